@@ -195,5 +195,9 @@ def_op('CALL_METHOD', 202)            # #args not including 'self'
 def_op('BUILD_LIST_FROM_ARG', 203)
 jrel_op('JUMP_IF_NOT_DEBUG', 204)     # jump over assert statements
 def_op('LOAD_REVDB_VAR', 205)         # reverse debugger (syntax example: $5)
+# superinstructions, see pypy/interpreter/astcompiler/assemble.py
+def_op('LOAD_FAST_LOAD_ATTR', 206)    # local index + (name index << 8)
+def_op('ADD_FAST_FAST', 207)          # local index + (local index << 8)
+def_op('COMPARE_POP_JUMP_IF_FALSE', 208)  # compare op + (target << 4)
 
 del def_op, name_op, jrel_op, jabs_op
@@ -0,0 +1,149 @@
+"""Build a code bundle: one file holding the compiled code of many modules.
+
+    pypy -m pypy_tools.build_code_bundle OUTPUT ROOT [ROOT...]
+
+Every ROOT is a directory as found in sys.path: all the modules and
+packages below it are compiled and stored in OUTPUT.  A ROOT can also be
+a single package directory or .py file.  Run it with the same PyPy that
+will use the bundle, then start that PyPy with PYPY_CODE_BUNDLE=OUTPUT:
+the modules of the bundle are imported from it, in priority over sys.path.
+
+'pypy --snapshot OUTPUT' also writes a bundle, with all the modules that
+were imported when the program ends; 'pypy --restore OUTPUT' imports
+them again at startup.  See snapshot() below.
+
+The format is described in pypy/module/imp/bundle.py.
+"""
+
+import sys, os, struct, marshal, imp
+
+BUNDLE_HEADER = "PYPYBNDL"
+FLAG_PACKAGE = 1
+
+
+def write_bundle(filename, magic, entries):
+    """Write the bundle 'filename'.  'entries' is a list of (dotted name,
+    is_package, marshalled code).  'magic' is the 4-byte magic number of
+    the .pyc files of the PyPy that will read it."""
+    index = []
+    for name, is_package, data in entries:
+        index.append(struct.pack('<i', len(name)))
+        index.append(name)
+        index.append('\0' * 12)    # filled below
+    offset = 16 + sum([len(s) for s in index])
+    parts = []
+    for i, (name, is_package, data) in enumerate(entries):
+        flags = FLAG_PACKAGE if is_package else 0
+        index[i * 3 + 2] = struct.pack('<iii', flags, offset, len(data))
+        parts.append(data)
+        offset += len(data)
+    tmpname = '%s.%d' % (filename, os.getpid())
+    with open(tmpname, 'wb') as f:
+        f.write(BUNDLE_HEADER)
+        f.write(magic)
+        f.write(struct.pack('<i', len(entries)))
+        f.write(''.join(index))
+        f.write(''.join(parts))
+    os.rename(tmpname, filename)
+
+def compile_file(path):
+    with open(path, 'rU') as f:
+        source = f.read()
+    if source and not source.endswith('\n'):
+        source += '\n'
+    code = compile(source, path, 'exec', 0, True)
+    return marshal.dumps(code)
+
+def find_modules(root, prefix=''):
+    """Yield (dotted name, is_package, path of the source) for all the
+    modules and packages found in the directory 'root'."""
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            init = os.path.join(path, '__init__.py')
+            if '.' not in name and os.path.isfile(init):
+                yield prefix + name, True, init
+                for item in find_modules(path, prefix + name + '.'):
+                    yield item
+        elif name.endswith('.py') and name != '__init__.py':
+            modname = name[:-3]
+            if '.' not in modname:
+                yield prefix + modname, False, path
+
+def collect(roots):
+    seen = set()
+    result = []
+    for root in roots:
+        root = os.path.abspath(root)
+        if os.path.isfile(root):
+            name = os.path.basename(root)[:-3]
+            items = [(name, False, root)]
+        elif os.path.isfile(os.path.join(root, '__init__.py')):
+            name = os.path.basename(root)
+            items = [(name, True, os.path.join(root, '__init__.py'))]
+            items.extend(find_modules(root, name + '.'))
+        else:
+            items = find_modules(root)
+        for name, is_package, path in items:
+            if name not in seen:      # like sys.path, the first one wins
+                seen.add(name)
+                result.append((name, is_package, path))
+    return result
+
+def build(output, roots):
+    entries = []
+    for name, is_package, path in collect(roots):
+        try:
+            data = compile_file(path)
+        except SyntaxError as e:
+            print >> sys.stderr, "skipping %s: %s" % (path, e)
+            continue
+        entries.append((name, is_package, data))
+    write_bundle(output, imp.get_magic(), entries)
+    return len(entries)
+
+def _get_snapshot_code(name, module):
+    filename = getattr(module, '__file__', None)
+    if isinstance(filename, str):
+        if filename.endswith('.pyc') or filename.endswith('.pyo'):
+            filename = filename[:-1]
+        if filename.endswith('.py') and os.path.isfile(filename):
+            return compile_file(filename)
+    # e.g. imported from a zip file, or from the bundle of a previous
+    # snapshot
+    loader = getattr(module, '__loader__', None)
+    if loader is not None and hasattr(loader, 'get_code'):
+        code = loader.get_code(name)
+        if code is not None:
+            return marshal.dumps(code)
+    return None
+
+def snapshot(output, modules):
+    """Write the bundle 'output' with the code of the given modules, a
+    list of (dotted name, module) like sys.modules.items().  The modules
+    that have no Python code, like builtin and extension modules, are
+    skipped.  The bundle lists the modules in the same order, which is
+    the order in which --restore imports them."""
+    entries = []
+    for name, module in modules:
+        if module is None or name == '__main__':
+            continue
+        try:
+            data = _get_snapshot_code(name, module)
+        except (SyntaxError, EnvironmentError, ImportError):
+            continue
+        if data is not None:
+            entries.append((name, hasattr(module, '__path__'), data))
+    write_bundle(output, imp.get_magic(), entries)
+    return len(entries)
+
+def main(argv):
+    if len(argv) < 3:
+        print >> sys.stderr, __doc__
+        return 2
+    count = build(argv[1], argv[2:])
+    print "%d modules written to %s" % (count, argv[1])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -36,7 +36,7 @@ working_modules.update([
     "cStringIO", "thread", "itertools", "pyexpat", "array",
     "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "_continuation", "_cffi_backend",
-    "_csv", "_pypyjson", "_jitlog", "cpyext"
+    "_csv", "_pypyjson", "_jitlog", "_bisect", "cpyext"
     # "_hashlib", "crypt", "_cppyy", "micronumpy"
 ])
 
@@ -154,6 +154,20 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
     BoolOption("lonepycfiles", "Import pyc files with no matching py file",
                default=False),
 
+    BoolOption("importdircache",
+               "Cache the listings of the directories searched by imports",
+               default=False),
+
+    BoolOption("lazycodeobjects",
+               "Unmarshal the functions of compiled modules only when they "
+               "are first used",
+               default=False),
+
+    BoolOption("superinstructions",
+               "Compile some common sequences of opcodes into single "
+               "opcodes, which are faster to interpret",
+               default=True),
+
     StrOption("soabi",
               "Tag to differentiate extension modules built for different Python interpreters",
               cmdline="--soabi",
@@ -200,6 +214,41 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "use specialised tuples",
                    default=False),
 
+        BoolOption("withspecialisedtuplelists",
+                   "store lists of same-shape specialised tuples as "
+                   "columns of unwrapped values (changes semantics: the "
+                   "identity of the tuples is lost)",
+                   default=False,
+                   requires=[("objspace.std.withspecialisedtuple", True)]),
+
+        BoolOption("withunboxeddictvalues",
+                   "store int and float values of dicts with int or bytes "
+                   "keys unboxed",
+                   default=False),
+
+        BoolOption("withallocsitefeedback",
+                   "presize the dicts and sets built by BUILD_MAP and "
+                   "BUILD_SET to the size they had at the same site before",
+                   default=False),
+
+        BoolOption("withsizedinstances",
+                   "allocate instances of user classes with as many inline "
+                   "attribute slots as their type's instances usually need",
+                   default=False),
+
+        BoolOption("withstrbuf", "use strings optimized for addition (ver 2)",
+                   default=False),
+
+        BoolOption("withstrslice",
+                   "make large slices of strings share the characters of "
+                   "the sliced string",
+                   default=False),
+
+        BoolOption("withunicodestrategies",
+                   "store lists and sets of non-ascii unicode objects "
+                   "unwrapped, as utf-8 strings",
+                   default=False),
+
         BoolOption("withliststrategies",
                    "enable optimized ways to store lists of primitives ",
                    default=True),
@@ -258,6 +307,7 @@ def set_pypy_opt_level(config, level):
     if level == 'mem':
         config.objspace.std.suggest(withprebuiltint=True)
         config.objspace.std.suggest(withliststrategies=True)
+        config.objspace.std.suggest(withunboxeddictvalues=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
 
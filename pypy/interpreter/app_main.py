@@ -31,6 +31,10 @@ arg ...: arguments passed to program in sys.argv[1:]
 
 PyPy options and arguments:
 --info : print translation information about this PyPy executable
+--snapshot file : when the program ends, save the code of all the modules
+                  imported so far in 'file'
+--restore file  : import at startup the modules saved by --snapshot in
+                  'file', reading their code from it
 -X track-resources : track the creation of files and sockets and display
                      a warning if they are not closed explicitly
 -X faulthandler    : attempt to display tracebacks when PyPy crashes
@@ -48,6 +52,10 @@ PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
 PYPY_DISABLE_JIT: if set to a non-empty value, disable JIT.
+PYPY_CODE_BUNDLE: a code bundle file whose modules are imported in
+               priority (see pypy_tools/build_code_bundle.py).
+PYPY_JIT_WARMUP_PROFILE: a file where the JIT records which loops were
+               compiled, to trace them early in the next runs.
 PYTHON_DISABLE_REMOTE_DEBUG: if set to a non-empty value, disable the remote debugging interface
 """
 
@@ -270,6 +278,26 @@ def set_jit_option(options, jitparam, *args):
         import pypyjit
         pypyjit.set_param(jitparam)
 
+def setup_jit_warmup_profile(filename):
+    if 'pypyjit' not in sys.builtin_module_names:
+        return
+    import pypyjit
+    try:
+        pypyjit.load_warmup_profile(filename)
+    except EnvironmentError as e:
+        print >> sys.stderr, "Could not load JIT warm-up profile %s: %s" % (
+            filename, e)
+        return
+    import atexit
+    atexit.register(save_jit_warmup_profile, filename)
+
+def save_jit_warmup_profile(filename):
+    import pypyjit
+    try:
+        pypyjit.save_warmup_profile(filename)
+    except EnvironmentError:
+        pass    # e.g. a read-only directory: just don't save it
+
 def run_faulthandler():
     if 'faulthandler' in sys.builtin_module_names:
         import faulthandler
@@ -350,6 +378,15 @@ def setup_and_fix_paths(ignore_environment=False, **extra):
         if dir not in _seen:
             sys.path.append(dir)
             _seen.add(dir)
+    # then a code bundle, which is searched before sys.path
+    bundle = readenv and getenv('PYPY_CODE_BUNDLE')
+    if bundle:
+        try:
+            import imp
+            sys.meta_path.insert(0, imp.codebundle(bundle))
+        except (ImportError, AttributeError, EnvironmentError) as e:
+            print >> sys.stderr, "Could not load code bundle %s: %s" % (
+                bundle, e)
 
 def set_stdio_encodings(ignore_environment):
     if IS_WINDOWS:
@@ -426,7 +463,9 @@ default_options = dict.fromkeys(
     "run_module",
     "run_stdin",
     "warnoptions",
-    "unbuffered"), 0)
+    "unbuffered",
+    "snapshot",
+    "restore"), 0)
 
 def simple_option(options, name, iterargv):
     options[name] += 1
@@ -455,6 +494,12 @@ def W_option(options, warnoption, iterargv):
 def end_options(options, _, iterargv):
     return list(iterargv)
 
+def snapshot_option(options, filename, iterargv):
+    options["snapshot"] = filename
+
+def restore_option(options, filename, iterargv):
+    options["restore"] = filename
+
 cmdline_options = {
     # simple options just increment the counter of the options listed above
     'b': (simple_option, 'bytes_warning'),
@@ -483,6 +528,8 @@ cmdline_options = {
     'Q':         (div_option,      Ellipsis),
     '--info':    (print_info,      None),
     '--jit':     (set_jit_option,  Ellipsis),
+    '--snapshot': (snapshot_option, Ellipsis),
+    '--restore': (restore_option,  Ellipsis),
     '-funroll-loops': (funroll_loops, None),
     '-X':        (set_runtime_options, Ellipsis),
     '--':        (end_options,     None),
@@ -625,6 +672,8 @@ def run_command_line(interactive,
                      unbuffered,
                      ignore_environment,
                      verbose,
+                     snapshot,
+                     restore,
                      **ignored):
     # with PyPy in top of CPython we can only have around 100
     # but we need more in the PyPy level for the compiler package
@@ -632,6 +681,12 @@ def run_command_line(interactive,
         sys.setrecursionlimit(5000)
     getenv = get_getenv()
 
+    # before 'import site', so that its code objects are found too
+    warmup_profile = not ignore_environment and getenv(
+        'PYPY_JIT_WARMUP_PROFILE')
+    if warmup_profile:
+        setup_jit_warmup_profile(warmup_profile)
+
     if unbuffered:
         set_unbuffered_io()
     elif not sys.stdout.isatty():
@@ -644,6 +699,10 @@ def run_command_line(interactive,
     mainmodule = type(sys)('__main__')
     sys.modules['__main__'] = mainmodule
 
+    if restore:
+        # normally includes 'site' and what it imports
+        restore_snapshot(restore)
+
     if not no_site:
         try:
             import site
@@ -709,149 +768,176 @@ def run_command_line(interactive,
     success = True
 
     try:
-        if run_command != 0:
-            # handle the "-c" command
-            # Put '' on sys.path
-            sys.path.insert(0, '')
-
-            @hidden_applevel
-            def run_it():
-                co_cmd = compile(run_command, '<module>', 'exec')
-                exec co_cmd in mainmodule.__dict__
-                future_flags[0] = co_cmd.co_flags
-            success = run_toplevel(run_it)
-        elif run_module:
-            # handle the "-m" command
-            # '' on sys.path is required also here
-            sys.path.insert(0, '')
-            import runpy
-            success = run_toplevel(runpy._run_module_as_main, sys.argv[0])
-        elif run_stdin:
-            # handle the case where no command/filename/module is specified
-            # on the command-line.
-
-            # update sys.path *after* loading site.py, in case there is a
-            # "site.py" file in the script's directory. Only run this if we're
-            # executing the interactive prompt, if we're running a script we
-            # put it's directory on sys.path
-            sys.path.insert(0, '')
-
-            if interactive or sys.stdin.isatty():
-                # If stdin is a tty or if "-i" is specified, we print
-                # a banner and run $PYTHONSTARTUP.
-                print_banner(not no_site)
-                python_startup = readenv and getenv('PYTHONSTARTUP')
-                if python_startup:
-                    try:
-                        with open(python_startup) as f:
-                            startup = f.read()
-                    except IOError as e:
-                        print >> sys.stderr, "Could not open PYTHONSTARTUP"
-                        print >> sys.stderr, "IOError:", e
-                    else:
-                        @hidden_applevel
-                        def run_it():
-                            co_python_startup = compile(startup,
-                                                        python_startup,
-                                                        'exec',
-                                                        PyCF_ACCEPT_NULL_BYTES)
-                            exec co_python_startup in mainmodule.__dict__
-                            future_flags[0] = co_python_startup.co_flags
-                        mainmodule.__file__ = python_startup
-                        run_toplevel(run_it)
-                        try:
-                            del mainmodule.__file__
-                        except (AttributeError, TypeError):
-                            pass
-                # Then we need a prompt.
-                inspect = True
-            else:
-                # If not interactive, just read and execute stdin normally.
-                if verbose:
-                    print_banner(not no_site)
+        try:
+            if run_command != 0:
+                # handle the "-c" command
+                # Put '' on sys.path
+                sys.path.insert(0, '')
+
                 @hidden_applevel
                 def run_it():
-                    co_stdin = compile(sys.stdin.read(), '<stdin>', 'exec',
-                                       PyCF_ACCEPT_NULL_BYTES)
-                    exec co_stdin in mainmodule.__dict__
-                    future_flags[0] = co_stdin.co_flags
-                mainmodule.__file__ = '<stdin>'
+                    co_cmd = compile(run_command, '<module>', 'exec')
+                    exec co_cmd in mainmodule.__dict__
+                    future_flags[0] = co_cmd.co_flags
                 success = run_toplevel(run_it)
-        else:
-            # handle the common case where a filename is specified
-            # on the command-line.
-            filename = sys.argv[0]
-            mainmodule.__file__ = filename
-            sys.path.insert(0, sys.pypy_resolvedirof(filename))
-            # assume it's a pyc file only if its name says so.
-            # CPython goes to great lengths to detect other cases
-            # of pyc file format, but I think it's ok not to care.
-            import imp
-            if IS_WINDOWS:
-                filename = filename.lower()
-            if filename.endswith('.pyc') or filename.endswith('.pyo'):
-                args = (imp._run_compiled_module, '__main__',
-                        sys.argv[0], None, mainmodule)
-            else:
-                # maybe it's the name of a directory or a zip file
-                filename = sys.argv[0]
-                importer = imp._getimporter(filename)
-                if not isinstance(importer, imp.NullImporter):
-                    # yes.  put the filename in sys.path[0] and import
-                    # the module __main__
-                    import runpy
-                    sys.path.insert(0, filename)
-                    args = (runpy._run_module_as_main, '__main__', False)
+            elif run_module:
+                # handle the "-m" command
+                # '' on sys.path is required also here
+                sys.path.insert(0, '')
+                import runpy
+                success = run_toplevel(runpy._run_module_as_main, sys.argv[0])
+            elif run_stdin:
+                # handle the case where no command/filename/module is specified
+                # on the command-line.
+
+                # update sys.path *after* loading site.py, in case there is a
+                # "site.py" file in the script's directory. Only run this if we're
+                # executing the interactive prompt, if we're running a script we
+                # put it's directory on sys.path
+                sys.path.insert(0, '')
+
+                if interactive or sys.stdin.isatty():
+                    # If stdin is a tty or if "-i" is specified, we print
+                    # a banner and run $PYTHONSTARTUP.
+                    print_banner(not no_site)
+                    python_startup = readenv and getenv('PYTHONSTARTUP')
+                    if python_startup:
+                        try:
+                            with open(python_startup) as f:
+                                startup = f.read()
+                        except IOError as e:
+                            print >> sys.stderr, "Could not open PYTHONSTARTUP"
+                            print >> sys.stderr, "IOError:", e
+                        else:
+                            @hidden_applevel
+                            def run_it():
+                                co_python_startup = compile(startup,
+                                                            python_startup,
+                                                            'exec',
+                                                            PyCF_ACCEPT_NULL_BYTES)
+                                exec co_python_startup in mainmodule.__dict__
+                                future_flags[0] = co_python_startup.co_flags
+                            mainmodule.__file__ = python_startup
+                            run_toplevel(run_it)
+                            try:
+                                del mainmodule.__file__
+                            except (AttributeError, TypeError):
+                                pass
+                    # Then we need a prompt.
+                    inspect = True
                 else:
-                    # no.  That's the normal path, "pypy stuff.py".
-                    # This includes the logic from execfile(), tweaked
-                    # to grab the future_flags at the end.
+                    # If not interactive, just read and execute stdin normally.
+                    if verbose:
+                        print_banner(not no_site)
                     @hidden_applevel
                     def run_it():
-                        f = file(filename, 'rU')
-                        try:
-                            source = f.read()
-                        finally:
-                            f.close()
-                        co_main = compile(source.rstrip()+"\n", filename,
-                                          'exec', PyCF_ACCEPT_NULL_BYTES)
-                        exec co_main in mainmodule.__dict__
-                        future_flags[0] = co_main.co_flags
-                    args = (run_it,)
-            success = run_toplevel(*args)
-
-    except SystemExit as e:
-        status = e.code
-        if inspect_requested():
-            display_exception(e)
-    else:
-        status = not success
+                        co_stdin = compile(sys.stdin.read(), '<stdin>', 'exec',
+                                           PyCF_ACCEPT_NULL_BYTES)
+                        exec co_stdin in mainmodule.__dict__
+                        future_flags[0] = co_stdin.co_flags
+                    mainmodule.__file__ = '<stdin>'
+                    success = run_toplevel(run_it)
+            else:
+                # handle the common case where a filename is specified
+                # on the command-line.
+                filename = sys.argv[0]
+                mainmodule.__file__ = filename
+                sys.path.insert(0, sys.pypy_resolvedirof(filename))
+                # assume it's a pyc file only if its name says so.
+                # CPython goes to great lengths to detect other cases
+                # of pyc file format, but I think it's ok not to care.
+                import imp
+                if IS_WINDOWS:
+                    filename = filename.lower()
+                if filename.endswith('.pyc') or filename.endswith('.pyo'):
+                    args = (imp._run_compiled_module, '__main__',
+                            sys.argv[0], None, mainmodule)
+                else:
+                    # maybe it's the name of a directory or a zip file
+                    filename = sys.argv[0]
+                    importer = imp._getimporter(filename)
+                    if not isinstance(importer, imp.NullImporter):
+                        # yes.  put the filename in sys.path[0] and import
+                        # the module __main__
+                        import runpy
+                        sys.path.insert(0, filename)
+                        args = (runpy._run_module_as_main, '__main__', False)
+                    else:
+                        # no.  That's the normal path, "pypy stuff.py".
+                        # This includes the logic from execfile(), tweaked
+                        # to grab the future_flags at the end.
+                        @hidden_applevel
+                        def run_it():
+                            f = file(filename, 'rU')
+                            try:
+                                source = f.read()
+                            finally:
+                                f.close()
+                            co_main = compile(source.rstrip()+"\n", filename,
+                                              'exec', PyCF_ACCEPT_NULL_BYTES)
+                            exec co_main in mainmodule.__dict__
+                            future_flags[0] = co_main.co_flags
+                        args = (run_it,)
+                success = run_toplevel(*args)
 
-    # start a prompt if requested
-    if inspect_requested():
-        try:
-            import __future__
-            from _pypy_interact import interactive_console
-            pypy_version_info = getattr(sys, 'pypy_version_info', sys.version_info)
-            irc_topic = pypy_version_info[3] != 'final' or (
-                            readenv and getenv('PYPY_IRC_TOPIC'))
-            flags = 0
-            for fname in __future__.all_feature_names:
-                feature = getattr(__future__, fname)
-                if future_flags[0] & feature.compiler_flag:
-                    flags |= feature.compiler_flag
-            kwds = {}
-            if flags:
-                kwds['future_flags'] = flags
-            success = run_toplevel(interactive_console, mainmodule,
-                                   quiet=not irc_topic, **kwds)
         except SystemExit as e:
             status = e.code
+            if inspect_requested():
+                display_exception(e)
         else:
             status = not success
 
+        # start a prompt if requested
+        if inspect_requested():
+            try:
+                import __future__
+                from _pypy_interact import interactive_console
+                pypy_version_info = getattr(sys, 'pypy_version_info', sys.version_info)
+                irc_topic = pypy_version_info[3] != 'final' or (
+                                readenv and getenv('PYPY_IRC_TOPIC'))
+                flags = 0
+                for fname in __future__.all_feature_names:
+                    feature = getattr(__future__, fname)
+                    if future_flags[0] & feature.compiler_flag:
+                        flags |= feature.compiler_flag
+                kwds = {}
+                if flags:
+                    kwds['future_flags'] = flags
+                success = run_toplevel(interactive_console, mainmodule,
+                                       quiet=not irc_topic, **kwds)
+            except SystemExit as e:
+                status = e.code
+            else:
+                status = not success
+    finally:
+        # also when the program or the interactive prompt calls sys.exit()
+        if snapshot:
+            run_toplevel(write_snapshot, snapshot)
+
     return status
 
+def restore_snapshot(filename):
+    try:
+        import imp
+        bundle = imp.codebundle(filename)
+    except (ImportError, AttributeError, EnvironmentError) as e:
+        print >> sys.stderr, "Could not restore snapshot %s: %s" % (
+            filename, e)
+        return
+    sys.meta_path.insert(0, bundle)
+    # in the order in which they were first imported
+    for name in bundle.modules():
+        if name not in sys.modules:
+            try:
+                __import__(name)
+            except Exception as e:
+                print >> sys.stderr, "Could not restore module %s: %s" % (
+                    name, e)
+
+def write_snapshot(filename):
+    from pypy_tools.build_code_bundle import snapshot
+    snapshot(filename, sys.modules.items())
+
 def print_banner(copyright):
     print >> sys.stderr, 'Python %s on %s' % (sys.version, sys.platform)
     if copyright:
@@ -18,6 +18,32 @@ is_absolute_jump = misc.dict_to_switch(
     default=False)
 
 
+is_conditional_jump = misc.dict_to_switch({
+    ops.POP_JUMP_IF_FALSE: True,
+    ops.POP_JUMP_IF_TRUE: True,
+    ops.JUMP_IF_FALSE_OR_POP: True,
+    ops.JUMP_IF_TRUE_OR_POP: True,
+    ops.COMPARE_POP_JUMP_IF_FALSE: True,
+}, default=False)
+
+
+def _forward_jump_target(target, offset):
+    """Follow the unconditional jumps starting the block 'target', as long
+    as they go forward from 'offset'.  Jumps are never turned into
+    backward jumps, because the back-edges of loops must stay on the
+    JUMP_ABSOLUTE where the JIT looks for them.
+    """
+    while target.instructions:
+        instr = target.instructions[0]
+        if (instr.opcode != ops.JUMP_ABSOLUTE and
+                instr.opcode != ops.JUMP_FORWARD):
+            break
+        if instr.jump.offset <= offset:
+            break
+        target = instr.jump
+    return target
+
+
 class StackDepthComputationError(Exception):
     pass
 
@@ -290,6 +316,46 @@ class PythonCodeMaker(ast.ASTVisitor):
             self.lineno = lineno
             self.lineno_set = False
 
+    def _fuse_superinstructions(self, blocks):
+        """Turn common sequences of instructions into superinstructions.
+
+        Only instructions of the same line are fused, so that tracing
+        sees the same lines.  Jumps only go to the start of a block, so
+        nothing can jump into the middle of a fused sequence.
+        """
+        for block in blocks:
+            instrs = block.instructions
+            fused = []
+            i = 0
+            while i < len(instrs):
+                instr = instrs[i]
+                i += 1
+                fused.append(instr)
+                if i == len(instrs) or instrs[i].lineno:
+                    continue
+                op = instr.opcode
+                nextinstr = instrs[i]
+                nextop = nextinstr.opcode
+                if op == ops.LOAD_FAST and instr.arg < 256:
+                    if nextop == ops.LOAD_ATTR and nextinstr.arg < 256:
+                        instr.opcode = ops.LOAD_FAST_LOAD_ATTR
+                        instr.arg |= nextinstr.arg << 8
+                        i += 1
+                    elif (nextop == ops.LOAD_FAST and nextinstr.arg < 256 and
+                          i + 1 < len(instrs) and
+                          instrs[i + 1].opcode == ops.BINARY_ADD and
+                          not instrs[i + 1].lineno):
+                        instr.opcode = ops.ADD_FAST_FAST
+                        instr.arg |= nextinstr.arg << 8
+                        i += 2
+                elif op == ops.COMPARE_OP and nextop == ops.POP_JUMP_IF_FALSE:
+                    # the compare operation stays in the low 4 bits of
+                    # the argument, see _resolve_block_targets()
+                    instr.opcode = ops.COMPARE_POP_JUMP_IF_FALSE
+                    instr.jump = nextinstr.jump
+                    i += 1
+            block.instructions = fused
+
     def _resolve_block_targets(self, blocks):
         """Compute the arguments of jump instructions."""
         last_extended_arg_count = 0
@@ -332,7 +398,14 @@ class PythonCodeMaker(ast.ASTVisitor):
                                     # we have to trigger another pass
                                     force_redo = True
                                     continue
-                        if is_absolute_jump(instr.opcode):
+                                elif target_op == ops.JUMP_FORWARD:
+                                    target = _forward_jump_target(
+                                        target, offset)
+                        elif is_conditional_jump(op):
+                            target = _forward_jump_target(target, offset)
+                        if instr.opcode == ops.COMPARE_POP_JUMP_IF_FALSE:
+                            jump_arg = (target.offset << 4) | (instr.arg & 0xF)
+                        elif is_absolute_jump(instr.opcode):
                             jump_arg = target.offset
                         else:
                             jump_arg = target.offset - offset
@@ -473,6 +546,8 @@ class PythonCodeMaker(ast.ASTVisitor):
             else:
                 self.first_lineno = 1
         blocks = self.first_block.post_order()
+        if self.space.config.objspace.superinstructions:
+            self._fuse_superinstructions(blocks)
         size = self._resolve_block_targets(blocks)
         lnotab = self._build_lnotab(blocks)
         stack_depth = self._stacksize(blocks)
@@ -641,6 +716,10 @@ _static_opcode_stack_effects = {
 
     ops.BUILD_LIST_FROM_ARG: 1,
     ops.LOAD_REVDB_VAR: 1,
+
+    ops.LOAD_FAST_LOAD_ATTR: 1,
+    ops.ADD_FAST_FAST: 1,
+    ops.COMPARE_POP_JUMP_IF_FALSE: -2,
 }
 
 
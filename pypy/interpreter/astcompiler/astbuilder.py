@@ -758,12 +758,15 @@ class ASTBuilder(object):
                 if expr_node.num_children() == 1:
                     expr_node = expr_node.get_child(0)
                     continue
-                operators = []
-                operands = []
+                count = expr_node.num_children() // 2
+                operators = [0] * count
+                operands = [None] * count
                 expr = self.handle_expr(expr_node.get_child(0))
-                for i in range(1, expr_node.num_children(), 2):
-                    operators.append(self.handle_comp_op(expr_node.get_child(i)))
-                    operands.append(self.handle_expr(expr_node.get_child(i + 1)))
+                for i in range(count):
+                    operators[i] = self.handle_comp_op(
+                        expr_node.get_child(i * 2 + 1))
+                    operands[i] = self.handle_expr(
+                        expr_node.get_child(i * 2 + 2))
                 return ast.Compare(expr, operators, operands, expr_node.get_lineno(),
                                    expr_node.get_column())
             elif expr_node_type == syms.expr or \
@@ -989,9 +992,20 @@ class ASTBuilder(object):
                        "if not sole argument", args_node)
         if arg_count + keyword_count + generator_count > 255:
             self.error("more than 255 arguments", args_node)
-        args = []
-        keywords = []
-        used_keywords = {}
+        # the lists are allocated with their final size, and the dict of
+        # the keywords only for calls that have keywords
+        if arg_count + generator_count:
+            args = [None] * (arg_count + generator_count)
+        else:
+            args = None
+        if keyword_count:
+            keywords = [None] * keyword_count
+            used_keywords = {}
+        else:
+            keywords = None
+            used_keywords = None
+        arg_index = 0
+        keyword_index = 0
         variable_arg = None
         keywords_arg = None
         child_count = args_node.num_children()
@@ -1001,15 +1015,17 @@ class ASTBuilder(object):
             if argument.type == syms.argument:
                 if argument.num_children() == 1:
                     expr_node = argument.get_child(0)
-                    if keywords:
+                    if keyword_index:
                         self.error("non-keyword arg after keyword arg",
                                    expr_node)
                     if variable_arg:
                         self.error("only named arguments may follow "
                                    "*expression", expr_node)
-                    args.append(self.handle_expr(expr_node))
+                    args[arg_index] = self.handle_expr(expr_node)
+                    arg_index += 1
                 elif argument.get_child(1).type == syms.comp_for:
-                    args.append(self.handle_genexp(argument))
+                    args[arg_index] = self.handle_genexp(argument)
+                    arg_index += 1
                 else:
                     keyword_node = argument.get_child(0)
                     keyword_expr = self.handle_expr(keyword_node)
@@ -1020,12 +1036,15 @@ class ASTBuilder(object):
                         self.error("keyword can't be an expression",
                                    keyword_node)
                     keyword = keyword_expr.id
+                    assert used_keywords is not None
                     if keyword in used_keywords:
                         self.error("keyword argument repeated", keyword_node)
                     used_keywords[keyword] = None
                     self.check_forbidden_name(keyword, keyword_node)
                     keyword_value = self.handle_expr(argument.get_child(2))
-                    keywords.append(ast.keyword(keyword, keyword_value))
+                    keywords[keyword_index] = ast.keyword(keyword,
+                                                          keyword_value)
+                    keyword_index += 1
             elif argument.type == tokens.STAR:
                 variable_arg = self.handle_expr(args_node.get_child(i + 1))
                 i += 1
@@ -1033,10 +1052,6 @@ class ASTBuilder(object):
                 keywords_arg = self.handle_expr(args_node.get_child(i + 1))
                 i += 1
             i += 1
-        if not args:
-            args = None
-        if not keywords:
-            keywords = None
         return ast.Call(callable_expr, args, keywords, variable_arg,
                         keywords_arg, callable_expr.lineno,
                         callable_expr.col_offset)
@@ -1099,12 +1114,13 @@ class ASTBuilder(object):
             encoding = self.compile_info.encoding
             flags = self.compile_info.flags
             unicode_literals = flags & consts.CO_FUTURE_UNICODE_LITERALS
-            sub_strings_w = []
-            for index in range(atom_node.num_children()):
+            count = atom_node.num_children()
+            sub_strings_w = [None] * count
+            for index in range(count):
                 child = atom_node.get_child(index)
                 try:
-                    sub_strings_w.append(parsestring.parsestr(space, encoding, child.get_value(),
-                                                              unicode_literals))
+                    sub_strings_w[index] = parsestring.parsestr(
+                        space, encoding, child.get_value(), unicode_literals)
                 except error.OperationError as e:
                     if not e.match(space, space.w_UnicodeError):
                         raise
@@ -1115,10 +1131,10 @@ class ASTBuilder(object):
                         child = atom_node
                     raise self.error('(unicode error) %s' % errmsg, child)
             # This implements implicit string concatenation.
-            if len(sub_strings_w) > 1:
+            if count > 1:
                 w_sub_strings = space.newlist(sub_strings_w)
-                w_join = space.getattr(space.newtext(""), space.newtext("join"))
-                final_string = space.call_function(w_join, w_sub_strings)
+                final_string = space.call_method(space.newtext(""), "join",
+                                                 w_sub_strings)
             else:
                 final_string = sub_strings_w[0]
             return ast.Str(final_string, atom_node.get_lineno(), atom_node.get_column())
@@ -1150,20 +1166,19 @@ class ASTBuilder(object):
                 return ast.Dict(None, None, atom_node.get_lineno(), atom_node.get_column())
             n_maker_children = maker.num_children()
             if n_maker_children == 1 or maker.get_child(1).type == tokens.COMMA:
-                elts = []
-                for i in range(0, n_maker_children, 2):
-                    elts.append(self.handle_expr(maker.get_child(i)))
+                elts = self.get_expression_list(maker)
                 return ast.Set(elts, atom_node.get_lineno(), atom_node.get_column())
             if maker.get_child(1).type == syms.comp_for:
                 return self.handle_setcomp(maker)
             if (n_maker_children > 3 and
                 maker.get_child(3).type == syms.comp_for):
                 return self.handle_dictcomp(maker)
-            keys = []
-            values = []
-            for i in range(0, n_maker_children, 4):
-                keys.append(self.handle_expr(maker.get_child(i)))
-                values.append(self.handle_expr(maker.get_child(i + 2)))
+            count = (n_maker_children + 1) // 4
+            keys = [None] * count
+            values = [None] * count
+            for i in range(count):
+                keys[i] = self.handle_expr(maker.get_child(i * 4))
+                values[i] = self.handle_expr(maker.get_child(i * 4 + 2))
             return ast.Dict(keys, values, atom_node.get_lineno(), atom_node.get_column())
         elif first_child_type == tokens.BACKQUOTE:
             expr = self.handle_testlist(atom_node.get_child(1))
@@ -159,6 +159,41 @@ opposite_compare_operations = misc.dict_to_switch({
 })
 
 
+class _ScopeEffectFinder(ast.GenericASTVisitor):
+    """Finds the parts of an expression that the symbol table cares about:
+    a yield makes a generator, list comprehensions bind names (2.7), and
+    lambdas or genexps can make cell variables.  Such expressions cannot
+    be dropped by the optimizer, which runs before the symbol table.
+    """
+
+    def __init__(self):
+        self.found = False
+
+    def visit_Yield(self, node):
+        self.found = True
+
+    def visit_ListComp(self, node):
+        self.found = True
+
+    def visit_SetComp(self, node):
+        self.found = True
+
+    def visit_DictComp(self, node):
+        self.found = True
+
+    def visit_GeneratorExp(self, node):
+        self.found = True
+
+    def visit_Lambda(self, node):
+        self.found = True
+
+
+def _can_drop(node):
+    finder = _ScopeEffectFinder()
+    node.walkabout(finder)
+    return not finder.found
+
+
 class OptimizingVisitor(ast.ASTVisitor):
     """Constant folds AST."""
 
@@ -255,6 +290,64 @@ class OptimizingVisitor(ast.ASTVisitor):
             return values[0]
         return bop
 
+    def visit_IfExp(self, ifexp):
+        truth = ifexp.test.as_constant_truth(self.space)
+        if truth == CONST_TRUE:
+            if _can_drop(ifexp.orelse):
+                return ifexp.body
+        elif truth == CONST_FALSE:
+            if _can_drop(ifexp.body):
+                return ifexp.orelse
+        return ifexp
+
+    def visit_Call(self, call):
+        """Fold 'sep'.join(<constant strings>)."""
+        func = call.func
+        if (isinstance(func, ast.Attribute) and func.attr == 'join' and
+                call.args is not None and len(call.args) == 1 and
+                not call.keywords and call.starargs is None and
+                call.kwargs is None):
+            w_sep = func.value.as_constant()
+            if w_sep is None:
+                return call
+            arg = call.args[0]
+            if isinstance(arg, ast.List):
+                w_items = self._tuple_of_consts(arg.elts)
+            else:
+                w_items = arg.as_constant()
+            if w_items is None:
+                return call
+            space = self.space
+            if space.isinstance_w(w_sep, space.w_unicode):
+                w_type = space.w_unicode
+            elif space.isinstance_w(w_sep, space.w_bytes):
+                w_type = space.w_bytes
+            else:
+                return call
+            if not space.isinstance_w(w_items, space.w_tuple):
+                return call
+            # only join strings of the same type as 'sep', leaving the
+            # implicit decoding of the mixed cases to the runtime
+            for w_item in space.fixedview(w_items):
+                if not space.is_w(space.type(w_item), w_type):
+                    return call
+            try:
+                w_const = space.call_method(w_sep, 'join', w_items)
+            except OperationError:
+                return call
+            return ast.Const(w_const, call.lineno, call.col_offset)
+        return call
+
+    def _tuple_of_consts(self, elts):
+        count = len(elts) if elts is not None else 0
+        consts_w = [None] * count
+        for i in range(count):
+            w_const = elts[i].as_constant()
+            if w_const is None:
+                return None
+            consts_w[i] = w_const
+        return self.space.newtuple(consts_w)
+
     def visit_Repr(self, rep):
         w_const = rep.value.as_constant()
         if w_const is not None:
@@ -968,6 +968,132 @@ class TestCompiler(BaseTestCompiler):
         yield (self.st, "x=(lambda: (-0.0, 0.0), lambda: (0.0, -0.0))[1]()",
                         'repr(x)', '(0.0, -0.0)')
 
+class TestSuperinstructions(BaseTestCompiler):
+
+    def opcodes(self, source):
+        source = str(py.code.Source(source))
+        code = compile_with_astcompiler(source, 'exec', self.space)
+        code = code.co_consts_w[0]
+        result = []
+        co_code = code.co_code
+        i = 0
+        while i < len(co_code):
+            op = ord(co_code[i])
+            if op >= ops.HAVE_ARGUMENT:
+                arg = ord(co_code[i + 1]) | (ord(co_code[i + 2]) << 8)
+                result.append((op, arg))
+                i += 3
+            else:
+                result.append((op, None))
+                i += 1
+        return result
+
+    def test_load_fast_load_attr(self):
+        opcodes = self.opcodes("""
+        def f(x):
+            return x.real
+        """)
+        assert opcodes[0] == (ops.LOAD_FAST_LOAD_ATTR, 0)
+        assert ops.LOAD_ATTR not in [op for op, arg in opcodes]
+
+    def test_run_load_fast_load_attr(self):
+        yield self.st, """
+        class A(object):
+            pass
+        def f(a):
+            return a.x
+        a = A(); a.x = 42
+        x = f(a), f(a)
+        """, "x", (42, 42)
+        yield self.st, """
+        def f():
+            y.real
+            y = 5
+        try:
+            f()
+        except UnboundLocalError:
+            x = 'ok'
+        """, "x", 'ok'
+
+    def test_add_fast_fast(self):
+        opcodes = self.opcodes("""
+        def f(x, y):
+            return x + y
+        """)
+        assert opcodes[0] == (ops.ADD_FAST_FAST, 0 | (1 << 8))
+        assert ops.BINARY_ADD not in [op for op, arg in opcodes]
+
+    def test_run_add_fast_fast(self):
+        yield self.st, """
+        import sys
+        def f(x, y):
+            return x + y
+        x = f(1, 2), f('a', 'b'), f(sys.maxint, 1), f(1.5, 2)
+        """, "x", (3, 'ab', sys.maxint + 1, 3.5)
+        yield self.st, """
+        def f(x):
+            x + y
+            y = 5
+        try:
+            f(1)
+        except UnboundLocalError:
+            x = 'ok'
+        """, "x", 'ok'
+
+    def test_compare_pop_jump_if_false(self):
+        opcodes = self.opcodes("""
+        def f(x, y):
+            if x < y:
+                return 1
+            return 2
+        """)
+        ops_only = [op for op, arg in opcodes]
+        assert ops_only.count(ops.COMPARE_POP_JUMP_IF_FALSE) == 1
+        assert ops.COMPARE_OP not in ops_only
+        for op, arg in opcodes:
+            if op == ops.COMPARE_POP_JUMP_IF_FALSE:
+                assert arg & 0xF == 0     # '<'
+
+    def test_run_compare_pop_jump_if_false(self):
+        yield self.st, """
+        def f(x, y):
+            if x < y: return '<'
+            if x == y: return '=='
+            return '>'
+        def g(x, y):
+            if x not in y: return 'not in'
+            return 'in'
+        x = (f(1, 2), f(2, 2), f(3, 2), f(1.5, 2), f(2, 1.5), f('b', 'a'),
+             g(1, [1]), g(1, []))
+        """, "x", ('<', '==', '>', '<', '>', '>', 'in', 'not in')
+
+    def test_compare_long_jump(self):
+        # the target of the jump does not fit in the 12 bits left to it
+        lines = ["def f(x):", "    if x > 0:"]
+        lines += ["        y = x + %d" % i for i in range(2000)]
+        lines += ["    return x", "x = f(1), f(-1)"]
+        self.simple_test("\n".join(lines), "x", (1, -1))
+
+
+class TestSuperinstructionsIntShortcut(TestSuperinstructions):
+    spaceconfig = {"objspace.std.intshortcut": True}
+
+
+class TestNoSuperinstructions(BaseTestCompiler):
+    spaceconfig = {"objspace.superinstructions": False}
+
+    def test_no_superinstructions(self):
+        source = """def f(x, y):
+            if x.a < y:
+                return x + y
+        """
+        code = compile_with_astcompiler(source, 'exec', self.space)
+        co_code = code.co_consts_w[0].co_code
+        for op in (ops.LOAD_FAST_LOAD_ATTR, ops.ADD_FAST_FAST,
+                   ops.COMPARE_POP_JUMP_IF_FALSE):
+            assert chr(op) not in co_code
+
+
 class TestCompilerRevDB(BaseTestCompiler):
     spaceconfig = {"translation.reverse_debugger": True}
 
@@ -1055,6 +1181,26 @@ class TestOptimizations:
             counts[instr.opcode] = counts.get(instr.opcode, 0) + 1
         return counts
 
+    def conditional_jumps(self, source):
+        """Return the (offset, target offset, target opcode) of the
+        conditional jumps, with a target opcode of None for the end."""
+        code, blocks = generate_function_code(source, self.space)
+        opcodes = {}
+        for block in blocks:
+            if block.instructions:
+                opcodes.setdefault(block.offset,
+                                   block.instructions[0].opcode)
+        jumps = []
+        for block in blocks:
+            offset = block.offset
+            for instr in block.instructions:
+                if instr.opcode in (ops.POP_JUMP_IF_FALSE,
+                                    ops.POP_JUMP_IF_TRUE):
+                    jumps.append((offset, instr.arg,
+                                  opcodes.get(instr.arg)))
+                offset += instr.size()
+        return jumps
+
     def test_elim_jump_to_return(self):
         source = """def f():
         return true_value if cond else false_value
@@ -1239,6 +1385,109 @@ class TestOptimizations:
         counts = self.count_instructions(source)
         assert ops.BUILD_TUPLE not in counts
 
+    def test_fold_constant_ifexp(self):
+        source = """def f(x, y):
+            return x if 1 else y
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_FAST: 1, ops.RETURN_VALUE: 1}
+        source = """def f(x, y):
+            return x if '' else y
+        """
+        counts = self.count_instructions(source)
+        assert counts == {ops.LOAD_FAST: 1, ops.RETURN_VALUE: 1}
+
+    def test_dont_fold_ifexp_with_scope_effects(self):
+        for source in (
+            "x if 1 else (yield)",
+            "(yield) if 0 else x",
+            "x if 1 else [y for y in x]",
+            "x if 1 else (lambda: x)",
+            ):
+            source = 'def f(x): y = %s' % source
+            counts = self.count_instructions(source)
+            assert ops.POP_JUMP_IF_FALSE in counts
+        # 'y' stays a local variable, as without optimization
+        space = self.space
+        w_res = space.appexec([], """():
+            y = 'global'
+            def f():
+                x = 5 if 1 else [y for y in 'abc']
+                try:
+                    return y
+                except NameError as e:
+                    return type(e).__name__
+            return f()
+        """)
+        assert space.str_w(w_res) == 'UnboundLocalError'
+
+    def test_fold_string_joins(self):
+        for source in (
+            "', '.join(('a', 'b', 'c'))",
+            "''.join(['a', 'b'])",
+            "u'-'.join([u'a', u'b'])",
+            "'%s-%s' % ('a', 5)",
+            ):
+            source = 'def f(): return %s' % source
+            counts = self.count_instructions(source)
+            assert counts == {ops.LOAD_CONST: 1, ops.RETURN_VALUE: 1}
+        for source in (
+            "', '.join((x, 'b'))",
+            "u'-'.join(['a', u'b'])",
+            "''.join([1, 2])",
+            "''.join(('a',), x)",
+            "''.join(*x)",
+            ):
+            source = 'def f(x): return %s' % source
+            counts = self.count_instructions(source)
+            assert ops.CALL_FUNCTION in counts or ops.CALL_METHOD in counts \
+                or ops.CALL_FUNCTION_VAR in counts
+
+    def test_thread_conditional_jumps(self):
+        source = """def f(x, y):
+            if x:
+                if y:
+                    g()
+            else:
+                h()
+        """
+        # the jump of 'if y' skips the JUMP_FORWARD at the end of 'if x'
+        jumps = self.conditional_jumps(source)
+        assert len(jumps) == 2
+        for offset, target, target_op in jumps:
+            assert target_op not in (ops.JUMP_FORWARD, ops.JUMP_ABSOLUTE)
+        space = self.space
+        w_res = space.appexec([], """():
+            l = []
+            def g(): l.append('g')
+            def h(): l.append('h')
+            def f(x, y):
+                if x:
+                    if y:
+                        g()
+                else:
+                    h()
+            f(0, 0); f(0, 1); f(1, 0); f(1, 1)
+            return ''.join(l)
+        """)
+        assert space.str_w(w_res) == 'hhg'
+
+    def test_dont_thread_loop_back_edges(self):
+        source = """def f(x):
+            while x:
+                if x > 5:
+                    g()
+                x -= 1
+            for y in x:
+                if y:
+                    continue
+                g()
+        """
+        jumps = self.conditional_jumps(source)
+        assert len(jumps) == 3
+        for offset, target, target_op in jumps:
+            assert target > offset
+
 
 class TestHugeStackDepths:
     def run_and_check_stacksize(self, source):
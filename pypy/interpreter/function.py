@@ -82,6 +82,17 @@ class Function(W_Root):
             return jit.promote(self.code)
         return self.code
 
+    def materialize_code(self):
+        """Return the code object, after unmarshalling it if it is still
+        a LazyCode."""
+        from pypy.interpreter.lazycode import LazyCode
+        code = self.code
+        if (self.space.config.objspace.lazycodeobjects and
+                isinstance(code, LazyCode)):
+            code = code.materialize()
+            self.code = code
+        return code
+
     def funccall(self, *args_w): # speed hack
         from pypy.interpreter import gateway
         from pypy.interpreter.pycode import PyCode
@@ -295,7 +306,7 @@ class Function(W_Root):
         from pypy.interpreter.mixedmodule import MixedModule
         w_mod = space.getbuiltinmodule('_pickle_support')
         mod = space.interp_w(MixedModule, w_mod)
-        code = self.code
+        code = self.materialize_code()
         if isinstance(code, BuiltinCode):
             new_inst = mod.get('builtin_function')
             return space.newtuple2(new_inst,
@@ -324,7 +335,7 @@ class Function(W_Root):
         tup_state = [
             space.newtext(self.name),
             w_doc,
-            self.code,
+            code,
             w_func_globals,
             w_closure,
             nt(self.defs_w),
@@ -433,7 +444,7 @@ class Function(W_Root):
         self.w_module = space.w_None
 
     def fget_func_code(self, space):
-        return self.getcode()
+        return self.materialize_code()
 
     def fset_func_code(self, space, w_code):
         from pypy.interpreter.pycode import PyCode
@@ -0,0 +1,88 @@
+"""
+Code objects that are unmarshalled only when they are first needed.
+
+With the 'lazycodeobjects' option, the .pyc data of a module is loaded
+so that only the code object of the module itself is built.  The code
+objects of the functions and classes it contains are found in its
+co_consts_w as LazyCode instances, which only record where the code
+starts in the marshal data.  MAKE_FUNCTION and MAKE_CLOSURE accept them,
+giving Functions whose code is materialized the first time they are
+called, or when their func_code is asked for.  Most functions of a
+large program are never called, and never cost more than this.
+"""
+
+from rpython.rlib import jit
+
+from pypy.interpreter.eval import Code
+
+
+class LazyCode(Code):
+    """A code object still in the marshal data of its module."""
+
+    def __init__(self, space, co_name, data, pos, stringtable_w, nstrings):
+        Code.__init__(self, co_name)
+        self.space = space
+        self.data = data                    # the whole marshal data
+        self.pos = pos                      # where this code object starts
+        self.stringtable_w = stringtable_w  # the interned strings of 'data'
+        self.nstrings = nstrings            # how many are seen before 'pos'
+        self.kill_docstrings = False
+        self.old_filename = None            # a pending co_filename change,
+        self.new_filename = None            # see update_filename()
+        self.w_code = None
+
+    def __repr__(self):
+        return "<LazyCode %s>" % (self.co_name,)
+
+    @jit.dont_look_inside
+    def materialize(self):
+        """Unmarshal the code object; returns the same PyCode every time."""
+        from pypy.objspace.std.marshal_impl import unmarshal_lazy_pycode
+        w_code = self.w_code
+        if w_code is None:
+            w_code = unmarshal_lazy_pycode(self.space, self.data, self.pos,
+                                           self.stringtable_w[:self.nstrings])
+            if self.kill_docstrings:
+                w_code.remove_docstrings(self.space)
+            if self.new_filename is not None:
+                from pypy.module.imp.importing import update_code_filenames
+                update_code_filenames(self.space, w_code, self.new_filename,
+                                      self.old_filename)
+            self.w_code = w_code
+            # the marshal data is not needed any more
+            self.data = ''
+            self.stringtable_w = None
+        return w_code
+
+    def remove_docstrings(self, space):
+        self.kill_docstrings = True
+        if self.w_code is not None:
+            self.w_code.remove_docstrings(space)
+
+    def update_filename(self, pathname, oldname):
+        """Give the co_filename 'pathname' to the code objects compiled as
+        'oldname', see importing.update_code_filenames().  If the code is
+        not materialized yet, this is done by materialize()."""
+        if self.w_code is not None:
+            from pypy.module.imp.importing import update_code_filenames
+            update_code_filenames(self.space, self.w_code, pathname, oldname)
+        elif self.new_filename is not None and oldname == self.new_filename:
+            self.new_filename = pathname    # renamed again
+        elif self.new_filename is None:
+            self.old_filename = oldname
+            self.new_filename = pathname
+
+    def signature(self):
+        return self.materialize().signature()
+
+    def getdocstring(self, space):
+        return self.materialize().getdocstring(space)
+
+    # the first call of a function materializes its code, and stores it
+    # in the function, so that the following calls take the fast paths
+
+    def funcrun(self, func, args):
+        return func.materialize_code().funcrun(func, args)
+
+    def funcrun_obj(self, func, w_obj, args):
+        return func.materialize_code().funcrun_obj(func, w_obj, args)
@@ -7,6 +7,7 @@ The bytecode interpreter itself is implemented by the PyFrame class.
 import dis, imp, struct, types, new, sys, os
 
 from pypy.interpreter import eval
+from pypy.interpreter.lazycode import LazyCode
 from pypy.interpreter.signature import Signature
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter.gateway import unwrap_spec
@@ -32,7 +33,7 @@ def unpack_text_tuple(space, w_str_tuple):
 # Magic numbers for the bytecode version in code objects.
 # See comments in pypy/module/imp/importing.
 cpython_magic, = struct.unpack("<i", imp.get_magic())   # host magic number
-default_magic = (0xf303 + 7) | 0x0a0d0000               # this PyPy's magic
+default_magic = (0xf303 + 8) | 0x0a0d0000               # this PyPy's magic
                                                         # (from CPython 2.7.0)
 
 def make_signature(code):
@@ -52,6 +53,7 @@ def make_signature(code):
 class CodeHookCache(object):
     def __init__(self, space):
         self._code_hook = None
+        self._warmup_profile = None     # see pypy/module/pypyjit
 
 class PyCode(eval.Code):
     "CPython-style code objects."
@@ -62,7 +64,11 @@ class PyCode(eval.Code):
                           "co_stacksize", "co_varnames[*]",
                           "_args_as_cellvars[*]",
                           "w_globals?",
-                          "cell_families[*]"]
+                          "cell_families[*]",
+                          "_jit_warmup?"]
+
+    # positions to trace from the JIT warm-up profile, until the code runs
+    _jit_warmup = None
 
     def __init__(self, space,  argcount, nlocals, stacksize, flags,
                      code, consts, names, varnames, filename,
@@ -107,7 +113,10 @@ class PyCode(eval.Code):
         return True
 
     def new_code_hook(self):
-        code_hook = self.space.fromcache(CodeHookCache)._code_hook
+        cache = self.space.fromcache(CodeHookCache)
+        if cache._warmup_profile is not None:
+            cache._warmup_profile.new_code(self)
+        code_hook = cache._code_hook
         if code_hook is not None:
             try:
                 self.space.call_function(code_hook, self)
@@ -116,6 +125,7 @@ class PyCode(eval.Code):
 
     def _initialize(self):
         from pypy.objspace.std.mapdict import init_mapdict_cache
+        from pypy.objspace.std.allocsite import init_alloc_sites
         from pypy.interpreter.nestedscope import CellFamily
         if self.co_cellvars:
             argcount = self.co_argcount
@@ -136,6 +146,7 @@ class PyCode(eval.Code):
         self._compute_flatcall()
 
         init_mapdict_cache(self)
+        init_alloc_sites(self)
         self._globals_caches = [None] * len(self.co_names_w)
 
     def _init_ready(self):
@@ -247,15 +258,35 @@ class PyCode(eval.Code):
     def remove_docstrings(self, space):
         if self.co_flags & CO_KILL_DOCSTRING:
             self.co_consts_w[0] = space.w_None
+        lazy = space.config.objspace.lazycodeobjects
         for w_co in self.co_consts_w:
-            if isinstance(w_co, PyCode):
+            if isinstance(w_co, PyCode) or (lazy and isinstance(w_co, LazyCode)):
                 w_co.remove_docstrings(space)
 
+    def materialized_consts_w(self):
+        """The constants, with the nested code objects that are still
+        lazy (see pypy.interpreter.lazycode) unmarshalled.  Use it instead
+        of co_consts_w when they can escape to app-level."""
+        consts_w = self.co_consts_w
+        if not self.space.config.objspace.lazycodeobjects:
+            return consts_w
+        for i in range(len(consts_w)):
+            if isinstance(consts_w[i], LazyCode):
+                break
+        else:
+            return consts_w
+        result_w = consts_w[:]
+        for i in range(len(result_w)):
+            w_const = result_w[i]
+            if isinstance(w_const, LazyCode):
+                result_w[i] = w_const.materialize()
+        return result_w
+
     def _to_code(self):
         """For debugging only."""
         consts = [None] * len(self.co_consts_w)
         num = 0
-        for w in self.co_consts_w:
+        for w in self.materialized_consts_w():
             if isinstance(w, PyCode):
                 consts[num] = w._to_code()
             else:
@@ -289,7 +320,7 @@ class PyCode(eval.Code):
         dis.dis(co)
 
     def fget_co_consts(self, space):
-        return space.newtuple(self.co_consts_w)
+        return space.newtuple(self.materialized_consts_w())
 
     def fget_co_names(self, space):
         return space.newtuple(self.co_names_w)
@@ -325,8 +356,10 @@ class PyCode(eval.Code):
             if not space.eq_w(self.co_names_w[i], w_other.co_names_w[i]):
                 return space.w_False
 
-        for i in range(len(self.co_consts_w)):
-            if not _code_const_eq(space, self.co_consts_w[i], w_other.co_consts_w[i]):
+        consts_w = self.materialized_consts_w()
+        other_consts_w = w_other.materialized_consts_w()
+        for i in range(len(consts_w)):
+            if not _code_const_eq(space, consts_w[i], other_consts_w[i]):
                 return space.w_False
 
         return space.w_True
@@ -351,7 +384,7 @@ class PyCode(eval.Code):
         w_result = space.newint(intmask(result))
         for w_name in self.co_names_w:
             w_result = space.xor(w_result, space.hash(w_name))
-        for w_const in self.co_consts_w:
+        for w_const in self.materialized_consts_w():
             w_key = self.const_comparison_key(space, w_const)
             w_result = space.xor(w_result, space.hash(w_key))
         return w_result
@@ -405,7 +438,7 @@ class PyCode(eval.Code):
             space.newint(self.co_stacksize),
             space.newint(self.co_flags),
             space.newbytes(self.co_code),
-            space.newtuple(self.co_consts_w),
+            space.newtuple(self.materialized_consts_w()),
             space.newtuple(self.co_names_w),
             space.newtuple([space.newtext(v) for v in self.co_varnames]),
             space.newtext(self.co_filename),
@@ -17,6 +17,7 @@ from pypy.interpreter import (
 from pypy.interpreter.executioncontext import TICK_COUNTER_STEP
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.lazycode import LazyCode
 from pypy.interpreter.nestedscope import Cell
 from pypy.interpreter.pycode import PyCode, BytecodeCorruption
 from pypy.tool.stdlib_opcode import bytecode_spec
@@ -236,6 +237,10 @@ class __extend__(pyframe.PyFrame):
                 next_instr = self.POP_JUMP_IF_FALSE(oparg, next_instr)
             elif opcode == opcodedesc.POP_JUMP_IF_TRUE.index:
                 next_instr = self.POP_JUMP_IF_TRUE(oparg, next_instr)
+            elif opcode == opcodedesc.COMPARE_POP_JUMP_IF_FALSE.index:
+                next_instr = self.COMPARE_POP_JUMP_IF_FALSE(oparg, next_instr)
+            elif opcode == opcodedesc.ADD_FAST_FAST.index:
+                self.ADD_FAST_FAST(oparg, next_instr)
             elif opcode == opcodedesc.BINARY_ADD.index:
                 self.BINARY_ADD(oparg, next_instr)
             elif opcode == opcodedesc.BINARY_AND.index:
@@ -360,6 +365,8 @@ class __extend__(pyframe.PyFrame):
                 self.LOAD_DEREF(oparg, next_instr)
             elif opcode == opcodedesc.LOAD_FAST.index:
                 self.LOAD_FAST(oparg, next_instr)
+            elif opcode == opcodedesc.LOAD_FAST_LOAD_ATTR.index:
+                self.LOAD_FAST_LOAD_ATTR(oparg, next_instr)
             elif opcode == opcodedesc.LOAD_GLOBAL.index:
                 self.LOAD_GLOBAL(oparg, next_instr)
             elif opcode == opcodedesc.LOAD_LOCALS.index:
@@ -520,6 +527,12 @@ class __extend__(pyframe.PyFrame):
                     "local variable '%s' referenced before assignment",
                     varname)
 
+    def _load_fast_checked(self, varindex):
+        w_value = self.locals_cells_stack_w[varindex]
+        if w_value is None:
+            self._load_fast_failed(varindex)
+        return w_value
+
     def LOAD_CONST(self, constindex, next_instr):
         w_const = self.getconstant_w(constindex)
         self.pushvalue(w_const)
@@ -1036,6 +1049,27 @@ class __extend__(pyframe.PyFrame):
             raise BytecodeCorruption("bad COMPARE_OP oparg")
         self.pushvalue(w_result)
 
+    # Superinstructions: the compiler turns some common sequences of
+    # opcodes into a single one, with the arguments packed into 'oparg'.
+    # Running them costs one round of dispatch_bytecode() instead of two
+    # or three, which matters for code that is not JITted.
+
+    def LOAD_FAST_LOAD_ATTR(self, oparg, next_instr):
+        "LOAD_FAST + LOAD_ATTR"
+        self.LOAD_FAST(oparg & 0xFF, next_instr)
+        self.LOAD_ATTR(oparg >> 8, next_instr)
+
+    def ADD_FAST_FAST(self, oparg, next_instr):
+        "LOAD_FAST + LOAD_FAST + BINARY_ADD"
+        w_1 = self._load_fast_checked(oparg & 0xFF)
+        w_2 = self._load_fast_checked(oparg >> 8)
+        self.pushvalue(self.space.add(w_1, w_2))
+
+    def COMPARE_POP_JUMP_IF_FALSE(self, oparg, next_instr):
+        "COMPARE_OP + POP_JUMP_IF_FALSE"
+        self.COMPARE_OP(oparg & 0xF, next_instr)
+        return self.POP_JUMP_IF_FALSE(oparg >> 4, next_instr)
+
     def IMPORT_NAME(self, nameindex, next_instr):
         space = self.space
         w_modulename = self.getname_w(nameindex)
@@ -1264,9 +1298,15 @@ class __extend__(pyframe.PyFrame):
         w_varargs = self.popvalue()
         self.call_function(oparg, w_varargs, w_varkw)
 
+    def _get_code_to_make_function(self, w_codeobj):
+        if (self.space.config.objspace.lazycodeobjects and
+                isinstance(w_codeobj, LazyCode)):
+            return w_codeobj
+        return self.space.interp_w(PyCode, w_codeobj)
+
     def MAKE_FUNCTION(self, numdefaults, next_instr):
         w_codeobj = self.popvalue()
-        codeobj = self.space.interp_w(PyCode, w_codeobj)
+        codeobj = self._get_code_to_make_function(w_codeobj)
         defaultarguments = self.popvalues(numdefaults)
         fn = function.Function(self.space, codeobj, self.get_w_globals(),
                                defaultarguments)
@@ -1275,7 +1315,7 @@ class __extend__(pyframe.PyFrame):
     @jit.unroll_safe
     def MAKE_CLOSURE(self, numdefaults, next_instr):
         w_codeobj = self.popvalue()
-        codeobj = self.space.interp_w(pycode.PyCode, w_codeobj)
+        codeobj = self._get_code_to_make_function(w_codeobj)
         w_freevarstuple = self.popvalue()
         freevars = [self.space.interp_w(Cell, cell)
                     for cell in self.space.fixedview(w_freevarstuple)]
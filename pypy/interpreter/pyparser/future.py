@@ -32,14 +32,19 @@ futureFlags_2_7 = FutureFlags((2, 7, 0, 'final', 0))
 
 
 class TokenIterator:
-    def __init__(self, tokens):
+    def __init__(self, tokens, tokenizer=None):
+        # if 'tokenizer' is given, the tokens are read from it as needed,
+        # and added to the list 'tokens'
         self.tokens = tokens
+        self.tokenizer = tokenizer
         self.index = 0
         self.next()
 
     def next(self):
         index = self.index
         self.index = index + 1
+        if index == len(self.tokens) and self.tokenizer is not None:
+            self.tokens.append(self.tokenizer.next())
         self.tok = self.tokens[index]
 
     def skip(self, n):
@@ -74,9 +79,9 @@ class TokenIterator:
             pass
 
 
-def add_future_flags(future_flags, tokens):
+def add_future_flags(future_flags, tokens, tokenizer=None):
     from pypy.interpreter.pyparser import pygram
-    it = TokenIterator(tokens)
+    it = TokenIterator(tokens, tokenizer)
     result = 0
     last_position = (0, 0)
     #
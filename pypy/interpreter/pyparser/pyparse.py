@@ -136,6 +136,13 @@ class PythonParser(parser.Parser):
             compile_info.encoding = enc
         return self._parse(textsrc, compile_info)
 
+    def _add_all_tokens(self, tokens, tokenizer):
+        for token in tokens:
+            if self.add_token(token):
+                return
+        while not self.add_token(tokenizer.next()):
+            pass
+
     def _parse(self, textsrc, compile_info):
         flags = compile_info.flags
 
@@ -147,52 +154,57 @@ class PythonParser(parser.Parser):
             flags &= ~consts.PyCF_DONT_IMPLY_DEDENT
 
         self.prepare(_targets[compile_info.mode])
+        # Note: we no longer pass the CO_FUTURE_* to the tokenizer,
+        # which is expected to work independently of them.  It's
+        # certainly the case for all futures in Python <= 2.7.
+        tokenizer = pytokenizer.Tokenizer(source_lines, flags)
         try:
             try:
-                # Note: we no longer pass the CO_FUTURE_* to the tokenizer,
-                # which is expected to work independently of them.  It's
-                # certainly the case for all futures in Python <= 2.7.
-                tokens = pytokenizer.generate_tokens(source_lines, flags)
+                # The tokens read while looking for __future__ imports are
+                # kept in 'tokens'; the rest is parsed while it is tokenized.
+                tokens = []
+                newflags, last_future_import = (
+                    future.add_future_flags(self.future_flags, tokens,
+                                            tokenizer))
+                compile_info.last_future_import = last_future_import
+                compile_info.flags |= newflags
+
+                self.grammar = pygram.choose_grammar(
+                    print_function=compile_info.flags & consts.CO_FUTURE_PRINT_FUNCTION,
+                    revdb=self.space.config.translation.reverse_debugger)
+
+                try:
+                    self._add_all_tokens(tokens, tokenizer)
+                except parser.ParseError as e:
+                    # An error of the tokenizer further down takes
+                    # precedence, as if the whole source was tokenized first.
+                    while tokenizer.next().token_type != pygram.tokens.ENDMARKER:
+                        pass
+                    # Catch parse errors, pretty them up and reraise them as a
+                    # SyntaxError.
+                    new_err = error.IndentationError
+                    if e.token.token_type == pygram.tokens.INDENT:
+                        msg = "unexpected indent"
+                    elif e.expected == pygram.tokens.INDENT:
+                        msg = "expected an indented block"
+                    else:
+                        new_err = error.SyntaxError
+                        msg = "invalid syntax"
+                        if e.expected_str is not None:
+                            msg += " (expected '%s')" % e.expected_str
+
+                    # parser.ParseError(...).column is 0-based, but the offsets in the
+                    # exceptions in the error module are 1-based, hence the '+ 1'
+                    raise new_err(msg, e.token.lineno, e.token.column + 1, e.token.line,
+                                  compile_info.filename)
+                else:
+                    tree = self.root
             except error.TokenError as e:
                 e.filename = compile_info.filename
                 raise
             except error.TokenIndentationError as e:
                 e.filename = compile_info.filename
                 raise
-
-            newflags, last_future_import = (
-                future.add_future_flags(self.future_flags, tokens))
-            compile_info.last_future_import = last_future_import
-            compile_info.flags |= newflags
-
-            self.grammar = pygram.choose_grammar(
-                print_function=compile_info.flags & consts.CO_FUTURE_PRINT_FUNCTION,
-                revdb=self.space.config.translation.reverse_debugger)
-
-            try:
-                for token in tokens:
-                    if self.add_token(token):
-                        break
-            except parser.ParseError as e:
-                # Catch parse errors, pretty them up and reraise them as a
-                # SyntaxError.
-                new_err = error.IndentationError
-                if token.token_type == pygram.tokens.INDENT:
-                    msg = "unexpected indent"
-                elif e.expected == pygram.tokens.INDENT:
-                    msg = "expected an indented block"
-                else:
-                    new_err = error.SyntaxError
-                    msg = "invalid syntax"
-                    if e.expected_str is not None:
-                        msg += " (expected '%s')" % e.expected_str
-
-                # parser.ParseError(...).column is 0-based, but the offsets in the
-                # exceptions in the error module are 1-based, hence the '+ 1'
-                raise new_err(msg, e.token.lineno, e.token.column + 1, e.token.line,
-                              compile_info.filename)
-            else:
-                tree = self.root
         finally:
             # Avoid hanging onto the tree.
             self.root = None
@@ -59,6 +59,9 @@ def generate_tokens(lines, flags):
     * the line number (the real one, counting continuation lines)
     * the position on the line of the end of the token.
 
+    Returns the list of all the tokens; the parser uses the Tokenizer
+    below directly, to get the tokens one by one.
+
     Original docstring ::
 
         The generate_tokens() generator requires one argment, readline, which
@@ -73,58 +76,105 @@ def generate_tokens(lines, flags):
         and the line on which the token was found. The line passed is the
         logical line; continuation lines are included.
     """
+    tokenizer = Tokenizer(lines, flags)
     token_list = []
-    lnum = continued = 0
-    namechars = NAMECHARS
-    numchars = NUMCHARS
-    contstrs, needcont = [], False
-    indents = [0]
-    last_comment = ''
-    # contains the tokens of the opening parens
-    parenstack = []
-
-    # make the annotator happy
-    endDFA = DUMMY_DFA
-    # make the annotator happy
-    line = ''
-    pos = 0
-    lines.append("")
-    strstart = (0, 0, "")
-    for line in lines:
-        lnum = lnum + 1
+    while True:
+        tok = tokenizer.next()
+        token_list.append(tok)
+        if tok.token_type == tokens.ENDMARKER:
+            return token_list
+
+
+class Tokenizer(object):
+    """Tokenizes 'lines' one line at a time.  Every call to next() returns
+    the next token, so that the tokens of a large source never need to be
+    all in memory at the same time.  The last one is the ENDMARKER.
+
+    The errors are raised only when next() reaches them; the 'tokens' of
+    TokenError and TokenIndentationError are the ones of the current line.
+    """
+
+    def __init__(self, lines, flags):
+        self.lines = lines
+        self.flags = flags
+        self.lnum = 0
+        self.continued = 0
+        self.contstrs = []
+        self.needcont = False
+        self.indents = [0]
+        self.last_comment = ''
+        # contains the tokens of the opening parens
+        self.parenstack = []
+        # make the annotator happy
+        self.endDFA = DUMMY_DFA
+        self.strstart = (0, 0, "")
+        # the tokens of the current line, and how many were returned
+        self.pending = []
+        self.pending_index = 0
+        self.last_token_type = -1
+        self.finished = False
+        lines.append("")
+
+    def next(self):
+        while self.pending_index == len(self.pending):
+            if self.finished:
+                # keep returning the ENDMARKER
+                return self.pending[-1]
+            if self.pending:
+                self.last_token_type = self.pending[-1].token_type
+                self.pending = []
+            self.pending_index = 0
+            if self.lnum < len(self.lines):
+                self._tokenize_line(self.lines[self.lnum])
+            else:
+                self._finish('', 0)
+        tok = self.pending[self.pending_index]
+        self.pending_index += 1
+        return tok
+
+    def _tokenize_line(self, line):
+        token_list = self.pending
+        namechars = NAMECHARS
+        numchars = NUMCHARS
+        parenstack = self.parenstack
+        self.lnum += 1
+        lnum = self.lnum
         line = universal_newline(line)
         pos, max = 0, len(line)
 
-        if contstrs:
+        if self.contstrs:
+            strstart = self.strstart
             if not line:
                 raise TokenError(
                     "end of file (EOF) while scanning triple-quoted string literal",
                     strstart[2], strstart[0], strstart[1]+1,
                     token_list, lnum-1)
-            endmatch = endDFA.recognize(line)
+            endmatch = self.endDFA.recognize(line)
             if endmatch >= 0:
                 pos = end = endmatch
-                contstrs.append(line[:end])
-                tok = Token(tokens.STRING, "".join(contstrs), strstart[0],
+                self.contstrs.append(line[:end])
+                tok = Token(tokens.STRING, "".join(self.contstrs), strstart[0],
                        strstart[1], line)
                 token_list.append(tok)
-                last_comment = ''
-                contstrs, needcont = [], False
-            elif (needcont and not line.endswith('\\\n') and
+                self.last_comment = ''
+                self.contstrs, self.needcont = [], False
+            elif (self.needcont and not line.endswith('\\\n') and
                                not line.endswith('\\\r\n')):
-                contstrs.append(line)
-                tok = Token(tokens.ERRORTOKEN, "".join(contstrs), strstart[0],
+                self.contstrs.append(line)
+                tok = Token(tokens.ERRORTOKEN, "".join(self.contstrs), strstart[0],
                        strstart[1], line)
                 token_list.append(tok)
-                last_comment = ''
-                contstrs = []
-                continue
+                self.last_comment = ''
+                self.contstrs = []
+                return
             else:
-                contstrs.append(line)
-                continue
+                self.contstrs.append(line)
+                return
 
-        elif not parenstack and not continued:  # new statement
-            if not line: break
+        elif not parenstack and not self.continued:  # new statement
+            if not line:
+                self._finish(line, pos)
+                return
             column = 0
             while pos < max:                   # measure leading whitespace
                 if line[pos] == ' ': column = column + 1
@@ -132,20 +182,23 @@ def generate_tokens(lines, flags):
                 elif line[pos] == '\f': column = 0
                 else: break
                 pos = pos + 1
-            if pos == max: break
+            if pos == max:
+                self._finish(line, pos)
+                return
 
             if line[pos] in '#\r\n':
                 # skip comments or blank lines
-                continue
+                return
 
+            indents = self.indents
             if column > indents[-1]:           # count indents or dedents
                 indents.append(column)
                 token_list.append(Token(tokens.INDENT, line[:pos], lnum, 0, line))
-                last_comment = ''
+                self.last_comment = ''
             while column < indents[-1]:
                 indents.pop()
                 token_list.append(Token(tokens.DEDENT, '', lnum, pos, line))
-                last_comment = ''
+                self.last_comment = ''
             if column != indents[-1]:
                 err = "unindent does not match any outer indentation level"
                 raise TokenIndentationError(err, line, lnum, column+1, token_list)
@@ -161,7 +214,7 @@ def generate_tokens(lines, flags):
                                      lnum1, start1 + 1, token_list, lnum)
                 raise TokenError("end of file (EOF) in multi-line statement", line,
                                  lnum, 0, token_list) # XXX why is the offset 0 here?
-            continued = 0
+            self.continued = 0
 
         while pos < max:
             pseudomatch = pseudoDFA.recognize(line, pos)
@@ -181,15 +234,15 @@ def generate_tokens(lines, flags):
                 if initial in numchars or \
                    (initial == '.' and token != '.'):      # ordinary number
                     token_list.append(Token(tokens.NUMBER, token, lnum, start, line))
-                    last_comment = ''
+                    self.last_comment = ''
                 elif initial in '\r\n':
                     if not parenstack:
-                        tok = Token(tokens.NEWLINE, last_comment, lnum, start, line)
+                        tok = Token(tokens.NEWLINE, self.last_comment, lnum, start, line)
                         token_list.append(tok)
-                    last_comment = ''
+                    self.last_comment = ''
                 elif initial == '#':
                     # skip comment
-                    last_comment = token
+                    self.last_comment = token
                 elif token in triple_quoted:
                     endDFA = endDFAs[token]
                     endmatch = endDFA.recognize(line, pos)
@@ -198,33 +251,34 @@ def generate_tokens(lines, flags):
                         token = line[start:pos]
                         tok = Token(tokens.STRING, token, lnum, start, line)
                         token_list.append(tok)
-                        last_comment = ''
+                        self.last_comment = ''
                     else:
-                        strstart = (lnum, start, line)
-                        contstrs = [line[start:]]
+                        self.endDFA = endDFA
+                        self.strstart = (lnum, start, line)
+                        self.contstrs = [line[start:]]
                         break
                 elif initial in single_quoted or \
                     token[:2] in single_quoted or \
                     token[:3] in single_quoted:
                     if token[-1] == '\n':                  # continued string
-                        strstart = (lnum, start, line)
-                        endDFA = (endDFAs[initial] or endDFAs[token[1]] or
-                                   endDFAs[token[2]])
-                        contstrs, needcont = [line[start:]], True
+                        self.strstart = (lnum, start, line)
+                        self.endDFA = (endDFAs[initial] or endDFAs[token[1]] or
+                                       endDFAs[token[2]])
+                        self.contstrs, self.needcont = [line[start:]], True
                         break
                     else:                                  # ordinary string
                         tok = Token(tokens.STRING, token, lnum, start, line)
                         token_list.append(tok)
-                        last_comment = ''
+                        self.last_comment = ''
                 elif initial in namechars:                 # ordinary name
                     token_list.append(Token(tokens.NAME, token, lnum, start, line))
-                    last_comment = ''
+                    self.last_comment = ''
                 elif initial == '\\':                      # continued stmt
-                    continued = 1
+                    self.continued = 1
                 elif initial == '$':
                     token_list.append(Token(tokens.REVDBMETAVAR, token,
                                        lnum, start, line))
-                    last_comment = ''
+                    self.last_comment = ''
                 else:
                     if token in python_opmap:
                         punct = python_opmap[token]
@@ -256,7 +310,7 @@ def generate_tokens(lines, flags):
                             raise TokenError(
                                     msg, line, lnum, start + 1, token_list)
                     token_list.append(tok)
-                    last_comment = ''
+                    self.last_comment = ''
             else:
                 if start < 0:
                     start = pos
@@ -265,21 +319,28 @@ def generate_tokens(lines, flags):
                              line, lnum, start+1, token_list)
                 tok = Token(tokens.ERRORTOKEN, line[pos], lnum, pos, line)
                 token_list.append(tok)
-                last_comment = ''
+                self.last_comment = ''
                 pos = pos + 1
 
-    lnum -= 1
-    if not (flags & consts.PyCF_DONT_IMPLY_DEDENT):
-        if token_list and token_list[-1].token_type != tokens.NEWLINE:
-            tok = Token(tokens.NEWLINE, '', lnum, 0, '\n')
-            token_list.append(tok)
-        for indent in indents[1:]:                # pop remaining indent levels
-            token_list.append(Token(tokens.DEDENT, '', lnum, pos, line))
-    tok = Token(tokens.NEWLINE, '', lnum, 0, '\n')
-    token_list.append(tok)
-
-    token_list.append(Token(tokens.ENDMARKER, '', lnum, pos, line))
-    return token_list
+    def _finish(self, line, pos):
+        # 'line' and 'pos' are where the end of the source was found
+        token_list = self.pending
+        self.finished = True
+        lnum = self.lnum - 1
+        if not (self.flags & consts.PyCF_DONT_IMPLY_DEDENT):
+            if token_list:
+                last_token_type = token_list[-1].token_type
+            else:
+                last_token_type = self.last_token_type
+            if last_token_type != -1 and last_token_type != tokens.NEWLINE:
+                tok = Token(tokens.NEWLINE, '', lnum, 0, '\n')
+                token_list.append(tok)
+            for indent in self.indents[1:]:       # pop remaining indent levels
+                token_list.append(Token(tokens.DEDENT, '', lnum, pos, line))
+        tok = Token(tokens.NEWLINE, '', lnum, 0, '\n')
+        token_list.append(tok)
+
+        token_list.append(Token(tokens.ENDMARKER, '', lnum, pos, line))
 
 
 def universal_newline(line):
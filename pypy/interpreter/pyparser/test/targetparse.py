@@ -1,11 +1,17 @@
 import sys
 import os
-ROOT =  os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+ROOT =  os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 print ROOT
 sys.path.insert(0, str(ROOT))
 import time
-from pypy.interpreter.pyparser import pyparse
+from pypy.interpreter.pyparser import pyparse, error
 
+# Parses the given files, or all the .py files of the given directories,
+# and prints the time it took.  By default, parses the whole stdlib:
+#
+#     python targetparse.py [file or directory...]
+#
+# or translated with rpython/bin/rpython targetparse.py.
 
 
 class FakeSpace(object):
@@ -23,24 +29,60 @@ def bench(fn, s):
     b = time.clock()
     print fn, (b-a)
 
+def read_file(fn):
+    fd = os.open(fn, os.O_RDONLY, 0777)
+    res = []
+    while True:
+        s = os.read(fd, 4096)
+        if not s:
+            break
+        res.append(s)
+    os.close(fd)
+    return "".join(res)
+
+def collect_files(path, result):
+    if not os.path.isdir(path):
+        result.append(path)
+        return
+    names = os.listdir(path)
+    names.sort()
+    for name in names:
+        fn = os.path.join(path, name)
+        if os.path.isdir(fn) or name.endswith(".py"):
+            collect_files(fn, result)
+
+def bench_many(fns):
+    sources = [read_file(fn) for fn in fns]
+    total_size = 0
+    errors = 0
+    a = time.clock()
+    for s in sources:
+        total_size += len(s)
+        info = pyparse.CompileInfo("<string>", "exec")
+        parser = pyparse.PythonParser(fakespace)
+        try:
+            parser._parse(s, info)
+        except error.SyntaxError:
+            errors += 1     # e.g. the test files with bad syntax
+    b = time.clock()
+    print len(fns), "files,", total_size, "bytes,", errors, "syntax errors"
+    print "total:", (b-a), "seconds"
+
 
 def entry_point(argv):
     if len(argv) >= 2:
-        fns = argv[1:]
+        paths = argv[1:]
     else:
-        fns = ["../../../../rpython/rlib/unicodedata/unicodedb_5_2_0.py"]
-    for fn in fns:
-        fd = os.open(fn, os.O_RDONLY, 0777)
-        res = []
-        while True:
-            s = os.read(fd, 4096)
-            if not s:
-                break
-            res.append(s)
-        os.close(fd)
-        s = "".join(res)
+        paths = [os.path.join(ROOT, "lib-python", "2.7")]
+    fns = []
+    for path in paths:
+        collect_files(path, fns)
+    if len(fns) == 1:
+        s = read_file(fns[0])
         print len(s)
-        bench(fn, s)
+        bench(fns[0], s)
+    else:
+        bench_many(fns)
 
     return 0
 
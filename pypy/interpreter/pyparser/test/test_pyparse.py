@@ -101,6 +101,25 @@ stuff = "nothing"
         assert exc.lineno == 1
         assert exc.offset == 4
 
+    def test_token_error_after_syntax_error(self):
+        # the source is tokenized while it is parsed, but the errors of the
+        # tokenizer are still reported first
+        exc = py.test.raises(SyntaxError, self.parse,
+                             "x = = 1\ny = 2\nz = (\n").value
+        assert exc.msg == "parenthesis is never closed"
+        assert exc.lineno == 3
+        exc = py.test.raises(SyntaxError, self.parse,
+                             "if 1:\n    x x\n  y = 3\n").value
+        assert exc.msg == "unindent does not match any outer indentation level"
+        assert exc.lineno == 3
+
+    def test_future_import_after_docstring(self):
+        info = pyparse.CompileInfo("<test>", "exec")
+        tree = self.parse('"doc"\nfrom __future__ import print_function\n'
+                          'print(1, end="")\n', info=info)
+        assert info.flags & consts.CO_FUTURE_PRINT_FUNCTION
+        assert tree.type == syms.file_input
+
     def test_is(self):
         self.parse("x is y")
         self.parse("x is not y")
@@ -31,6 +31,27 @@ class TestTokenizer(object):
             Token(tokens.ENDMARKER, '', 2, 0, ''),
             ]
 
+    def test_tokenizer_next(self):
+        source = "if x:\n    y = (1,\n  2)\n'''a\nb'''\n"
+        expected = tokenize(source)
+        tokenizer = pytokenizer.Tokenizer(source.splitlines(True) + ["\n"], 0)
+        tks = []
+        while True:
+            tks.append(tokenizer.next())
+            if tks[-1].token_type == tokens.ENDMARKER:
+                break
+        assert tks == expected
+        assert tokenizer.next() == expected[-1]
+
+    def test_tokenizer_error_is_lazy(self):
+        tokenizer = pytokenizer.Tokenizer(["a = 1\n", "b = (\n"], 0)
+        tok = tokenizer.next()
+        assert tok == Token(tokens.NAME, 'a', 1, 0, "a = 1\n")
+        for i in range(6):
+            tokenizer.next()
+        error = pytest.raises(TokenError, tokenizer.next)
+        assert error.value.msg == "parenthesis is never closed"
+
     def test_error_parenthesis(self):
         for paren in "([{":
             check_token_error(paren + "1 + 2",
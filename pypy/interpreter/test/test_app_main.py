@@ -159,6 +159,10 @@ class TestParseCommandLine:
                    no_site=1)
         self.check(['-Scpass'], {}, sys_argv=['-c'], run_command='pass', no_site=1)
         self.check(['-c', '', ''], {}, sys_argv=['-c', ''], run_command='')
+        self.check(['--snapshot', 'foo', '-c', 'pass'], {}, sys_argv=['-c'],
+                   run_command='pass', snapshot='foo')
+        self.check(['--restore', 'foo', 'bar'], {}, sys_argv=['bar'],
+                   restore='foo')
         self.check(['-mfoo', 'bar', 'baz'], {}, sys_argv=['foo', 'bar', 'baz'],
                    run_module=True)
         self.check(['-m', 'foo', 'bar', 'baz'], {}, sys_argv=['foo', 'bar', 'baz'],
@@ -738,6 +742,23 @@ class TestNonInteractive:
         data = self.run('-c "print 6**5"')
         assert '7776' in data
 
+    def test_option_snapshot(self):
+        p = udir.join('demo_test_app_main_snapshot.bundle')
+        data = self.run('--snapshot "%s" -c "import textwrap; print 42"' % (
+            p,))
+        assert '42' in data
+        content = p.read(mode='rb')
+        assert content.startswith('PYPYBNDL')
+        assert 'textwrap' in content
+
+    def test_option_snapshot_sys_exit(self):
+        p = udir.join('demo_test_app_main_snapshot_exit.bundle')
+        data = self.run('--snapshot "%s" -c "import textwrap, sys; sys.exit(0)"'
+                        % (p,))
+        content = p.read(mode='rb')
+        assert content.startswith('PYPYBNDL')
+        assert 'textwrap' in content
+
     def test_no_pythonstartup(self, monkeypatch):
         monkeypatch.setenv('PYTHONSTARTUP', crashing_demo_script)
         data = self.run('"%s"' % (demo_script,))
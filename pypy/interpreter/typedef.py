@@ -151,13 +151,36 @@ def get_unique_interplevel_subclass(space, cls):
         return subcls
 _unique_subclass_cache = {}
 
-def _getusercls(cls, reallywantdict=False):
+@specialize.memo()
+@not_rpython
+def get_sized_interplevel_subclasses(space, cls):
+    """initialization-time only. Returns a list of user subclasses of 'cls'
+    with different numbers of inline attribute slots, in the order of
+    mapdict.SUBCLASSES_SIZES"""
+    from pypy.objspace.std.mapdict import (
+        SUBCLASSES_SIZES, SUBCLASSES_NUM_FIELDS)
+    try:
+        return _sized_subclasses_cache[cls]
+    except KeyError:
+        classes = []
+        for size in SUBCLASSES_SIZES:
+            if size == SUBCLASSES_NUM_FIELDS:
+                subcls = get_unique_interplevel_subclass(space, cls)
+            else:
+                subcls = _getusercls(cls, size=size)
+            classes.append(subcls)
+        _sized_subclasses_cache[cls] = classes
+        return classes
+_sized_subclasses_cache = {}
+
+def _getusercls(cls, reallywantdict=False, size=-1):
     from rpython.rlib import objectmodel
     from pypy.objspace.std.objectobject import W_ObjectObject
     from pypy.module.__builtin__.interp_classobj import W_InstanceObject
     from pypy.objspace.std.mapdict import (BaseUserClassMapdict,
             MapdictDictSupport, MapdictWeakrefSupport,
-            _make_storage_mixin_size_n, MapdictStorageMixin)
+            _make_storage_mixin_size_n, MapdictStorageMixin,
+            SUBCLASSES_NUM_FIELDS)
     # some subtleties here: We want w_obj.getclass to be a small func
     # set, ie less than 5 different implementations. That way, it can be
     # inlined into its callers. This means we cannot give every single
@@ -175,8 +198,13 @@ def _getusercls(cls, reallywantdict=False):
     isobjectsubclass = cls is W_ObjectObject
 
     if isobjectsubclass or cls is W_InstanceObject:
-        base_mixin = _make_storage_mixin_size_n()
+        if size == -1:
+            size = SUBCLASSES_NUM_FIELDS
+        elif size != SUBCLASSES_NUM_FIELDS:
+            name += "Size%d" % size
+        base_mixin = _make_storage_mixin_size_n(size)
     else:
+        assert size == -1
         base_mixin = MapdictStorageMixin
     if not isobjectsubclass:
         shared_methods = [BaseUserClassMapdict]
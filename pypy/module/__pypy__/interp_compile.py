@@ -0,0 +1,195 @@
+import os, stat
+
+from rpython.rlib import rposix, streamio
+from rpython.rlib.streamio import StreamErrors
+
+from pypy.interpreter.error import OperationError, wrap_oserror
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.imp import importing
+
+HAVE_FORK = hasattr(os, 'fork')
+
+def _compile_one(space, pathname, force):
+    """Compile 'pathname' and write its .pyc file.  Returns None, or an
+    error message."""
+    try:
+        st = os.stat(pathname)
+    except OSError as e:
+        return os.strerror(e.errno)
+    cpathname = pathname + 'c'
+    mtime = int(st[stat.ST_MTIME])
+    if not force:
+        stream = importing.check_compiled_module(space, cpathname, mtime)
+        if stream:
+            importing._close_ignore(stream)
+            return None      # up to date
+    try:
+        stream = streamio.open_file_as_stream(pathname, "rU")
+        try:
+            source = stream.readall()
+        finally:
+            stream.close()
+    except StreamErrors:
+        return "cannot read the file"
+    try:
+        code_w = importing.parse_source_module(space, pathname, source)
+    except OperationError as e:
+        if e.async(space):
+            raise
+        return e.errorstr(space)
+    importing.write_compiled_module(space, code_w, cpathname,
+                                    st[stat.ST_MODE], mtime)
+    return None
+
+def _compile_all(space, paths, force):
+    errors = []
+    for pathname in paths:
+        error = _compile_one(space, pathname, force)
+        if error is not None:
+            errors.append((pathname, error))
+    return errors
+
+def _write_all(fd, data):
+    while data:
+        count = os.write(fd, data)
+        data = data[count:]
+
+def _read_all(fd):
+    parts = []
+    while True:
+        data = os.read(fd, 8192)
+        if not data:
+            break
+        parts.append(data)
+    return ''.join(parts)
+
+def _run_worker(space, paths, force, fd):
+    # in a forked process: the errors are sent to the parent as
+    # '\0'-terminated pathnames and messages.  It must never return.
+    status = 1
+    try:
+        parts = []
+        for pathname, error in _compile_all(space, paths, force):
+            parts.append(pathname + '\0' + error.replace('\0', ' ') + '\0')
+        _write_all(fd, ''.join(parts))
+        status = 0
+    finally:
+        os._exit(status)
+
+def _start_worker(space, chunk, force):
+    from pypy.module.posix.interp_posix import _run_forking_function
+    readfd, writefd = os.pipe()
+    try:
+        pid, _ = _run_forking_function(space, "F")
+    except OperationError:
+        os.close(readfd)
+        os.close(writefd)
+        raise
+    if pid == 0:
+        os.close(readfd)
+        _run_worker(space, chunk, force, writefd)
+    os.close(writefd)
+    return pid, readfd
+
+def _finish_worker(pid, readfd):
+    """Read what the worker sent and wait for it to exit.  Returns None if
+    it did not exit normally."""
+    try:
+        data = _read_all(readfd)
+    finally:
+        os.close(readfd)
+        _, status = os.waitpid(pid, 0)
+    if not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0):
+        return None
+    return data
+
+def _reap_workers(workers):
+    for pid, readfd, chunk in workers:
+        try:
+            os.close(readfd)
+            os.waitpid(pid, 0)
+        except OSError:
+            pass
+
+def _start_workers(space, paths, force, jobs, workers):
+    """Start up to 'jobs' workers, and add them to 'workers'.  Returns the
+    chunks of 'paths' that could not be given to a worker."""
+    local_chunks = []
+    for i in range(jobs):
+        chunk = [paths[j] for j in range(i, len(paths), jobs)]
+        if local_chunks:
+            # starting a worker failed already, don't try again
+            local_chunks.append(chunk)
+            continue
+        try:
+            pid, readfd = _start_worker(space, chunk, force)
+        except OSError:
+            local_chunks.append(chunk)
+            continue
+        except OperationError as e:
+            if e.async(space):
+                raise
+            local_chunks.append(chunk)
+            continue
+        workers.append((pid, readfd, chunk))
+    return local_chunks
+
+def _collect_workers(space, workers, force, errors):
+    while workers:
+        pid, readfd, chunk = workers.pop(0)
+        data = _finish_worker(pid, readfd)
+        if data is None:
+            # the worker died: we don't know which files it did
+            errors.extend(_compile_all(space, chunk, force))
+            continue
+        fields = data.split('\0')
+        for i in range(0, len(fields) - 1, 2):
+            errors.append((fields[i], fields[i + 1]))
+
+def _compile_in_workers(space, paths, force, jobs):
+    workers = []
+    errors = []
+    try:
+        local_chunks = _start_workers(space, paths, force, jobs, workers)
+        # the part that could not be given to a worker (e.g. because
+        # fork() failed with EAGAIN) is compiled in this process
+        for chunk in local_chunks:
+            errors.extend(_compile_all(space, chunk, force))
+        _collect_workers(space, workers, force, errors)
+    finally:
+        # if something raised, don't leak the pipes and the zombies of the
+        # workers that were started.  on success, _collect_workers() has
+        # emptied the list already and this does nothing
+        _reap_workers(workers)
+    return errors
+
+@unwrap_spec(jobs=int, force=bool)
+def compile_many(space, w_paths, jobs=0, force=False):
+    """compile_many(paths, jobs=0, force=False) -> list of (path, error)
+
+Byte-compile the .py files 'paths', writing the .pyc files next to them
+like an import would, unless they are already up to date or 'force' is
+true.  The files are shared between 'jobs' worker processes, by default
+one per CPU.  Returns the files that could not be compiled, with the
+error message."""
+    paths = []
+    seen = {}
+    for w_path in space.listview(w_paths):
+        pathname = space.fsencode_w(w_path)
+        if pathname not in seen:
+            seen[pathname] = None
+            paths.append(pathname)
+    if jobs <= 0:
+        jobs = rposix.cpu_count()
+    if jobs > len(paths):
+        jobs = len(paths)
+    if jobs > 1 and HAVE_FORK:
+        try:
+            errors = _compile_in_workers(space, paths, force, jobs)
+        except OSError as e:
+            raise wrap_oserror(space, e)
+    else:
+        errors = _compile_all(space, paths, force)
+    return space.newlist([space.newtuple2(space.newfilename(pathname),
+                                          space.newtext(error))
+                          for pathname, error in errors])
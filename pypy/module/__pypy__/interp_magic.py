@@ -1,6 +1,6 @@
 from pypy.interpreter.error import oefmt, wrap_oserror
 from pypy.interpreter.gateway import unwrap_spec
-from pypy.interpreter.pycode import CodeHookCache
+from pypy.interpreter.pycode import CodeHookCache, PyCode
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.mixedmodule import MixedModule
 from rpython.rlib.objectmodel import we_are_translated
@@ -51,6 +51,22 @@ def mapdict_cache_counter(space, name):
     return space.newtuple2(space.newint(cache.hits.get(name, 0)),
                            space.newint(cache.misses.get(name, 0)))
 
+@unwrap_spec(w_code=PyCode, name='text')
+def attr_cache_counter(space, w_code, name):
+    """Return a tuple (hits, misses) for the attribute and method caches
+    of the code object 'code' for the given attribute name.  The caches
+    are used by the interpreter for 'obj.name', 'obj.name = value' and
+    'obj.name(...)'."""
+    from pypy.objspace.std.mapdict import get_cache_counters
+    assert space.config.objspace.std.withmethodcachecounter
+    for nameindex in range(len(w_code.co_names_w)):
+        if space.text_w(w_code.co_names_w[nameindex]) == name:
+            hits, misses = get_cache_counters(w_code, nameindex)
+            break
+    else:
+        hits = misses = 0
+    return space.newtuple2(space.newint(hits), space.newint(misses))
+
 def builtinify(space, w_func):
     """To implement at app-level modules that are, in CPython,
     implemented in C: this decorator protects a function from being ever
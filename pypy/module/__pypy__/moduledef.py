@@ -123,6 +123,7 @@ class Module(MixedModule):
         'newmemoryview'             : 'interp_buffer.newmemoryview',
         'utf8content'               : 'interp_magic.utf8content',
         'list_get_physical_size'    : 'interp_magic.list_get_physical_size',
+        'compile_many'              : 'interp_compile.compile_many',
         '_pypy_disable_remote_debugger': 'space.w_False'
     }
     if sys.platform == 'win32':
@@ -148,6 +149,8 @@ class Module(MixedModule):
                                  'interp_magic.reset_method_cache_counter')
             self.extra_interpdef('mapdict_cache_counter',
                                  'interp_magic.mapdict_cache_counter')
+            self.extra_interpdef('attr_cache_counter',
+                                 'interp_magic.attr_cache_counter')
         PYC_MAGIC = get_pyc_magic(self.space)
         self.extra_interpdef('PYC_MAGIC', 'space.wrap(%d)' % PYC_MAGIC)
         try:
@@ -0,0 +1,127 @@
+import py
+from rpython.tool.udir import udir
+
+
+class AppTestCompileMany:
+    spaceconfig = dict(usemodules=['__pypy__', 'imp', 'marshal', 'posix'])
+
+    def setup_class(cls):
+        d = udir.join('compile_many')
+        d.ensure(dir=1)
+        for i in range(4):
+            d.join('mod%d.py' % i).write('x = %d\ndef f():\n    return x\n'
+                                         % (i,))
+        d.join('broken.py').write('def f(:\n')
+        cls.w_dir = cls.space.wrap(str(d))
+
+    def test_compile_many(self):
+        import os, imp, marshal
+        from __pypy__ import compile_many
+        paths = [os.path.join(self.dir, 'mod%d.py' % i) for i in range(4)]
+        broken = os.path.join(self.dir, 'broken.py')
+        missing = os.path.join(self.dir, 'missing.py')
+        for jobs in [1, 2]:
+            for path in paths:
+                if os.path.exists(path + 'c'):
+                    os.unlink(path + 'c')
+            errors = compile_many(paths + [broken, missing, paths[0]],
+                                  jobs=jobs)
+            assert sorted([path for path, msg in errors]) == [broken,
+                                                              missing]
+            for path, msg in errors:
+                if path == broken:
+                    assert 'SyntaxError' in msg
+            for i, path in enumerate(paths):
+                with open(path + 'c', 'rb') as f:
+                    assert f.read(4) == imp.get_magic()
+                    f.read(4)
+                    co = marshal.loads(f.read())
+                d = {}
+                exec co in d
+                assert d['f']() == i
+            assert not os.path.exists(broken + 'c')
+
+    def test_compile_many_up_to_date(self):
+        import os
+        from __pypy__ import compile_many
+        path = os.path.join(self.dir, 'mod0.py')
+        assert compile_many([path]) == []
+        st = os.stat(path + 'c')
+        assert compile_many([path]) == []
+        assert os.stat(path + 'c').st_ino == st.st_ino
+        assert compile_many([path], force=True) == []
+
+
+class TestCompileInWorkers:
+    spaceconfig = dict(usemodules=['__pypy__', 'imp', 'marshal', 'posix'])
+
+    def test_fork_fails(self, space, monkeypatch):
+        import errno, os
+        from pypy.interpreter.error import wrap_oserror
+        from pypy.module.posix import interp_posix
+        from pypy.module.__pypy__ import interp_compile
+        if not interp_compile.HAVE_FORK:
+            py.test.skip("no fork()")
+        d = udir.join('compile_many_fork_fails')
+        d.ensure(dir=1)
+        paths = []
+        for i in range(4):
+            d.join('mod%d.py' % i).write('x = %d\n' % (i,))
+            paths.append(str(d.join('mod%d.py' % i)))
+        d.join('broken.py').write('def f(:\n')
+        paths.append(str(d.join('broken.py')))
+        #
+        forks = []
+        def run_forking_function(space, kind):
+            if forks:
+                raise wrap_oserror(space, OSError(errno.EAGAIN, "no"))
+            pid, master_fd = os.fork(), -1
+            if pid != 0:
+                forks.append(pid)
+            return pid, master_fd
+        monkeypatch.setattr(interp_posix, '_run_forking_function',
+                            run_forking_function)
+        errors = interp_compile._compile_in_workers(space, paths, True, 3)
+        assert len(forks) == 1
+        assert [path for path, msg in errors] == [paths[4]]
+        for i in range(4):
+            assert d.join('mod%d.pyc' % i).check()
+        with py.test.raises(OSError):
+            os.waitpid(forks[0], os.WNOHANG)
+
+    def test_interrupted(self, space, monkeypatch):
+        import os
+        from pypy.interpreter.error import OperationError
+        from pypy.module.posix import interp_posix
+        from pypy.module.__pypy__ import interp_compile
+        if not interp_compile.HAVE_FORK:
+            py.test.skip("no fork()")
+        d = udir.join('compile_many_interrupted')
+        d.ensure(dir=1)
+        paths = []
+        for i in range(2):
+            d.join('mod%d.py' % i).write('x = %d\n' % (i,))
+            paths.append(str(d.join('mod%d.py' % i)))
+        #
+        forks = []
+        def run_forking_function(space, kind):
+            if forks:
+                raise OperationError(space.w_KeyboardInterrupt,
+                                     space.w_None)
+            pid, master_fd = os.fork(), -1
+            if pid != 0:
+                forks.append(pid)
+            return pid, master_fd
+        monkeypatch.setattr(interp_posix, '_run_forking_function',
+                            run_forking_function)
+        if not os.path.isdir('/proc/self/fd'):
+            py.test.skip("no /proc/self/fd")
+        fds = sorted(os.listdir('/proc/self/fd'))
+        with py.test.raises(OperationError):
+            interp_compile._compile_in_workers(space, paths, True, 2)
+        assert len(forks) == 1
+        # the worker was waited for
+        with py.test.raises(OSError):
+            os.waitpid(forks[0], os.WNOHANG)
+        # and the pipe closed
+        assert sorted(os.listdir('/proc/self/fd')) == fds
@@ -0,0 +1,86 @@
+from rpython.rlib.rarithmetic import intmask, r_uint
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.listobject import W_ListObject
+
+
+def _bisect(space, w_a, w_x, lo, hi, right):
+    if lo < 0:
+        raise oefmt(space.w_ValueError, "lo must be non-negative")
+    if hi == -1:
+        hi = space.len_w(w_a)
+    if type(w_a) is W_ListObject:
+        # lists of ints, floats or strings: compare the unwrapped items
+        index = w_a.bisect(w_x, lo, hi, right)
+        if index >= 0:
+            return index
+    while lo < hi:
+        mid = intmask((r_uint(lo) + r_uint(hi)) >> 1)
+        w_litem = space.getitem(w_a, space.newint(mid))
+        if right:
+            if space.is_true(space.lt(w_x, w_litem)):
+                hi = mid
+            else:
+                lo = mid + 1
+        else:
+            if space.is_true(space.lt(w_litem, w_x)):
+                lo = mid + 1
+            else:
+                hi = mid
+    return lo
+
+def _insort(space, w_a, w_x, lo, hi, right):
+    index = _bisect(space, w_a, w_x, lo, hi, right)
+    if type(w_a) is W_ListObject:
+        if lo == 0 and (hi == -1 or hi == w_a.length()):
+            w_a.insort(index, w_x)
+        else:
+            w_a.insert(index, w_x)
+    else:
+        space.call_method(w_a, 'insert', space.newint(index), w_x)
+
+
+@unwrap_spec(lo=int, hi=int)
+def bisect_left(space, w_a, w_x, lo=0, hi=-1):
+    """Return the index where to insert item x in list a, assuming a is sorted.
+
+The return value i is such that all e in a[:i] have e < x, and all e in
+a[i:] have e >= x.  So if x already appears in the list, i points just
+before the leftmost x already there.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    return space.newint(_bisect(space, w_a, w_x, lo, hi, False))
+
+@unwrap_spec(lo=int, hi=int)
+def bisect_right(space, w_a, w_x, lo=0, hi=-1):
+    """Return the index where to insert item x in list a, assuming a is sorted.
+
+The return value i is such that all e in a[:i] have e <= x, and all e in
+a[i:] have e > x.  So if x already appears in the list, i points just
+beyond the rightmost x already there
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    return space.newint(_bisect(space, w_a, w_x, lo, hi, True))
+
+@unwrap_spec(lo=int, hi=int)
+def insort_left(space, w_a, w_x, lo=0, hi=-1):
+    """Insert item x in list a, and keep it sorted assuming a is sorted.
+
+If x is already in a, insert it to the left of the leftmost x.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    _insort(space, w_a, w_x, lo, hi, False)
+
+@unwrap_spec(lo=int, hi=int)
+def insort_right(space, w_a, w_x, lo=0, hi=-1):
+    """Insert item x in list a, and keep it sorted assuming a is sorted.
+
+If x is already in a, insert it to the right of the rightmost x.
+
+Optional args lo (default 0) and hi (default len(a)) bound the
+slice of a to be searched."""
+    _insort(space, w_a, w_x, lo, hi, True)
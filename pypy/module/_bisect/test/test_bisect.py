@@ -0,0 +1,186 @@
+from pypy.objspace.std.listobject import W_ListObject
+
+
+class AppTestBisect:
+    spaceconfig = dict(usemodules=['_bisect'])
+
+    def test_bisect_left(self):
+        from _bisect import bisect_left
+        a = [0, 5, 6, 6, 6, 7]
+        assert bisect_left(a, None) == 0
+        assert bisect_left(a, -3) == 0
+        assert bisect_left(a, 0) == 0
+        assert bisect_left(a, 3) == 1
+        assert bisect_left(a, 5) == 1
+        assert bisect_left(a, 5.5) == 2
+        assert bisect_left(a, 6) == 2
+        assert bisect_left(a, 6.0) == 2
+        assert bisect_left(a, 6.1) == 5
+        assert bisect_left(a, 7) == 5
+        assert bisect_left(a, 8) == 6
+        a = []
+        assert bisect_left(a, 123) == 0
+        a = [9]
+        assert bisect_left(a, -123) == 0
+        assert bisect_left(a, 9) == 0
+        assert bisect_left(a, 123) == 1
+        a = [9, 9]
+        assert bisect_left(a, -123) == 0
+        assert bisect_left(a, 9) == 0
+        assert bisect_left(a, 123) == 2
+        a = [4, 6, 6, 9]
+        assert bisect_left(a, 6, 0) == 1
+        assert bisect_left(a, 6, 1) == 1
+        assert bisect_left(a, 6, 2) == 2
+        assert bisect_left(a, 6, 3) == 3
+        assert bisect_left(a, 6, 4) == 4
+        assert bisect_left(a, 6, 0, 0) == 0
+        assert bisect_left(a, 6, 0, 1) == 1
+        assert bisect_left(a, 6, 0, 2) == 1
+        assert bisect_left(a, 6, 0, 3) == 1
+        assert bisect_left(a, 6, 0, 4) == 1
+        raises(ValueError, bisect_left, a, 6, -1)
+        raises(IndexError, bisect_left, a, 6, 0, 10)
+
+    def test_bisect_right(self):
+        from _bisect import bisect_right
+        a = [0, 5, 6, 6, 6, 7]
+        assert bisect_right(a, None) == 0
+        assert bisect_right(a, -3) == 0
+        assert bisect_right(a, 0) == 1
+        assert bisect_right(a, 3) == 1
+        assert bisect_right(a, 5) == 2
+        assert bisect_right(a, 5.5) == 2
+        assert bisect_right(a, 6) == 5
+        assert bisect_right(a, 6.0) == 5
+        assert bisect_right(a, 6.1) == 5
+        assert bisect_right(a, 7) == 6
+        assert bisect_right(a, 8) == 6
+        a = []
+        assert bisect_right(a, 123) == 0
+        a = [4, 6, 6, 9]
+        assert bisect_right(a, 6, 0) == 3
+        assert bisect_right(a, 6, 4) == 4
+        assert bisect_right(a, 6, 0, 2) == 2
+        raises(IndexError, bisect_right, a, 6, 0, 10)
+
+    def test_bisect_floats_and_strings(self):
+        from _bisect import bisect_left, bisect_right
+        a = [0.5, 1.5, 1.5, 2.5]
+        assert bisect_left(a, 1.5) == 1
+        assert bisect_right(a, 1.5) == 3
+        assert bisect_left(a, 1) == 1
+        a = ['a', 'bc', 'bc', 'd']
+        assert bisect_left(a, 'bc') == 1
+        assert bisect_right(a, 'bc') == 3
+        assert bisect_right(a, u'bc') == 3
+        assert bisect_left(a, 'zz') == 4
+
+    def test_bisect_subclass(self):
+        from _bisect import bisect_left
+        class mylist(list):
+            def __getitem__(self, index):
+                return -list.__getitem__(self, index)
+        assert bisect_left(mylist([5, 3, 1]), -3) == 1
+
+    def test_insort(self):
+        from _bisect import insort, insort_left, insort_right
+        assert insort is insort_right
+        a = [0, 5, 6, 6, 6, 7]
+        insort_left(a, 6.0)
+        assert a == [0, 5, 6, 6, 6, 6, 7]
+        assert map(type, a) == [int, int, float, int, int, int, int]
+        insort_right(a, 6.0)
+        assert a == [0, 5, 6, 6, 6, 6, 6, 7]
+        assert map(type, a) == [int, int, float, int, int, int, float, int]
+        a = [1, 3]
+        insort(a, 2)
+        insort(a, 4)
+        insort(a, 0)
+        assert a == [0, 1, 2, 3, 4]
+
+    def test_insort_non_list(self):
+        from _bisect import insort_left
+        class seq(object):
+            def __init__(self):
+                self.l = []
+            def __len__(self):
+                return len(self.l)
+            def __getitem__(self, index):
+                return self.l[index]
+            def insert(self, index, item):
+                self.l.insert(index, item)
+        s = seq()
+        for x in [5, 1, 3, 2]:
+            insort_left(s, x)
+        assert s.l == [1, 2, 3, 5]
+
+    def test_sort_after_insort(self):
+        from _bisect import insort
+        a = [5, 1, 4]
+        a.sort()
+        for x in [2, 7, 0]:
+            insort(a, x)
+        a.sort()
+        assert a == [0, 1, 2, 4, 5, 7]
+        a.append(-1)
+        a.sort()
+        assert a == [-1, 0, 1, 2, 4, 5, 7]
+
+
+class TestSortedFlag:
+    spaceconfig = dict(usemodules=['_bisect'])
+
+    def test_flag(self):
+        space = self.space
+        w_insort = space.appexec([], """():
+            from _bisect import insort
+            return insort
+        """)
+        w = space.wrap
+        w_l = W_ListObject(space, [w(3), w(1), w(2)])
+        assert not w_l.is_sorted
+        w_l.sort(False)
+        assert w_l.is_sorted
+        space.call_function(w_insort, w_l, w(0))
+        assert w_l.is_sorted
+        assert space.unwrap(w_l) == [0, 1, 2, 3]
+        w_l.pop(0)
+        assert w_l.is_sorted
+        assert w_l.clone().is_sorted
+        space.call_function(w_insort, w_l, w(1.5))
+        assert not w_l.is_sorted
+        #
+        w_l = W_ListObject(space, [w(3), w(1), w(2)])
+        w_l.sort(True)
+        assert not w_l.is_sorted
+        w_l.sort(False)
+        w_l.append(w(4))
+        assert not w_l.is_sorted
+        w_l.sort(False)
+        w_l.setitem(0, w(5))
+        assert not w_l.is_sorted
+        w_l.sort(False)
+        w_l.reverse()
+        assert not w_l.is_sorted
+
+    def test_flag_floats(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w(3.5), w(1.5)])
+        w_l.sort(False)
+        assert w_l.is_sorted
+        w_l = W_ListObject(space, [w(3.5), w(float('nan')), w(1.5)])
+        w_l.sort(False)
+        assert not w_l.is_sorted
+
+    def test_bisect_unwrapped(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w(1), w(3), w(3), w(5)])
+        assert w_l.bisect(w(3), 0, 4, False) == 1
+        assert w_l.bisect(w(3), 0, 4, True) == 3
+        assert w_l.bisect(w(3), 0, 5, True) == -1
+        assert w_l.bisect(w(3.0), 0, 4, True) == -1
+        w_l = W_ListObject(space, [w(1), w('a')])
+        assert w_l.bisect(w(3), 0, 2, True) == -1
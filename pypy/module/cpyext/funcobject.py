@@ -88,7 +88,7 @@ def code_dealloc(space, py_obj):
 def PyFunction_GetCode(space, w_func):
     """Return the code object associated with the function object op."""
     func = space.interp_w(Function, w_func)
-    return func.code      # borrowed ref
+    return func.materialize_code()      # borrowed ref
 
 @cpython_api([PyObject, PyObject, PyObject], PyObject)
 def PyMethod_New(space, w_func, w_self, w_cls):
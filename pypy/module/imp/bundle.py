@@ -0,0 +1,204 @@
+"""
+Code bundles: a single file holding the compiled code of many modules.
+
+A bundle is built ahead of time, e.g. by lib_pypy/pypy_tools/
+build_code_bundle.py, and made importable by putting a codebundle object
+in sys.meta_path, which app_main does if PYPY_CODE_BUNDLE is set.  The
+file is mmapped once; importing a module from it reads its code object
+directly from the mapping, without any open() or stat() of its own.
+
+The format is, with all integers as 4-byte little-endian values:
+
+    "PYPYBNDL"
+    the magic number of .pyc files
+    the number of modules
+    for every module: the length of its dotted name, the name, its flags
+                      (1 for packages), the offset and length of its code
+    the marshalled code objects
+"""
+
+import os
+
+from rpython.rlib import rmmap
+from rpython.rlib.rmmap import RMMapError
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.module import Module
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.module.imp import importing
+
+BUNDLE_HEADER = "PYPYBNDL"
+FLAG_PACKAGE = 1
+
+
+class BundleEntry(object):
+    def __init__(self, is_package, offset, length):
+        self.is_package = is_package
+        self.offset = offset
+        self.length = length
+
+
+class W_CodeBundle(W_Root):
+    def __init__(self, space, filename, mmap, names, entries):
+        self.space = space
+        self.filename = filename
+        self.mmap = mmap
+        self.names = names          # the dotted names, in the file's order
+        self.entries = entries      # {dotted name: BundleEntry}
+
+    def _get_entry(self, space, fullname):
+        try:
+            return self.entries[fullname]
+        except KeyError:
+            raise oefmt(space.w_ImportError,
+                        "can't find module '%s' in %s", fullname,
+                        self.filename)
+
+    def _make_filename(self, fullname, entry):
+        filename = self.filename + os.sep + fullname.replace('.', os.sep)
+        if entry.is_package:
+            filename += os.sep + '__init__'
+        return filename + '.pyc'
+
+    def _read_code(self, space, fullname, entry):
+        data = self.mmap.getslice(entry.offset, entry.length)
+        return importing.read_compiled_module(
+            space, self._make_filename(fullname, entry), data)
+
+    @unwrap_spec(fullname='text')
+    def find_module(self, space, fullname, w_path=None):
+        if fullname in self.entries:
+            return self
+        return space.w_None
+
+    @unwrap_spec(fullname='text')
+    def load_module(self, space, fullname):
+        entry = self._get_entry(space, fullname)
+        w_modulename = space.newtext(fullname)
+        w_mod = importing.check_sys_modules(space, w_modulename)
+        if w_mod is None:
+            w_mod = Module(space, w_modulename)
+        filename = self._make_filename(fullname, entry)
+        if entry.is_package:
+            pkgpath = (self.filename + os.sep +
+                       fullname.replace('.', os.sep))
+        else:
+            pkgpath = None
+        space.setattr(w_mod, space.newtext('__loader__'), self)
+        importing._prepare_module(space, w_mod, filename, pkgpath)
+        data = self.mmap.getslice(entry.offset, entry.length)
+        try:
+            return importing.load_compiled_module(
+                space, w_modulename, w_mod, filename,
+                importing.get_pyc_magic(space), 0, data)
+        except:
+            w_mods = space.sys.get('modules')
+            space.call_method(w_mods, 'pop', w_modulename, space.w_None)
+            raise
+
+    @unwrap_spec(fullname='text')
+    def get_code(self, space, fullname):
+        entry = self._get_entry(space, fullname)
+        return self._read_code(space, fullname, entry)
+
+    @unwrap_spec(fullname='text')
+    def get_source(self, space, fullname):
+        self._get_entry(space, fullname)
+        return space.w_None
+
+    @unwrap_spec(fullname='text')
+    def get_filename(self, space, fullname):
+        entry = self._get_entry(space, fullname)
+        return space.newtext(self._make_filename(fullname, entry))
+
+    @unwrap_spec(fullname='text')
+    def is_package(self, space, fullname):
+        entry = self._get_entry(space, fullname)
+        return space.newbool(entry.is_package)
+
+    def descr_modules(self, space):
+        names_w = [space.newtext(name) for name in self.names]
+        return space.newlist(names_w)
+
+    def getarchive(self, space):
+        return space.newtext(self.filename)
+
+
+def _read_int(s, pos):
+    return (ord(s[pos]) | (ord(s[pos + 1]) << 8) |
+            (ord(s[pos + 2]) << 16) | (ord(s[pos + 3]) << 24))
+
+def parse_index(space, filename, mmap):
+    size = mmap.size
+    if size < 16 or mmap.getslice(0, 8) != BUNDLE_HEADER:
+        raise oefmt(space.w_ImportError, "%s is not a code bundle", filename)
+    header = mmap.getslice(8, 8)
+    if _read_int(header, 0) != importing.get_pyc_magic(space):
+        raise oefmt(space.w_ImportError,
+                    "code bundle %s was built by another version", filename)
+    count = _read_int(header, 4)
+    names = []
+    entries = {}
+    pos = 16
+    for i in range(count):
+        if pos + 4 > size:
+            break
+        namelength = _read_int(mmap.getslice(pos, 4), 0)
+        pos += 4
+        if namelength < 0 or pos + namelength + 12 > size:
+            break
+        name = mmap.getslice(pos, namelength)
+        pos += namelength
+        s = mmap.getslice(pos, 12)
+        pos += 12
+        flags = _read_int(s, 0)
+        offset = _read_int(s, 4)
+        length = _read_int(s, 8)
+        if offset < 0 or length < 0 or offset + length > size:
+            break
+        if name not in entries:
+            names.append(name)
+        entries[name] = BundleEntry(bool(flags & FLAG_PACKAGE),
+                                    offset, length)
+    else:
+        return names, entries
+    raise oefmt(space.w_ImportError, "code bundle %s is truncated", filename)
+
+@unwrap_spec(filename='fsencode')
+def descr_new_codebundle(space, w_type, filename):
+    try:
+        fd = os.open(filename, os.O_RDONLY, 0)
+    except OSError as e:
+        raise wrap_oserror(space, e, filename,
+                           w_exception_class=space.w_IOError)
+    try:
+        try:
+            mmap = rmmap.mmap(fd, 0, access=rmmap.ACCESS_READ)
+        except RMMapError:
+            raise oefmt(space.w_ImportError, "cannot map %s", filename)
+        except OSError as e:
+            raise wrap_oserror(space, e, filename,
+                               w_exception_class=space.w_IOError)
+    finally:
+        os.close(fd)
+    try:
+        names, entries = parse_index(space, filename, mmap)
+    except:
+        mmap.close()
+        raise
+    return W_CodeBundle(space, filename, mmap, names, entries)
+
+W_CodeBundle.typedef = TypeDef(
+    'imp.codebundle',
+    __new__     = interp2app(descr_new_codebundle),
+    find_module = interp2app(W_CodeBundle.find_module),
+    load_module = interp2app(W_CodeBundle.load_module),
+    get_code    = interp2app(W_CodeBundle.get_code),
+    get_source  = interp2app(W_CodeBundle.get_source),
+    get_filename = interp2app(W_CodeBundle.get_filename),
+    is_package  = interp2app(W_CodeBundle.is_package),
+    modules     = interp2app(W_CodeBundle.descr_modules),
+    archive     = GetSetProperty(W_CodeBundle.getarchive),
+)
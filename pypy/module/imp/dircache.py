@@ -0,0 +1,153 @@
+"""
+A cache of the listings of the directories searched by imports.
+
+With the 'importdircache' option, find_module() first looks up the
+listing of every directory of sys.path (or of a package's __path__) and
+skips the directories that contain no file with a candidate name,
+instead of doing several stat() calls per directory.  A listing is
+reused as long as the mtime of its directory does not change.  Listings
+taken less than RACY_DELAY seconds after the last change of a directory
+are not cached, because a file created within the same mtime tick would
+not be noticed later.
+
+If the environment variable PYPY_IMPORT_INDEX names a file, the listings
+are loaded from it at the first import, and written back at shutdown if
+new directories were listed.  The next process then only needs one
+stat() per directory to know which modules it contains.
+"""
+
+import os, stat, time
+
+from rpython.rlib import streamio
+from rpython.rlib.rfloat import formatd, string_to_float
+from rpython.rlib.rstring import ParseStringError
+from rpython.rlib.streamio import StreamErrors
+
+RACY_DELAY = 2.0
+
+INDEX_MAGIC = "pypy-import-index 1\n"
+
+
+class DirListing(object):
+    def __init__(self, mtime, names):
+        self.mtime = mtime
+        self.names = names      # {name: None}
+
+    def contains(self, name):
+        return name in self.names
+
+
+class ImportDirCache(object):
+    def __init__(self, space):
+        self.space = space
+        self.listings = {}      # {absolute directory: DirListing}
+        self.index_loaded = False
+        self.index_filename = None
+        self.dirty = False
+
+    def get_listing(self, path):
+        """Return the DirListing of the directory 'path', or None if it is
+        not known, in which case the caller must check the files one by
+        one."""
+        if not os.path.isabs(path):
+            # relative to the current directory, which can change
+            return None
+        self.load_index()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(st.st_mode):
+            return None
+        mtime = st.st_mtime
+        listing = self.listings.get(path, None)
+        if listing is not None and listing.mtime == mtime:
+            return listing
+        if time.time() - mtime < RACY_DELAY:
+            return None
+        try:
+            names = os.listdir(path)
+        except OSError:
+            return None
+        d = {}
+        for name in names:
+            d[name] = None
+        listing = DirListing(mtime, d)
+        self.listings[path] = listing
+        self.dirty = True
+        return listing
+
+    # ____________________________________________________________
+    # the on-disk index: the magic line, followed by the listings as
+    # '\0'-separated fields: directory, mtime, number of names, names...
+
+    def load_index(self):
+        if self.index_loaded:
+            return
+        self.index_loaded = True
+        filename = os.environ.get('PYPY_IMPORT_INDEX')
+        if not filename:
+            return
+        self.index_filename = filename
+        try:
+            stream = streamio.open_file_as_stream(filename, "rb")
+            try:
+                data = stream.readall()
+            finally:
+                stream.close()
+        except StreamErrors:
+            return
+        self.parse_index(data)
+
+    def parse_index(self, data):
+        if not data.startswith(INDEX_MAGIC):
+            return
+        fields = data[len(INDEX_MAGIC):].split('\0')
+        end = len(fields) - 1   # the data ends with a '\0'
+        listings = {}
+        i = 0
+        try:
+            while i < end:
+                if i + 3 > end:
+                    return
+                path = fields[i]
+                mtime = string_to_float(fields[i + 1])
+                count = int(fields[i + 2])
+                i += 3
+                if count < 0 or i + count > end:
+                    return
+                names = {}
+                for j in range(i, i + count):
+                    names[fields[j]] = None
+                i += count
+                listings[path] = DirListing(mtime, names)
+        except (ValueError, ParseStringError):
+            return      # corrupted index, ignore it
+        self.listings = listings
+
+    def dump_index(self):
+        parts = []
+        for path, listing in self.listings.items():
+            parts.append(path)
+            parts.append(formatd(listing.mtime, 'r', 0))
+            parts.append(str(len(listing.names)))
+            for name in listing.names:
+                parts.append(name)
+        parts.append('')
+        return INDEX_MAGIC + '\0'.join(parts)
+
+    def save_index(self):
+        if self.index_filename is None or not self.dirty:
+            return
+        filename = self.index_filename
+        tmpname = '%s.%d' % (filename, os.getpid())
+        try:
+            stream = streamio.open_file_as_stream(tmpname, "wb")
+            try:
+                stream.write(self.dump_index())
+            finally:
+                stream.close()
+            os.rename(tmpname, filename)
+        except (StreamErrors, OSError):
+            return
+        self.dirty = False
@@ -11,6 +11,7 @@ from pypy.interpreter.error import OperationError, oefmt, wrap_oserror
 from pypy.interpreter.baseobjspace import W_Root, CannotHaveLock
 from pypy.interpreter.eval import Code
 from pypy.interpreter.pycode import PyCode
+from pypy.interpreter.lazycode import LazyCode
 from pypy.interpreter.streamutil import wrap_streamerror
 from rpython.rlib import streamio, jit
 from rpython.rlib.streamio import StreamErrors
@@ -117,6 +118,28 @@ def find_modtype(space, filepart):
 
     return SEARCH_ERROR, None, None
 
+def may_contain_module(space, path, partname):
+    """Check in the cached listing of the directory 'path' if it can
+    contain the module or package 'partname'.  Returns True if it may, or
+    if the listing is not available.
+    """
+    from pypy.module.imp.dircache import ImportDirCache
+    listing = space.fromcache(ImportDirCache).get_listing(path)
+    if listing is None:
+        return True
+    # the same files as tried by find_modtype() and has_init_module()
+    if listing.contains(partname) or listing.contains(partname + ".py"):
+        return True
+    if _WIN32 and listing.contains(partname + ".pyw"):
+        return True
+    if (space.config.objspace.lonepycfiles and
+            listing.contains(partname + ".pyc")):
+        return True
+    if (has_so_extension(space) and
+            listing.contains(partname + get_so_extension(space))):
+        return True
+    return False
+
 if sys.platform.startswith('linux') or 'freebsd' in sys.platform:
     def case_ok(filename):
         return True
@@ -576,6 +599,9 @@ def find_module(space, modulename, w_modulename, partname, w_path,
                     return FindInfo.fromLoader(w_loader)
 
             path = space.fsencode_w(w_pathitem)
+            if (space.config.objspace.importdircache and
+                    not may_contain_module(space, path, partname)):
+                continue
             filepart = os.path.join(path, partname)
             log_pyverbose(space, 2, "# trying %s\n" % (filepart,))
             if os.path.isdir(filepart) and case_ok(filepart):
@@ -867,11 +893,12 @@ def getimportlock(space):
 # CPython leaves a gap of 10 when it increases its own magic number.
 # To avoid assigning exactly the same numbers as CPython, we can pick
 # any number between CPython + 2 and CPython + 9.  Right now,
-# default_magic = CPython + 7.
+# default_magic = CPython + 8.
 #
 #     CPython + 0                  -- used by CPython without the -U option
 #     CPython + 1                  -- used by CPython with the -U option
-#     CPython + 7 = default_magic  -- used by PyPy (incompatible!)
+#     CPython + 7                  -- used by PyPy before superinstructions
+#     CPython + 8 = default_magic  -- used by PyPy (incompatible!)
 #
 from pypy.interpreter.pycode import default_magic
 MARSHAL_VERSION_FOR_PYC = 2
@@ -972,6 +999,9 @@ def update_code_filenames(space, code_w, pathname, oldname=None):
     for const in constants:
         if const is not None and isinstance(const, PyCode):
             update_code_filenames(space, const, pathname, oldname)
+        elif (space.config.objspace.lazycodeobjects and
+                isinstance(const, LazyCode)):
+            const.update_filename(pathname, oldname)
 
 def _get_long(s):
     a = ord(s[0])
@@ -1059,8 +1089,13 @@ def check_compiled_module(space, pycfilename, expected_mtime):
 def read_compiled_module(space, cpathname, strbuf):
     """ Read a code object from a file and check it for validity """
 
-    w_marshal = space.getbuiltinmodule('marshal')
-    w_code = space.call_method(w_marshal, 'loads', space.newbytes(strbuf))
+    if space.config.objspace.lazycodeobjects:
+        from pypy.module.marshal.interp_marshal import loads_lazily
+        w_code = loads_lazily(space, strbuf)
+    else:
+        w_marshal = space.getbuiltinmodule('marshal')
+        w_code = space.call_method(w_marshal, 'loads',
+                                   space.newbytes(strbuf))
     if not isinstance(w_code, Code):
         raise oefmt(space.w_ImportError, "Non-code object in %s", cpathname)
     return w_code
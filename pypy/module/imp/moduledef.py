@@ -24,6 +24,7 @@ class Module(MixedModule):
         'load_dynamic':    'interp_imp.load_dynamic',
         '_run_compiled_module': 'interp_imp._run_compiled_module',   # pypy
         '_getimporter':    'importing._getimporter',                 # pypy
+        'codebundle':      'bundle.W_CodeBundle',                    # pypy
         #'run_module':      'interp_imp.run_module',
         'new_module':      'interp_imp.new_module',
         'init_builtin':    'interp_imp.init_builtin',
@@ -50,3 +51,8 @@ class Module(MixedModule):
         add_fork_hook('parent', interp_imp.release_lock)
         add_fork_hook('child', interp_imp.reinit_lock)
 
+    def shutdown(self, space):
+        if space.config.objspace.importdircache:
+            from pypy.module.imp.dircache import ImportDirCache
+            space.fromcache(ImportDirCache).save_index()
+
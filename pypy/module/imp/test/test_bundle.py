@@ -0,0 +1,148 @@
+import struct
+
+from rpython.tool.udir import udir
+
+from lib_pypy.pypy_tools.build_code_bundle import (collect, write_bundle,
+                                                   snapshot)
+from pypy.module.imp import importing
+
+
+def test_collect():
+    root = udir.join('codebundle_collect')
+    root.ensure('a.py')
+    root.ensure('pkg', '__init__.py')
+    root.ensure('pkg', 'b.py')
+    root.ensure('pkg', 'sub', '__init__.py')
+    root.ensure('notpkg', 'c.py')
+    other = udir.join('codebundle_collect2')
+    other.ensure('a.py')
+    other.ensure('d.py')
+    result = collect([str(root), str(other), str(root.join('pkg'))])
+    names = [(name, is_package) for name, is_package, path in result]
+    assert names == [('a', False), ('pkg', True), ('pkg.b', False),
+                     ('pkg.sub', True), ('d', False)]
+    assert result[0][2] == str(root.join('a.py'))
+
+def test_snapshot():
+    import marshal, sys, types
+    root = udir.join('codebundle_snapshot')
+    root.ensure('snap_a.py').write('x = 1\n')
+    root.ensure('snap_pkg', '__init__.py').write('y = 2\n')
+    root.ensure('snap_gone.py')
+    mod_a = types.ModuleType('snap_a')
+    mod_a.__file__ = str(root.join('snap_a.pyc'))
+    mod_pkg = types.ModuleType('snap_pkg')
+    mod_pkg.__file__ = str(root.join('snap_pkg', '__init__.py'))
+    mod_pkg.__path__ = [str(root.join('snap_pkg'))]
+    mod_gone = types.ModuleType('snap_gone')
+    mod_gone.__file__ = str(root.join('snap_gone.py'))
+    root.join('snap_gone.py').remove()
+    class Loader(object):
+        def get_code(self, name):
+            return compile('z = 3\n', name, 'exec')
+    mod_zip = types.ModuleType('snap_zip')
+    mod_zip.__file__ = '/nonexistent.zip/snap_zip.py'
+    mod_zip.__loader__ = Loader()
+    modules = [('__main__', sys.modules['__main__']), ('snap_pkg', mod_pkg),
+               ('snap_a', mod_a), ('snap_none', None), ('sys', sys),
+               ('snap_gone', mod_gone), ('snap_zip', mod_zip)]
+    output = str(root.join('snapshot.bundle'))
+    assert snapshot(output, modules) == 3
+    data = open(output, 'rb').read()
+    assert data.startswith('PYPYBNDL')
+    # the modules are written in the given order
+    positions = [data.index(name) for name in ['snap_pkg', 'snap_a',
+                                               'snap_zip']]
+    assert positions == sorted(positions)
+    assert 'snap_gone' not in data and 'snap_none' not in data
+
+
+class AppTestCodeBundle:
+    spaceconfig = dict(usemodules=['imp', 'marshal'])
+
+    def setup_class(cls):
+        space = cls.space
+        def compiled(source, filename):
+            w_data = space.appexec([space.wrap(source), space.wrap(filename)],
+                """(source, filename):
+                    import marshal
+                    return marshal.dumps(compile(source, filename, 'exec'))
+                """)
+            return space.bytes_w(w_data)
+        magic = struct.pack('<i', importing.get_pyc_magic(space))
+        entries = [
+            ('bundled_mod', False, compiled("x = 42\n", "bundled_mod.py")),
+            ('bundled_pkg', True, compiled("y = 'pkg'\n", "__init__.py")),
+            ('bundled_pkg.sub', False,
+                compiled("from bundled_pkg import y\nz = y * 2\n",
+                         "sub.py")),
+            ('bundled_shadow', False,
+                compiled("where = 'bundle'\n", "bundled_shadow.py")),
+            ('bundled_error', False, compiled("1 / 0\n", "bundled_error.py")),
+        ]
+        p = udir.join('codebundle')
+        p.ensure(dir=1)
+        bundle = p.join('test.bundle')
+        write_bundle(str(bundle), magic, entries)
+        p.join('bundled_shadow.py').write("where = 'path'\n")
+        bad = p.join('bad.bundle')
+        bad.write('PYPYBNDL' + '\xff' * 8, mode='wb')
+        truncated = p.join('truncated.bundle')
+        truncated.write('PYPYBNDL' + magic + struct.pack('<i', 5) + 'x',
+                        mode='wb')
+        cls.w_bundle = space.wrap(str(bundle))
+        cls.w_badbundle = space.wrap(str(bad))
+        cls.w_truncatedbundle = space.wrap(str(truncated))
+        cls.w_dirpath = space.wrap(str(p))
+
+    def test_import(self):
+        import sys, imp
+        b = imp.codebundle(self.bundle)
+        assert b.archive == self.bundle
+        assert b.modules() == ['bundled_mod', 'bundled_pkg',
+                               'bundled_pkg.sub', 'bundled_shadow',
+                               'bundled_error']
+        assert b.find_module('bundled_mod') is b
+        assert b.find_module('not_bundled') is None
+        assert not b.is_package('bundled_mod')
+        assert b.is_package('bundled_pkg')
+        assert b.get_source('bundled_mod') is None
+        assert b.get_filename('bundled_mod').endswith('bundled_mod.pyc')
+        code = b.get_code('bundled_mod')
+        assert code.co_filename == 'bundled_mod.py'
+        raises(ImportError, b.get_code, 'not_bundled')
+        sys.meta_path.insert(0, b)
+        try:
+            import bundled_mod
+            assert bundled_mod.x == 42
+            assert bundled_mod.__loader__ is b
+            assert bundled_mod.__file__ == b.get_filename('bundled_mod')
+            from bundled_pkg import sub
+            assert sub.z == 'pkgpkg'
+            import bundled_pkg
+            assert len(bundled_pkg.__path__) == 1
+            raises(ZeroDivisionError, "import bundled_error")
+            assert 'bundled_error' not in sys.modules
+        finally:
+            sys.meta_path.remove(b)
+            for name in ['bundled_mod', 'bundled_pkg', 'bundled_pkg.sub']:
+                sys.modules.pop(name, None)
+
+    def test_before_sys_path(self):
+        import sys, imp
+        b = imp.codebundle(self.bundle)
+        sys.meta_path.insert(0, b)
+        sys.path.insert(0, self.dirpath)
+        try:
+            import bundled_shadow
+            assert bundled_shadow.where == 'bundle'
+        finally:
+            sys.meta_path.remove(b)
+            sys.path.remove(self.dirpath)
+            sys.modules.pop('bundled_shadow', None)
+
+    def test_bad_bundle(self):
+        import imp
+        raises(ImportError, imp.codebundle, self.badbundle)
+        raises(ImportError, imp.codebundle, self.truncatedbundle)
+        raises(IOError, imp.codebundle, self.dirpath + '/missing')
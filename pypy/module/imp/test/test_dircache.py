@@ -0,0 +1,133 @@
+import os, time
+
+from rpython.tool.udir import udir
+
+from pypy.module.imp import importing
+from pypy.module.imp.dircache import ImportDirCache, INDEX_MAGIC
+
+
+def make_dir(name, files, age=3600):
+    p = udir.join('dircache').join(name)
+    p.ensure(dir=1)
+    for filename in files:
+        p.join(filename).write('x = %r\n' % (filename,))
+    set_age(p, age)
+    return p
+
+def set_age(p, age):
+    t = time.time() - age
+    os.utime(str(p), (t, t))
+
+
+class TestImportDirCache:
+    spaceconfig = {"objspace.importdircache": True}
+
+    def test_listing(self):
+        p = make_dir('listing', ['a.py', 'b.pyc'])
+        cache = ImportDirCache(self.space)
+        cache.index_loaded = True
+        listing = cache.get_listing(str(p))
+        assert listing.contains('a.py')
+        assert listing.contains('b.pyc')
+        assert not listing.contains('c.py')
+        assert cache.get_listing(str(p)) is listing
+        p.join('c.py').write('')
+        set_age(p, 1800)
+        listing2 = cache.get_listing(str(p))
+        assert listing2 is not listing
+        assert listing2.contains('c.py')
+
+    def test_recently_changed(self):
+        p = make_dir('recent', ['a.py'], age=0)
+        cache = ImportDirCache(self.space)
+        cache.index_loaded = True
+        assert cache.get_listing(str(p)) is None
+        assert str(p) not in cache.listings
+
+    def test_not_a_directory(self):
+        p = make_dir('notadir', ['a.py'])
+        cache = ImportDirCache(self.space)
+        cache.index_loaded = True
+        assert cache.get_listing(str(p.join('a.py'))) is None
+        assert cache.get_listing(str(p.join('missing'))) is None
+        assert cache.get_listing('relative') is None
+
+    def test_index_roundtrip(self):
+        p1 = make_dir('index1', ['a.py', 'b.py'])
+        p2 = make_dir('index2', [])
+        cache = ImportDirCache(self.space)
+        cache.index_loaded = True
+        cache.get_listing(str(p1))
+        cache.get_listing(str(p2))
+        data = cache.dump_index()
+        assert data.startswith(INDEX_MAGIC)
+        cache2 = ImportDirCache(self.space)
+        cache2.parse_index(data)
+        assert sorted(cache2.listings) == sorted([str(p1), str(p2)])
+        listing = cache2.listings[str(p1)]
+        assert sorted(listing.names) == ['a.py', 'b.py']
+        assert listing.mtime == cache.listings[str(p1)].mtime
+        assert cache2.listings[str(p2)].names == {}
+
+    def test_parse_corrupted_index(self):
+        cache = ImportDirCache(self.space)
+        for data in ["", "foo", INDEX_MAGIC + "/x\0nan-ish\x003\0",
+                     INDEX_MAGIC + "/x\x001.5\x005\0a\0",
+                     INDEX_MAGIC + "/x\x001.5\0"]:
+            cache.parse_index(data)
+            assert cache.listings == {}
+
+    def test_load_and_save_index(self, monkeypatch):
+        p = make_dir('saved', ['mod.py'])
+        index = udir.join('dircache').join('index')
+        if index.check():
+            index.remove()
+        monkeypatch.setitem(os.environ, 'PYPY_IMPORT_INDEX', str(index))
+        cache = ImportDirCache(self.space)
+        cache.get_listing(str(p))
+        cache.save_index()
+        assert index.check()
+        assert not cache.dirty
+        cache2 = ImportDirCache(self.space)
+        cache2.load_index()
+        assert cache2.listings[str(p)].contains('mod.py')
+        # a still valid listing from the index is used without listdir()
+        monkeypatch.setattr(os, 'listdir', None)
+        assert cache2.get_listing(str(p)) is cache2.listings[str(p)]
+        assert not cache2.dirty
+
+    def test_may_contain_module(self):
+        space = self.space
+        p = make_dir('maycontain', ['mod.py', 'pkg'])
+        path = str(p)
+        assert importing.may_contain_module(space, path, 'mod')
+        assert importing.may_contain_module(space, path, 'pkg')
+        assert not importing.may_contain_module(space, path, 'other')
+        assert importing.may_contain_module(space, 'relative', 'other')
+
+
+class AppTestImportDirCache:
+    spaceconfig = {"objspace.importdircache": True}
+
+    def setup_class(cls):
+        p = make_dir('apptest', [])
+        p.join('dircache_mod.py').write('value = 42\n')
+        pkg = p.join('dircache_pkg')
+        pkg.ensure(dir=1)
+        pkg.join('__init__.py').write('')
+        pkg.join('sub.py').write('value = 43\n')
+        set_age(pkg, 3600)
+        set_age(p, 3600)
+        cls.w_path = cls.space.wrap(str(p))
+
+    def test_import(self):
+        import sys
+        sys.path.insert(0, self.path)
+        try:
+            import dircache_mod
+            assert dircache_mod.value == 42
+            from dircache_pkg import sub
+            assert sub.value == 43
+            raises(ImportError, "import dircache_missing")
+        finally:
+            sys.path.remove(self.path)
@@ -1196,6 +1196,47 @@ class TestPycStuff:
                     stream.close()
 
 
+class TestLazyCodeObjects:
+    spaceconfig = {"objspace.lazycodeobjects": True}
+
+    def test_read_compiled_module_lazily(self):
+        from pypy.interpreter.lazycode import LazyCode
+        space = self.space
+        co = compile('def f(x):\n    return x * 2\ny = f(21)\n', '?', 'exec')
+        cpathname = _testfile(importing.get_pyc_magic(space), 12345, co)
+        with open(cpathname, 'rb') as f:
+            f.seek(8)
+            pycode = importing.read_compiled_module(space, cpathname, f.read())
+        assert type(pycode) is pypy.interpreter.pycode.PyCode
+        assert isinstance(pycode.co_consts_w[0], LazyCode)
+        w_dic = space.newdict()
+        pycode.exec_code(space, w_dic, w_dic)
+        assert space.int_w(space.getitem(w_dic, space.wrap('y'))) == 42
+        w_f = space.getitem(w_dic, space.wrap('f'))
+        assert type(w_f.code) is pypy.interpreter.pycode.PyCode
+
+    def test_relocated_pyc(self):
+        from pypy.interpreter.lazycode import LazyCode
+        space = self.space
+        co = compile('def f():\n    pass\n'
+                     'class A:\n    def g(self):\n        pass\n',
+                     'old/place.py', 'exec')
+        cpathname = _testfile(importing.get_pyc_magic(space), 12345, co)
+        with open(cpathname, 'rb') as f:
+            f.seek(8)
+            pycode = importing.read_compiled_module(space, cpathname, f.read())
+        importing.update_code_filenames(space, pycode, 'new/place.py')
+        assert pycode.co_filename == 'new/place.py'
+        assert isinstance(pycode.co_consts_w[0], LazyCode)
+        w_dic = space.newdict()
+        pycode.exec_code(space, w_dic, w_dic)
+        w_res = space.appexec([w_dic], """(d):
+            return (d['f'].func_code.co_filename,
+                    d['A'].g.im_func.func_code.co_filename)
+        """)
+        assert space.unwrap(w_res) == ('new/place.py', 'new/place.py')
+
+
 def test_PYTHONPATH_takes_precedence(space):
     if sys.platform == "win32":
         py.test.skip("unresolved issues with win32 shell quoting rules")
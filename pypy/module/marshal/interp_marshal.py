@@ -53,6 +53,14 @@ ignored."""
     obj = u.load_w_obj()
     return obj
 
+def loads_lazily(space, data):
+    """Like loads(), for the marshal data of a module: the code objects
+    nested in the outermost one are left as LazyCode instances, see
+    pypy.interpreter.lazycode."""
+    u = StringUnmarshaller(space, space.newbytes(data))
+    u.lazy = True
+    return u.load_w_obj()
+
 
 class AbstractReaderWriter(object):
     def __init__(self, space):
@@ -338,6 +346,8 @@ class Unmarshaller(_Base):
         self.space = space
         self.reader = reader
         self.stringtable_w = []
+        self.lazy = False       # only for StringUnmarshaller
+        self.code_depth = 0     # how many code objects are being read
 
     def get(self, n):
         assert n >= 0
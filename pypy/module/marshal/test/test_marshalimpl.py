@@ -91,3 +91,83 @@ def test_long_more(space):
         for i in range(100):
             _marshal_check(sign * ((1L << i) - 1L))
             _marshal_check(sign * (1L << i))
+
+
+LAZY_SOURCE = '''\
+"the module"
+x = 42
+def f(a, b=2):
+    "doc of f"
+    def g(c):
+        return a + b + c + x
+    return g
+class C(object):
+    def m(self, a):
+        return {'a': a, 'key': (1.5, -3L, 2j, u'\\xe9', None, frozenset([1]))}
+def h(a):
+    return sorted(a)
+'''
+
+def _lazy_loads(space, source):
+    from pypy.interpreter.pycode import PyCode
+    w_code = space.appexec([space.wrap(source)], """(source):
+        import marshal
+        return marshal.dumps(compile(source, 'm.py', 'exec'))
+    """)
+    w_lazy = interp_marshal.loads_lazily(space, space.bytes_w(w_code))
+    assert isinstance(w_lazy, PyCode)
+    return w_code, w_lazy
+
+class TestLazyCode:
+    spaceconfig = {"objspace.lazycodeobjects": True}
+
+    def test_lazy_code(self, space):
+        from pypy.interpreter.lazycode import LazyCode
+        w_data, w_lazy = _lazy_loads(space, LAZY_SOURCE)
+        lazy = [w for w in w_lazy.co_consts_w if isinstance(w, LazyCode)]
+        assert [w.co_name for w in lazy] == ['f', 'C', 'h']
+        assert [w.w_code for w in lazy] == [None, None, None]
+        # materializing gives the same code objects as loading eagerly
+        w_eager = interp_marshal.loads(space, w_data)
+        assert space.eq_w(w_lazy, w_eager)
+        assert space.eq_w(interp_marshal.dumps(space, w_lazy, space.wrap(2)),
+                          w_data)
+        w_f = lazy[0].materialize()
+        assert lazy[0].materialize() is w_f
+        assert w_f.co_name == 'f'
+        # code objects nested deeper are lazy too
+        assert [w.co_name for w in w_f.co_consts_w
+                if isinstance(w, LazyCode)] == ['g']
+
+    def test_lazy_code_run(self, space):
+        from pypy.interpreter.lazycode import LazyCode
+        w_data, w_lazy = _lazy_loads(space, LAZY_SOURCE)
+        w_dict = space.newdict()
+        w_lazy.exec_code(space, w_dict, w_dict)
+        w_h = space.getitem(w_dict, space.wrap('h'))
+        assert isinstance(w_h.code, LazyCode)
+        w_res = space.call_function(w_h, space.wrap([3, 1, 2]))
+        assert space.unwrap(w_res) == [1, 2, 3]
+        assert not isinstance(w_h.code, LazyCode)
+        w_f = space.getitem(w_dict, space.wrap('f'))
+        assert space.unwrap(space.getattr(w_f, space.wrap('__doc__'))) == (
+            'doc of f')
+        w_res = space.call_function(space.call_function(w_f, space.wrap(1)),
+                                    space.wrap(3))
+        assert space.int_w(w_res) == 48
+        w_res = space.appexec([w_dict], """(d):
+            return d['C']().m(5)['a'], d['C'].m.func_code.co_name
+        """)
+        assert space.unwrap(w_res) == (5, 'm')
+
+    def test_lazy_code_interned_strings(self, space):
+        # 'a' is interned in the first function, and referred to by index
+        # in the following ones, which must still see it once materialized
+        source = ('def f(a): return a\n'
+                  'def g(a): return a\n'
+                  'def h(a): return a\n')
+        w_data, w_lazy = _lazy_loads(space, source)
+        w_eager = interp_marshal.loads(space, w_data)
+        w_lazy_h = w_lazy.co_consts_w[2].materialize()
+        assert w_lazy_h.co_varnames == ['a']
+        assert space.eq_w(w_lazy, w_eager)
@@ -4,7 +4,9 @@ from rpython.rlib.jit import JitHookInterface, Counters
 
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
-    WrappedOp, W_JitLoopInfo, wrap_oplist)
+    unwrap_greenkey, WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_warmup import (WarmupProfile, LOOP,
+    DONT_TRACE_HERE)
 
 class PyPyJitIface(JitHookInterface):
     def are_hooks_enabled(self):
@@ -12,7 +14,14 @@ class PyPyJitIface(JitHookInterface):
         cache = space.fromcache(Cache)
         return (cache.w_compile_hook is not None or
                 cache.w_abort_hook is not None or
-                cache.w_trace_too_long_hook is not None)
+                cache.w_trace_too_long_hook is not None or
+                space.fromcache(WarmupProfile).enabled)
+
+    def _record_warmup(self, jitdriver, greenkey, flag):
+        profile = self.space.fromcache(WarmupProfile)
+        if profile.enabled and jitdriver.name == 'pypyjit':
+            pycode, next_instr, is_being_profiled = unwrap_greenkey(greenkey)
+            profile.record(pycode, next_instr, is_being_profiled, flag)
 
 
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr, logops, operations):
@@ -37,6 +46,7 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def on_trace_too_long(self, jitdriver, greenkey, greenkey_repr):
+        self._record_warmup(jitdriver, greenkey, DONT_TRACE_HERE)
         space = self.space
         cache = space.fromcache(Cache)
         if cache.in_recursion:
@@ -54,6 +64,8 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        self._record_warmup(debug_info.get_jitdriver(), debug_info.greenkey,
+                            LOOP)
         self._compile_hook(debug_info, is_bridge=False)
 
     def after_compile_bridge(self, debug_info):
@@ -19,6 +19,7 @@ from pypy.interpreter.pyopcode import ExitFrame, Yield
 from pypy.interpreter.baseobjspace import W_Root
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app
+from pypy.module.pypyjit.interp_warmup import LOOP, DONT_TRACE_HERE
 from opcode import opmap
 
 
@@ -80,6 +81,8 @@ class __extend__(PyFrame):
         self = hint(self, access_directly=True)
         next_instr = r_uint(next_instr)
         is_being_profiled = self.get_is_being_profiled()
+        if pycode._jit_warmup is not None:    # quasi-immutable, usually None
+            _replay_warmup(pycode)
         try:
             while True:
                 pypyjitdriver.jit_merge_point(ec=ec,
@@ -116,6 +119,27 @@ class __extend__(PyFrame):
                                  is_being_profiled=self.get_is_being_profiled())
         return jumpto
 
+@dont_look_inside
+def _replay_warmup(pycode):
+    # the code object runs for the first time, and the JIT warm-up profile
+    # says where loops were compiled in a previous run: trace them now.
+    # This is not done when the code object is created, because the
+    # counters decay in the meantime.
+    positions = pycode._jit_warmup
+    pycode._jit_warmup = None
+    if positions is None:
+        return
+    ll_pycode = cast_instance_to_gcref(pycode)
+    for position, flags in positions.items():
+        next_instr = r_uint(position >> 1)
+        is_being_profiled = position & 1
+        if flags & LOOP:
+            jit_hooks.trace_next_iteration(
+                'pypyjit', next_instr, is_being_profiled, ll_pycode)
+        if flags & DONT_TRACE_HERE:
+            jit_hooks.dont_trace_here(
+                'pypyjit', next_instr, is_being_profiled, ll_pycode)
+
 def _get_adapted_tick_counter():
     # Normally, the tick counter is decremented by 100 for every
     # Python opcode.  Here, to better support JIT compilation of
@@ -255,6 +279,15 @@ def trace_next_iteration_hash(space, hash):
     jit_hooks.trace_next_iteration_hash('pypyjit', hash)
     return space.w_None
 
+@dont_look_inside
+def compile_deferred(space):
+    """ Optimize and assemble the loops that were traced but wait to be
+    compiled, because of the JIT parameter 'defer_compile'.  Call it at a
+    point where latency does not matter, e.g. between two requests.
+    Returns the number of loops compiled.
+    """
+    return space.newint(jit_hooks.stats_compile_deferred_loops(None))
+
 @dont_look_inside
 def releaseall(space):
     """ Mark all current machine code objects as ready to release.  They will
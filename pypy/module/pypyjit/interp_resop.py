@@ -30,16 +30,23 @@ class Cache(object):
         self.no += 1
         return self.no - 1
 
+def unwrap_greenkey(greenkey):
+    """ Returns (pycode, next_instr, is_being_profiled) from the greenkey
+    of the 'pypyjit' jitdriver
+    """
+    next_instr = greenkey[0].getint()
+    is_being_profiled = greenkey[1].getint()
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                     greenkey[2].getref_base())
+    pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+    return pycode, next_instr, is_being_profiled
+
 def wrap_greenkey(space, jitdriver, greenkey, greenkey_repr):
     if greenkey is None:
         return space.w_None
     jitdriver_name = jitdriver.name
     if jitdriver_name == 'pypyjit':
-        next_instr = greenkey[0].getint()
-        is_being_profiled = greenkey[1].getint()
-        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
-                                         greenkey[2].getref_base())
-        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        pycode, next_instr, is_being_profiled = unwrap_greenkey(greenkey)
         return space.newtuple([pycode, space.newint(next_instr),
                                space.newbool(bool(is_being_profiled))])
     else:
@@ -397,6 +404,25 @@ def get_stats_asmmemmgr(space):
     m2 = jit_hooks.stats_asmmemmgr_used(None)
     return space.newtuple2(space.newint(m1), space.newint(m2))
 
+def get_stats_memmgr(space):
+    """Returns a dict with statistics about the loops kept alive by the
+    JIT: 'alive_loops', the number of loops currently kept alive;
+    'evicted_loops', how many were freed because they were not used for a
+    while (see the 'loop_longevity' parameter) or because the machine code
+    was too large (see 'code_memory_limit'); 'evicted_for_code_size', how
+    many of them were freed for the second reason; and 'recompiled_loops',
+    how many loops were compiled again after being freed."""
+    w_stats = space.newdict()
+    space.setitem_str(w_stats, 'alive_loops',
+                      space.newint(jit_hooks.stats_memmgr_alive_loops(None)))
+    space.setitem_str(w_stats, 'evicted_loops',
+                      space.newint(jit_hooks.stats_memmgr_evicted_loops(None)))
+    space.setitem_str(w_stats, 'evicted_for_code_size',
+        space.newint(jit_hooks.stats_memmgr_evicted_for_code_size(None)))
+    space.setitem_str(w_stats, 'recompiled_loops',
+        space.newint(jit_hooks.stats_memmgr_recompiled_loops(None)))
+    return w_stats
+
 def enable_debug(space):
     """ Set the jit debugging - completely necessary for some stats to work,
     most notably assembler counters.
@@ -0,0 +1,162 @@
+""" A JIT warm-up profile: the positions in the bytecode for which the JIT
+compiled a loop, or decided not to inline the function, are recorded and
+can be saved to a file.  In the next run, loading the file makes these
+positions trace on the first time the code runs, instead of after the
+'threshold' or 'function_threshold' iterations.
+
+The positions are looked up by (filename, name, first line number, CRC-32
+of the bytecode) of the code objects, so a changed function is simply not
+found in the profile.  The CRC-32 is the same in every process, unlike
+compute_hash(), which is randomized with --hash=siphash24 and differs
+before and after translation.
+"""
+
+import os, errno
+
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rzipfile import crc32
+from rpython.rlib.rstring import StringBuilder
+from pypy.interpreter.error import wrap_oserror
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import CodeHookCache
+
+LOOP = 1                # a loop or a function entry was compiled here
+DONT_TRACE_HERE = 2     # the trace was too long: don't inline the function
+
+HEADER = "# PyPy JIT warm-up profile v2\n"
+
+
+def code_key(pycode):
+    """Returns the key of 'pycode' in the profile, or None if it cannot be
+    stored in the file."""
+    name = pycode.co_name
+    filename = pycode.co_filename
+    if '\t' in name or '\n' in name or '\t' in filename or '\n' in filename:
+        return None
+    return "%d\t%d\t%s\t%s" % (intmask(crc32(pycode.co_code)),
+                               pycode.co_firstlineno, name, filename)
+
+
+class WarmupProfile(object):
+    def __init__(self, space):
+        self.space = space
+        self.enabled = False
+        self.entries = {}     # code key -> {next_instr * 2 + profiled: flags}
+
+    def enable(self):
+        self.enabled = True
+        self.space.fromcache(CodeHookCache)._warmup_profile = self
+
+    def record(self, pycode, next_instr, is_being_profiled, flag):
+        key = code_key(pycode)
+        if key is None:
+            return
+        positions = self.entries.get(key, None)
+        if positions is None:
+            positions = {}
+            self.entries[key] = positions
+        position = next_instr * 2 + is_being_profiled
+        positions[position] = positions.get(position, 0) | flag
+
+    def new_code(self, pycode):
+        "Called for every new code object once the profile is enabled."
+        if not self.entries:
+            return
+        key = code_key(pycode)
+        if key is None:
+            return
+        positions = self.entries.get(key, None)
+        if positions is not None:
+            pycode._jit_warmup = positions
+
+    def load(self, data):
+        "Adds the entries from the content of a profile file."
+        count = 0
+        for line in data.split('\n'):
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split('\t', 3)
+            if len(fields) != 4:
+                continue
+            try:
+                flags = int(fields[0])
+                position = int(fields[1]) * 2 + int(fields[2])
+            except ValueError:
+                continue
+            if flags <= 0 or position < 0:
+                continue
+            key = fields[3]
+            positions = self.entries.get(key, None)
+            if positions is None:
+                positions = {}
+                self.entries[key] = positions
+            positions[position] = positions.get(position, 0) | flags
+            count += 1
+        return count
+
+    def dump(self):
+        builder = StringBuilder()
+        builder.append(HEADER)
+        for key, positions in self.entries.items():
+            for position, flags in positions.items():
+                builder.append("%d\t%d\t%d\t%s\n" % (flags, position >> 1,
+                                                     position & 1, key))
+        return builder.build()
+
+
+def _read_file(filename):
+    fd = os.open(filename, os.O_RDONLY, 0)
+    try:
+        parts = []
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            parts.append(data)
+    finally:
+        os.close(fd)
+    return ''.join(parts)
+
+def _write_file(filename, data):
+    # write a temporary file and rename it, so that several processes
+    # saving the profile at the same time don't produce a mixed file
+    tmpname = "%s.%d.tmp" % (filename, os.getpid())
+    fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0666)
+    try:
+        while data:
+            count = os.write(fd, data)
+            data = data[count:]
+    finally:
+        os.close(fd)
+    os.rename(tmpname, filename)
+
+@unwrap_spec(filename='fsencode')
+def load_warmup_profile(space, filename):
+    """load_warmup_profile(filename) -> number of entries loaded
+
+    Enable the JIT warm-up profile and load the entries of 'filename',
+    if it exists.  The loops that were compiled in the run that saved the
+    file are traced the first time their code runs, and the loops compiled
+    from now on are added to the profile."""
+    profile = space.fromcache(WarmupProfile)
+    profile.enable()
+    try:
+        data = _read_file(filename)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            return space.newint(0)
+        raise wrap_oserror(space, e, filename)
+    return space.newint(profile.load(data))
+
+@unwrap_spec(filename='fsencode')
+def save_warmup_profile(space, filename):
+    """save_warmup_profile(filename)
+
+    Write the JIT warm-up profile to 'filename'.  It contains the entries
+    loaded by load_warmup_profile() and the loops compiled since then."""
+    profile = space.fromcache(WarmupProfile)
+    try:
+        _write_file(filename, profile.dump())
+    except OSError as e:
+        raise wrap_oserror(space, e, filename)
+    return space.w_None
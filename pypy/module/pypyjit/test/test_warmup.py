@@ -0,0 +1,145 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import PyCode, CodeHookCache
+from rpython.jit.metainterp.history import ConstInt, ConstPtr
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+from pypy.module.pypyjit.interp_warmup import (WarmupProfile, LOOP,
+    DONT_TRACE_HERE, code_key)
+from pypy.module.pypyjit.hooks import pypy_hooks
+
+
+def test_load_and_dump():
+    class FakeSpace(object):
+        def fromcache(self, cls):
+            return cache
+    cache = CodeHookCache(None)
+    profile = WarmupProfile(FakeSpace())
+    assert profile.load("# comment\n"
+                        "1\t10\t0\t42\t3\tf\tfile.py\n"
+                        "2\t10\t0\t42\t3\tf\tfile.py\n"
+                        "3\t0\t1\t43\t5\tg\tname\twith tab.py\n"
+                        "x\t0\t1\t43\t5\tg\tfile.py\n"
+                        "1\t0\n") == 3
+    assert profile.entries == {"42\t3\tf\tfile.py": {20: 3},
+                               "43\t5\tg\tname\twith tab.py": {1: 3}}
+    dumped = profile.dump()
+    assert dumped.startswith("# PyPy JIT warm-up profile")
+    assert sorted(dumped.splitlines()[1:]) == [
+        "3\t0\t1\t43\t5\tg\tname\twith tab.py",
+        "3\t10\t0\t42\t3\tf\tfile.py"]
+    profile2 = WarmupProfile(FakeSpace())
+    assert profile2.load(dumped) == 2
+    assert profile2.entries == profile.entries
+    assert cache._warmup_profile is None
+    profile.enable()
+    assert cache._warmup_profile is profile
+
+def test_code_key_is_stable():
+    # the key must not depend on the process: it is the CRC-32 of the
+    # bytecode, 0x352441c2 for 'abc', and not a randomized hash
+    class FakeCode(object):
+        co_code = 'abc'
+        co_firstlineno = 3
+        co_name = 'f'
+        co_filename = 'file.py'
+    key = code_key(FakeCode())
+    assert key == "891568578\t3\tf\tfile.py"
+    class FakeSpace(object):
+        def fromcache(self, cls):
+            return CodeHookCache(None)
+    profile = WarmupProfile(FakeSpace())
+    profile.record(FakeCode(), 10, 0, LOOP)
+    # what a later process finds after loading the saved file
+    profile2 = WarmupProfile(FakeSpace())
+    assert profile2.load(profile.dump()) == 1
+    assert profile2.entries[code_key(FakeCode())] == {20: LOOP}
+
+
+class AppTestWarmupProfile(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+
+        def greenkey(pycode, next_instr, is_being_profiled):
+            return [ConstInt(next_instr), ConstInt(is_being_profiled),
+                    ConstPtr(cast_instance_to_gcref(pycode))]
+
+        @unwrap_spec(w_code=PyCode, next_instr=int)
+        def interp_trace_too_long(space, w_code, next_instr):
+            if pypy_hooks.are_hooks_enabled():
+                pypy_hooks.on_trace_too_long(pypyjitdriver,
+                    greenkey(w_code, next_instr, 0), 'blah')
+
+        @unwrap_spec(w_code=PyCode, next_instr=int)
+        def interp_compiled(space, w_code, next_instr):
+            profile = space.fromcache(WarmupProfile)
+            if pypy_hooks.are_hooks_enabled() and profile.enabled:
+                # what after_compile() records, without a real loop
+                pypy_hooks._record_warmup(pypyjitdriver,
+                    greenkey(w_code, next_instr, 1), LOOP)
+
+        @unwrap_spec(w_code=PyCode)
+        def interp_get_warmup(space, w_code):
+            positions = w_code._jit_warmup
+            if positions is None:
+                return space.w_None
+            return space.newlist([space.newtuple2(space.newint(position),
+                                                  space.newint(flags))
+                                  for position, flags in positions.items()])
+
+        def interp_forget(space):
+            space.fromcache(WarmupProfile).entries.clear()
+
+        cls.w_trace_too_long = space.wrap(interp2app(interp_trace_too_long))
+        cls.w_compiled = space.wrap(interp2app(interp_compiled))
+        cls.w_get_warmup = space.wrap(interp2app(interp_get_warmup))
+        cls.w_forget = space.wrap(interp2app(interp_forget))
+        cls.w_tmpfile = space.wrap(str(py.test.ensuretemp("warmup")
+                                       .join("profile")))
+
+    def teardown_class(cls):
+        if not cls.runappdirect:
+            profile = cls.space.fromcache(WarmupProfile)
+            profile.enabled = False
+            profile.entries.clear()
+            cls.space.fromcache(CodeHookCache)._warmup_profile = None
+
+    def test_save_and_load(self):
+        import pypyjit, os
+        assert pypyjit.load_warmup_profile(self.tmpfile + ".missing") == 0
+        source = "def f():\n    pass\ndef g():\n    pass\n"
+        ns = {}
+        exec compile(source, "warmup_test.py", "exec") in ns
+        self.compiled(ns['f'].func_code, 6)
+        self.trace_too_long(ns['f'].func_code, 0)
+        self.compiled(ns['f'].func_code, 6)
+        pypyjit.save_warmup_profile(self.tmpfile)
+        with open(self.tmpfile) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 3
+        assert lines[0].startswith('#')
+        assert sorted(line.split('\t')[:3] for line in lines[1:]) == [
+            ['1', '6', '1'], ['2', '0', '0']]
+        assert not [name for name in os.listdir(os.path.dirname(self.tmpfile))
+                    if name.endswith('.tmp')]
+        #
+        self.forget()
+        assert pypyjit.load_warmup_profile(self.tmpfile) == 2
+        code = compile(source, "warmup_test.py", "exec")
+        f_code, g_code = [c for c in code.co_consts
+                          if isinstance(c, type(code))]
+        assert sorted(self.get_warmup(f_code)) == [(0, 2), (13, 1)]
+        assert self.get_warmup(g_code) is None
+        # a changed function is not found
+        code = compile(source.replace("pass", "return 1"),
+                       "warmup_test.py", "exec")
+        assert self.get_warmup(code.co_consts[0]) is None
+
+    def test_load_error(self):
+        import pypyjit, os
+        raises(OSError, pypyjit.load_warmup_profile,
+               os.path.dirname(self.tmpfile))
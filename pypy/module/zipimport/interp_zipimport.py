@@ -6,8 +6,12 @@ from pypy.interpreter.typedef import TypeDef, GetSetProperty
 from pypy.interpreter.module import Module
 from pypy.module.imp import importing
 from pypy.module.zlib.interp_zlib import zlib_error
+from rpython.rlib import rmmap
+from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rmmap import RMMapError
+from rpython.rlib.streamio import O_BINARY
 from rpython.rlib.unroll import unrolling_iterable
-from rpython.rlib.rzipfile import RZipFile, BadZipfile
+from rpython.rlib.rzipfile import RZipFile, BadZipfile, ZIP_STORED
 from rpython.rlib.rzlib import RZlibError
 import os
 import stat
@@ -16,6 +20,10 @@ ZIPSEP = '/'
 # note that zipfiles always use slash, but for OSes with other
 # separators, we need to pretend that we had the os.sep.
 
+# the index of 'foo.zip' is written in 'foo.zip.pypyidx', like the .pyc
+# files, and makes the following processes open the archive faster
+INDEX_SUFFIX = '.pypyidx'
+
 ENUMERATE_EXTS = unrolling_iterable(
     [(True, True, ZIPSEP + '__init__.pyc'),
      (True, True, ZIPSEP + '__init__.pyo'),
@@ -121,6 +129,38 @@ class W_ZipImporter(W_Root):
         self.filename = filename
         self.zip_file = zip_file
         self.prefix = prefix
+        self.mmap = None
+        self.mmap_failed = False
+
+    def _get_mmap(self):
+        if self.mmap is None and not self.mmap_failed:
+            try:
+                fd = os.open(self.filename, os.O_RDONLY, 0)
+                try:
+                    self.mmap = rmmap.mmap(fd, 0, access=rmmap.ACCESS_READ)
+                finally:
+                    os.close(fd)
+            except (OSError, RMMapError):
+                self.mmap_failed = True
+        return self.mmap
+
+    def read_member(self, filename):
+        """Return the data of a member of the archive.  The members that
+        are stored without compression are read directly from a mapping
+        of the archive."""
+        info = self.zip_file.getinfo(filename)
+        if info.compress_type == ZIP_STORED:
+            mmap = self._get_mmap()
+            start = info.file_offset
+            size = intmask(info.compress_size)
+            # if the archive was changed since, read it as usual
+            if (mmap is not None and 0 <= start and 0 <= size and
+                    start + size <= mmap.size and
+                    mmap.file_size() == mmap.size):
+                data = mmap.getslice(start, size)
+                self.zip_file.check_crc(info, data)
+                return data
+        return self.zip_file.read(filename)
 
     def getprefix(self, space):
         if ZIPSEP == os.path.sep:
@@ -248,7 +288,7 @@ class W_ZipImporter(W_Root):
         for compiled, is_package, ext in ENUMERATE_EXTS:
             fname = filename + ext
             try:
-                buf = self.zip_file.read(fname)
+                buf = self.read_member(fname)
             except (KeyError, OSError, BadZipfile):
                 pass
             except RZlibError as e:
@@ -287,7 +327,7 @@ class W_ZipImporter(W_Root):
     def get_data(self, space, filename):
         filename = self._find_relative_path(filename)
         try:
-            data = self.zip_file.read(filename)
+            data = self.read_member(filename)
             return space.newbytes(data)
         except (KeyError, OSError, BadZipfile):
             raise oefmt(space.w_IOError, "Error reading file")
@@ -390,8 +430,9 @@ def descr_new_zipimporter(space, w_type, name):
                         "already tried and failed", name)
     except KeyError:
         zip_cache.cache[filename] = None
+    index = _read_index(filename + INDEX_SUFFIX)
     try:
-        zip_file = RZipFile(filename, 'r')
+        zip_file = RZipFile(filename, 'r', index=index)
     except (BadZipfile, OSError):
         raise oefmt(get_error(space), "%s seems not to be a zipfile", filename)
     except RZlibError as e:
@@ -404,10 +445,53 @@ def descr_new_zipimporter(space, w_type, name):
         prefix = prefix[1:]
     if prefix and not prefix.endswith(ZIPSEP) and not prefix.endswith(os.path.sep):
         prefix += ZIPSEP
+    if (not zip_file.index_used and
+            not space.is_true(space.sys.get('dont_write_bytecode'))):
+        _write_index(filename + INDEX_SUFFIX, zip_file)
     w_result = W_ZipImporter(space, name, filename, zip_file, prefix)
     zip_cache.set(filename, w_result)
     return w_result
 
+def _read_index(indexname):
+    try:
+        fd = os.open(indexname, os.O_RDONLY | O_BINARY, 0)
+    except OSError:
+        return None
+    try:
+        try:
+            parts = []
+            while True:
+                data = os.read(fd, 65536)
+                if not data:
+                    break
+                parts.append(data)
+        except OSError:
+            return None
+    finally:
+        os.close(fd)
+    return ''.join(parts)
+
+def _write_index(indexname, zip_file):
+    # errors are ignored; the index is written in a temporary file first,
+    # so that other processes never see a partial one
+    tmpname = '%s.%d' % (indexname, os.getpid())
+    try:
+        fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | O_BINARY,
+                     0644)
+        try:
+            data = zip_file.get_index()
+            while data:
+                count = os.write(fd, data)
+                data = data[count:]
+        finally:
+            os.close(fd)
+        os.rename(tmpname, indexname)
+    except OSError:
+        try:
+            os.unlink(tmpname)
+        except OSError:
+            pass
+
 W_ZipImporter.typedef = TypeDef(
     'zipimporter',
     __new__     = interp2app(descr_new_zipimporter),
@@ -7,6 +7,8 @@ import shutil
 import time
 import zipfile
 
+from rpython.tool.udir import udir
+
 TESTFN = '@test'
 
 created_paths = dict.fromkeys(['_top_level',
@@ -25,6 +27,15 @@ class AppTestZipImport:
     def setup_class(cls):
         cls.w_created_paths = cls.space.wrap(created_paths)
 
+    def setup_method(self, meth):
+        # the tests create their files in the current directory, and
+        # zipimporter writes the index of the archive next to it
+        self.old_cwd = os.getcwd()
+        os.chdir(str(udir.ensure('zipimport_undocumented', dir=1)))
+
+    def teardown_method(self, meth):
+        os.chdir(self.old_cwd)
+
     def w_temp_zipfile(self, created_paths, source=True, bytecode=True):
         """Create a temporary zip file for testing.
 
@@ -347,6 +347,44 @@ class AppTestZipimport:
         k = zipimport._zip_directory_cache[l[0]].keys()
         assert k[0] == os.path.sep.join(['directory','package','__init__.py'])
 
+    def test_index(self):
+        import os, sys
+        import zipimport
+        self.writefile("one.py", "x = 1")
+        self.writefile("two.py", "x = 2")
+        indexname = self.zipfile + '.pypyidx'
+        importer = zipimport.zipimporter(self.zipfile)
+        assert os.path.exists(indexname)
+        # the index is used by the next importers, and ignored when the
+        # archive changes
+        del zipimport._zip_directory_cache[self.zipfile]
+        importer = zipimport.zipimporter(self.zipfile)
+        assert importer.get_data('two.py') == 'x = 2'
+        self.writefile("three.py", "x = 3")
+        del zipimport._zip_directory_cache[self.zipfile]
+        importer = zipimport.zipimporter(self.zipfile)
+        assert importer.get_data('two.py') == 'x = 2'
+        assert importer.get_data('three.py') == 'x = 3'
+        assert importer.load_module('three').x == 3
+        # a broken index is ignored too
+        with open(indexname, 'wb') as f:
+            f.write('RZIPIDX1' + '\xff' * 16)
+        del zipimport._zip_directory_cache[self.zipfile]
+        importer = zipimport.zipimporter(self.zipfile)
+        assert importer.load_module('one').x == 1
+
+    def test_index_dont_write_bytecode(self):
+        import os, sys
+        import zipimport
+        self.writefile("one.py", "x = 1")
+        sys.dont_write_bytecode = True
+        try:
+            importer = zipimport.zipimporter(self.zipfile)
+        finally:
+            sys.dont_write_bytecode = False
+        assert not os.path.exists(self.zipfile + '.pypyidx')
+        assert importer.load_module('one').x == 1
+
     def test_path_hooks(self):
         import sys
         import zipimport
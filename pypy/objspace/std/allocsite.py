@@ -0,0 +1,72 @@
+"""Size feedback for the dicts and sets built by BUILD_MAP and BUILD_SET.
+
+With the 'withallocsitefeedback' option, every BUILD_MAP and BUILD_SET
+instruction of a code object gets an AllocationSite.  The site watches the
+first few dicts (or sets) it creates, through a weakref, and looks at their
+length when the instruction runs again.  The smallest length seen becomes
+the size hint of the site.  Later empty dicts and sets built there carry the
+site in their empty storage, and are presized to the hint when the first
+item is added, instead of being resized several times while they grow.
+"""
+
+import weakref
+
+from rpython.rlib import jit
+from rpython.rlib.rweakref import dead_ref
+
+from pypy.tool.stdlib_opcode import opcodedesc, HAVE_ARGUMENT
+
+# how many dicts or sets of a site are looked at before its hint is fixed
+NUM_SAMPLES = 4
+
+
+class AllocationSite(object):
+    """The size feedback of a single BUILD_MAP or BUILD_SET instruction."""
+
+    def __init__(self):
+        self.sizehint = 0
+        self.samples = 0
+        self.last_ref = dead_ref
+
+    def observe(self, space, w_obj):
+        """ called with every new object built at this site """
+        if self.samples >= NUM_SAMPLES:
+            return
+        w_prev = self.last_ref()
+        if w_prev is not None:
+            size = space.len_w(w_prev)
+            if self.samples == 0 or size < self.sizehint:
+                self.sizehint = size
+            self.samples += 1
+        if self.samples < NUM_SAMPLES:
+            self.last_ref = weakref.ref(w_obj)
+        else:
+            self.last_ref = dead_ref
+
+    def __repr__(self):
+        return "<AllocationSite sizehint=%d samples=%d>" % (
+            self.sizehint, self.samples)
+
+
+def init_alloc_sites(pycode):
+    if not pycode.space.config.objspace.std.withallocsitefeedback:
+        pycode._alloc_sites = None
+        return
+    sites = {}
+    code = pycode.co_code
+    i = 0
+    while i < len(code):
+        op = ord(code[i])
+        if (op == opcodedesc.BUILD_MAP.index or
+                op == opcodedesc.BUILD_SET.index):
+            sites[i] = AllocationSite()
+        if op >= HAVE_ARGUMENT:
+            i += 3
+        else:
+            i += 1
+    pycode._alloc_sites = sites
+
+@jit.elidable
+def get_alloc_site(pycode, offset):
+    return pycode._alloc_sites.get(offset, None)
+
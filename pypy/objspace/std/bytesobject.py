@@ -125,6 +125,15 @@ class W_AbstractBytesObject(W_Root):
     def descr_str(self, space):
         """x.__str__() <==> str(x)"""
 
+    def descr_getbuffer(self, space, w_flags):
+        """x.__buffer__(flags) -> buffer"""
+
+    def descr_formatter_parser(self, space):
+        pass
+
+    def descr_formatter_field_name_split(self, space):
+        pass
+
     def descr_capitalize(self, space):
         """S.capitalize() -> string
 
@@ -502,7 +511,7 @@ class W_BytesObject(W_AbstractBytesObject):
     @staticmethod
     def _use_rstr_ops(space, w_other):
         from pypy.objspace.std.unicodeobject import W_UnicodeObject
-        return (isinstance(w_other, W_BytesObject) or
+        return (isinstance(w_other, W_AbstractBytesObject) or
                 isinstance(w_other, W_UnicodeObject))
 
     @staticmethod
@@ -614,35 +623,58 @@ class W_BytesObject(W_AbstractBytesObject):
     def descr_rmod(self, space, w_values):
         return mod_format(space, w_values, self, do_unicode=False)
 
+    @staticmethod
+    def _bytes_value(space, w_other):
+        """Return the value of w_other if it is a str, including the string
+        buffers of the 'withstrbuf' option and the slices of the
+        'withstrslice' option, or None."""
+        if isinstance(w_other, W_BytesObject):
+            return w_other._value
+        if space.config.objspace.std.withstrbuf:
+            from pypy.objspace.std.strbufobject import W_StringBufferObject
+            if isinstance(w_other, W_StringBufferObject):
+                return w_other.force()
+        if space.config.objspace.std.withstrslice:
+            from pypy.objspace.std.strsliceobject import W_StringSliceObject
+            if isinstance(w_other, W_StringSliceObject):
+                return w_other.force()
+        return None
+
     def descr_eq(self, space, w_other):
-        if not isinstance(w_other, W_BytesObject):
+        other = self._bytes_value(space, w_other)
+        if other is None:
             return space.w_NotImplemented
-        return space.newbool(self._value == w_other._value)
+        return space.newbool(self._value == other)
 
     def descr_ne(self, space, w_other):
-        if not isinstance(w_other, W_BytesObject):
+        other = self._bytes_value(space, w_other)
+        if other is None:
             return space.w_NotImplemented
-        return space.newbool(self._value != w_other._value)
+        return space.newbool(self._value != other)
 
     def descr_lt(self, space, w_other):
-        if not isinstance(w_other, W_BytesObject):
+        other = self._bytes_value(space, w_other)
+        if other is None:
             return space.w_NotImplemented
-        return space.newbool(self._value < w_other._value)
+        return space.newbool(self._value < other)
 
     def descr_le(self, space, w_other):
-        if not isinstance(w_other, W_BytesObject):
+        other = self._bytes_value(space, w_other)
+        if other is None:
             return space.w_NotImplemented
-        return space.newbool(self._value <= w_other._value)
+        return space.newbool(self._value <= other)
 
     def descr_gt(self, space, w_other):
-        if not isinstance(w_other, W_BytesObject):
+        other = self._bytes_value(space, w_other)
+        if other is None:
             return space.w_NotImplemented
-        return space.newbool(self._value > w_other._value)
+        return space.newbool(self._value > other)
 
     def descr_ge(self, space, w_other):
-        if not isinstance(w_other, W_BytesObject):
+        other = self._bytes_value(space, w_other)
+        if other is None:
             return space.w_NotImplemented
-        return space.newbool(self._value >= w_other._value)
+        return space.newbool(self._value >= other)
 
     # auto-conversion fun
 
@@ -657,8 +689,22 @@ class W_BytesObject(W_AbstractBytesObject):
             from .bytearrayobject import W_BytearrayObject, _make_data
             self_as_bytearray = W_BytearrayObject(_make_data(self._value))
             return space.add(self_as_bytearray, w_other)
+        if space.config.objspace.std.withstrbuf:
+            from pypy.objspace.std.strbufobject import new_string_buffer
+            # not self._op_val(), which would accept any buffer
+            other = self._bytes_value(space, w_other)
+            if other is None:
+                return space.w_NotImplemented
+            return new_string_buffer(self._value, other)
         return self._StringMethods_descr_add(space, w_other)
 
+    _StringMethods__sliced = _sliced
+    def _sliced(self, space, s, start, stop, orig_obj):
+        if space.config.objspace.std.withstrslice:
+            from pypy.objspace.std.strsliceobject import new_string_slice
+            return new_string_slice(s, start, stop)
+        return self._StringMethods__sliced(space, s, start, stop, orig_obj)
+
     _StringMethods__startswith = _startswith
     def _startswith(self, space, value, w_prefix, start, end):
         if space.isinstance_w(w_prefix, space.w_unicode):
@@ -923,17 +969,19 @@ W_BytesObject.typedef = TypeDef(
     translate = interpindirect2app(W_AbstractBytesObject.descr_translate),
     upper = interpindirect2app(W_AbstractBytesObject.descr_upper),
     zfill = interpindirect2app(W_AbstractBytesObject.descr_zfill),
-    __buffer__ = interp2app(W_BytesObject.descr_getbuffer),
+    __buffer__ = interpindirect2app(W_AbstractBytesObject.descr_getbuffer),
 
-    format = interpindirect2app(W_BytesObject.descr_format),
-    __format__ = interpindirect2app(W_BytesObject.descr__format__),
-    __mod__ = interpindirect2app(W_BytesObject.descr_mod),
-    __rmod__ = interpindirect2app(W_BytesObject.descr_rmod),
+    format = interpindirect2app(W_AbstractBytesObject.descr_format),
+    __format__ = interpindirect2app(W_AbstractBytesObject.descr__format__),
+    __mod__ = interpindirect2app(W_AbstractBytesObject.descr_mod),
+    __rmod__ = interpindirect2app(W_AbstractBytesObject.descr_rmod),
     __getnewargs__ = interpindirect2app(
         W_AbstractBytesObject.descr_getnewargs),
-    _formatter_parser = interp2app(W_BytesObject.descr_formatter_parser),
+    _formatter_parser =
+        interpindirect2app(W_AbstractBytesObject.descr_formatter_parser),
     _formatter_field_name_split =
-        interp2app(W_BytesObject.descr_formatter_field_name_split),
+        interpindirect2app(
+            W_AbstractBytesObject.descr_formatter_field_name_split),
 )
 W_BytesObject.typedef.flag_sequence_bug_compat = True
 
@@ -729,23 +729,36 @@ class EmptyDictStrategy(DictStrategy):
     def get_empty_storage(self):
         return self.erase(None)
 
-    def switch_to_correct_strategy(self, w_dict, w_key):
+    def _presize(self, w_dict, site):
+        # the storage of dicts built by BUILD_MAP can hold their
+        # AllocationSite, see allocsite.py
+        if site is not None:
+            w_dict.get_strategy().prepare_update(w_dict, site.sizehint)
+
+    def switch_to_correct_strategy(self, w_dict, w_key, w_value=None):
         if type(w_key) is self.space.StringObjectCls:
-            self.switch_to_bytes_strategy(w_dict)
+            self.switch_to_bytes_strategy(w_dict, w_value)
             return
         elif type(w_key) is self.space.UnicodeObjectCls:
             self.switch_to_unicode_strategy(w_dict)
             return
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
-            self.switch_to_int_strategy(w_dict)
+            self.switch_to_int_strategy(w_dict, w_value)
         elif w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
             self.switch_to_object_strategy(w_dict)
 
-    def switch_to_bytes_strategy(self, w_dict):
-        strategy = self.space.fromcache(BytesDictStrategy)
+    def switch_to_bytes_strategy(self, w_dict, w_value=None):
+        space = self.space
+        strategy = space.fromcache(BytesDictStrategy)
+        if (w_value is not None and
+                space.config.objspace.std.withunboxeddictvalues):
+            if type(w_value) is space.IntObjectCls:
+                strategy = space.fromcache(BytesIntDictStrategy)
+            elif type(w_value) is space.FloatObjectCls:
+                strategy = space.fromcache(BytesFloatDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
@@ -756,8 +769,13 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
 
-    def switch_to_int_strategy(self, w_dict):
-        strategy = self.space.fromcache(IntDictStrategy)
+    def switch_to_int_strategy(self, w_dict, w_value=None):
+        space = self.space
+        strategy = space.fromcache(IntDictStrategy)
+        if (w_value is not None and
+                space.config.objspace.std.withunboxeddictvalues and
+                type(w_value) is space.IntObjectCls):
+            strategy = space.fromcache(IntIntDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
         w_dict.dstorage = storage
@@ -788,16 +806,22 @@ class EmptyDictStrategy(DictStrategy):
 
     def setdefault(self, w_dict, w_key, w_default):
         # here the dict is always empty
-        self.switch_to_correct_strategy(w_dict, w_key)
+        site = self.unerase(w_dict.dstorage)
+        self.switch_to_correct_strategy(w_dict, w_key, w_default)
+        self._presize(w_dict, site)
         w_dict.setitem(w_key, w_default)
         return w_default
 
     def setitem(self, w_dict, w_key, w_value):
-        self.switch_to_correct_strategy(w_dict, w_key)
+        site = self.unerase(w_dict.dstorage)
+        self.switch_to_correct_strategy(w_dict, w_key, w_value)
+        self._presize(w_dict, site)
         w_dict.setitem(w_key, w_value)
 
     def setitem_str(self, w_dict, key, w_value):
-        self.switch_to_bytes_strategy(w_dict)
+        site = self.unerase(w_dict.dstorage)
+        self.switch_to_bytes_strategy(w_dict, w_value)
+        self._presize(w_dict, site)
         w_dict.setitem_str(key, w_value)
 
     def delitem(self, w_dict, w_key):
@@ -1409,6 +1433,274 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 create_iterator_classes(IntDictStrategy)
 
 
+class AbstractTypedValueStrategy(object):
+    """Mixin for strategies that store the values unwrapped too, in addition
+    to the keys.  Storing a value of another type devolves the dict to the
+    strategy returned by get_key_strategy(), which only unwraps the keys.
+    Enabled by the 'withunboxeddictvalues' option."""
+    _mixin_ = True
+
+    def wrap_value(self, value):
+        raise NotImplementedError("abstract base class")
+
+    def unwrap_value(self, w_value):
+        raise NotImplementedError("abstract base class")
+
+    def is_correct_value_type(self, w_value):
+        raise NotImplementedError("abstract base class")
+
+    def get_key_strategy(self):
+        raise NotImplementedError("abstract base class")
+
+    def setitem(self, w_dict, w_key, w_value):
+        if self.is_correct_type(w_key):
+            if self.is_correct_value_type(w_value):
+                d = self.unerase(w_dict.dstorage)
+                d[self.unwrap(w_key)] = self.unwrap_value(w_value)
+                return
+            self.switch_to_key_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        w_dict.setitem(w_key, w_value)
+
+    def setdefault(self, w_dict, w_key, w_default):
+        if self.is_correct_type(w_key):
+            d = self.unerase(w_dict.dstorage)
+            key = self.unwrap(w_key)
+            if self.is_correct_value_type(w_default):
+                return self.wrap_value(
+                    d.setdefault(key, self.unwrap_value(w_default)))
+            if key in d:
+                return self.wrap_value(d[key])
+            self.switch_to_key_strategy(w_dict)
+        else:
+            self.switch_to_object_strategy(w_dict)
+        return w_dict.setdefault(w_key, w_default)
+
+    def getitem(self, w_dict, w_key):
+        return self._getitem_typed(w_dict, w_key)
+
+    def _getitem_typed(self, w_dict, w_key):
+        space = self.space
+        if self.is_correct_type(w_key):
+            d = self.unerase(w_dict.dstorage)
+            try:
+                value = d[self.unwrap(w_key)]
+            except KeyError:
+                return None
+            return self.wrap_value(value)
+        elif self._never_equal_to(space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def values(self, w_dict):
+        return [self.wrap_value(value)
+                for value in self.unerase(w_dict.dstorage).itervalues()]
+
+    def items(self, w_dict):
+        space = self.space
+        dict_w = self.unerase(w_dict.dstorage)
+        return [space.newtuple2(self.wrap(key), self.wrap_value(value))
+                for (key, value) in dict_w.iteritems()]
+
+    def popitem(self, w_dict):
+        key, value = self.unerase(w_dict.dstorage).popitem()
+        return (self.wrap(key), self.wrap_value(value))
+
+    def pop(self, w_dict, w_key, w_default):
+        space = self.space
+        if self.is_correct_type(w_key):
+            d = self.unerase(w_dict.dstorage)
+            key = self.unwrap(w_key)
+            if key in d:
+                return self.wrap_value(d.pop(key))
+            if w_default is None:
+                raise KeyError
+            return w_default
+        elif self._never_equal_to(space.type(w_key)):
+            if w_default is not None:
+                return w_default
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.get_strategy().pop(w_dict, w_key, w_default)
+
+    def switch_to_object_strategy(self, w_dict):
+        d = self.unerase(w_dict.dstorage)
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, value in d.iteritems():
+            d_new[self.wrap(key)] = self.wrap_value(value)
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+    def switch_to_key_strategy(self, w_dict):
+        d = self.unerase(w_dict.dstorage)
+        strategy = self.get_key_strategy()
+        d_new = strategy.unerase(strategy.get_empty_storage())
+        for key, value, keyhash in objectmodel.iteritems_with_hash(d):
+            objectmodel.setitem_with_hash(d_new, key, keyhash,
+                                          self.wrap_value(value))
+        w_dict.set_strategy(strategy)
+        w_dict.dstorage = strategy.erase(d_new)
+
+
+class IntIntDictStrategy(AbstractTypedValueStrategy, AbstractTypedStrategy,
+                         DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("intint")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.newint(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.int_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_int)
+
+    def is_correct_value_type(self, w_value):
+        return type(w_value) is self.space.IntObjectCls
+
+    def unwrap_value(self, w_value):
+        return self.space.int_w(w_value)
+
+    def wrap_value(self, value):
+        return self.space.newint(value)
+
+    def get_key_strategy(self):
+        return self.space.fromcache(IntDictStrategy)
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_bytes) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def listview_int(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def wrapkey(space, key):
+        return space.newint(key)
+
+    def wrapvalue(space, value):
+        return space.newint(value)
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_int(self.listview_int(w_dict))
+
+create_iterator_classes(IntIntDictStrategy)
+
+
+class AbstractBytesKeyValueStrategy(object):
+    """Bytes-keyed part of BytesIntDictStrategy and BytesFloatDictStrategy,
+    with the same shortcuts as BytesDictStrategy."""
+    _mixin_ = True
+
+    def wrap(self, unwrapped):
+        return self.space.newbytes(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.bytes_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_bytes)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_key_strategy(self):
+        return self.space.fromcache(BytesDictStrategy)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def setitem_str(self, w_dict, key, w_value):
+        assert key is not None
+        if self.is_correct_value_type(w_value):
+            self.unerase(w_dict.dstorage)[key] = self.unwrap_value(w_value)
+            return
+        self.switch_to_key_strategy(w_dict)
+        w_dict.setitem_str(key, w_value)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if type(w_key) is space.StringObjectCls:
+            return self.getitem_str(w_dict, w_key.unwrap(space))
+        return self._getitem_typed(w_dict, w_key)
+
+    def getitem_str(self, w_dict, key):
+        assert key is not None
+        d = self.unerase(w_dict.dstorage)
+        try:
+            value = d[key]
+        except KeyError:
+            return None
+        return self.wrap_value(value)
+
+    def listview_bytes(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_bytes(self.listview_bytes(w_dict))
+
+    def wrapkey(space, key):
+        return space.newbytes(key)
+
+
+class BytesIntDictStrategy(AbstractBytesKeyValueStrategy,
+                           AbstractTypedValueStrategy, AbstractTypedStrategy,
+                           DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("bytesint")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_value_type(self, w_value):
+        return type(w_value) is self.space.IntObjectCls
+
+    def unwrap_value(self, w_value):
+        return self.space.int_w(w_value)
+
+    def wrap_value(self, value):
+        return self.space.newint(value)
+
+    def wrapvalue(space, value):
+        return space.newint(value)
+
+create_iterator_classes(BytesIntDictStrategy)
+
+
+class BytesFloatDictStrategy(AbstractBytesKeyValueStrategy,
+                             AbstractTypedValueStrategy, AbstractTypedStrategy,
+                             DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("bytesfloat")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_value_type(self, w_value):
+        return type(w_value) is self.space.FloatObjectCls
+
+    def unwrap_value(self, w_value):
+        return self.space.float_w(w_value)
+
+    def wrap_value(self, value):
+        return self.space.newfloat(value)
+
+    def wrapvalue(space, value):
+        return space.newfloat(value)
+
+create_iterator_classes(BytesFloatDictStrategy)
+
+
 def update1(space, w_dict, w_data):
     if isinstance(w_data, W_DictMultiObject):    # optimization case only
         update1_dict_dict(space, w_dict, w_data)
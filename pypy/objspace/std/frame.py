@@ -2,13 +2,17 @@
 
 import operator
 
+from rpython.rlib import jit
 from rpython.rlib.rarithmetic import ovfcheck
 from rpython.tool.sourcetools import func_renamer
 
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.error import oefmt
+from pypy.objspace.std.allocsite import get_alloc_site
+from pypy.objspace.std.dictmultiobject import W_DictObject, EmptyDictStrategy
 from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.listobject import W_ListObject
+from pypy.objspace.std.setobject import W_SetObject, EmptySetStrategy
 
 
 class BaseFrame(PyFrame):
@@ -60,6 +64,51 @@ int_BINARY_SUBTRACT = _intshortcut('sub')
 int_INPLACE_SUBTRACT = _intshortcut('inplace_sub')
 
 
+def int_ADD_FAST_FAST(self, oparg, next_instr):
+    space = self.space
+    w_1 = self._load_fast_checked(oparg & 0xFF)
+    w_2 = self._load_fast_checked(oparg >> 8)
+    if type(w_1) is W_IntObject and type(w_2) is W_IntObject:
+        try:
+            z = ovfcheck(w_1.intval + w_2.intval)
+        except OverflowError:
+            w_result = w_1.descr_add(space, w_2)
+        else:
+            w_result = space.newint(z)
+    else:
+        w_result = space.add(w_1, w_2)
+    self.pushvalue(w_result)
+
+
+def int_COMPARE_POP_JUMP_IF_FALSE(self, oparg, next_instr):
+    testnum = oparg & 0xF
+    if testnum <= 5:
+        w_2 = self.peekvalue(0)
+        w_1 = self.peekvalue(1)
+        if type(w_1) is W_IntObject and type(w_2) is W_IntObject:
+            # compare the two ints directly, without making a bool
+            self.dropvalues(2)
+            x = w_1.intval
+            y = w_2.intval
+            if testnum == 0:
+                result = x < y
+            elif testnum == 1:
+                result = x <= y
+            elif testnum == 2:
+                result = x == y
+            elif testnum == 3:
+                result = x != y
+            elif testnum == 4:
+                result = x > y
+            else:
+                result = x >= y
+            if result:
+                return next_instr
+            return oparg >> 4
+    self.COMPARE_OP(testnum, next_instr)
+    return self.POP_JUMP_IF_FALSE(oparg >> 4, next_instr)
+
+
 def list_BINARY_SUBSCR(self, oparg, next_instr):
     space = self.space
     w_2 = self.popvalue()
@@ -74,6 +123,37 @@ def list_BINARY_SUBSCR(self, oparg, next_instr):
     self.pushvalue(w_result)
 
 
+def sized_BUILD_MAP(self, itemcount, next_instr):
+    space = self.space
+    site = get_alloc_site(self.getcode(), self.last_instr)
+    strategy = space.fromcache(EmptyDictStrategy)
+    if site is not None and site.sizehint > itemcount:
+        # the dict is presized when it gets its first item
+        storage = strategy.erase(site)
+    else:
+        storage = strategy.get_empty_storage()
+    w_dict = W_DictObject(space, strategy, storage)
+    if site is not None:
+        site.observe(space, w_dict)
+    self.pushvalue(w_dict)
+
+
+@jit.unroll_safe
+def sized_BUILD_SET(self, itemcount, next_instr):
+    space = self.space
+    site = get_alloc_site(self.getcode(), self.last_instr)
+    w_set = W_SetObject(space, None)
+    if site is not None:
+        if site.sizehint > itemcount:
+            w_set.sstorage = space.fromcache(EmptySetStrategy).erase(site)
+        site.observe(space, w_set)
+    for i in range(itemcount-1, -1, -1):
+        w_item = self.peekvalue(i)
+        space.call_method(w_set, 'add', w_item)
+    self.dropvalues(itemcount)
+    self.pushvalue(w_set)
+
+
 def build_frame(space):
     """Consider the objspace config and return a patched frame object."""
     class StdObjSpaceFrame(BaseFrame):
@@ -83,8 +163,14 @@ def build_frame(space):
         StdObjSpaceFrame.INPLACE_ADD = int_INPLACE_ADD
         StdObjSpaceFrame.BINARY_SUBTRACT = int_BINARY_SUBTRACT
         StdObjSpaceFrame.INPLACE_SUBTRACT = int_INPLACE_SUBTRACT
+        StdObjSpaceFrame.ADD_FAST_FAST = int_ADD_FAST_FAST
+        StdObjSpaceFrame.COMPARE_POP_JUMP_IF_FALSE = (
+            int_COMPARE_POP_JUMP_IF_FALSE)
     if space.config.objspace.std.optimized_list_getitem:
         StdObjSpaceFrame.BINARY_SUBSCR = list_BINARY_SUBSCR
+    if space.config.objspace.std.withallocsitefeedback:
+        StdObjSpaceFrame.BUILD_MAP = sized_BUILD_MAP
+        StdObjSpaceFrame.BUILD_SET = sized_BUILD_SET
     from pypy.objspace.std.callmethod import LOOKUP_METHOD, CALL_METHOD
     StdObjSpaceFrame.LOOKUP_METHOD = LOOKUP_METHOD
     StdObjSpaceFrame.CALL_METHOD = CALL_METHOD
@@ -15,7 +15,7 @@ def _wrapkey(space, key):
 
 
 class EmptyKwargsDictStrategy(EmptyDictStrategy):
-    def switch_to_bytes_strategy(self, w_dict):
+    def switch_to_bytes_strategy(self, w_dict, w_value=None):
         strategy = self.space.fromcache(KwargsDictStrategy)
         storage = strategy.get_empty_storage()
         w_dict.set_strategy(strategy)
@@ -15,7 +15,7 @@ from rpython.rlib import debug, jit, rerased, rutf8
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import (
     import_from_mixin, instantiate, newlist_hint, resizelist_hint, specialize)
-from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rarithmetic import intmask, ovfcheck, r_uint
 from rpython.rlib import longlong2float
 from rpython.tool.sourcetools import func_with_new_name
 from rpython.rlib.rstring import StringBuilder
@@ -34,7 +34,9 @@ from pypy.objspace.std.iterobject import (
     W_FastListIterObject, W_ReverseSeqIterObject)
 from pypy.objspace.std.sliceobject import (
     W_SliceObject, normalize_simple_slice, unwrap_start_stop)
+from pypy.objspace.std.specialisedtupleobject import Cls_ff, Cls_ii
 from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.typeobject import W_TypeObject
 from pypy.objspace.std.unicodeobject import W_UnicodeObject
 from pypy.objspace.std.util import get_positive_index, negate
 
@@ -43,6 +45,11 @@ __all__ = ['W_ListObject', 'make_range_list', 'make_empty_list_with_size']
 
 UNROLL_CUTOFF = 5
 
+# slices of at least SLICE_SHARING_CUTOFF items, covering at least a quarter
+# of their list, share the items with that list until one of the two is
+# mutated, see SliceListStrategy
+SLICE_SHARING_CUTOFF = 64
+
 
 def make_range_list(space, start, step, length):
     if length <= 0:
@@ -93,6 +100,21 @@ def get_strategy_from_list_object(space, list_w, sizehint):
         if len(list_w) > 1:
             return _get_strategy_from_list_object_unicode(space, list_w)
         return space.fromcache(AsciiListStrategy)
+    elif (type(w_firstobj) is W_UnicodeObject and
+            space.config.objspace.std.withunicodestrategies):
+        if len(list_w) > 1:
+            return _get_strategy_from_list_object_utf8(space, list_w)
+        return space.fromcache(UnicodeListStrategy)
+    elif (type(w_firstobj) is Cls_ii and
+            space.config.objspace.std.withspecialisedtuplelists):
+        if len(list_w) > 1:
+            return _get_strategy_from_list_object_int_pair(space, list_w)
+        return space.fromcache(IntPairListStrategy)
+    elif (type(w_firstobj) is Cls_ff and
+            space.config.objspace.std.withspecialisedtuplelists):
+        if len(list_w) > 1:
+            return _get_strategy_from_list_object_float_pair(space, list_w)
+        return space.fromcache(FloatPairListStrategy)
 
     return space.fromcache(ObjectListStrategy)
 
@@ -131,10 +153,38 @@ def _get_strategy_from_list_object_bytes(space, list_w):
 def _get_strategy_from_list_object_unicode(space, list_w):
     for i in range(1, len(list_w)):
         item = list_w[i]
-        if type(item) is not W_UnicodeObject or not item.is_ascii():
+        if type(item) is not W_UnicodeObject:
+            return space.fromcache(ObjectListStrategy)
+        if not item.is_ascii():
+            if space.config.objspace.std.withunicodestrategies:
+                return _get_strategy_from_list_object_utf8(space, list_w)
             return space.fromcache(ObjectListStrategy)
     return space.fromcache(AsciiListStrategy)
 
+@jit.look_inside_iff(lambda space, list_w:
+        jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+def _get_strategy_from_list_object_utf8(space, list_w):
+    for i in range(1, len(list_w)):
+        if type(list_w[i]) is not W_UnicodeObject:
+            return space.fromcache(ObjectListStrategy)
+    return space.fromcache(UnicodeListStrategy)
+
+@jit.look_inside_iff(lambda space, list_w:
+        jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+def _get_strategy_from_list_object_int_pair(space, list_w):
+    for i in range(1, len(list_w)):
+        if type(list_w[i]) is not Cls_ii:
+            return space.fromcache(ObjectListStrategy)
+    return space.fromcache(IntPairListStrategy)
+
+@jit.look_inside_iff(lambda space, list_w:
+        jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+def _get_strategy_from_list_object_float_pair(space, list_w):
+    for i in range(1, len(list_w)):
+        if type(list_w[i]) is not Cls_ff:
+            return space.fromcache(ObjectListStrategy)
+    return space.fromcache(FloatPairListStrategy)
+
 @jit.look_inside_iff(lambda space, list_w:
         jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
 def _get_strategy_from_list_object_int_or_float(space, list_w):
@@ -178,6 +228,23 @@ def _do_extend_from_iterable(space, w_list, w_iterable):
         i += 1
     return i
 
+@specialize.argtype(1)
+def _bisect_unwrapped(l, x, lo, hi, right):
+    # same comparisons as the generic bisection in pypy/module/_bisect
+    while lo < hi:
+        mid = intmask((r_uint(lo) + r_uint(hi)) >> 1)
+        if right:
+            if x < l[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        else:
+            if l[mid] < x:
+                lo = mid + 1
+            else:
+                hi = mid
+    return lo
+
 def _get_printable_location(strategy_type, typ):
     return 'list.repr [%s, %s]' % (
         strategy_type,
@@ -290,10 +357,14 @@ def list_eq(w_list, space, w_other):
 
 class W_ListObject(W_Root):
     strategy = None
+    # True if the list is known to be sorted: set by sort() and insort(),
+    # cleared by every mutation that can break the order
+    is_sorted = False
 
     def __init__(self, space, wrappeditems, sizehint=-1):
         assert isinstance(wrappeditems, list)
         self.space = space
+        self.is_sorted = False
         if space.config.objspace.std.withliststrategies:
             self.strategy = get_strategy_from_list_object(space, wrappeditems,
                                                           sizehint)
@@ -373,6 +444,7 @@ class W_ListObject(W_Root):
         cpy_strategy = self.space.fromcache(CPyListStrategy)
         if self.strategy is cpy_strategy:
             return
+        self.is_sorted = False
         lst = self.getitems()
         self.strategy = cpy_strategy
         self.lstorage = cpy_strategy.erase(CPyListStorage(space, lst))
@@ -383,11 +455,13 @@ class W_ListObject(W_Root):
         """Initializes listobject by iterating through the given list of
         wrapped items, unwrapping them if neccessary and creating a
         new erased object as storage"""
+        self.is_sorted = False
         self.strategy.init_from_list_w(self, list_w)
 
     def clear(self, space):
         """Initializes (or overrides) the listobject as empty."""
         self.space = space
+        self.is_sorted = False
         if space.config.objspace.std.withliststrategies:
             strategy = space.fromcache(EmptyListStrategy)
         else:
@@ -399,7 +473,9 @@ class W_ListObject(W_Root):
         """Returns a clone by creating a new listobject
         with the same strategy and a copy of the storage.
         if a sizehint is given, the clone is overallocated to be that size."""
-        return self.strategy.clone(self, sizehint)
+        w_clone = self.strategy.clone(self, sizehint)
+        w_clone.is_sorted = self.is_sorted
+        return w_clone
 
     def _resize_hint(self, hint):
         """Ensure the underlying list has room for at least hint
@@ -418,6 +494,7 @@ class W_ListObject(W_Root):
 
     def append(self, w_item):
         """L.append(object) -- append object to end"""
+        self.is_sorted = False
         self.strategy.append(self, w_item)
 
     def length(self):
@@ -486,6 +563,7 @@ class W_ListObject(W_Root):
 
     def inplace_mul(self, times):
         """Alters the list by multiplying its content by times."""
+        self.is_sorted = False
         self.strategy.inplace_mul(self, times)
 
     def deleteslice(self, start, step, length):
@@ -505,32 +583,59 @@ class W_ListObject(W_Root):
     def setitem(self, index, w_item):
         """Inserts a wrapped item at the given (unwrapped) index.
         May raise IndexError."""
+        self.is_sorted = False
         self.strategy.setitem(self, index, w_item)
 
     def setslice(self, start, step, slicelength, sequence_w):
         """Sets the slice of the list from start to start+step*slicelength to
         the sequence sequence_w.
         Used by setslice and setitem."""
+        self.is_sorted = False
+        if isinstance(sequence_w.strategy, SliceListStrategy):
+            sequence_w.strategy.switch_to_base_strategy(sequence_w)
         self.strategy.setslice(self, start, step, slicelength, sequence_w)
 
     def insert(self, index, w_item):
         """Inserts an item at the given position. Item must be wrapped,
         index not."""
+        self.is_sorted = False
         self.strategy.insert(self, index, w_item)
 
     def extend(self, w_iterable):
         '''L.extend(iterable) -- extend list by appending
         elements from the iterable'''
+        self.is_sorted = False
         self.strategy.extend(self, w_iterable)
 
     def reverse(self):
         """Reverses the list."""
+        self.is_sorted = False
         self.strategy.reverse(self)
 
     def sort(self, reverse):
         """Sorts the list ascending or descending depending on
         argument reverse. Argument must be unwrapped."""
+        if self.is_sorted and not reverse:
+            return
         self.strategy.sort(self, reverse)
+        self.is_sorted = not reverse and self.strategy.can_be_sorted(self)
+
+    def bisect(self, w_item, lo, hi, right):
+        """Returns the index where w_item would be inserted in list[lo:hi]
+        by bisect_left() or bisect_right(), comparing the unwrapped items
+        directly.  Returns -1 if the strategy cannot do it, in which case
+        the caller must do the generic bisection."""
+        return self.strategy.bisect(self, w_item, lo, hi, right)
+
+    def insort(self, index, w_item):
+        """Inserts w_item at the index returned by a bisection of the
+        whole list, keeping the sorted flag if it was set."""
+        was_sorted = self.is_sorted
+        strategy = self.strategy
+        self.insert(index, w_item)
+        if (was_sorted and self.strategy is strategy and
+                strategy.can_be_sorted_with(w_item)):
+            self.is_sorted = True
 
     def physical_size(self):
         """ return the physical (ie overallocated size) of the underlying list.
@@ -842,6 +947,10 @@ class W_ListObject(W_Root):
                 sorterclass = CustomCompareSort
         else:
             if has_key:
+                if (space.config.objspace.std.withspecialisedtuplelists and
+                        self.strategy.sort_with_key(self, w_key, reverse)):
+                    self.is_sorted = False
+                    return
                 sorterclass = CustomKeySort
             else:
                 if self.strategy is space.fromcache(ObjectListStrategy):
@@ -984,6 +1093,11 @@ class ListStrategy(object):
     def getslice(self, w_list, start, stop, step, length):
         raise NotImplementedError
 
+    def getslice_copy(self, w_list, start, stop, step, length):
+        """Like getslice(), but the result never shares its items with
+        w_list."""
+        return self.getslice(w_list, start, stop, step, length)
+
     def getitems(self, w_list):
         return self.getitems_copy(w_list)
 
@@ -1039,6 +1153,11 @@ class ListStrategy(object):
         space = self.space
         if type(w_any) is W_ListObject or (isinstance(w_any, W_ListObject) and
                                            space._uses_list_iter(w_any)):
+            if (isinstance(w_any.strategy, SliceListStrategy) and
+                    not self.is_empty_strategy()):
+                # the strategies only know how to extend from their own
+                # storage, don't make them switch to objects
+                w_any.strategy.switch_to_base_strategy(w_any)
             self._extend_from_list(w_list, w_any)
         elif (isinstance(w_any, W_AbstractTupleObject) and
                 not w_any.user_overridden_class and
@@ -1088,6 +1207,25 @@ class ListStrategy(object):
     def sort(self, w_list, reverse):
         raise NotImplementedError
 
+    def can_be_sorted(self, w_list):
+        """Returns True if the list, just sorted by self.sort(), may get its
+        sorted flag set."""
+        return False
+
+    def can_be_sorted_with(self, w_item):
+        """Returns True if a sorted list still has its sorted flag after
+        w_item was inserted at its bisection point."""
+        return False
+
+    def bisect(self, w_list, w_item, lo, hi, right):
+        return -1
+
+    def sort_with_key(self, w_list, w_key, reverse):
+        """Sorts the list with the key function w_key if the strategy can
+        do it on the unwrapped items, without calling w_key, and returns
+        True.  Otherwise returns False and descr_sort() does the sort."""
+        return False
+
     def is_empty_strategy(self):
         return False
 
@@ -1176,8 +1314,17 @@ class EmptyListStrategy(ListStrategy):
             strategy = self.space.fromcache(BytesListStrategy)
         elif type(w_item) is W_UnicodeObject and w_item.is_ascii():
             strategy = self.space.fromcache(AsciiListStrategy)
+        elif (type(w_item) is W_UnicodeObject and
+                self.space.config.objspace.std.withunicodestrategies):
+            strategy = self.space.fromcache(UnicodeListStrategy)
         elif type(w_item) is W_FloatObject:
             strategy = self.space.fromcache(FloatListStrategy)
+        elif (type(w_item) is Cls_ii and
+                self.space.config.objspace.std.withspecialisedtuplelists):
+            strategy = self.space.fromcache(IntPairListStrategy)
+        elif (type(w_item) is Cls_ff and
+                self.space.config.objspace.std.withspecialisedtuplelists):
+            strategy = self.space.fromcache(FloatPairListStrategy)
         else:
             strategy = self.space.fromcache(ObjectListStrategy)
 
@@ -1343,6 +1490,18 @@ class BaseRangeListStrategy(ListStrategy):
         return self._getitems_range_unroll(w_list, True)
 
     def getslice(self, w_list, start, stop, step, length):
+        # a slice of a range is again a range: return it without copying and
+        # without forcing w_list, unless the new step overflows
+        if length > 0:
+            first = self._getitem_unwrapped(w_list, start)
+            if length == 1:
+                return make_range_list(self.space, first, 1, 1)
+            try:
+                newstep = ovfcheck(step * self.step(w_list))
+            except OverflowError:
+                pass
+            else:
+                return make_range_list(self.space, first, newstep, length)
         self.switch_to_integer_strategy(w_list)
         return w_list.getslice(start, stop, step, length)
 
@@ -1567,6 +1726,216 @@ class RangeListStrategy(BaseRangeListStrategy):
             return w_list.pop(index)
 
 
+def share_slice(space, w_list, start, step, length):
+    """Return the slice of w_list as a list sharing its items with w_list,
+    which is itself turned into a view of all of them.  w_list must use one
+    of the unwrapped strategies."""
+    strategy = space.fromcache(SliceListStrategy)
+    w_base = W_ListObject.from_storage_and_strategy(space, w_list.lstorage,
+                                                    w_list.strategy)
+    w_list.strategy = strategy
+    w_list.lstorage = strategy.erase(
+        ListSlice(w_base, 0, 1, w_base.length()))
+    storage = strategy.erase(ListSlice(w_base, start, step, length))
+    return W_ListObject.from_storage_and_strategy(space, storage, strategy)
+
+
+class ListSlice(object):
+    """The storage of SliceListStrategy: the 'length' items of w_base
+    starting at 'start', 'step' apart."""
+    _immutable_fields_ = ['w_base', 'start', 'step', 'length']
+
+    def __init__(self, w_base, start, step, length):
+        self.w_base = w_base
+        self.start = start
+        self.step = step
+        self.length = length
+
+
+class SliceListStrategy(ListStrategy):
+    """SliceListStrategy is used by slices of large lists: the storage is a
+    ListSlice.  Its w_base is a list which is not visible from app-level and
+    is never mutated, so that it can be shared by several lists, starting
+    with the list that was sliced and the slice.  Reading goes to w_base;
+    the first mutation copies the items out of it, switching to the strategy
+    of w_base (see switch_to_base_strategy())."""
+
+    erase, unerase = rerased.new_erasing_pair("slice")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def switch_to_base_strategy(self, w_list):
+        s = self.unerase(w_list.lstorage)
+        w_base = s.w_base
+        w_copy = w_base.strategy.getslice_copy(
+            w_base, s.start, s.start + s.step * s.length, s.step, s.length)
+        w_list.strategy = w_copy.strategy
+        w_list.lstorage = w_copy.lstorage
+
+    def init_from_list_w(self, w_list, list_w):
+        raise NotImplementedError
+
+    def clone(self, w_list, sizehint=0):
+        # the storage is immutable, no need to clone
+        return W_ListObject.from_storage_and_strategy(
+            self.space, w_list.lstorage, self)
+
+    def _resize_hint(self, w_list, hint):
+        assert hint >= 0
+
+    def copy_into(self, w_list, w_other):
+        w_other.strategy = self
+        w_other.lstorage = w_list.lstorage
+
+    def find_or_count(self, w_list, w_item, start, stop, count):
+        s = self.unerase(w_list.lstorage)
+        if s.step == 1:
+            stop = min(stop, s.length)
+            if start >= stop:
+                if count:
+                    return 0
+                raise ValueError
+            result = s.w_base.find_or_count(w_item, s.start + start,
+                                            s.start + stop, count)
+            if count:
+                return result
+            return result - s.start
+        return ListStrategy.find_or_count(self, w_list, w_item, start, stop,
+                                          count)
+
+    def length(self, w_list):
+        return self.unerase(w_list.lstorage).length
+
+    def getitem(self, w_list, index):
+        s = self.unerase(w_list.lstorage)
+        if index < 0:
+            index += s.length
+            if index < 0:
+                raise IndexError
+        elif index >= s.length:
+            raise IndexError
+        return s.w_base.getitem(s.start + index * s.step)
+
+    def getslice(self, w_list, start, stop, step, length):
+        s = self.unerase(w_list.lstorage)
+        if (length < SLICE_SHARING_CUTOFF or
+                length < (s.w_base.length() >> 2)):
+            # don't keep all of w_base alive for a few of its items
+            w_base = s.w_base
+            start = s.start + start * s.step
+            step = step * s.step
+            return w_base.strategy.getslice_copy(
+                w_base, start, start + step * length, step, length)
+        storage = self.erase(ListSlice(s.w_base, s.start + start * s.step,
+                                       step * s.step, length))
+        return W_ListObject.from_storage_and_strategy(self.space, storage,
+                                                      self)
+
+    def getitems_copy(self, w_list):
+        s = self.unerase(w_list.lstorage)
+        w_base = s.w_base
+        items_w = [None] * s.length
+        index = s.start
+        for i in range(s.length):
+            items_w[i] = w_base.getitem(index)
+            index += s.step
+        return items_w
+
+    getitems_unroll = jit.unroll_safe(
+            func_with_new_name(getitems_copy, "getitems_unroll"))
+
+    @jit.look_inside_iff(lambda self, w_list:
+            w_list._unrolling_heuristic())
+    def getitems_fixedsize(self, w_list):
+        return self.getitems_unroll(w_list)
+
+    def getitems_bytes(self, w_list):
+        return self._copy(w_list).getitems_bytes()
+
+    def getitems_ascii(self, w_list):
+        return self._copy(w_list).getitems_ascii()
+
+    def getitems_int(self, w_list):
+        return self._copy(w_list).getitems_int()
+
+    def getitems_float(self, w_list):
+        return self._copy(w_list).getitems_float()
+
+    def _copy(self, w_list):
+        s = self.unerase(w_list.lstorage)
+        w_base = s.w_base
+        return w_base.strategy.getslice_copy(
+            w_base, s.start, s.start + s.step * s.length, s.step, s.length)
+
+    def getstorage_copy(self, w_list):
+        # the storage is immutable
+        return w_list.lstorage
+
+    def pop_end(self, w_list):
+        s = self.unerase(w_list.lstorage)
+        w_result = self.getitem(w_list, s.length - 1)
+        self._set_slice(w_list, s.w_base, s.start, s.step, s.length - 1)
+        return w_result
+
+    def pop(self, w_list, index):
+        s = self.unerase(w_list.lstorage)
+        if index == 0:
+            w_result = self.getitem(w_list, 0)
+            self._set_slice(w_list, s.w_base, s.start + s.step, s.step,
+                            s.length - 1)
+            return w_result
+        elif index == s.length - 1:
+            return self.pop_end(w_list)
+        else:
+            self.switch_to_base_strategy(w_list)
+            return w_list.pop(index)
+
+    def _set_slice(self, w_list, w_base, start, step, length):
+        if length == 0:
+            strategy = w_list.strategy = self.space.fromcache(
+                EmptyListStrategy)
+            w_list.lstorage = strategy.erase(None)
+        else:
+            w_list.lstorage = self.erase(
+                ListSlice(w_base, start, step, length))
+
+    def append(self, w_list, w_item):
+        self.switch_to_base_strategy(w_list)
+        w_list.append(w_item)
+
+    def inplace_mul(self, w_list, times):
+        self.switch_to_base_strategy(w_list)
+        w_list.inplace_mul(times)
+
+    def deleteslice(self, w_list, start, step, slicelength):
+        self.switch_to_base_strategy(w_list)
+        w_list.deleteslice(start, step, slicelength)
+
+    def setitem(self, w_list, index, w_item):
+        self.switch_to_base_strategy(w_list)
+        w_list.setitem(index, w_item)
+
+    def setslice(self, w_list, start, step, slicelength, sequence_w):
+        self.switch_to_base_strategy(w_list)
+        w_list.setslice(start, step, slicelength, sequence_w)
+
+    def insert(self, w_list, index, w_item):
+        self.switch_to_base_strategy(w_list)
+        w_list.insert(index, w_item)
+
+    def extend(self, w_list, w_any):
+        self.switch_to_base_strategy(w_list)
+        w_list.extend(w_any)
+
+    def reverse(self, w_list):
+        self.switch_to_base_strategy(w_list)
+        w_list.reverse()
+
+    def sort(self, w_list, reverse):
+        self.switch_to_base_strategy(w_list)
+        w_list.sort(reverse)
+
+
 class AbstractUnwrappedStrategy(object):
 
     def wrap(self, unwrapped):
@@ -1692,6 +2061,13 @@ class AbstractUnwrappedStrategy(object):
         return self.erase(items)
 
     def getslice(self, w_list, start, stop, step, length):
+        if (length >= SLICE_SHARING_CUTOFF and
+                length >= (self.length(w_list) >> 2) and
+                self.space.config.objspace.std.withliststrategies):
+            return share_slice(self.space, w_list, start, step, length)
+        return self.getslice_copy(w_list, start, stop, step, length)
+
+    def getslice_copy(self, w_list, start, stop, step, length):
         if step == 1 and 0 <= start <= stop:
             l = self.unerase(w_list.lstorage)
             assert start >= 0
@@ -1985,6 +2361,20 @@ class IntegerListStrategy(ListStrategy):
         if reverse:
             l.reverse()
 
+    def can_be_sorted(self, w_list):
+        return True
+
+    def can_be_sorted_with(self, w_item):
+        return self.is_correct_type(w_item)
+
+    def bisect(self, w_list, w_item, lo, hi, right):
+        if not self.is_correct_type(w_item):
+            return -1
+        l = self.unerase(w_list.lstorage)
+        if hi > len(l):
+            return -1     # let the generic version raise IndexError
+        return _bisect_unwrapped(l, self.unwrap(w_item), lo, hi, right)
+
     def getitems_int(self, w_list):
         return self.unerase(w_list.lstorage)
 
@@ -2089,6 +2479,26 @@ class FloatListStrategy(ListStrategy):
         if reverse:
             l.reverse()
 
+    def can_be_sorted(self, w_list):
+        # nans compare false with everything, so that a list containing
+        # them is not necessarily in order after sort()
+        for f in self.unerase(w_list.lstorage):
+            if math.isnan(f):
+                return False
+        return True
+
+    def can_be_sorted_with(self, w_item):
+        return (self.is_correct_type(w_item) and
+                not math.isnan(self.unwrap(w_item)))
+
+    def bisect(self, w_list, w_item, lo, hi, right):
+        if not self.is_correct_type(w_item):
+            return -1
+        l = self.unerase(w_list.lstorage)
+        if hi > len(l):
+            return -1     # let the generic version raise IndexError
+        return _bisect_unwrapped(l, self.unwrap(w_item), lo, hi, right)
+
     def getitems_float(self, w_list):
         return self.unerase(w_list.lstorage)
 
@@ -2363,6 +2773,20 @@ class BytesListStrategy(ListStrategy):
         if reverse:
             l.reverse()
 
+    def can_be_sorted(self, w_list):
+        return True
+
+    def can_be_sorted_with(self, w_item):
+        return self.is_correct_type(w_item)
+
+    def bisect(self, w_list, w_item, lo, hi, right):
+        if not self.is_correct_type(w_item):
+            return -1
+        l = self.unerase(w_list.lstorage)
+        if hi > len(l):
+            return -1     # let the generic version raise IndexError
+        return _bisect_unwrapped(l, self.unwrap(w_item), lo, hi, right)
+
     def getitems_bytes(self, w_list):
         return self.unerase(w_list.lstorage)
 
@@ -2402,6 +2826,524 @@ class AsciiListStrategy(ListStrategy):
     def getitems_ascii(self, w_list):
         return self.unerase(w_list.lstorage)
 
+    def switch_to_unicode_strategy(self, w_list):
+        # the items are already utf-8, so the storage can be kept as it is
+        if not self.space.config.objspace.std.withunicodestrategies:
+            return False
+        w_list.strategy = self.space.fromcache(UnicodeListStrategy)
+        return True
+
+    def switch_to_next_strategy(self, w_list, w_sample_item):
+        if type(w_sample_item) is W_UnicodeObject:
+            if self.switch_to_unicode_strategy(w_list):
+                return
+        w_list.switch_to_object_strategy()
+
+    _base_extend_from_list = _extend_from_list
+
+    def _extend_from_list(self, w_list, w_other):
+        if w_other.strategy is self.space.fromcache(UnicodeListStrategy):
+            if self.switch_to_unicode_strategy(w_list):
+                w_list.extend(w_other)
+                return
+        return self._base_extend_from_list(w_list, w_other)
+
+    _base_setslice = setslice
+
+    def setslice(self, w_list, start, step, slicelength, w_other):
+        if w_other.strategy is self.space.fromcache(UnicodeListStrategy):
+            if self.switch_to_unicode_strategy(w_list):
+                w_list.setslice(start, step, slicelength, w_other)
+                return
+        return self._base_setslice(w_list, start, step, slicelength, w_other)
+
+
+class UnicodeListStrategy(ListStrategy):
+    """Lists of unicode objects that are not all ascii.  The items are
+    stored as their utf-8 encoding, like in AsciiListStrategy, and the
+    length is recomputed when an item is read.  Enabled by
+    'withunicodestrategies'."""
+    import_from_mixin(AbstractUnwrappedStrategy)
+
+    _none_value = ""
+
+    def wrap(self, stringval):
+        assert stringval is not None
+        return self.space.newutf8(stringval,
+                                  rutf8.codepoints_in_utf8(stringval))
+
+    def unwrap(self, w_string):
+        return self.space.utf8_w(w_string)
+
+    def _quick_cmp(self, a, b):
+        return a is b
+
+    # same storage as AsciiListStrategy, switching between them is free
+    erase = staticmethod(AsciiListStrategy.erase)
+    unerase = staticmethod(AsciiListStrategy.unerase)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_UnicodeObject
+
+    def list_is_correct_type(self, w_list):
+        return (w_list.strategy is self.space.fromcache(UnicodeListStrategy) or
+                w_list.strategy is self.space.fromcache(AsciiListStrategy))
+
+    def sort(self, w_list, reverse):
+        # utf-8 strings sort in the same order as their code points
+        l = self.unerase(w_list.lstorage)
+        sorter = StringSort(l, len(l))
+        sorter.sort()
+        if reverse:
+            l.reverse()
+
+
+class IntPairColumns(object):
+    """The storage of IntPairListStrategy: the first and the second items of
+    the tuples, in two lists of the same length."""
+
+    def __init__(self, items0, items1):
+        self.items0 = items0
+        self.items1 = items1
+
+
+class FloatPairColumns(object):
+    """The storage of FloatPairListStrategy, like IntPairColumns."""
+
+    def __init__(self, items0, items1):
+        self.items0 = items0
+        self.items1 = items1
+
+
+class ItemGetterCache(object):
+    def __init__(self, space):
+        self.w_itemgetter = None
+        self.w_call = None
+
+
+def _itemgetter_column(space, w_key):
+    """If w_key is operator.itemgetter(0) or operator.itemgetter(1) (or -2,
+    -1), return the index of the item it returns from a pair.  Otherwise
+    return -1."""
+    cache = space.fromcache(ItemGetterCache)
+    if cache.w_itemgetter is None:
+        w_operator = space.builtin_modules.get('operator', None)
+        if w_operator is None:
+            return -1
+        w_itemgetter = w_operator.getdictvalue(space, 'itemgetter')
+        if not isinstance(w_itemgetter, W_TypeObject):
+            return -1
+        cache.w_itemgetter = w_itemgetter
+        cache.w_call = w_itemgetter.lookup('__call__')
+    if (space.type(w_key) is not cache.w_itemgetter or
+            space.lookup(w_key, '__call__') is not cache.w_call):
+        return -1
+    # operator.itemgetter is an app-level class, read its fields
+    if not space.is_w(w_key.getdictvalue(space, '_single'), space.w_True):
+        return -1
+    w_idx = w_key.getdictvalue(space, '_idx')
+    if type(w_idx) is not W_IntObject:
+        return -1
+    idx = space.int_w(w_idx)
+    if idx == 0 or idx == -2:
+        return 0
+    if idx == 1 or idx == -1:
+        return 1
+    return -1
+
+
+class AbstractPairColumnsStrategy(object):
+    """The strategies for lists whose items are all specialised pairs of the
+    same kind.  The first and the second items of the tuples are stored
+    unwrapped in two parallel lists, and the tuple objects are only created
+    when the items are read.  Enabled by 'withspecialisedtuplelists'."""
+
+    def wrap(self, value0, value1):
+        raise NotImplementedError
+
+    def unwrap(self, w_pair):
+        """Returns the two items of w_pair, which must be of the correct
+        type, as an RPython tuple."""
+        raise NotImplementedError
+
+    def _item_eq(self, a, b):
+        raise NotImplementedError("abstract base class")
+
+    def _new_columns(self, items0, items1):
+        raise NotImplementedError("abstract base class")
+
+    def _new_sorter(self, columns):
+        raise NotImplementedError("abstract base class")
+
+    @staticmethod
+    def unerase(storage):
+        raise NotImplementedError("abstract base class")
+
+    @staticmethod
+    def erase(obj):
+        raise NotImplementedError("abstract base class")
+
+    def is_correct_type(self, w_obj):
+        raise NotImplementedError("abstract base class")
+
+    def list_is_correct_type(self, w_list):
+        raise NotImplementedError("abstract base class")
+
+    def new_list_from_columns(self, items0, items1):
+        """Returns a new list of the pairs (items0[i], items1[i]).  The two
+        lists are used as the storage, without copying them."""
+        storage = self.erase(self._new_columns(items0, items1))
+        return W_ListObject.from_storage_and_strategy(self.space, storage, self)
+
+    @jit.look_inside_iff(lambda self, w_list, list_w:
+            jit.loop_unrolling_heuristic(list_w, len(list_w), UNROLL_CUTOFF))
+    def init_from_list_w(self, w_list, list_w):
+        items0 = newlist_hint(len(list_w))
+        items1 = newlist_hint(len(list_w))
+        for w_item in list_w:
+            value0, value1 = self.unwrap(w_item)
+            items0.append(value0)
+            items1.append(value1)
+        w_list.lstorage = self.erase(self._new_columns(items0, items1))
+
+    def get_empty_storage(self, sizehint):
+        if sizehint == -1:
+            return self.erase(self._new_columns([], []))
+        return self.erase(self._new_columns(newlist_hint(sizehint),
+                                            newlist_hint(sizehint)))
+
+    def clone(self, w_list, sizehint=0):
+        c = self.unerase(w_list.lstorage)
+        if sizehint:
+            assert sizehint >= len(c.items0)
+            items0 = newlist_hint(sizehint)
+            items0.extend(c.items0)
+            items1 = newlist_hint(sizehint)
+            items1.extend(c.items1)
+        else:
+            items0 = c.items0[:]
+            items1 = c.items1[:]
+        return self.new_list_from_columns(items0, items1)
+
+    def _resize_hint(self, w_list, hint):
+        c = self.unerase(w_list.lstorage)
+        resizelist_hint(c.items0, hint)
+        resizelist_hint(c.items1, hint)
+
+    def copy_into(self, w_list, w_other):
+        w_other.strategy = self
+        w_other.lstorage = self.getstorage_copy(w_list)
+
+    def getstorage_copy(self, w_list):
+        c = self.unerase(w_list.lstorage)
+        return self.erase(self._new_columns(c.items0[:], c.items1[:]))
+
+    def find_or_count(self, w_list, w_obj, start, stop, count):
+        if self.is_correct_type(w_obj):
+            value0, value1 = self.unwrap(w_obj)
+            c = self.unerase(w_list.lstorage)
+            result = 0
+            for i in range(start, min(stop, len(c.items0))):
+                if (self._item_eq(c.items0[i], value0) and
+                        self._item_eq(c.items1[i], value1)):
+                    if count:
+                        result += 1
+                    else:
+                        return i
+            if count:
+                return result
+            raise ValueError
+        return ListStrategy.find_or_count(
+            self, w_list, w_obj, start, stop, count)
+
+    def length(self, w_list):
+        return len(self.unerase(w_list.lstorage).items0)
+
+    def getitem(self, w_list, index):
+        c = self.unerase(w_list.lstorage)
+        try:
+            value0 = c.items0[index]
+        except IndexError:  # make RPython raise the exception
+            raise
+        return self.wrap(value0, c.items1[index])
+
+    def getitems_copy(self, w_list):
+        c = self.unerase(w_list.lstorage)
+        res = [None] * len(c.items0)
+        for i in range(len(c.items0)):
+            res[i] = self.wrap(c.items0[i], c.items1[i])
+        return res
+
+    getitems_unroll = jit.unroll_safe(
+            func_with_new_name(getitems_copy, "getitems_unroll"))
+
+    getitems_copy = jit.look_inside_iff(lambda self, w_list:
+            w_list._unrolling_heuristic())(getitems_copy)
+
+    @jit.look_inside_iff(lambda self, w_list:
+            w_list._unrolling_heuristic())
+    def getitems_fixedsize(self, w_list):
+        return self.getitems_unroll(w_list)
+
+    def getslice(self, w_list, start, stop, step, length):
+        c = self.unerase(w_list.lstorage)
+        if step == 1 and 0 <= start <= stop:
+            assert start >= 0
+            assert stop >= 0
+            return self.new_list_from_columns(c.items0[start:stop],
+                                              c.items1[start:stop])
+        items0 = newlist_hint(length)
+        items1 = newlist_hint(length)
+        for i in range(length):
+            items0.append(c.items0[start])
+            items1.append(c.items1[start])
+            start += step
+        return self.new_list_from_columns(items0, items1)
+
+    def append(self, w_list, w_item):
+        if self.is_correct_type(w_item):
+            c = self.unerase(w_list.lstorage)
+            value0, value1 = self.unwrap(w_item)
+            c.items0.append(value0)
+            c.items1.append(value1)
+            return
+        w_list.switch_to_object_strategy()
+        w_list.append(w_item)
+
+    def insert(self, w_list, index, w_item):
+        if self.is_correct_type(w_item):
+            c = self.unerase(w_list.lstorage)
+            value0, value1 = self.unwrap(w_item)
+            c.items0.insert(index, value0)
+            c.items1.insert(index, value1)
+            return
+        w_list.switch_to_object_strategy()
+        w_list.insert(index, w_item)
+
+    def _extend_from_list(self, w_list, w_other):
+        if self.list_is_correct_type(w_other):
+            c = self.unerase(w_list.lstorage)
+            other = self.unerase(w_other.lstorage)
+            c.items0 += other.items0
+            c.items1 += other.items1
+            return
+        elif w_other.strategy.is_empty_strategy():
+            return
+        w_other = w_other._temporarily_as_objects()
+        w_list.switch_to_object_strategy()
+        w_list.extend(w_other)
+
+    def setitem(self, w_list, index, w_item):
+        if self.is_correct_type(w_item):
+            c = self.unerase(w_list.lstorage)
+            value0, value1 = self.unwrap(w_item)
+            try:
+                c.items0[index] = value0
+            except IndexError:
+                raise
+            c.items1[index] = value1
+        else:
+            w_list.switch_to_object_strategy()
+            w_list.setitem(index, w_item)
+
+    def setslice(self, w_list, start, step, slicelength, w_other):
+        assert slicelength >= 0
+        space = self.space
+        len2 = w_other.length()
+        if not self.list_is_correct_type(w_other) and len2 != 0:
+            w_list.switch_to_object_strategy()
+            w_other_as_object = w_other._temporarily_as_objects()
+            assert (w_other_as_object.strategy is
+                    space.fromcache(ObjectListStrategy))
+            w_list.setslice(start, step, slicelength, w_other_as_object)
+            return
+
+        c = self.unerase(w_list.lstorage)
+        if len2 == 0:
+            other0 = c.items0[:0]
+            other1 = c.items1[:0]
+        else:
+            other = self.unerase(w_other.lstorage)
+            other0 = other.items0
+            other1 = other.items1
+        if step == 1:
+            # the columns are rebuilt, which also works if w_other is w_list
+            assert start >= 0
+            stop = start + slicelength
+            c.items0 = c.items0[:start] + other0 + c.items0[stop:]
+            c.items1 = c.items1[:start] + other1 + c.items1[stop:]
+            return
+        if len2 != slicelength:  # No resize for extended slices
+            raise oefmt(space.w_ValueError,
+                        "attempt to assign sequence of size %d to extended "
+                        "slice of size %d", len2, slicelength)
+        if other0 is c.items0:
+            other0 = other0[:]
+            other1 = other1[:]
+        for i in range(len2):
+            c.items0[start] = other0[i]
+            c.items1[start] = other1[i]
+            start += step
+
+    def deleteslice(self, w_list, start, step, slicelength):
+        if slicelength == 0:
+            return
+        c = self.unerase(w_list.lstorage)
+        if step < 0:
+            start = start + step * (slicelength - 1)
+            step = -step
+        assert start >= 0
+        if step == 1:
+            stop = start + slicelength
+            assert stop >= 0
+            del c.items0[start:stop]
+            del c.items1[start:stop]
+            return
+        n = len(c.items0)
+        stop = start + step * slicelength
+        items0 = newlist_hint(n - slicelength)
+        items1 = newlist_hint(n - slicelength)
+        for i in range(n):
+            if not (start <= i < stop and (i - start) % step == 0):
+                items0.append(c.items0[i])
+                items1.append(c.items1[i])
+        c.items0 = items0
+        c.items1 = items1
+
+    def pop_end(self, w_list):
+        c = self.unerase(w_list.lstorage)
+        value0 = c.items0.pop()
+        return self.wrap(value0, c.items1.pop())
+
+    def pop(self, w_list, index):
+        c = self.unerase(w_list.lstorage)
+        # not sure if RPython raises IndexError on pop
+        # so check again here
+        if index < 0:
+            raise IndexError
+        try:
+            value0 = c.items0.pop(index)
+        except IndexError:
+            raise
+        return self.wrap(value0, c.items1.pop(index))
+
+    def mul(self, w_list, times):
+        c = self.unerase(w_list.lstorage)
+        return self.new_list_from_columns(c.items0 * times, c.items1 * times)
+
+    def inplace_mul(self, w_list, times):
+        c = self.unerase(w_list.lstorage)
+        c.items0 *= times
+        c.items1 *= times
+
+    def reverse(self, w_list):
+        c = self.unerase(w_list.lstorage)
+        c.items0.reverse()
+        c.items1.reverse()
+
+    def sort(self, w_list, reverse):
+        c = self.unerase(w_list.lstorage)
+        sorter = self._new_sorter(c)
+        sorter.sort()
+        if reverse:
+            self.reverse(w_list)
+
+    def sort_with_key(self, w_list, w_key, reverse):
+        column = _itemgetter_column(self.space, w_key)
+        if column < 0:
+            return False
+        # like W_ListObject.descr_sort(): the sort is stable, so reverse
+        # before and after sorting
+        c = self.unerase(w_list.lstorage)
+        sorter = self._new_sorter(c)
+        sorter.column = column
+        if reverse:
+            self.reverse(w_list)
+        sorter.sort()
+        if reverse:
+            self.reverse(w_list)
+        return True
+
+    def physical_size(self, w_list):
+        from rpython.rlib.objectmodel import list_get_physical_size
+        c = self.unerase(w_list.lstorage)
+        return list_get_physical_size(c.items0)
+
+    def _unrolling_heuristic(self, w_list):
+        items0 = self.unerase(w_list.lstorage).items0
+        return jit.loop_unrolling_heuristic(items0, len(items0), UNROLL_CUTOFF)
+
+
+class IntPairListStrategy(ListStrategy):
+    """Lists whose items are all specialised (int, int) tuples, see
+    AbstractPairColumnsStrategy."""
+    import_from_mixin(AbstractPairColumnsStrategy)
+
+    def wrap(self, value0, value1):
+        return Cls_ii(self.space, value0, value1)
+
+    def unwrap(self, w_pair):
+        assert isinstance(w_pair, Cls_ii)
+        return (w_pair.value0, w_pair.value1)
+
+    def _item_eq(self, a, b):
+        return a == b
+
+    def _new_columns(self, items0, items1):
+        return IntPairColumns(items0, items1)
+
+    def _new_sorter(self, columns):
+        return IntPairSort(columns, len(columns.items0))
+
+    erase, unerase = rerased.new_erasing_pair("intpair")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is Cls_ii
+
+    def list_is_correct_type(self, w_list):
+        return w_list.strategy is self.space.fromcache(IntPairListStrategy)
+
+
+def _float_item_eq(a, b):
+    # like the tuple comparison: identical floats (including NaNs with the
+    # same bit pattern) are equal
+    return (a == b or
+            longlong2float.float2longlong(a) == longlong2float.float2longlong(b))
+
+
+class FloatPairListStrategy(ListStrategy):
+    """Lists whose items are all specialised (float, float) tuples, see
+    AbstractPairColumnsStrategy."""
+    import_from_mixin(AbstractPairColumnsStrategy)
+
+    def wrap(self, value0, value1):
+        return Cls_ff(self.space, value0, value1)
+
+    def unwrap(self, w_pair):
+        assert isinstance(w_pair, Cls_ff)
+        return (w_pair.value0, w_pair.value1)
+
+    def _item_eq(self, a, b):
+        return _float_item_eq(a, b)
+
+    def _new_columns(self, items0, items1):
+        return FloatPairColumns(items0, items1)
+
+    def _new_sorter(self, columns):
+        return FloatPairSort(columns, len(columns.items0))
+
+    erase, unerase = rerased.new_erasing_pair("floatpair")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is Cls_ff
+
+    def list_is_correct_type(self, w_list):
+        return w_list.strategy is self.space.fromcache(FloatPairListStrategy)
+
 # _______________________________________________________
 
 init_signature = Signature(['sequence'], None, None)
@@ -2420,6 +3362,27 @@ FloatBaseTimSort = make_timsort_class()
 IntOrFloatBaseTimSort = make_timsort_class()
 
 
+def _make_pair_columns_timsort_class(Columns):
+    # sorts the two columns together, the items are pairs of values
+    def getitem(columns, i):
+        return (columns.items0[i], columns.items1[i])
+
+    def setitem(columns, i, pair):
+        columns.items0[i] = pair[0]
+        columns.items1[i] = pair[1]
+
+    def length(columns):
+        return len(columns.items0)
+
+    def getitem_slice(columns, start, stop):
+        return Columns(columns.items0[start:stop], columns.items1[start:stop])
+
+    return make_timsort_class(getitem, setitem, length, getitem_slice)
+
+IntPairBaseTimSort = _make_pair_columns_timsort_class(IntPairColumns)
+FloatPairBaseTimSort = _make_pair_columns_timsort_class(FloatPairColumns)
+
+
 class KeyContainer(W_Root):
     def __init__(self, w_key, w_item):
         self.w_key = w_key
@@ -2453,6 +3416,36 @@ class IntOrFloatSort(IntOrFloatBaseTimSort):
         return fa < fb
 
 
+class IntPairSort(IntPairBaseTimSort):
+    # 0 or 1 to compare only this item of the pairs, see sort_with_key()
+    column = -1
+
+    def lt(self, a, b):
+        if self.column == 0:
+            return a[0] < b[0]
+        if self.column == 1:
+            return a[1] < b[1]
+        if a[0] != b[0]:
+            return a[0] < b[0]
+        return a[1] < b[1]
+
+
+class FloatPairSort(FloatPairBaseTimSort):
+    column = -1
+
+    def lt(self, a, b):
+        if self.column == 0:
+            return a[0] < b[0]
+        if self.column == 1:
+            return a[1] < b[1]
+        # same result as comparing the two tuple objects
+        if not _float_item_eq(a[0], b[0]):
+            return a[0] < b[0]
+        if not _float_item_eq(a[1], b[1]):
+            return a[1] < b[1]
+        return False
+
+
 class CustomCompareSort(SimpleSort):
     def lt(self, a, b):
         space = self.space
@@ -38,13 +38,30 @@ LIMIT_MAP_ATTRIBUTES = 80
 
 class AbstractAttribute(object):
     _immutable_fields_ = ['terminator']
-    _attrs_ = ['terminator', 'space', 'cache_attrs']
+    _attrs_ = ['terminator', 'space', 'cache_attrs', '_size_estimate']
     cache_attrs = None
 
     def __init__(self, space, terminator):
         self.space = space
         assert isinstance(terminator, Terminator)
         self.terminator = terminator
+        if space.config.objspace.std.withsizedinstances:
+            # estimate of the storage size that objects passing through this
+            # map end up with, times NUM_DIGITS_POW2
+            self._size_estimate = SUBCLASSES_NUM_FIELDS * NUM_DIGITS_POW2
+
+    def size_estimate(self):
+        return self._size_estimate >> NUM_DIGITS
+
+    def _update_size_estimate(self, attr):
+        """ called when an object moves from this map to its child 'attr'.
+        moves our estimate 1/NUM_DIGITS_POW2 of the way towards attr's.
+        only used with objspace.std.withsizedinstances. """
+        if not jit.we_are_jitted():
+            size_est = (self._size_estimate + attr.size_estimate()
+                                            - self.size_estimate())
+            assert size_est >= 0
+            self._size_estimate = size_est
 
     def read(self, obj, name, attrkind):
         attr = self.find_map_attr(name, attrkind)
@@ -153,6 +170,8 @@ class AbstractAttribute(object):
         unbox_type = self._pick_unbox_type(w_value)
         number_to_readd, holder = self._find_branch_to_move_into(name, attrkind, unbox_type)
         attr = holder.pick_attr(unbox_type)
+        if space.config.objspace.std.withsizedinstances:
+            self._update_size_estimate(attr)
         if not number_to_readd:
             attr._switch_map_and_write_increase_storage1(obj, w_value)
         else:
@@ -301,6 +320,21 @@ class Terminator(AbstractAttribute):
         AbstractAttribute.__init__(self, space, self)
         self.w_cls = w_cls
         self.allow_unboxing = True
+        if space.config.objspace.std.withsizedinstances:
+            # the index into SUBCLASSES_SIZES picked for the last instance of
+            # w_cls, and how many times in a row it was picked
+            self._size_pick = -1
+            self._size_pick_streak = 0
+
+    def _record_size_pick(self, index):
+        """ called when a new instance of w_cls is allocated with the size
+        SUBCLASSES_SIZES[index]. returns True once the same size was picked
+        SIZED_INSTANCES_SETTLE times in a row. """
+        if index != self._size_pick:
+            self._size_pick = index
+            self._size_pick_streak = 0
+        self._size_pick_streak += 1
+        return self._size_pick_streak >= SIZED_INSTANCES_SETTLE
 
     def _read_terminator(self, obj, name, attrkind):
         return None
@@ -422,6 +456,8 @@ class PlainAttribute(AbstractAttribute):
         self.back = back
         self.ever_mutated = False
         self.order = order
+        if self.space.config.objspace.std.withsizedinstances:
+            self._size_estimate = self.storage_needed() * NUM_DIGITS_POW2
 
     def _copy_attr(self, obj, new_obj):
         w_value = self._prim_direct_read(obj)
@@ -522,7 +558,7 @@ class PlainAttribute(AbstractAttribute):
 
 
 class UnboxedPlainAttribute(PlainAttribute):
-    _immutable_fields_ = ["listindex", "firstunwrapped", "typ"]
+    _immutable_fields_ = ["listindex", "firstunwrapped", "typ", "devolved?"]
     def __init__(self, name, attrkind, back, order, typ):
         AbstractAttribute.__init__(self, back.space, back.terminator)
         # don't call PlainAttribute.__init__, that runs into weird problems
@@ -537,6 +573,11 @@ class UnboxedPlainAttribute(PlainAttribute):
         self._compute_storageindex_listindex()
         self._num_attributes = back.num_attributes() + 1
         self.typ = typ
+        # set to True once a value of another type was written to this
+        # attribute. objects that still use this map are switched lazily
+        self.devolved = False
+        if self.space.config.objspace.std.withsizedinstances:
+            self._size_estimate = self.storage_needed() * NUM_DIGITS_POW2
 
     def _compute_storageindex_listindex(self):
         attr = self.back
@@ -583,9 +624,9 @@ class UnboxedPlainAttribute(PlainAttribute):
 
     def _direct_read(self, obj):
         w_res = self._prim_direct_read(obj)
-        if self.terminator.allow_unboxing == False:
-            # oops, some other object using the same class isn't type stable!
-            # stop using unboxing altogether to not get too many variants of maps
+        if self.devolved or self.terminator.allow_unboxing == False:
+            # oops, some other object using the same map isn't type stable!
+            # stop using this map to not get too many variants of maps
             self._convert_to_boxed(obj)
         return w_res
 
@@ -610,14 +651,23 @@ class UnboxedPlainAttribute(PlainAttribute):
             unboxed[self.listindex] = val
             return
         # type change not supposed to happen. according to the principle
-        # of type freezing, we just give up, and will never unbox anything
-        # from that class again
-        self.terminator.allow_unboxing = False
+        # of type freezing, we give up on unboxing this attribute, but only
+        # this one: the other unboxed attributes of the class stay unboxed
+        self._devolve()
         map = self._convert_to_boxed(obj)
-        # now obj won't have any UnboxedPlainAttribute in its chain any
-        # more, because allow_unboxing is False
+        # now the attribute is boxed in obj's new map (or it is unboxed
+        # with a different type, and the write devolves that one too)
         map.write(obj, self.name, self.attrkind, w_value)
 
+    def _devolve(self):
+        cache = self.back.cache_attrs
+        if cache is not None:
+            holder = cache.get((self.name, self.attrkind), None)
+            if holder is not None and holder.attr is self:
+                holder.devolve()
+                return
+        self.devolved = True
+
     def _switch_map_and_write_increase_storage1(self, obj, w_value):
         val = self._unbox(w_value)
         if self.firstunwrapped:
@@ -647,6 +697,8 @@ class UnboxedPlainAttribute(PlainAttribute):
             res.append("immutable")
         if self.firstunwrapped:
             res.append("first unwrapped")
+        if self.devolved:
+            res.append("devolved")
         return res
 
     def repr(self):
@@ -672,14 +724,19 @@ class CachedAttributeHolder(object):
     def pick_attr(self, unbox_type):
         if self.typ is None or self.typ is unbox_type:
             return self.attr
+        return self.devolve()
+
+    def devolve(self):
+        """ the attribute was seen with values of different types. from now
+        on store it boxed, in a fresh PlainAttribute. """
+        old_attr = self.attr
+        assert isinstance(old_attr, UnboxedPlainAttribute)
         self.typ = None
         # this will never be traced, because the previous assignment
         # invalidates a quasi-immutable field
-        self.attr.terminator.allow_unboxing = False
-        name = self.attr.name
-        attrkind = self.attr.attrkind
-        back = self.attr.back
-        attr = self.attr = PlainAttribute(name, attrkind, back, self.order)
+        old_attr.devolved = True
+        attr = self.attr = PlainAttribute(
+            old_attr.name, old_attr.attrkind, old_attr.back, self.order)
         return attr
 
 
@@ -947,6 +1004,37 @@ assert Object.getclass.im_func is BaseUserClassMapdict.getclass.im_func
 
 SUBCLASSES_NUM_FIELDS = 5
 
+# with objspace.std.withsizedinstances, instances of subclasses of 'object'
+# are allocated as one of these sizes, depending on the size estimate of
+# their type's terminator.  One of them must be SUBCLASSES_NUM_FIELDS.
+SUBCLASSES_SIZES = [2, SUBCLASSES_NUM_FIELDS, 8]
+
+# once the same size was picked for this many instances of a type in a row,
+# the choice is stored in the quasi-immutable w_type.sized_instance_class and
+# the size estimate is no longer consulted for that type
+SIZED_INSTANCES_SETTLE = 100
+
+@objectmodel.specialize.arg(1)
+def get_subclass_of_correct_size(space, cls, w_type):
+    subcls = w_type.sized_instance_class
+    if subcls is None:
+        subcls = _pick_subclass_of_correct_size(space, cls, w_type)
+    return subcls
+
+@objectmodel.specialize.arg(1)
+def _pick_subclass_of_correct_size(space, cls, w_type):
+    from pypy.interpreter.typedef import get_sized_interplevel_subclasses
+    classes = get_sized_interplevel_subclasses(space, cls)
+    terminator = w_type.terminator
+    size = terminator.size_estimate()
+    i = 0
+    while i < len(classes) - 1 and SUBCLASSES_SIZES[i] < size:
+        i += 1
+    subcls = classes[i]
+    if terminator._record_size_pick(i):
+        w_type.sized_instance_class = subcls
+    return subcls
+
 def _make_storage_mixin_size_n(n=SUBCLASSES_NUM_FIELDS):
     from rpython.rlib import unroll
     rangen = unroll.unrolling_iterable(range(n))
@@ -1342,6 +1430,16 @@ class MapDictIteratorItems(BaseItemIterator):
 
 # ____________________________________________________________
 # Magic caching
+#
+# Every code object has a cache for each name of co_names_w, which is
+# used by all its LOAD_ATTR, STORE_ATTR and LOOKUP_METHOD of that name.
+# The cache is a chain of at most POLYMORPHIC_CACHE_SIZE entries, each
+# valid for one map and one version_tag of its class, so that code seeing
+# objects of a few different classes or layouts does not keep evicting
+# its entries.  The first entry is checked inline; the others are checked
+# before falling back to the full lookup.
+
+POLYMORPHIC_CACHE_SIZE = 4
 
 class CacheEntry(object):
     version_tag = None
@@ -1350,6 +1448,7 @@ class CacheEntry(object):
     failure_counter = 0
     valid_for_store = True
     attr_to_add = None
+    next = None     # the next entry of the same name, or None
 
     @objectmodel.specialize.arg(2)
     def is_valid_for_obj(self, w_obj, store=False):
@@ -1386,15 +1485,57 @@ INVALID_CACHE_ENTRY.valid_for_store = False
 def init_mapdict_cache(pycode):
     num_entries = len(pycode.co_names_w)
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
+    if pycode.space.config.objspace.std.withmethodcachecounter:
+        # hits and misses of the cache of every name
+        pycode._mapdict_cache_counters = [0] * (2 * num_entries)
+
+@objectmodel.always_inline
+def _count_hit(pycode, nameindex):
+    if pycode.space.config.objspace.std.withmethodcachecounter:
+        pycode._mapdict_cache_counters[2 * nameindex] += 1
+
+@objectmodel.always_inline
+def _count_miss(pycode, nameindex):
+    if pycode.space.config.objspace.std.withmethodcachecounter:
+        pycode._mapdict_cache_counters[2 * nameindex + 1] += 1
+
+def get_cache_counters(pycode, nameindex):
+    """Return (hits, misses) of the cache of a name of 'pycode'."""
+    counters = pycode._mapdict_cache_counters
+    return counters[2 * nameindex], counters[2 * nameindex + 1]
+
+def _entry_to_fill(pycode, nameindex, map):
+    # reuse the entry of the same map, or of a map that died; otherwise
+    # add a new entry in front, dropping the last one if there are
+    # already POLYMORPHIC_CACHE_SIZE of them
+    head = pycode._mapdict_caches[nameindex]
+    if head is INVALID_CACHE_ENTRY:
+        entry = CacheEntry()
+        pycode._mapdict_caches[nameindex] = entry
+        return entry
+    entry = head
+    count = 1
+    while True:
+        mymap = entry.map_wref()
+        if mymap is None or mymap is map:
+            return entry
+        if entry.next is None:
+            break
+        if count == POLYMORPHIC_CACHE_SIZE - 1:
+            entry.next = None     # drop the last entry
+            break
+        entry = entry.next
+        count += 1
+    entry = CacheEntry()
+    entry.next = head
+    pycode._mapdict_caches[nameindex] = entry
+    return entry
 
 @jit.dont_look_inside
 def _fill_cache(pycode, nameindex, map, version_tag, attr, w_method=None, valid_for_store=False, attr_to_add=None):
     if not pycode.space._side_effects_ok():
         return
-    entry = pycode._mapdict_caches[nameindex]
-    if entry is INVALID_CACHE_ENTRY:
-        entry = CacheEntry()
-        pycode._mapdict_caches[nameindex] = entry
+    entry = _entry_to_fill(pycode, nameindex, map)
     entry.map_wref = weakref.ref(map)
     if attr:
         entry.attr_wref = weakref.ref(attr)
@@ -1416,12 +1557,23 @@ def LOAD_ATTR_caching(pycode, w_obj, nameindex):
         # everything matches, it's incredibly fast
         attr = entry.attr_wref()
         if attr is not None:
+            _count_hit(pycode, nameindex)
             return attr._direct_read(w_obj)
     return LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map)
 
 @objectmodel.dont_inline
 def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
     space = pycode.space
+    # look at the other entries of the polymorphic cache
+    entry = pycode._mapdict_caches[nameindex].next
+    while entry is not None:
+        if entry.is_valid_for_map(map) and entry.w_method is None:
+            attr = entry.attr_wref()
+            if attr is not None:
+                _count_hit(pycode, nameindex)
+                return attr._direct_read(w_obj)
+        entry = entry.next
+    _count_miss(pycode, nameindex)
     w_name = pycode.co_names_w[nameindex]
     if map is not None:
         w_type = map.terminator.w_cls
@@ -1473,12 +1625,17 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
 def LOOKUP_METHOD_mapdict(f, nameindex, w_obj):
     pycode = f.getcode()
     entry = pycode._mapdict_caches[nameindex]
-    if entry.is_valid_for_obj(w_obj):
-        w_method = entry.w_method
-        if w_method is not None:
-            f.pushvalue(w_method)
-            f.pushvalue(w_obj)
-            return True
+    map = w_obj._get_mapdict_map()
+    while entry is not None:
+        if entry.is_valid_for_map(map):
+            w_method = entry.w_method
+            if w_method is not None:
+                _count_hit(pycode, nameindex)
+                f.pushvalue(w_method)
+                f.pushvalue(w_obj)
+                return True
+        entry = entry.next
+    _count_miss(pycode, nameindex)
     return False
 
 def LOOKUP_METHOD_mapdict_fill_cache_method(space, pycode, name, nameindex,
@@ -1509,6 +1666,7 @@ def STORE_ATTR_caching(pycode, w_obj, nameindex, w_value):
         if attr is not None:
             if not attr.ever_mutated:
                 attr.ever_mutated = True
+            _count_hit(pycode, nameindex)
             attr._direct_write(w_obj, w_value)
             return
     return STORE_ATTR_slowpath(pycode, w_obj, nameindex, map, w_value, entry)
@@ -1520,24 +1678,38 @@ def STORE_ATTR_slowpath(pycode, w_obj, nameindex, map, w_value, entry):
     if map is not None:
         w_type = map.terminator.w_cls
         version_tag = w_type.version_tag()
-        # there is still a (not inlined) fast path for stores that add a new
-        # attribute
-        if entry.valid_for_store and version_tag is entry.version_tag:
-            entry_map = entry.map_wref()
-            attr_to_add = entry.attr_wref()
-            if (entry_map is not None and
-                    isinstance(entry_map, PlainAttribute) and
-                    attr_to_add is entry_map
-                    and entry_map.back is map):
-                if isinstance(attr_to_add, UnboxedPlainAttribute):
-                    typsafe = type(w_value) is attr_to_add.typ
-                else:
-                    typsafe = True
-                if typsafe:
+        # the other entries of the polymorphic cache, and a (not inlined)
+        # fast path for stores that add a new attribute
+        while entry is not None:
+            if entry.valid_for_store and version_tag is entry.version_tag:
+                entry_map = entry.map_wref()
+                attr = entry.attr_wref()
+                if entry_map is map and attr is not None and entry.w_method is None:
                     if space.config.objspace.std.withmethodcachecounter:
                         entry.success_counter += 1
-                    attr_to_add._switch_map_and_write_increase_storage1(w_obj, w_value)
+                    if not attr.ever_mutated:
+                        attr.ever_mutated = True
+                    _count_hit(pycode, nameindex)
+                    attr._direct_write(w_obj, w_value)
                     return
+                if (entry_map is not None and
+                        isinstance(entry_map, PlainAttribute) and
+                        attr is entry_map
+                        and entry_map.back is map):
+                    if isinstance(attr, UnboxedPlainAttribute):
+                        typsafe = type(w_value) is attr.typ
+                    else:
+                        typsafe = True
+                    if typsafe:
+                        if space.config.objspace.std.withmethodcachecounter:
+                            entry.success_counter += 1
+                        _count_hit(pycode, nameindex)
+                        if space.config.objspace.std.withsizedinstances:
+                            map._update_size_estimate(attr)
+                        attr._switch_map_and_write_increase_storage1(w_obj, w_value)
+                        return
+            entry = entry.next
+        _count_miss(pycode, nameindex)
         w_descr = w_type.setattr_if_not_from_object()
         if w_descr:
             return space.get_and_call_function(w_descr, w_obj, w_name, w_value)
@@ -1576,5 +1748,6 @@ def STORE_ATTR_slowpath(pycode, w_obj, nameindex, map, w_value, entry):
                             _fill_cache(pycode, nameindex, mapnew, version_tag, mapnew,
                                         valid_for_store=True)
                     return
-
+    else:
+        _count_miss(pycode, nameindex)
     space.setattr(w_obj, w_name, w_value)
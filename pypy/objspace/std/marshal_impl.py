@@ -346,7 +346,7 @@ def marshal_pycode(space, w_pycode, m):
     m.put_int(x.co_stacksize)
     m.put_int(x.co_flags)
     m.atom_str(TYPE_STRING, x.co_code)
-    m.put_tuple_w(TYPE_TUPLE, x.co_consts_w)
+    m.put_tuple_w(TYPE_TUPLE, x.materialized_consts_w())
     m.put_tuple_w(TYPE_TUPLE, x.co_names_w)
     _put_interned_str_list(space, m, x.co_varnames)
     _put_interned_str_list(space, m, x.co_freevars)
@@ -374,13 +374,17 @@ def unmarshal_strlist(u, tc):
 
 @unmarshaller(TYPE_CODE)
 def unmarshal_pycode(space, u, tc):
+    if u.lazy and u.code_depth > 0:
+        return _unmarshal_lazycode(space, u)
     argcount    = u.get_int()
     nlocals     = u.get_int()
     stacksize   = u.get_int()
     flags       = u.get_int()
     code        = unmarshal_str(u)
     u.start(TYPE_TUPLE)
+    u.code_depth += 1
     consts_w    = u.get_tuple_w()
+    u.code_depth -= 1
     # copy in order not to merge it with anything else
     names       = unmarshal_strlist(u, TYPE_TUPLE)
     varnames    = unmarshal_strlist(u, TYPE_TUPLE)
@@ -394,6 +398,94 @@ def unmarshal_pycode(space, u, tc):
                   code, consts_w[:], names, varnames, filename,
                   name, firstlineno, lnotab, freevars, cellvars)
 
+# lazy code objects, see pypy.interpreter.lazycode.  The marshal data of a
+# code object has no length prefix, so it must still be walked over, but
+# without building anything else than the interned strings: the ones
+# that follow refer to them by their index in u.stringtable_w.
+
+def _unmarshal_lazycode(space, u):
+    from pypy.interpreter.lazycode import LazyCode
+    from pypy.module.marshal.interp_marshal import StringUnmarshaller
+    assert isinstance(u, StringUnmarshaller)
+    pos = u.bufpos
+    nstrings = len(u.stringtable_w)
+    name = _skip_pycode(space, u)
+    return LazyCode(space, name, u.bufstr, pos, u.stringtable_w, nstrings)
+
+def unmarshal_lazy_pycode(space, data, pos, stringtable_w):
+    """Unmarshal the code object found at 'pos' in 'data', just after its
+    type code.  'stringtable_w' are the interned strings seen before."""
+    from pypy.module.marshal.interp_marshal import StringUnmarshaller
+    u = StringUnmarshaller(space, space.newbytes(data))
+    u.lazy = True
+    assert pos >= 0
+    u.bufpos = pos
+    u.stringtable_w = stringtable_w
+    w_code = unmarshal_pycode(space, u, TYPE_CODE)
+    assert isinstance(w_code, PyCode)
+    return w_code
+
+def _skip_pycode(space, u):
+    # returns the name of the code object
+    u.get_int()     # argcount
+    u.get_int()     # nlocals
+    u.get_int()     # stacksize
+    u.get_int()     # flags
+    _skip_w_obj(space, u)      # code
+    _skip_w_obj(space, u)      # consts
+    _skip_w_obj(space, u)      # names
+    _skip_w_obj(space, u)      # varnames
+    _skip_w_obj(space, u)      # freevars
+    _skip_w_obj(space, u)      # cellvars
+    _skip_w_obj(space, u)      # filename
+    name = unmarshal_str(u)
+    u.get_int()     # firstlineno
+    _skip_w_obj(space, u)      # lnotab
+    return name
+
+def _skip_w_obj(space, u):
+    # returns False if the object was a NULL
+    tc = u.get1()
+    if tc == TYPE_NULL:
+        return False
+    elif (tc == TYPE_NONE or tc == TYPE_FALSE or tc == TYPE_TRUE or
+              tc == TYPE_STOPITER or tc == TYPE_ELLIPSIS):
+        pass
+    elif tc == TYPE_INT or tc == TYPE_STRINGREF:
+        u.get(4)
+    elif tc == TYPE_INT64 or tc == TYPE_BINARY_FLOAT:
+        u.get(8)
+    elif tc == TYPE_BINARY_COMPLEX:
+        u.get(16)
+    elif tc == TYPE_FLOAT:
+        u.get_pascal()
+    elif tc == TYPE_COMPLEX:
+        u.get_pascal()
+        u.get_pascal()
+    elif tc == TYPE_LONG:
+        lng = u.get_int()
+        if lng < 0:
+            lng = -lng
+        for i in range(lng):    # like unmarshal_long()
+            u.get(2)
+    elif tc == TYPE_STRING or tc == TYPE_UNICODE:
+        u.get_str()
+    elif tc == TYPE_INTERNED:
+        unmarshal_interned(space, u, tc)
+    elif (tc == TYPE_TUPLE or tc == TYPE_LIST or tc == TYPE_SET or
+              tc == TYPE_FROZENSET):
+        lng = u.get_lng()
+        for i in range(lng):
+            _skip_w_obj(space, u)
+    elif tc == TYPE_DICT:
+        while _skip_w_obj(space, u):    # key, or the final NULL
+            _skip_w_obj(space, u)       # value
+    elif tc == TYPE_CODE:
+        _skip_pycode(space, u)
+    else:
+        u.raise_exc("bad marshal data (unknown type code)")
+    return True
+
 
 @marshaller(W_UnicodeObject)
 def marshal_unicode(space, w_unicode, m):
@@ -8,7 +8,7 @@ from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.unicodeobject import W_UnicodeObject
 from pypy.objspace.std.util import IDTAG_SPECIAL, IDTAG_SHIFT
 
-from rpython.rlib.objectmodel import r_dict
+from rpython.rlib.objectmodel import r_dict, prepare_dict_update
 from rpython.rlib.objectmodel import iterkeys_with_hash, contains_with_hash
 from rpython.rlib.objectmodel import setitem_with_hash, delitem_with_hash
 from rpython.rlib.rarithmetic import intmask, r_uint
@@ -750,6 +750,9 @@ class SetStrategy(object):
     def add(self, w_set, w_key):
         raise NotImplementedError
 
+    def prepare_update(self, w_set, num_extra):
+        pass
+
     def remove(self, w_set, w_item):
         raise NotImplementedError
 
@@ -831,12 +834,20 @@ class EmptySetStrategy(SetStrategy):
             strategy = self.space.fromcache(BytesSetStrategy)
         elif type(w_key) is W_UnicodeObject and w_key.is_ascii():
             strategy = self.space.fromcache(AsciiSetStrategy)
+        elif (type(w_key) is W_UnicodeObject and
+                self.space.config.objspace.std.withunicodestrategies):
+            strategy = self.space.fromcache(UnicodeSetStrategy)
         elif self.space.type(w_key).compares_by_identity():
             strategy = self.space.fromcache(IdentitySetStrategy)
         else:
             strategy = self.space.fromcache(ObjectSetStrategy)
+        # the storage of sets built by BUILD_SET can hold their
+        # AllocationSite, see allocsite.py
+        site = self.unerase(w_set.sstorage)
         w_set.strategy = strategy
         w_set.sstorage = strategy.get_empty_storage()
+        if site is not None:
+            strategy.prepare_update(w_set, site.sizehint)
         w_set.add(w_key)
 
     def remove(self, w_set, w_item):
@@ -900,6 +911,11 @@ class EmptySetStrategy(SetStrategy):
 class AbstractUnwrappedSetStrategy(object):
     _mixin_ = True
 
+    # The storage is an RPython dict whose values are always None.  The
+    # rtyper turns the value field of such dicts into a Void, so each entry
+    # only holds the key (plus a validity flag if the key type has no dummy
+    # value), and the dict itself is a compact entry array plus index table.
+
     def is_correct_type(self, w_key):
         """ Checks wether the given wrapped key fits this strategy."""
         raise NotImplementedError
@@ -931,6 +947,9 @@ class AbstractUnwrappedSetStrategy(object):
     def length(self, w_set):
         return len(self.unerase(w_set.sstorage))
 
+    def prepare_update(self, w_set, num_extra):
+        prepare_dict_update(self.unerase(w_set.sstorage), num_extra)
+
     def clear(self, w_set):
         w_set.switch_to_empty_strategy()
 
@@ -1332,6 +1351,57 @@ class AsciiSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def iter(self, w_set):
         return UnicodeIteratorImplementation(self.space, self, w_set)
 
+    def add(self, w_set, w_key):
+        if self.is_correct_type(w_key):
+            d = self.unerase(w_set.sstorage)
+            d[self.unwrap(w_key)] = None
+            return
+        if (type(w_key) is W_UnicodeObject and
+                self.space.config.objspace.std.withunicodestrategies):
+            # the keys are already utf-8, the dict can be kept as it is
+            w_set.strategy = self.space.fromcache(UnicodeSetStrategy)
+        else:
+            w_set.switch_to_object_strategy(self.space)
+        w_set.add(w_key)
+
+
+class UnicodeSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    """Sets of unicode objects that are not all ascii, stored as their
+    utf-8 encoding.  Enabled by 'withunicodestrategies'."""
+    # same storage as AsciiSetStrategy, switching between them is free
+    erase = staticmethod(AsciiSetStrategy.erase)
+    unerase = staticmethod(AsciiSetStrategy.unerase)
+
+    intersect_jmp = jit.JitDriver(greens = [], reds = 'auto',
+                                  name='set(utf8).intersect')
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def is_correct_type(self, w_key):
+        return type(w_key) is W_UnicodeObject
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(IntegerSetStrategy):
+            return False
+        elif strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        elif strategy is self.space.fromcache(IdentitySetStrategy):
+            return False
+        return True
+
+    def unwrap(self, w_item):
+        return self.space.utf8_w(w_item)
+
+    def wrap(self, item):
+        return self.space.newutf8(item, rutf8.codepoints_in_utf8(item))
+
+    def iter(self, w_set):
+        return Utf8IteratorImplementation(self.space, self, w_set)
+
 
 class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("integer")
@@ -1358,6 +1428,8 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         elif strategy is self.space.fromcache(AsciiSetStrategy):
             return False
+        elif strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
         elif strategy is self.space.fromcache(EmptySetStrategy):
             return False
         elif strategy is self.space.fromcache(IdentitySetStrategy):
@@ -1449,6 +1521,8 @@ class IdentitySetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
             return False
         if strategy is self.space.fromcache(AsciiSetStrategy):
             return False
+        if strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
         return True
 
     def unwrap(self, w_item):
@@ -1536,6 +1610,19 @@ class UnicodeIteratorImplementation(IteratorImplementation):
             return None
 
 
+class Utf8IteratorImplementation(IteratorImplementation):
+    def __init__(self, space, strategy, w_set):
+        IteratorImplementation.__init__(self, space, strategy, w_set)
+        d = strategy.unerase(w_set.sstorage)
+        self.iterator = d.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.newutf8(key, rutf8.codepoints_in_utf8(key))
+        else:
+            return None
+
+
 class IntegerIteratorImplementation(IteratorImplementation):
     #XXX same implementation in dictmultiobject on dictstrategy-branch
     def __init__(self, space, strategy, w_set):
@@ -1682,6 +1769,15 @@ def _pick_correct_strategy_unroll(space, w_set, w_iterable):
         w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
         return
 
+    if space.config.objspace.std.withunicodestrategies:
+        for w_item in iterable_w:
+            if type(w_item) is not W_UnicodeObject:
+                break
+        else:
+            w_set.strategy = space.fromcache(UnicodeSetStrategy)
+            w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+            return
+
     # check for compares by identity
     for w_item in iterable_w:
         if not space.type(w_item).compares_by_identity():
@@ -185,6 +185,13 @@ def _build_zipped_spec(space, Cls, lst1, lst2):
     length = min(len(lst1), len(lst2))
     return [Cls(space, lst1[i], lst2[i]) for i in range(length)]
 
+@specialize.argtype(0)
+def _build_zipped_columns(strategy, lst1, lst2):
+    # with 'withspecialisedtuplelists', the zipped list doesn't need any
+    # tuple object: the two lists are its storage
+    length = min(len(lst1), len(lst2))
+    return strategy.new_list_from_columns(lst1[:length], lst2[:length])
+
 def _build_zipped_spec_oo(space, w_list1, w_list2):
     strat1 = w_list1.strategy
     strat2 = w_list2.strategy
@@ -200,7 +207,8 @@ def _build_zipped_unspec(space, w_list1, w_list2):
                             strat2.getitem(w_list2, i)) for i in range(length)]
 
 def specialized_zip_2_lists(space, w_list1, w_list2):
-    from pypy.objspace.std.listobject import W_ListObject
+    from pypy.objspace.std.listobject import (
+        W_ListObject, IntPairListStrategy, FloatPairListStrategy)
     if type(w_list1) is not W_ListObject or type(w_list2) is not W_ListObject:
         raise oefmt(space.w_TypeError, "expected two exact lists")
 
@@ -209,6 +217,10 @@ def specialized_zip_2_lists(space, w_list1, w_list2):
         if intlist1 is not None:
             intlist2 = w_list2.getitems_int()
             if intlist2 is not None:
+                if space.config.objspace.std.withspecialisedtuplelists:
+                    return _build_zipped_columns(
+                        space.fromcache(IntPairListStrategy),
+                        intlist1, intlist2)
                 lst_w = _build_zipped_spec(
                         space, Cls_ii, intlist1, intlist2)
                 return space.newlist(lst_w)
@@ -217,6 +229,10 @@ def specialized_zip_2_lists(space, w_list1, w_list2):
             if floatlist1 is not None:
                 floatlist2 = w_list2.getitems_float()
                 if floatlist2 is not None:
+                    if space.config.objspace.std.withspecialisedtuplelists:
+                        return _build_zipped_columns(
+                            space.fromcache(FloatPairListStrategy),
+                            floatlist1, floatlist2)
                     lst_w = _build_zipped_spec(
                         space, Cls_ff, floatlist1, floatlist2)
                     return space.newlist(lst_w)
@@ -0,0 +1,153 @@
+"""Slices of strings that share the characters of the sliced string.
+
+When the 'withstrslice' option is enabled, slicing a string returns a
+W_StringSliceObject that points into the original string, as long as the
+slice is not too small compared to it: otherwise a few characters would keep
+a large string alive.  len(), indexing and slicing work on the original
+string.  Every other operation forces the object to a W_BytesObject first,
+which also drops the reference to the original string.
+"""
+
+import inspect
+
+import py
+
+from rpython.rlib.buffer import StringBuffer
+
+from pypy.interpreter.buffer import SimpleView
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.objspace.std.bytesobject import (
+    W_AbstractBytesObject, W_BytesObject)
+from pypy.objspace.std.sliceobject import (
+    W_SliceObject, normalize_simple_slice)
+
+# slices shorter than this, or than a quarter of the sliced string, are copied
+SLICE_SHARING_CUTOFF = 64
+
+
+class W_StringSliceObject(W_AbstractBytesObject):
+    w_str = None
+
+    def __init__(self, s, start, stop):
+        assert 0 <= start <= stop <= len(s)
+        self.s = s
+        self.start = start
+        self.stop = stop
+
+    def force(self):
+        if self.w_str is None:
+            start = self.start
+            stop = self.stop
+            assert start >= 0 and stop >= 0
+            s = self.s[start:stop]
+            self.w_str = W_BytesObject(s)
+            # don't keep the sliced string alive any longer
+            self.s = s
+            self.start = 0
+            self.stop = len(s)
+            return s
+        else:
+            return self.w_str._value
+
+    def __repr__(self):
+        """representation for debugging purposes"""
+        return "%s(%r[%d:%d])" % (
+            self.__class__.__name__, self.s, self.start, self.stop)
+
+    def unwrap(self, space):
+        return self.force()
+
+    def str_w(self, space):
+        return self.force()
+
+    def utf8_w(self, space):
+        return self.force()
+
+    charbuf_w = str_w
+
+    def buffer_w(self, space, flags):
+        space.check_buf_flags(flags, True)
+        return SimpleView(StringBuffer(self.force()))
+
+    def readbuf_w(self, space):
+        return StringBuffer(self.force())
+
+    def ord(self, space):
+        self.force()
+        return self.w_str.ord(space)
+
+    def descr_len(self, space):
+        return space.newint(self.stop - self.start)
+
+    def descr_getitem(self, space, w_index):
+        length = self.stop - self.start
+        if isinstance(w_index, W_SliceObject):
+            start, stop, step, sl = w_index.indices4(space, length)
+            if sl == 0:
+                return W_BytesObject.EMPTY
+            elif step == 1:
+                return new_string_slice(self.s, self.start + start,
+                                        self.start + stop)
+            self.force()
+            return self.w_str.descr_getitem(space, w_index)
+
+        index = space.getindex_w(w_index, space.w_IndexError, "string index")
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise oefmt(space.w_IndexError, "string index out of range")
+        return W_BytesObject(self.s[self.start + index])
+
+    def descr_getslice(self, space, w_start, w_stop):
+        start, stop = normalize_simple_slice(space, self.stop - self.start,
+                                             w_start, w_stop)
+        if start == stop:
+            return W_BytesObject.EMPTY
+        return new_string_slice(self.s, self.start + start, self.start + stop)
+
+    def descr_str(self, space):
+        # you cannot get subclasses of W_StringSliceObject here
+        assert type(self) is W_StringSliceObject
+        return self
+
+
+def new_string_slice(s, start, stop):
+    length = stop - start
+    if length >= SLICE_SHARING_CUTOFF and length >= (len(s) >> 2):
+        return W_StringSliceObject(s, start, stop)
+    assert start >= 0 and stop >= 0
+    return W_BytesObject(s[start:stop])
+
+
+# all the other methods force the string and call the W_BytesObject version
+for key, value in W_BytesObject.typedef.rawdict.iteritems():
+    if not isinstance(value, interp2app):
+        continue
+    if key in ('__new__', '__len__', '__getitem__', '__getslice__',
+               '__str__'):
+        continue
+
+    func = value._code._bltin
+    args = inspect.getargs(func.func_code)
+    if args.varargs or args.keywords:
+        raise TypeError("Varargs and keywords not supported in unwrap_spec")
+    argspec = ', '.join([arg for arg in args.args[1:]])
+    func_code = py.code.Source("""
+    def f(self, %(args)s):
+        self.force()
+        return self.w_str.%(func_name)s(%(args)s)
+    """ % {'args': argspec, 'func_name': func.func_name})
+    d = {}
+    exec func_code.compile() in d
+    f = d['f']
+    f.func_defaults = func.func_defaults
+    f.__module__ = func.__module__
+    # necessary for unique identifiers for pickling
+    f.func_name = func.func_name
+    unwrap_spec_ = getattr(func, 'unwrap_spec', None)
+    if unwrap_spec_ is not None:
+        f = unwrap_spec(**unwrap_spec_)(f)
+    setattr(W_StringSliceObject, func.func_name, f)
+
+W_StringSliceObject.typedef = W_BytesObject.typedef
@@ -0,0 +1,115 @@
+from pypy.objspace.std.allocsite import NUM_SAMPLES
+from pypy.objspace.std.dictmultiobject import EmptyDictStrategy
+from pypy.objspace.std.setobject import EmptySetStrategy
+
+
+class TestAllocationSites:
+    spaceconfig = {"objspace.std.withallocsitefeedback": True}
+
+    def get_site(self, w_func):
+        from pypy.interpreter.pycode import PyCode
+        # comprehensions have their BUILD_MAP or BUILD_SET in a nested code
+        sites = []
+        codes = [w_func.code]
+        while codes:
+            code = codes.pop()
+            sites.extend(code._alloc_sites.values())
+            codes.extend([w_const for w_const in code.co_consts_w
+                          if isinstance(w_const, PyCode)])
+        assert len(sites) == 1
+        return sites[0]
+
+    def test_no_sites_without_option(self):
+        from pypy.tool.pytest.objspace import gettestobjspace
+        space = gettestobjspace()
+        w_f = space.appexec([], """():
+            def f():
+                return {}
+            return f
+        """)
+        assert w_f.code._alloc_sites is None
+
+    def test_dict_feedback(self):
+        space = self.space
+        w_f = space.appexec([], """():
+            def f(n):
+                d = {}
+                for i in range(n):
+                    d[i] = i
+                return d
+            return f
+        """)
+        site = self.get_site(w_f)
+        w_n = space.newint(10)
+        keepalive = [space.call_function(w_f, w_n)
+                     for i in range(NUM_SAMPLES + 1)]
+        assert site.samples == NUM_SAMPLES
+        assert site.sizehint == 10
+        w_d = space.call_function(w_f, space.newint(0))
+        strategy = w_d.get_strategy()
+        assert isinstance(strategy, EmptyDictStrategy)
+        assert strategy.unerase(w_d.dstorage) is site
+        w_d = space.call_function(w_f, w_n)
+        assert space.int_w(space.len(w_d)) == 10
+
+    def test_smallest_size_wins(self):
+        space = self.space
+        w_f = space.appexec([], """():
+            def f(n):
+                return {i: None for i in range(n)}
+            return f
+        """)
+        site = self.get_site(w_f)
+        keepalive = [space.call_function(w_f, space.newint(n))
+                     for n in [5, 3, 7, 4, 6, 1]]
+        assert site.samples == NUM_SAMPLES
+        assert site.sizehint == 3
+
+    def test_set_feedback(self):
+        space = self.space
+        w_f = space.appexec([], """():
+            def f(n):
+                return {str(i) for i in range(n)}
+            return f
+        """)
+        site = self.get_site(w_f)
+        w_n = space.newint(8)
+        keepalive = [space.call_function(w_f, w_n)
+                     for i in range(NUM_SAMPLES + 1)]
+        assert site.sizehint == 8
+        w_s = space.call_function(w_f, space.newint(0))
+        assert isinstance(w_s.strategy, EmptySetStrategy)
+        assert w_s.strategy.unerase(w_s.sstorage) is site
+
+
+class AppTestAllocationSites:
+    spaceconfig = {"objspace.std.withallocsitefeedback": True}
+
+    def test_dicts(self):
+        def f(n):
+            d = {}
+            for i in range(n):
+                d[str(i)] = i
+            return d
+        l = [f(20) for i in range(10)]
+        assert l[-1] == dict((str(i), i) for i in range(20))
+        assert f(0) == {}
+        d = f(0)
+        d.setdefault(1, 2)
+        assert d == {1: 2}
+        d = f(0)
+        d.update(a=5)
+        assert d == {'a': 5}
+
+    def test_sets(self):
+        def f(*args):
+            return {1, 2, 3} | set(args)
+        def g(n):
+            return {i for i in range(n)}
+        l = [g(20) for i in range(10)]
+        assert l[-1] == set(range(20))
+        assert g(0) == set()
+        s = g(0)
+        s.add('x')
+        assert s == set(['x'])
+        assert f(4) == set([1, 2, 3, 4])
@@ -1275,6 +1275,78 @@ class AppTestStrategies(object):
         raises(RuntimeError, list, it)
 
 
+class AppTestUnboxedValueStrategies(AppTestStrategies):
+    spaceconfig = {"objspace.std.withunboxeddictvalues": True}
+
+    def test_empty_to_string(self):
+        d = {}
+        d[b"a"] = 1
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+        d = {}
+        d[b"a"] = 1.5
+        assert "BytesFloatDictStrategy" in self.get_strategy(d)
+        d = {}
+        d[b"a"] = None
+        assert "BytesDictStrategy" in self.get_strategy(d)
+
+    def test_empty_to_int(self):
+        d = {}
+        d[1] = 2
+        assert "IntIntDictStrategy" in self.get_strategy(d)
+        assert d[1L] == 2
+        d = {}
+        d[1] = "hi"
+        assert "IntDictStrategy" in self.get_strategy(d)
+
+    def test_counter(self):
+        d = {}
+        for key in [b"a", b"b", b"a", b"c", b"a"]:
+            d[key] = d.get(key, 0) + 1
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+        assert d == {b"a": 3, b"b": 1, b"c": 1}
+        assert sorted(d.values()) == [1, 1, 3]
+        assert sorted(d.items()) == [(b"a", 3), (b"b", 1), (b"c", 1)]
+        assert d.setdefault(b"b", 7) == 1
+        assert d.setdefault(b"d", 7) == 7
+        assert d.pop(b"d") == 7
+        assert d.pop(b"d", None) is None
+        assert "BytesIntDictStrategy" in self.get_strategy(d)
+
+    def test_devolve_on_value(self):
+        d = {1: 2, 3: 4}
+        d[5] = "x"
+        assert "IntDictStrategy" in self.get_strategy(d)
+        assert d == {1: 2, 3: 4, 5: "x"}
+        d = {b"a": 1.5}
+        d[b"b"] = 1
+        assert "BytesDictStrategy" in self.get_strategy(d)
+        assert d == {b"a": 1.5, b"b": 1}
+        d = {b"a": 1}
+        assert d.setdefault(b"b", []) == []
+        assert "BytesDictStrategy" in self.get_strategy(d)
+
+    def test_devolve_on_key(self):
+        d = {1: 2}
+        d[b"x"] = 3
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {1: 2, b"x": 3}
+
+    def test_value_subclasses(self):
+        d = {}
+        d[1] = True
+        assert "IntIntDictStrategy" not in self.get_strategy(d)
+        assert d[1] is True
+        class myint(int):
+            pass
+        d = {1: 2}
+        d[3] = myint(4)
+        assert type(d[3]) is myint
+
+
+class AppTest_DictObjectUnboxedValues(AppTest_DictObject):
+    spaceconfig = {"objspace.std.withunboxeddictvalues": True}
+
+
 class FakeWrapper(object):
     hash_count = 0
     def unwrap(self, space):
@@ -1393,6 +1465,8 @@ class Config:
         class std:
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withunboxeddictvalues = False
+            withsizedinstances = False
         honor__builtins__ = False
 
 FakeSpace.config = Config()
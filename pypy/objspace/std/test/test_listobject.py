@@ -1911,7 +1911,7 @@ class AppTestRangeListForcing:
         for i in r[10:15]:
             result.append(i)
         assert result == [21, 23, 25, 27, 29]
-        assert not self.not_forced(r)
+        assert self.not_forced(r)
 
     def test_getitem_extended_slice(self):
         result = []
@@ -1919,13 +1919,27 @@ class AppTestRangeListForcing:
         for i in r[40:30:-2]:
             result.append(i)
         assert result == [81, 77, 73, 69, 65]
-        assert not self.not_forced(r)
+        assert self.not_forced(r)
 
     def test_repr(self):
         r = range(5)
         assert repr(r) == "[0, 1, 2, 3, 4]"
         assert self.not_forced(r)
 
+    def test_getslice(self):
+        r = range(3, 30, 3)
+        s = r[1:7:2]
+        assert self.not_forced(r)
+        assert self.not_forced(s)
+        assert s == [6, 12, 18]
+        s = r[::-1]
+        assert self.not_forced(s)
+        assert s == range(27, 0, -3)
+        s.append(0)
+        assert not self.not_forced(s)
+        assert self.not_forced(r)
+        assert r == range(3, 30, 3)
+
     def test_force(self):
         r = range(10)
         r[0] = 42
@@ -1977,6 +1991,65 @@ class AppTestRangeListForcing:
         assert r == [1, 2, 3, 4, 5, 6, 7]
 
 
+class AppTestSliceList:
+    def test_mutate_slice(self):
+        l = [str(i) for i in range(100)]
+        l2 = l[::-1]
+        l3 = l2[10:]
+        l2[0] = 'x'
+        assert l2 == ['x'] + [str(i) for i in range(98, -1, -1)]
+        assert l3 == [str(i) for i in range(89, -1, -1)]
+        assert l == [str(i) for i in range(100)]
+        del l3[:5]
+        l3.sort()
+        assert l3 == sorted(str(i) for i in range(85))
+
+    def test_mutate_sliced(self):
+        l = [float(i) for i in range(100)]
+        l2 = l[:]
+        l3 = l[50:]
+        l.reverse()
+        l.append(0.5)
+        assert l2 == [float(i) for i in range(100)]
+        assert l3 == [float(i) for i in range(50, 100)]
+        l2 += l3
+        assert len(l2) == 150
+        l3 *= 2
+        assert l3 == [float(i) for i in range(50, 100)] * 2
+
+    def test_pop(self):
+        l = range(200)
+        l.append(None)
+        l2 = l[:200]
+        result = []
+        while l2:
+            result.append(l2.pop(0))
+            l2.pop()
+        assert result == range(100)
+        assert len(l) == 201
+
+    def test_index_count(self):
+        l = [i % 10 for i in range(100)]
+        l2 = l[5:]
+        assert l2.index(3) == 8
+        assert l2.index(3, 10) == 18
+        assert l2.count(3) == 9
+        assert l2.count(42) == 0
+        raises(ValueError, l2.index, 42)
+        raises(ValueError, l2.index, 3, 95)
+        l2 = l[::-2]
+        assert l2.index(9) == 0
+        assert l2.count(9) == 10
+        assert 7 in l2
+        assert 8 not in l2
+
+    def test_identity(self):
+        objs = [object() for i in range(100)]
+        l = objs[10:90]
+        assert all(a is b for a, b in zip(l, objs[10:90]))
+        assert l[-1] is objs[89]
+
+
 class AppTestWithoutStrategies:
     spaceconfig = {"objspace.std.withliststrategies": False}
 
@@ -1989,6 +2062,14 @@ class AppTestWithoutStrategies:
         notshared = l[:]
         assert notshared == []
 
+    def test_large_slice(self):
+        l = range(100)
+        l2 = l[1:]
+        l2.append(100)
+        l[0] = -1
+        assert l == [-1] + range(1, 100)
+        assert l2 == range(1, 101)
+
 
 class AppTestListFastSubscr:
     spaceconfig = {"objspace.std.optimized_list_getitem": True}
@@ -2000,3 +2081,70 @@ class AppTestListFastSubscr:
             assert l[i] == i
         assert l[3:] == [3, 4]
         raises(TypeError, operator.getitem, l, "str")
+
+
+class AppTestSpecialisedTupleLists:
+    spaceconfig = {"objspace.std.withspecialisedtuplelists": True}
+
+    def test_pairs(self):
+        l = [(i, -i) for i in range(10)]
+        assert l[3] == (3, -3)
+        assert (4, -4) in l
+        assert l.index((5, -5)) == 5
+        l.sort()
+        assert l[0] == (0, 0)
+        l.sort(reverse=True)
+        assert l[0] == (9, -9)
+        assert l[2:4] == [(7, -7), (6, -6)]
+        l.append((1.5, 2.5))
+        assert l[-1] == (1.5, 2.5)
+        assert len(l) == 11
+
+    def test_float_pairs(self):
+        l = [(1.5, 0.0), (0.5, -1.0)]
+        l.sort()
+        assert l == [(0.5, -1.0), (1.5, 0.0)]
+        l.insert(0, (1, 2))
+        assert l == [(1, 2), (0.5, -1.0), (1.5, 0.0)]
+
+    def test_identity_is_lost(self):
+        t = (1, 2)
+        l = [t]
+        assert l[0] == t
+        assert l[0] is not t
+        assert l[0] is not l[0]
+
+    def test_sort_itemgetter(self):
+        import operator
+        l = [(i % 3, -i) for i in range(10)]
+        l.sort(key=operator.itemgetter(0))
+        assert l == [(0, 0), (0, -3), (0, -6), (0, -9), (1, -1), (1, -4),
+                     (1, -7), (2, -2), (2, -5), (2, -8)]
+        l.sort(key=operator.itemgetter(-1), reverse=True)
+        assert l == [(i % 3, -i) for i in range(10)]
+        l.sort(key=operator.itemgetter(1))
+        assert l == [(i % 3, -i) for i in reversed(range(10))]
+        l = [(0.5, 2.0), (1.5, float('nan')), (2.5, 1.0), (3.5, 1.0)]
+        l.sort(key=operator.itemgetter(1), reverse=True)
+        assert l[0] == (0.5, 2.0)
+        assert l[2:] == [(2.5, 1.0), (3.5, 1.0)]
+        # other keys still work
+        l.sort(key=lambda t: -t[0])
+        assert [t[0] for t in l] == [3.5, 2.5, 1.5, 0.5]
+        raises(IndexError, l.sort, key=operator.itemgetter(2))
+
+    def test_sort_itemgetter_patched(self):
+        import operator
+        class itemgetter(operator.itemgetter):
+            def __call__(self, t):
+                return -t[0]
+        l = [(1, 2), (3, 4)]
+        l.sort(key=itemgetter(0))
+        assert l == [(3, 4), (1, 2)]
+        old_call = operator.itemgetter.__call__
+        operator.itemgetter.__call__ = lambda self, t: -t[0]
+        try:
+            l.sort(key=operator.itemgetter(0))
+        finally:
+            operator.itemgetter.__call__ = old_call
+        assert l == [(3, 4), (1, 2)]
@@ -4,7 +4,9 @@ from pypy.objspace.std.listobject import (
     W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy,
     FloatListStrategy, BytesListStrategy, RangeListStrategy,
     SimpleRangeListStrategy, make_range_list, AsciiListStrategy,
-    IntOrFloatListStrategy)
+    UnicodeListStrategy,
+    IntOrFloatListStrategy, IntPairListStrategy, FloatPairListStrategy,
+    SliceListStrategy)
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -515,6 +517,24 @@ class TestW_ListStrategies(TestW_ListObject):
         l2 = l.getslice(0, 21, 11, 2)
         assert isinstance(l2.strategy, IntegerListStrategy)
 
+    def test_range_getslice_is_range(self):
+        space = self.space
+        l = make_range_list(space, 1, 3, 10)
+        l2 = l.getslice(2, 8, 2, 3)
+        assert isinstance(l.strategy, RangeListStrategy)
+        assert isinstance(l2.strategy, RangeListStrategy)
+        assert space.unwrap(l2) == [7, 13, 19]
+        l3 = l2.getslice(2, -1, -1, 3)
+        assert isinstance(l3.strategy, RangeListStrategy)
+        assert space.unwrap(l3) == [19, 13, 7]
+        l = make_range_list(space, 0, 1, 10)
+        l2 = l.getslice(0, 5, 1, 5)
+        assert isinstance(l.strategy, SimpleRangeListStrategy)
+        assert isinstance(l2.strategy, SimpleRangeListStrategy)
+        assert space.unwrap(l2) == [0, 1, 2, 3, 4]
+        l2 = l.getslice(4, 5, 1, 1)
+        assert space.unwrap(l2) == [4]
+
     def test_range_setslice(self):
         l = make_range_list(self.space, 1, 3, 5)
         assert isinstance(l.strategy, RangeListStrategy)
@@ -531,6 +551,81 @@ class TestW_ListStrategies(TestW_ListObject):
         l.sort(False)
         assert isinstance(l.strategy, IntegerListStrategy)
 
+    def test_slice_shares_items(self):
+        space = self.space
+        l = W_ListObject(space, [space.wrap(i) for i in range(100)])
+        l2 = l.getslice(10, 90, 1, 80)
+        assert isinstance(l.strategy, SliceListStrategy)
+        assert isinstance(l2.strategy, SliceListStrategy)
+        assert space.unwrap(l2) == range(10, 90)
+        assert space.unwrap(l.getitem(-1)) == 99
+        l2.setitem(0, space.wrap(-1))
+        assert isinstance(l2.strategy, IntegerListStrategy)
+        assert isinstance(l.strategy, SliceListStrategy)
+        assert space.unwrap(l2) == [-1] + range(11, 90)
+        assert space.unwrap(l) == range(100)
+        l.append(space.wrap(100))
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert space.unwrap(l) == range(101)
+
+    def test_slice_small_copies(self):
+        space = self.space
+        l = W_ListObject(space, [space.wrap(i) for i in range(1000)])
+        l2 = l.getslice(0, 10, 1, 10)
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert isinstance(l2.strategy, IntegerListStrategy)
+        l2 = l.getslice(0, 100, 1, 100)    # less than a quarter of l
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert isinstance(l2.strategy, IntegerListStrategy)
+
+    def test_slice_of_slice(self):
+        space = self.space
+        l = W_ListObject(space, [space.wrap(str(i)) for i in range(200)])
+        l2 = l.getslice(199, -1, -1, 200)
+        assert isinstance(l2.strategy, SliceListStrategy)
+        l3 = l2.getslice(1, 199, 2, 99)
+        assert isinstance(l3.strategy, SliceListStrategy)
+        assert space.unwrap(l3) == [str(i) for i in range(198, 0, -2)]
+        l4 = l3.getslice(0, 99, 1, 99)
+        assert space.unwrap(l4) == [str(i) for i in range(198, 0, -2)]
+        # a small slice of a view does not keep all the items alive
+        l4 = l3.getslice(0, 20, 1, 20)
+        assert isinstance(l4.strategy, BytesListStrategy)
+        assert space.unwrap(l4) == [str(i) for i in range(198, 158, -2)]
+        l4 = l2.getslice(0, 20, -1, 20)
+        assert isinstance(l4.strategy, BytesListStrategy)
+
+    def test_slice_pop(self):
+        space = self.space
+        l = W_ListObject(space, [space.wrap(i) for i in range(100)])
+        l2 = l.getslice(0, 100, 1, 100)
+        assert space.unwrap(l2.pop(0)) == 0
+        assert space.unwrap(l2.pop_end()) == 99
+        assert isinstance(l2.strategy, SliceListStrategy)
+        assert space.unwrap(l2) == range(1, 99)
+        assert space.unwrap(l2.pop(5)) == 6
+        assert isinstance(l2.strategy, IntegerListStrategy)
+        assert space.unwrap(l) == range(100)
+        for i in range(100):
+            l.pop_end()
+        assert isinstance(l.strategy, EmptyListStrategy)
+
+    def test_slice_extend_keeps_strategy(self):
+        space = self.space
+        l = W_ListObject(space, [space.wrap(i) for i in range(200)])
+        l2 = l.getslice(0, 200, 2, 100)
+        assert isinstance(l2.strategy, SliceListStrategy)
+        l3 = W_ListObject(space, [space.wrap(-1)])
+        l3.extend(l2)
+        assert isinstance(l3.strategy, IntegerListStrategy)
+        assert space.unwrap(l3) == [-1] + range(0, 200, 2)
+        l4 = W_ListObject(space, [])
+        l4.extend(l)
+        assert isinstance(l4.strategy, SliceListStrategy)
+        l3.setslice(0, 1, 1, l4)
+        assert isinstance(l3.strategy, IntegerListStrategy)
+        assert space.unwrap(l3) == range(200) + range(0, 200, 2)
+
     def test_copy_list(self):
         l1 = W_ListObject(self.space, [self.space.wrap(1), self.space.wrap(2), self.space.wrap(3)])
         l2 = l1.clone()
@@ -1059,3 +1154,187 @@ class TestW_ListStrategiesDisabled:
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap('a')]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap(2),self.space.wrap(3)]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap('a'), self.space.wrap('b')]).strategy, ObjectListStrategy)
+
+
+class TestW_ListStrategiesUnicode:
+    spaceconfig = {"objspace.std.withunicodestrategies": True}
+
+    def unwrap_unicode(self, w_l):
+        space = self.space
+        return [space.utf8_w(w_item).decode('utf-8')
+                for w_item in space.listview(w_l)]
+
+    def test_check_strategy(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w(u'\xe9t\xe9'), w(u'a')])
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        w_l = W_ListObject(space, [w(u'a'), w(u'\u1234')])
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        w_l = W_ListObject(space, [w(u'a'), w(u'b')])
+        assert isinstance(w_l.strategy, AsciiListStrategy)
+        w_l = W_ListObject(space, [w(u'\xe9'), space.newbytes('b')])
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+
+    def test_ascii_to_unicode(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [])
+        w_l.append(w(u'a'))
+        assert isinstance(w_l.strategy, AsciiListStrategy)
+        storage = w_l.lstorage
+        w_l.append(w(u'\xe9\u1234'))
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert w_l.lstorage is storage
+        w_l.append(w(u'b'))
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        w_item = w_l.getitem(1)
+        assert space.len_w(w_item) == 2
+        assert self.unwrap_unicode(w_l) == [u'a', u'\xe9\u1234', u'b']
+        w_l.append(w(u'c'))
+        w_l.append(w(1))
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        assert space.len_w(w_l.getitem(1)) == 2
+
+    def test_extend_and_setslice(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w(u'a'), w(u'b')])
+        w_l.extend(W_ListObject(space, [w(u'\xe9')]))
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        w_l.extend(W_ListObject(space, [w(u'c')]))
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert self.unwrap_unicode(w_l) == [u'a', u'b', u'\xe9', u'c']
+        w_l = W_ListObject(space, [w(u'a'), w(u'b')])
+        w_l.setslice(0, 1, 1, W_ListObject(space, [w(u'\xe9')]))
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert self.unwrap_unicode(w_l) == [u'\xe9', u'b']
+
+    def test_sort(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w(u'\u1234'), w(u'b'), w(u'\xe9'),
+                                   w(u'\U00012345'), w(u'a')])
+        w_l.sort(False)
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert self.unwrap_unicode(w_l) == [u'a', u'b', u'\xe9', u'\u1234',
+                                     u'\U00012345']
+
+
+class TestW_ListStrategiesSpecialisedTuples:
+    spaceconfig = {"objspace.std.withspecialisedtuplelists": True}
+
+    def test_check_strategy(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w((1, 2)), w((3, 4))])
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        w_l = W_ListObject(space, [w((1.5, 2.5)), w((3.0, 4.0))])
+        assert isinstance(w_l.strategy, FloatPairListStrategy)
+        w_l = W_ListObject(space, [w((1, 2)), w((3.0, 4.0))])
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        w_l = W_ListObject(space, [w((1, 2, 3))])
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+
+    def test_empty_to_pair(self):
+        space = self.space
+        w_l = W_ListObject(space, [])
+        w_l.append(space.wrap((1, 2)))
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        w_l.append(space.wrap((5, 6)))
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        assert space.unwrap(w_l) == [(1, 2), (5, 6)]
+        w_l.append(space.wrap(7))
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        assert space.unwrap(w_l) == [(1, 2), (5, 6), 7]
+
+    def test_getitem_setitem(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w((1, 2)), w((3, 4))])
+        w_item = w_l.getitem(1)
+        assert space.unwrap(w_item) == (3, 4)
+        w_l.setitem(0, w((-5, 6)))
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        assert space.unwrap(w_l) == [(-5, 6), (3, 4)]
+        w_l.setitem(0, w((1.5, 6.0)))
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        assert space.unwrap(w_l) == [(1.5, 6.0), (3, 4)]
+
+    def test_find_and_sort(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w((3, 1)), w((1, 2)), w((1, 1)),
+                                   w((3, 1))])
+        assert w_l.find_or_count(w((1, 1))) == 2
+        assert w_l.find_or_count(w((3, 1)), count=True) == 2
+        py.test.raises(ValueError, w_l.find_or_count, w((2, 2)))
+        w_l.sort(False)
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        assert space.unwrap(w_l) == [(1, 1), (1, 2), (3, 1), (3, 1)]
+        w_l.sort(True)
+        assert space.unwrap(w_l) == [(3, 1), (3, 1), (1, 2), (1, 1)]
+
+    def test_float_pair_nan(self):
+        space = self.space
+        w = space.wrap
+        nan = float('nan')
+        w_l = W_ListObject(space, [w((2.0, nan)), w((1.0, 2.0))])
+        assert isinstance(w_l.strategy, FloatPairListStrategy)
+        assert w_l.find_or_count(w((2.0, nan))) == 0
+        w_l.sort(False)
+        assert space.unwrap(w_l)[0] == (1.0, 2.0)
+
+    def test_storage_is_columns(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w((1, 2)), w((3, 4)), w((5, 6))])
+        storage = w_l.strategy.unerase(w_l.lstorage)
+        assert storage.items0 == [1, 3, 5]
+        assert storage.items1 == [2, 4, 6]
+        w_l.pop(1)
+        w_l.insert(0, w((7, 8)))
+        assert storage.items0 == [7, 1, 5]
+        assert storage.items1 == [8, 2, 6]
+
+    def test_slices(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w((i, -i)) for i in range(10)])
+        w_slice = w_l.getslice(1, 9, 3, 3)
+        assert isinstance(w_slice.strategy, IntPairListStrategy)
+        assert space.unwrap(w_slice) == [(1, -1), (4, -4), (7, -7)]
+        w_l.deleteslice(8, -3, 3)
+        assert space.unwrap(w_l) == [(0, 0), (1, -1), (3, -3), (4, -4),
+                                     (6, -6), (7, -7), (9, -9)]
+        w_l.setslice(1, 1, 5, W_ListObject(space, [w((5, 5))]))
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        assert space.unwrap(w_l) == [(0, 0), (5, 5), (9, -9)]
+        w_l.setslice(0, 2, 2, w_l.getslice(2, -1, -2, 2))
+        assert space.unwrap(w_l) == [(9, -9), (5, 5), (0, 0)]
+        w_l.setslice(1, 1, 1, W_ListObject(space, [w(1)]))
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        assert space.unwrap(w_l) == [(9, -9), 1, (0, 0)]
+
+    def test_extend(self):
+        space = self.space
+        w = space.wrap
+        w_l = W_ListObject(space, [w((1.5, 2.5))])
+        w_l.extend(W_ListObject(space, [w((3.5, 4.5))]))
+        assert isinstance(w_l.strategy, FloatPairListStrategy)
+        w_l.extend(w_l)
+        assert space.unwrap(w_l) == [(1.5, 2.5), (3.5, 4.5)] * 2
+        w_l.extend(W_ListObject(space, [w((1, 2))]))
+        assert isinstance(w_l.strategy, ObjectListStrategy)
+        assert space.unwrap(w_l) == [(1.5, 2.5), (3.5, 4.5)] * 2 + [(1, 2)]
+
+    def test_zip(self):
+        space = self.space
+        w_l = space.call_function(space.builtin.get('zip'),
+                                  space.wrap([1, 2, 3]), space.wrap([4, 5]))
+        assert isinstance(w_l.strategy, IntPairListStrategy)
+        assert space.unwrap(w_l) == [(1, 4), (2, 5)]
+        w_l = space.call_function(space.builtin.get('zip'),
+                                  space.wrap([1.5]), space.wrap([4.5]))
+        assert isinstance(w_l.strategy, FloatPairListStrategy)
+        assert space.unwrap(w_l) == [(1.5, 4.5)]
@@ -11,11 +11,14 @@ class Config:
         class std:
             methodcachesizeexp = 11
             withmethodcachecounter = False
+            withsizedinstances = True
 
 space = FakeSpace()
 space.config = Config
 
 class Class(object):
+    sized_instance_class = None
+
     def __init__(self, hasdict=True, allow_unboxing=False):
         self.hasdict = hasdict
         if hasdict:
@@ -110,7 +113,7 @@ def test_huge_chain():
 
 
 def test_search():
-    aa = PlainAttribute("b", DICT, PlainAttribute("a", DICT, Terminator(None, None), 0), 0)
+    aa = PlainAttribute("b", DICT, PlainAttribute("a", DICT, Terminator(space, None), 0), 0)
     assert aa.search(DICT) is aa
     assert aa.search(SLOTS_STARTING_FROM) is None
     assert aa.search(SPECIAL) is None
@@ -660,7 +663,8 @@ def test_unboxed_type_change():
     w_obj.setdictvalue(space, "b", "woopsie")
     assert w_obj.getdictvalue(space, "b") == "woopsie"
     assert type(w_obj.map) is PlainAttribute
-    assert w_obj.map.terminator.allow_unboxing == False
+    # only the attribute is devolved, not the whole class
+    assert w_obj.map.terminator.allow_unboxing == True
 
     w_obj = cls.instantiate(space)
     w_obj.setdictvalue(space, "b", 15.12)
@@ -680,7 +684,7 @@ def test_unboxed_type_change_other_object():
     w_obj1.setdictvalue(space, "b", "woopsie")
     assert w_obj1.getdictvalue(space, "b") == "woopsie"
     assert type(w_obj1.map) is PlainAttribute
-    assert w_obj1.map.terminator.allow_unboxing == False
+    assert w_obj2.map.devolved
 
     # w_obj2 is unaffected so far
     assert type(w_obj2.map) is UnboxedPlainAttribute
@@ -698,7 +702,43 @@ def test_unboxed_mixed_two_different_instances():
     w_obj2 = cls.instantiate(space)
     w_obj2.setdictvalue(space, "b", "abc")
 
-    assert w_obj2.map.terminator.allow_unboxing == False
+    assert type(w_obj2.map) is PlainAttribute
+    assert w_obj1.map.devolved
+    assert w_obj1.getdictvalue(space, "b") == 15.12
+    assert w_obj1.map is w_obj2.map
+
+@skip_if_no_int_unboxing
+def test_unboxed_type_change_keeps_other_attributes():
+    cls = Class(allow_unboxing=True)
+    w_obj1 = cls.instantiate(space)
+    w_obj1.setdictvalue(space, "a", 1)
+    w_obj1.setdictvalue(space, "b", 2)
+    w_obj1.setdictvalue(space, "c", 3.5)
+    w_obj1.setdictvalue(space, "b", None)
+    assert w_obj1.getdictvalue(space, "a") == 1
+    assert w_obj1.getdictvalue(space, "b") is None
+    assert w_obj1.getdictvalue(space, "c") == 3.5
+    assert type(w_obj1.map) is UnboxedPlainAttribute
+    assert type(w_obj1.map.back) is PlainAttribute
+    assert type(w_obj1.map.back.back) is UnboxedPlainAttribute
+    assert w_obj1.map.terminator.allow_unboxing
+
+    # new instances get the same layout, the ints are still unboxed
+    w_obj2 = cls.instantiate(space)
+    w_obj2.setdictvalue(space, "a", 4)
+    w_obj2.setdictvalue(space, "b", 5)
+    w_obj2.setdictvalue(space, "c", 6.5)
+    assert w_obj2.map is w_obj1.map
+    assert unerase_unboxed(w_obj2.storage[0]) == [4, float2longlong(6.5)]
+    assert w_obj2.getdictvalue(space, "b") == 5
+
+    # a second type change on another attribute
+    w_obj2.setdictvalue(space, "a", "x")
+    assert type(w_obj2.map.back.back) is PlainAttribute
+    assert type(w_obj2.map) is UnboxedPlainAttribute
+    assert w_obj2.getdictvalue(space, "a") == "x"
+    assert w_obj2.getdictvalue(space, "b") == 5
+    assert w_obj2.getdictvalue(space, "c") == 6.5
 
 def test_unboxed_attr_immutability(monkeypatch):
     cls = Class(allow_unboxing=True)
@@ -1064,6 +1104,62 @@ def test_specialized_class_overflow():
         for j in range(i + 1, 20):
             assert obj.getdictvalue(space, str(j)) is objs[(j + 1) % len(objs)]
 
+def test_size_estimate():
+    cls = Class()
+    assert cls.terminator.size_estimate() == SUBCLASSES_NUM_FIELDS
+    for i in range(100):
+        obj = cls.instantiate()
+        obj.setdictvalue(space, "a", 1)
+        obj.setdictvalue(space, "b", 2)
+    assert cls.terminator.size_estimate() == 2
+    for i in range(1000):
+        obj = cls.instantiate()
+        for name in "abcdefghij":
+            obj.setdictvalue(space, name, 3)
+    assert cls.terminator.size_estimate() == 10
+    assert obj.map.size_estimate() == 10
+    assert obj.map.back.size_estimate() == 10
+
+
+def test_get_subclass_of_correct_size():
+    from pypy.objspace.std.mapdict import get_subclass_of_correct_size
+    from pypy.interpreter.typedef import get_unique_interplevel_subclass
+    cls = Class()
+    def get(size):
+        cls.terminator._size_estimate = size * NUM_DIGITS_POW2
+        return get_subclass_of_correct_size(space, W_ObjectObject, cls)
+    assert "Size2" in get(0).__name__
+    assert "Size2" in get(2).__name__
+    assert get(5) is get_unique_interplevel_subclass(space, W_ObjectObject)
+    assert "Size8" in get(6).__name__
+    assert get(50) is get(6)
+    assert cls.sized_instance_class is None
+
+def test_get_subclass_of_correct_size_settles():
+    from pypy.objspace.std.mapdict import get_subclass_of_correct_size
+    cls = Class()
+    cls.terminator._size_estimate = 2 * NUM_DIGITS_POW2
+    subcls = get_subclass_of_correct_size(space, W_ObjectObject, cls)
+    assert "Size2" in subcls.__name__
+    cls.terminator._size_estimate = 8 * NUM_DIGITS_POW2
+    for i in range(SIZED_INSTANCES_SETTLE - 1):
+        assert get_subclass_of_correct_size(space, W_ObjectObject, cls) is not subcls
+    assert cls.sized_instance_class is None
+    subcls = get_subclass_of_correct_size(space, W_ObjectObject, cls)
+    assert "Size8" in subcls.__name__
+    assert cls.sized_instance_class is subcls
+    # from now on the estimate is ignored
+    cls.terminator._size_estimate = 0
+    assert get_subclass_of_correct_size(space, W_ObjectObject, cls) is subcls
+
+def test_no_size_estimate_without_sizedinstances(monkeypatch):
+    monkeypatch.setattr(Config.objspace.std, "withsizedinstances", False)
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", 1)
+    assert not hasattr(cls.terminator, "_size_estimate")
+    assert not hasattr(obj.map, "_size_estimate")
+
  
 # ___________________________________________________________
 # integration tests
@@ -1381,19 +1477,22 @@ class AppTestWithMapDictAndCounters(object):
             w_code = space.getattr(w_func, space.wrap('func_code'))
             nameindex = map(space.str_w, w_code.co_names_w).index(name)
             entry = w_code._mapdict_caches[nameindex]
-            entry.failure_counter = 0
-            entry.success_counter = 0
+            while entry is not None:
+                entry.failure_counter = 0
+                entry.success_counter = 0
+                entry = entry.next
             INVALID_CACHE_ENTRY.failure_counter = 0
             #
             w_res = space.call_function(w_func)
             assert space.eq_w(w_res, space.wrap(42))
             #
+            # sum the counters of all the entries of the polymorphic cache
             entry = w_code._mapdict_caches[nameindex]
-            if entry is INVALID_CACHE_ENTRY:
-                failures = successes = 0
-            else:
-                failures = entry.failure_counter
-                successes = entry.success_counter
+            failures = successes = 0
+            while entry is not None and entry is not INVALID_CACHE_ENTRY:
+                failures += entry.failure_counter
+                successes += entry.success_counter
+                entry = entry.next
             globalfailures = INVALID_CACHE_ENTRY.failure_counter
             return space.wrap((failures, successes, globalfailures))
         check.unwrap_spec = [gateway.ObjSpace, gateway.W_Root, 'text']
@@ -1878,6 +1977,72 @@ class AppTestWithMapDictAndCounters(object):
         res = self.check(f, 'attrinitb')
         assert res == (0, 2, 0)
 
+    def test_polymorphic_load(self):
+        import __pypy__
+        class A(object):
+            pass
+        class B(object):
+            pass
+        class C(object):
+            pass
+        l = []
+        for cls in [A, B, C]:
+            obj = cls()
+            obj.x = 42
+            l.append(obj)
+        l[1].y = 5
+        def f(l):
+            res = 0
+            for obj in l:
+                res += obj.x
+            return res
+        for i in range(10):
+            assert f(l) == 3 * 42
+        hits, misses = __pypy__.attr_cache_counter(f.func_code, 'x')
+        assert (hits, misses) == (27, 3)
+
+    def test_polymorphic_store_and_method(self):
+        import __pypy__
+        class A(object):
+            def m(self):
+                return self.x
+        class B(A):
+            pass
+        l = [A(), B(), A(), B()]
+        def f(l):
+            for obj in l:
+                obj.x = 21
+            return sum([obj.m() for obj in l])
+        for i in range(5):
+            assert f(l) == 4 * 21
+        code = f.func_code
+        # the first store of each class adds the attribute, and misses
+        # once more when the class goes on with the new map
+        hits, misses = __pypy__.attr_cache_counter(code, 'x')
+        assert misses <= 4 and hits + misses == 20
+        hits, misses = __pypy__.attr_cache_counter(code, 'm')
+        assert (hits, misses) == (18, 2)
+
+    def test_polymorphic_too_many(self):
+        import __pypy__
+        classes = [type('A%d' % i, (object,), {}) for i in range(6)]
+        l = []
+        for cls in classes:
+            obj = cls()
+            obj.x = 1
+            l.append(obj)
+        def f(l):
+            res = 0
+            for obj in l:
+                res += obj.x
+            return res
+        for i in range(3):
+            assert f(l) == 6
+        hits, misses = __pypy__.attr_cache_counter(f.func_code, 'x')
+        assert hits + misses == 18
+        assert misses > 6     # the entries are evicted
+        assert __pypy__.attr_cache_counter(f.func_code, 'foo') == (0, 0)
+
     def test_store_cache_unboxing_problem(self):
         class A(object):
             pass
@@ -1909,6 +2074,33 @@ class AppTestWithMapDictAndCounters(object):
         a.a5 = (int, str)
 
 
+class AppTestSizedInstances(AppTestWithMapDict):
+    spaceconfig = {"objspace.std.withsizedinstances": True}
+
+    def test_size_follows_usage(self):
+        import __pypy__
+        class Small(object):
+            pass
+        class Big(object):
+            pass
+        for i in range(100):
+            s = Small()
+            s.x = i
+            b = Big()
+            for j in range(10):
+                # not ints: those would all be stored unboxed in one slot
+                setattr(b, "a%d" % j, str(j))
+        assert "Size2" in __pypy__.internal_repr(Small())
+        assert "Size8" in __pypy__.internal_repr(Big())
+        b = Big()
+        b.a0 = 1
+        assert b.a0 == 1
+        s = Small()
+        for j in range(10):
+            setattr(s, "a%d" % j, j)
+        assert [getattr(s, "a%d" % j) for j in range(10)] == range(10)
+
+
 class AppTestGlobalCaching(AppTestWithMapDict):
     spaceconfig = {"objspace.std.withmethodcachecounter": True}
 
@@ -1927,10 +2119,10 @@ class AppTestGlobalCaching(AppTestWithMapDict):
                     return 44
             l = [A(), B(), C()] * 10
             __pypy__.reset_method_cache_counter()
-            # 'exec' to make sure that a.f() is compiled with CALL_METHOD
-            exec """for i, a in enumerate(l):
-                        assert a.f() == 42 + i % 3
-            """ in locals()
+            # getattr(), because the cache of the code object would find
+            # 'a.f' without looking at the global cache
+            for i, a in enumerate(l):
+                assert getattr(a, 'f')() == 42 + i % 3
             cache_counter = __pypy__.mapdict_cache_counter("f")
             if cache_counter == (27, 3):
                 break
@@ -1956,7 +2148,7 @@ class AppTestGlobalCaching(AppTestWithMapDict):
             l = [A(), B(), C()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.x == 42 + i % 3
+                assert getattr(a, 'x') == 42 + i % 3
             cache_counter = __pypy__.mapdict_cache_counter("x")
             if cache_counter == (27, 3):
                 break
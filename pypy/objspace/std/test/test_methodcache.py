@@ -40,7 +40,7 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
             l = [A(), B(), C()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.f() == 42 + i % 3
+                assert getattr(a, 'f')() == 42 + i % 3
             cache_counter = __pypy__.method_cache_counter("f")
             assert cache_counter[0] >= 15
             assert cache_counter[1] >= 3 # should be (27, 3)
@@ -67,7 +67,7 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
             l = [A(), B(), C()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.f() == 42 + i % 3
+                assert getattr(a, 'f')() == 42 + i % 3
             cache_counter = __pypy__.method_cache_counter("f")
             assert cache_counter[0] >= 9
             assert cache_counter[1] >= 2 # should be (18, 2)
@@ -88,7 +88,7 @@ class AppTestMethodCaching(test_typeobject.AppTestTypeObject):
             l = [A(), B(), C()] * 10
             __pypy__.reset_method_cache_counter()
             for i, a in enumerate(l):
-                assert a.f() == 42 + (i % 3 == 1)
+                assert getattr(a, 'f')() == 42 + (i % 3 == 1)
             cache_counter = __pypy__.method_cache_counter("f")
             assert cache_counter[0] >= 15
             assert cache_counter[1] >= 3 # should be (27, 3)
@@ -2,7 +2,7 @@ from pypy.objspace.std.setobject import W_SetObject
 from pypy.objspace.std.setobject import (
     BytesIteratorImplementation, BytesSetStrategy, EmptySetStrategy,
     IntegerIteratorImplementation, IntegerSetStrategy, ObjectSetStrategy,
-    UnicodeIteratorImplementation, AsciiSetStrategy)
+    UnicodeIteratorImplementation, AsciiSetStrategy, UnicodeSetStrategy)
 from pypy.objspace.std.listobject import W_ListObject
 
 class TestW_SetStrategies:
@@ -144,3 +144,45 @@ class TestW_SetStrategies:
         #
         #s = W_SetObject(space, self.wrapped([u"a", u"b"]))
         #assert sorted(space.listview_unicode(s)) == [u"a", u"b"]
+
+
+class TestW_SetStrategiesUnicode:
+    spaceconfig = {"objspace.std.withunicodestrategies": True}
+
+    def wrapped(self, l):
+        return W_ListObject(self.space, [self.space.wrap(x) for x in l])
+
+    def test_from_list(self):
+        space = self.space
+        s = W_SetObject(space, self.wrapped([u"a", u"\xe9"]))
+        assert s.strategy is space.fromcache(UnicodeSetStrategy)
+        s = W_SetObject(space, self.wrapped([u"a", u"b"]))
+        assert s.strategy is space.fromcache(AsciiSetStrategy)
+        s = W_SetObject(space, self.wrapped([u"\xe9", "b"]))
+        assert s.strategy is space.fromcache(ObjectSetStrategy)
+
+    def test_add(self):
+        space = self.space
+        s = W_SetObject(space, self.wrapped([]))
+        s.add(space.wrap(u"a"))
+        assert s.strategy is space.fromcache(AsciiSetStrategy)
+        s.add(space.wrap(u"\u1234x"))
+        assert s.strategy is space.fromcache(UnicodeSetStrategy)
+        assert s.has_key(space.wrap(u"a"))
+        assert s.has_key(space.wrap(u"\u1234x"))
+        assert not s.has_key(space.wrap(u"\u1234"))
+        assert s.strategy is space.fromcache(UnicodeSetStrategy)
+        items = [space.utf8_w(w_item).decode('utf-8')
+                 for w_item in s.getkeys()]
+        assert sorted(items) == [u"a", u"\u1234x"]
+        for w_item in s.getkeys():
+            assert space.len_w(w_item) == len(
+                space.utf8_w(w_item).decode('utf-8'))
+        s.add(space.wrap(1))
+        assert s.strategy is space.fromcache(ObjectSetStrategy)
+
+    def test_empty_to_unicode(self):
+        space = self.space
+        s = W_SetObject(space, self.wrapped([]))
+        s.add(space.wrap(u"\xe9"))
+        assert s.strategy is space.fromcache(UnicodeSetStrategy)
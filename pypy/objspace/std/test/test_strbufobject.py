@@ -0,0 +1,92 @@
+import py
+
+from pypy.objspace.std.test import test_bytesobject
+
+
+class AppTestStringObject(test_bytesobject.AppTestBytesObject):
+    spaceconfig = {"objspace.std.withstrbuf": True}
+
+    def test_basic(self):
+        import __pypy__
+        # cannot do "Hello, " + "World!" because cpy2.5 optimises this
+        # away on AST level
+        s = "Hello, ".__add__("World!")
+        assert type(s) is str
+        assert 'W_StringBufferObject' in __pypy__.internal_repr(s)
+
+    def test_add_twice(self):
+        x = "a".__add__("b")
+        y = x + "c"
+        c = x + "d"
+        assert y == "abc"
+        assert c == "abd"
+
+    def test_add(self):
+        import __pypy__
+        all = ""
+        for i in range(20):
+            all += str(i)
+        assert 'W_StringBufferObject' in __pypy__.internal_repr(all)
+        assert all == "012345678910111213141516171819"
+        assert len(all) == 30
+
+    def test_hash(self):
+        import __pypy__
+        def join(s): return s[:len(s) // 2] + s[len(s) // 2:]
+        t = 'a' * 101
+        s = join(t)
+        assert 'W_StringBufferObject' in __pypy__.internal_repr(s)
+        assert hash(s) == hash(t)
+
+    def test_len(self):
+        s = "a".__add__("b")
+        r = "c".__add__("d")
+        t = s + r
+        assert len(s) == 2
+        assert len(r) == 2
+        assert len(t) == 4
+
+    def test_buffer(self):
+        s = b'a'.__add__(b'b')
+        assert buffer(s) == buffer(b'ab')
+        assert memoryview(s) == b'ab'
+
+    def test_add_buffer(self):
+        raises(TypeError, "'abc' + buffer('def')")
+        raises(TypeError, "'abc' + memoryview('def')")
+        s = 'ab'.__add__('c')
+        raises(TypeError, "s + buffer('def')")
+        assert s + bytearray('d') == bytearray('abcd')
+        assert 'abc' + s == 'abcabc'
+
+    def test_add_strbuf(self):
+        # make three strbuf objects
+        s = 'a'.__add__('b')
+        t = 'x'.__add__('c')
+        u = 'y'.__add__('d')
+
+        # add two different strbufs to the same string
+        v = s + t
+        w = s + u
+
+        # check that insanity hasn't resulted.
+        assert v == "abxc"
+        assert w == "abyd"
+
+    def test_add_unicode(self):
+        s = 'a'.__add__('b')
+        t = s + u'c'
+        assert type(t) is unicode
+        assert t == u'abc'
+
+    def test_methods_force(self):
+        s = 'ab'.__add__('cd')
+        s += 'ef'
+        assert s.upper() == 'ABCDEF'
+        assert s.find('cd') == 2
+        assert s[1:3] == 'bc'
+        assert '%s!' % s == 'abcdef!'
+        assert (s + '%d') % 5 == 'abcdef5'
+        assert '{}-{}'.__add__('x').format(1, 2) == '1-2x'
+        assert {s: 1}['abcdef'] == 1
+        assert 'abcdef' == s and s == 'abcdef'
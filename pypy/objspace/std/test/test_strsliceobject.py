@@ -0,0 +1,58 @@
+from pypy.objspace.std.test import test_bytesobject
+
+
+class AppTestStringObject(test_bytesobject.AppTestBytesObject):
+    spaceconfig = {"objspace.std.withstrslice": True}
+
+    def test_basic(self):
+        import __pypy__
+        s = 'abcdefgh' * 20
+        t = s[10:150]
+        assert type(t) is str
+        assert 'W_StringSliceObject' in __pypy__.internal_repr(t)
+        assert t == s[10:150]
+        assert len(t) == 140
+        assert t[0] == 'c' and t[-1] == 'f'
+        raises(IndexError, "t[140]")
+        raises(IndexError, "t[-141]")
+
+    def test_small_slice_copies(self):
+        import __pypy__
+        s = 'abcdefgh' * 20
+        for t in [s[:10], s[1:40], ('x' * 1000)[5:100]]:
+            assert 'W_StringSliceObject' not in __pypy__.internal_repr(t)
+
+    def test_slice_of_slice(self):
+        import __pypy__
+        s = ''.join([chr(i) for i in range(256)])
+        t = s[10:]
+        u = t[5:-5]
+        assert 'W_StringSliceObject' in __pypy__.internal_repr(u)
+        assert u == s[15:-5]
+        assert t[5:20] == s[15:30]
+        assert t[::-1] == s[:9:-1]
+        assert t.__getslice__(-10, 1000) == s[10:]
+        assert t[100:100] == ''
+
+    def test_add(self):
+        s = 'abcdefgh' * 20
+        t = s[:100]
+        assert 'x' + t == 'x' + s[:100]
+        assert t + 'x' == s[:100] + 'x'
+        assert t + t == s[:100] * 2
+        assert t.find(s[8:80]) == 0
+
+    def test_methods(self):
+        s = 'abc,' * 50
+        t = s[4:]
+        assert t.split(',') == ['abc'] * 49 + ['']
+        assert t.upper() == 'ABC,' * 49
+        assert hash(t) == hash('abc,' * 49)
+        assert t + '!' == 'abc,' * 49 + '!'
+        assert t == 'abc,' * 49
+        assert 'abc,' * 49 == t
+        assert t < s
+        assert {t: 1}['abc,' * 49] == 1
+        assert buffer(t) == buffer('abc,' * 49)
+        assert len(t) == 196
+        assert t[1] == 'b'
@@ -155,6 +155,7 @@ class W_TypeObject(W_Root):
                           '_version_tag?',
                           'name?',
                           'mro_w?[*]',
+                          'sized_instance_class?',
                           ]
 
     # whether the class has an overridden __getattribute__/__setattr__
@@ -168,6 +169,10 @@ class W_TypeObject(W_Root):
     # used to cache the type's __new__ function
     w_new_function = None
 
+    # with objspace.std.withsizedinstances: the interp-level class that
+    # instances are allocated as, once the size estimate has settled
+    sized_instance_class = None
+
     @dont_look_inside
     def __init__(self, space, name, bases_w, dict_w,
                  overridetypedef=None, force_new_layout=False,
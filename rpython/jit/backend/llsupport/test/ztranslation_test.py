@@ -270,6 +270,30 @@ class TranslationTestJITStats(CCompiledMixin):
         res = self.meta_interp(main, [])
         assert res == 0
 
+    def test_defer_compile(self):
+        driver = JitDriver(greens = [], reds = ['n', 'i', 's'])
+
+        def f(n):
+            i = 0
+            s = 0
+            while i < n:
+                driver.jit_merge_point(n=n, i=i, s=s)
+                s += i
+                i += 1
+            return s
+
+        def main(n):
+            set_param(driver, 'defer_compile', 5)
+            if f(n) != n * (n - 1) // 2:
+                return -1
+            compiled = jit_hooks.stats_compile_deferred_loops(None)
+            if f(n) != n * (n - 1) // 2:
+                return -2
+            return compiled * 10 + jit_hooks.stats_compile_deferred_loops(None)
+
+        res = self.meta_interp(main, [10000])
+        assert res == 10
+
 class TranslationRemoveTypePtrTest(CCompiledMixin):
     CPUClass = getcpuclass()
 
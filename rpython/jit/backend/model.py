@@ -20,6 +20,7 @@ class AbstractCPU(object):
     supports_singlefloats = False
     supports_guard_gc_type = False
     supports_load_effective_address = False
+    supports_guard_class_dispatch = False
 
     propagate_exception_descr = None
 
@@ -35,6 +36,11 @@ class AbstractCPU(object):
         """Called once by the front-end when the program starts."""
         pass
 
+    def get_code_memory_in_use(self):
+        """Returns the number of bytes of machine code and data currently
+        allocated, or 0 if the backend doesn't know."""
+        return 0
+
     def finish_once(self):
         """Called once by the front-end when the program stops."""
         pass
@@ -72,6 +78,22 @@ class AbstractCPU(object):
         """
         raise NotImplementedError
 
+    def enable_guard_class_dispatch(self, faildescr, original_loop_token):
+        """Only if supports_guard_class_dispatch.  The FailDescr is the
+        descr of a GUARD_CLASS or GUARD_NONNULL_CLASS with a 'class_dispatch'
+        (see history.GuardClassDispatch).  From now on, the bridges compiled
+        out of this guard are not attached in place of the previous one, but
+        the guard jumps to one of them depending on the class of the object:
+        the one compiled when 'class_dispatch.bridge_key' was that class, as
+        returned by get_class_dispatch_key().  Returns False if not possible.
+        """
+        return False
+
+    def get_class_dispatch_key(self, gcref):
+        """Only if supports_guard_class_dispatch.  Returns the integer
+        identifying the class of 'gcref', or 0 if it is null."""
+        raise NotImplementedError
+
     def dump_loop_token(self, looptoken):
         """Print a disassembled version of looptoken to stdout"""
         raise NotImplementedError
@@ -306,6 +328,15 @@ class CompiledLoopToken(object):
         debug_print("allocating Loop #", self.number)
         debug_stop("jit-mem-looptoken-alloc")
 
+    def get_code_size(self):
+        """Returns the size of the machine code and data of the loop and
+        its bridges."""
+        size = 0
+        if self.asmmemmgr_blocks is not None:
+            for rawstart, rawstop in self.asmmemmgr_blocks:
+                size += rawstop - rawstart
+        return size
+
     def compiling_a_bridge(self):
         self.cpu.tracker.total_compiled_bridges += 1
         self.bridges_count += 1
@@ -9,7 +9,8 @@ import operator
 import math
 from rpython.jit.metainterp.history import (
     AbstractFailDescr, AbstractDescr, BasicFailDescr, BasicFinalDescr,
-    JitCellToken, TargetToken, ConstInt, ConstPtr, ConstFloat, Const)
+    JitCellToken, TargetToken, ConstInt, ConstPtr, ConstFloat, Const,
+    GuardClassDispatch)
 from rpython.jit.metainterp.resoperation import (
     ResOperation, rop, InputArgInt, InputArgFloat, InputArgRef)
 from rpython.jit.metainterp.executor import wrap_constant
@@ -4777,6 +4778,74 @@ class LLtypeBackendTest(BaseBackendTest):
         fail = self.cpu.get_latest_descr(deadframe)
         assert fail.identifier == 99
 
+    def test_guard_class_dispatch(self):
+        if not self.cpu.supports_guard_class_dispatch:
+            py.test.skip("guard_class dispatch not supported")
+        # four instances with different vtables; the guard passes
+        # only for the last one
+        t_boxes = []
+        for i in range(4):
+            t_box, T_box, _ = self.alloc_instance(self.T)
+            t_boxes.append(t_box)
+        null_box = self.null_instance()
+        get_key = self.cpu.get_class_dispatch_key
+        keys = [get_key(box.getref_base()) for box in t_boxes]
+        assert len(set(keys)) == 4
+        assert get_key(null_box.getref_base()) == 0
+        #
+        faildescr = BasicFailDescr(1)
+        p0 = InputArgRef()
+        i0 = InputArgInt()
+        operations = [
+            ResOperation(rop.GUARD_NONNULL_CLASS, [p0, T_box],
+                         descr=faildescr),
+            ResOperation(rop.FINISH, [i0], descr=BasicFinalDescr(0))]
+        operations[0].setfailargs([i0, p0])
+        faildescr.class_dispatch = GuardClassDispatch(1, 1, True)
+        looptoken = JitCellToken()
+        self.cpu.compile_loop([p0, i0], operations, looptoken)
+
+        def compile_bridge(key, number):
+            i1 = InputArgInt()
+            p1 = InputArgRef()
+            i2 = ResOperation(rop.INT_ADD, [i1, ConstInt(number)])
+            operations = [i2, ResOperation(rop.FINISH, [i2],
+                                           descr=BasicFinalDescr(number))]
+            faildescr.class_dispatch.bridge_key = key
+            self.cpu.compile_bridge(faildescr, [i1, p1], operations,
+                                    looptoken)
+
+        def run(box):
+            deadframe = self.cpu.execute_token(looptoken, box.getref_base(),
+                                               1000)
+            fail = self.cpu.get_latest_descr(deadframe)
+            res = self.cpu.get_int_value(deadframe, 0)
+            if fail.identifier == 1:
+                assert res == 1000
+            else:
+                assert res == 1000 + fail.identifier
+            return fail.identifier
+
+        assert run(t_boxes[0]) == 1
+        compile_bridge(keys[0], 10)
+        # a normal bridge: all the other classes go there
+        assert run(t_boxes[0]) == 10
+        assert run(t_boxes[1]) == 10
+        assert run(null_box) == 10
+        #
+        assert self.cpu.enable_guard_class_dispatch(faildescr, looptoken)
+        assert run(t_boxes[0]) == 10
+        assert run(t_boxes[1]) == 1
+        assert run(null_box) == 1
+        compile_bridge(keys[1], 11)
+        compile_bridge(0, 12)
+        assert run(t_boxes[0]) == 10
+        assert run(t_boxes[1]) == 11
+        assert run(t_boxes[2]) == 1
+        assert run(null_box) == 12
+        assert run(t_boxes[3]) == 0
+        assert not self.cpu.enable_guard_class_dispatch(faildescr, looptoken)
+
     def test_raw_load_int(self):
         from rpython.rlib import rawstorage
         from rpython.rlib.rarithmetic import r_longlong
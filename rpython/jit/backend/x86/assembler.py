@@ -43,6 +43,9 @@ from rpython.jit.codewriter import longlong
 from rpython.rlib.rarithmetic import intmask, r_uint
 from rpython.rlib.objectmodel import compute_unique_id
 
+# how many bridges a GUARD_CLASS can dispatch to, see history.GuardClassDispatch
+MAX_CLASS_DISPATCH = 32
+
 
 class Assembler386(BaseAssembler, VectorAssemblerMixin):
     _regalloc = None
@@ -628,8 +631,10 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
 
         self.setup(original_loop_token)
         if self.cpu.HAS_CODEMAP:
-            self.codemap_builder.inherit_code_from_position(
-                faildescr.adr_jump_offset)
+            adr_jump_offset = faildescr.adr_jump_offset
+            if adr_jump_offset == 0 and faildescr.class_dispatch is not None:
+                adr_jump_offset = faildescr.class_dispatch.adr_jump
+            self.codemap_builder.inherit_code_from_position(adr_jump_offset)
         self.mc.force_frame_size(DEFAULT_FRAME_BYTES)
         descr_number = compute_unique_id(faildescr)
         if log or self._debug:
@@ -687,7 +692,16 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
         debug_stop("jit-regalloc-stats")
         self.patch_pending_failure_recoveries(rawstart)
         # patch the jump from original guard
-        self.patch_jump_for_descr(faildescr, rawstart + startpos)
+        dispatch = faildescr.class_dispatch
+        if dispatch is not None and dispatch.enabled:
+            self.add_class_dispatch_target(faildescr, original_loop_token,
+                                           rawstart + startpos)
+        else:
+            if dispatch is not None and dispatch.keys is None:
+                # remember the first bridge, for enable_guard_class_dispatch()
+                dispatch.keys = [dispatch.bridge_key]
+                dispatch.targets = [rawstart + startpos]
+            self.patch_jump_for_descr(faildescr, rawstart + startpos)
         ops_offset = self.mc.ops_offset
         frame_depth = max(self.current_clt.frame_info.jfi_frame_depth,
                           frame_depth_no_fixed_size + JITFRAME_FIXED_SIZE)
@@ -860,6 +874,11 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
                 continue # patch them later
             relative_target = tok.pos_recovery_stub - (tok.pos_jump_offset + 4)
             assert rx86.fits_in_32bits(relative_target)
+            dispatch = descr.class_dispatch
+            if dispatch is not None:
+                dispatch.adr_jump = addr
+                dispatch.adr_miss = rawstart + tok.pos_recovery_stub
+                dispatch.scratch_value = tok.known_scratch_value
             #
             if not tok.guard_not_invalidated():
                 mc = codebuf.MachineCodeBlockWrapper()
@@ -985,8 +1004,109 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
             p = rffi.cast(rffi.INTP, adr_jump_offset)
             adr_target = adr_jump_offset + 4 + rffi.cast(lltype.Signed, p[0])
             mc.copy_to_raw_memory(adr_target)
+            if faildescr.class_dispatch is not None:
+                faildescr.class_dispatch.adr_miss = 0  # overwritten stub
         faildescr.adr_jump_offset = 0    # means "patched"
 
+    def enable_guard_class_dispatch(self, faildescr, original_loop_token):
+        dispatch = faildescr.class_dispatch
+        if dispatch.enabled or dispatch.closed or dispatch.adr_miss == 0:
+            return False
+        if dispatch.keys is None:
+            dispatch.keys = []
+            dispatch.targets = []
+        if not self._write_class_dispatch(dispatch, original_loop_token,
+                                          dispatch.adr_miss):
+            return False
+        dispatch.enabled = True
+        return True
+
+    def add_class_dispatch_target(self, faildescr, original_loop_token,
+                                  adr_target):
+        dispatch = faildescr.class_dispatch
+        assert not dispatch.closed
+        if len(dispatch.keys) < MAX_CLASS_DISPATCH:
+            dispatch.keys.append(dispatch.bridge_key)
+            dispatch.targets.append(adr_target)
+            if self._write_class_dispatch(dispatch, original_loop_token,
+                                          dispatch.adr_miss):
+                return
+            dispatch.keys.pop()
+            dispatch.targets.pop()
+        # too many classes: the new bridge gets all the other ones, and
+        # the guard never fails again.  If we cannot write the code at
+        # all, the bridge is not used and the guard stops compiling
+        # bridges.
+        dispatch.closed = True
+        self._write_class_dispatch(dispatch, original_loop_token, adr_target)
+
+    def _write_class_dispatch(self, dispatch, original_loop_token,
+                              adr_else):
+        """Write the code that compares the class of the object with
+        'dispatch.keys' and jumps to the corresponding bridge, or else to
+        'adr_else'; and patch the guard to jump to it.  The code uses only
+        the scratch register, so all the other registers are still as
+        expected by the bridges and by the recovery stub."""
+        mc = codebuf.MachineCodeBlockWrapper()
+        mc.force_frame_size(DEFAULT_FRAME_BYTES)
+        loc_ptr = RegLoc(dispatch.reg, is_xmm=False)
+        keys = dispatch.keys
+        targets = dispatch.targets
+        miss_jumps = []
+        if dispatch.nullable:
+            adr_null = adr_else
+            for i in range(len(keys)):
+                if keys[i] == 0:
+                    adr_null = targets[i]
+            mc.TEST_rr(loc_ptr.value, loc_ptr.value)
+            jnz_location = mc.emit_forward_jump('NZ')
+            self._jump_from_class_dispatch(mc, dispatch, adr_null, miss_jumps)
+            mc.patch_forward_jump(jnz_location)
+        for i in range(len(keys)):
+            if keys[i] != 0:
+                self._cmp_class_dispatch_key(mc, loc_ptr, keys[i])
+                jne_location = mc.emit_forward_jump('NE')
+                mc.JMP(imm(targets[i]))
+                mc.patch_forward_jump(jne_location)
+        self._jump_from_class_dispatch(mc, dispatch, adr_else, miss_jumps)
+        #
+        allblocks = self.get_asmmemmgr_blocks(original_loop_token)
+        rawstart = mc.materialize(self.cpu, allblocks)
+        for pos in miss_jumps:
+            offset = dispatch.adr_miss - (rawstart + pos)
+            if not rx86.fits_in_32bits(offset):
+                return False
+            p = rffi.cast(rffi.INTP, rawstart + pos - 4)
+            p[0] = rffi.cast(rffi.INT, offset)
+        offset = rawstart - (dispatch.adr_jump + 4)
+        if not rx86.fits_in_32bits(offset):
+            return False
+        mc = codebuf.MachineCodeBlockWrapper()
+        mc.writeimm32(offset)
+        mc.copy_to_raw_memory(dispatch.adr_jump)
+        return True
+
+    def _jump_from_class_dispatch(self, mc, dispatch, adr_target, miss_jumps):
+        if adr_target != dispatch.adr_miss:
+            mc.JMP(imm(adr_target))    # a bridge
+            return
+        # the recovery stub may expect a known value in the scratch
+        # register, so load it and jump with a rel32, patched when we
+        # know where the code is
+        if dispatch.scratch_value != -1:
+            mc.MOV_ri(X86_64_SCRATCH_REG.value, dispatch.scratch_value)
+        mc.JMP_l(0)
+        miss_jumps.append(mc.get_relative_pos(break_basic_block=False))
+
+    def _cmp_class_dispatch_key(self, mc, loc_ptr, key):
+        # compares like _cmp_guard_class(), with the key returned by
+        # cpu.get_class_dispatch_key()
+        offset = self.cpu.vtable_offset
+        if offset is not None:
+            mc.CMP(mem(loc_ptr, offset), imm(key))
+        else:
+            self._cmp_guard_gc_type_mc(mc, loc_ptr, imm(key))
+
     def fixup_target_tokens(self, rawstart):
         for targettoken in self.target_tokens_currently_compiling:
             targettoken._ll_loop_code += rawstart
@@ -1896,19 +2016,23 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
             self._cmp_guard_gc_type(loc_ptr, ImmedLoc(expected_typeid))
 
     def _cmp_guard_gc_type(self, loc_ptr, loc_expected_typeid):
+        self._cmp_guard_gc_type_mc(self.mc, loc_ptr, loc_expected_typeid)
+
+    def _cmp_guard_gc_type_mc(self, mc, loc_ptr, loc_expected_typeid):
         # Note that the typeid half-word is at offset 0 on a little-endian
         # machine; it would be at offset 2 or 4 on a big-endian machine.
         assert self.cpu.supports_guard_gc_type
         if IS_X86_32:
-            self.mc.CMP16(mem(loc_ptr, 0), loc_expected_typeid)
+            mc.CMP16(mem(loc_ptr, 0), loc_expected_typeid)
         else:
             assert isinstance(loc_expected_typeid, ImmedLoc)
-            self.mc.CMP32_mi((loc_ptr.value, 0), loc_expected_typeid.value)
+            mc.CMP32_mi((loc_ptr.value, 0), loc_expected_typeid.value)
 
     def genop_guard_guard_class(self, guard_op, guard_token, locs, ign):
         self._cmp_guard_class(locs)
         self.guard_success_cc = rx86.Conditions['E']
         self.implement_guard(guard_token)
+        self._record_class_dispatch_reg(guard_token, locs[0])
 
     def genop_guard_guard_nonnull_class(self, guard_op, guard_token, locs, ign):
         self.mc.CMP(locs[0], imm1)
@@ -1920,6 +2044,13 @@ class Assembler386(BaseAssembler, VectorAssemblerMixin):
         #
         self.guard_success_cc = rx86.Conditions['E']
         self.implement_guard(guard_token)
+        self._record_class_dispatch_reg(guard_token, locs[0])
+
+    def _record_class_dispatch_reg(self, guard_token, loc_ptr):
+        dispatch = guard_token.faildescr.class_dispatch
+        if dispatch is not None:
+            assert isinstance(loc_ptr, RegLoc)
+            dispatch.reg = loc_ptr.value
 
     def genop_guard_guard_gc_type(self, guard_op, guard_token, locs, ign):
         self._cmp_guard_gc_type(locs[0], locs[1])
@@ -10,7 +10,7 @@ from rpython.jit.backend.x86.profagent import ProfileAgent
 from rpython.jit.backend.llsupport.llmodel import AbstractLLCPU
 from rpython.jit.backend.x86 import regloc
 from rpython.jit.backend.x86.vector_ext import X86VectorExt
-from rpython.jit.backend.x86.arch import WIN64
+from rpython.jit.backend.x86.arch import WIN64, WORD
 
 import sys
 
@@ -20,6 +20,7 @@ class AbstractX86CPU(AbstractLLCPU):
     supports_floats = True
     supports_singlefloats = True
     supports_load_effective_address = True
+    supports_guard_class_dispatch = True
 
     dont_keepalive_stuff = False # for tests
     with_threads = False
@@ -102,6 +103,18 @@ class AbstractX86CPU(AbstractLLCPU):
         return self.assembler.assemble_bridge(faildescr, inputargs, operations,
                                               original_loop_token, log, logger)
 
+    def enable_guard_class_dispatch(self, faildescr, original_loop_token):
+        return self.assembler.enable_guard_class_dispatch(faildescr,
+                                                          original_loop_token)
+
+    def get_class_dispatch_key(self, gcref):
+        if not gcref:
+            return 0
+        if self.vtable_offset is not None:
+            return self.read_int_at_mem(gcref, self.vtable_offset, WORD, 0)
+        # the typeid, as compared by _cmp_guard_gc_type()
+        return self.read_int_at_mem(gcref, 0, WORD // 2, 0)
+
     def cast_ptr_to_int(x):
         adr = llmemory.cast_ptr_to_adr(x)
         return CPU386.cast_adr_to_int(adr)
@@ -3,7 +3,7 @@ from rpython.jit.backend.detect_cpu import getcpuclass
 from rpython.jit.metainterp.warmspot import ll_meta_interp
 from rpython.jit.metainterp.test import support, test_ajit
 from rpython.jit.codewriter.policy import StopAtXPolicy
-from rpython.rlib.jit import JitDriver
+from rpython.rlib.jit import JitDriver, set_param
 
 class Jit386Mixin(support.LLJitMixin):
     CPUClass = getcpuclass()
@@ -36,3 +36,35 @@ class TestBasic(Jit386Mixin, test_ajit.BaseLLtypeTests):
 
     def test_free_object(self):
         py.test.skip("issue of freeing, probably with ll2ctypes")
+
+    def test_guard_class_dispatch(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'total', 'lst'])
+        class Base(object):
+            def f(self):
+                return 1
+        class A(Base):
+            def f(self):
+                return 2
+        class B(Base):
+            def f(self):
+                return 3
+        class C(Base):
+            def f(self):
+                return 5
+        class D(Base):
+            def f(self):
+                return 7
+        def f(n, limit):
+            set_param(myjitdriver, 'class_dispatch', limit)
+            lst = [A(), B(), C(), D(), Base()]
+            total = 0
+            while n > 0:
+                myjitdriver.jit_merge_point(n=n, total=total, lst=lst)
+                total += lst[n % 5].f()
+                n -= 1
+            return total
+        expected = f(500, 0)
+        res = self.meta_interp(f, [500, 2])
+        assert res == expected
+        res = self.meta_interp(f, [500, 0])
+        assert res == expected
@@ -744,6 +744,11 @@ class AbstractResumeGuardDescr(ResumeDescr):
             # valid per-guard index in the jitcounter.
             hash = self.status
             assert hash == (self.status & self.ST_SHIFT_MASK)
+            if self.class_dispatch is not None:
+                if self.class_dispatch.closed:
+                    return False
+                hash = self._class_dispatch_hash(hash, deadframe,
+                                                 metainterp_sd)
         #
         # do we have the BUSY flag?  If so, we're tracing right now, e.g. in an
         # outer invocation of the same function, so don't trace again for now.
@@ -783,6 +788,21 @@ class AbstractResumeGuardDescr(ResumeDescr):
         increment = jitdriver_sd.warmstate.increment_trace_eagerness
         return jitcounter.tick(hash, increment)
 
+    def _class_dispatch_hash(self, hash, deadframe, metainterp_sd):
+        # a GUARD_CLASS: remember the class of the object in case we
+        # compile a bridge now.  If the backend dispatches on the class,
+        # count the failures separately for each class, like GUARD_VALUE.
+        from rpython.rlib.objectmodel import current_object_addr_as_int
+        dispatch = self.class_dispatch
+        cpu = metainterp_sd.cpu
+        gcref = cpu.get_ref_value(deadframe, dispatch.failarg_index)
+        key = cpu.get_class_dispatch_key(gcref)
+        dispatch.bridge_key = key
+        if dispatch.enabled:
+            hash = r_uint(current_object_addr_as_int(self) * 777767777 +
+                          key * 1442968193)
+        return hash
+
     def start_compiling(self):
         # start tracing and compiling from this guard.
         self.status |= self.ST_BUSY_FLAG
@@ -808,7 +828,40 @@ class AbstractResumeGuardDescr(ResumeDescr):
                                self, inputargs, new_loop.operations,
                                new_loop.original_jitcell_token,
                                metainterp.box_names_memo)
+        original_jitcell_token = new_loop.original_jitcell_token
         record_loop_or_bridge(metainterp.staticdata, new_loop)
+        if self.class_dispatch is not None:
+            self._extend_class_dispatch_chain(metainterp, new_loop,
+                                              original_jitcell_token)
+
+    def _extend_class_dispatch_chain(self, metainterp, new_loop,
+                                     original_jitcell_token):
+        # if the bridge checks again the class of the same object, its
+        # guard continues the chain of bridges that starts at 'root'.  When
+        # the chain is long enough, the backend dispatches on the class at
+        # 'root' (see history.GuardClassDispatch)
+        dispatch = self.class_dispatch
+        root = dispatch.chain_root
+        if root is None:
+            root = self
+        root_dispatch = root.class_dispatch
+        if root_dispatch.enabled:
+            return
+        box = new_loop.inputargs[dispatch.input_index]
+        for op in new_loop.operations:
+            opnum = op.getopnum()
+            if ((opnum == rop.GUARD_CLASS or opnum == rop.GUARD_NONNULL_CLASS)
+                    and op.getarg(0) is box):
+                descr = op.getdescr()
+                if (isinstance(descr, AbstractResumeGuardDescr) and
+                        descr.class_dispatch is not None):
+                    descr.class_dispatch.chain_root = root
+                break
+        root_dispatch.chain_length += 1
+        limit = metainterp.jitdriver_sd.warmstate.class_dispatch_limit
+        if 0 < limit <= root_dispatch.chain_length:
+            metainterp.staticdata.cpu.enable_guard_class_dispatch(root,
+                                                    original_jitcell_token)
 
     def make_a_counter_per_value(self, guard_value_op, index):
         assert guard_value_op.getopnum() == rop.GUARD_VALUE
@@ -129,9 +129,11 @@ class AbstractFailDescr(AbstractDescr):
     index = -1
     final_descr = False
 
-    _attrs_ = ('adr_jump_offset', 'rd_locs', 'rd_loop_token', 'rd_vector_info')
+    _attrs_ = ('adr_jump_offset', 'rd_locs', 'rd_loop_token', 'rd_vector_info',
+               'class_dispatch')
 
     rd_vector_info = None
+    class_dispatch = None
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
         raise NotImplementedError
@@ -153,6 +155,34 @@ class AbstractFailDescr(AbstractDescr):
         info.prev = self.rd_vector_info
         self.rd_vector_info = info
 
+class GuardClassDispatch(object):
+    """ Attached to the descr of a GUARD_CLASS or GUARD_NONNULL_CLASS, if
+    the backend supports it and the object is in the failargs.  When the
+    bridges out of the guard keep checking the class of the same object,
+    we get a chain of bridges, one per class.  After 'class_dispatch'
+    bridges, the first guard of the chain is turned into a dispatch on the
+    class: the backend jumps directly to one bridge per class, all of them
+    compiled out of this guard (see cpu.enable_guard_class_dispatch()).
+    """
+    chain_root = None      # the descr of the first guard of the chain
+    chain_length = 0       # on the first guard: how many bridges in the chain
+    enabled = False        # the backend dispatches on the class
+    closed = False         # the backend doesn't accept more classes
+    bridge_key = 0         # the class key of the next bridge out of the guard
+    # for the backend
+    reg = -1               # the register containing the object at the guard
+    adr_jump = 0           # the address of the jump of the guard
+    adr_miss = 0           # the address of the failure path of the guard
+    scratch_value = -1     # the value it expects in the scratch register
+    keys = None            # the class keys of the bridges...
+    targets = None         # ...and their addresses
+
+    def __init__(self, failarg_index, input_index, nullable):
+        self.failarg_index = failarg_index  # the object in the failargs
+        self.input_index = input_index      # the object in the bridge inputargs
+        self.nullable = nullable            # GUARD_NONNULL_CLASS
+
+
 class BasicFinalDescr(AbstractFailDescr):
     final_descr = True
 
@@ -445,6 +475,12 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    # for the MemoryManager: in how many generations the loop was entered,
+    # the hash of its greenkey, and how many times it was already freed
+    # and compiled again
+    entry_count = 0
+    greenkey_hash = r_uint(0)
+    times_evicted = 0
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
@@ -2,6 +2,7 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,8 +20,39 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# The age limit is multiplied by the "usage weight" of the loop, which
+# grows with the number of generations in which the loop was entered and
+# with the number of its bridges, and which is larger for loops that were
+# already freed once and compiled again.  So loops that are costly to lose
+# stay alive longer when unused for a while.
+#
+# Optionally, the total size of machine code can be limited: when it goes
+# above the limit, loops are freed in order of age divided by the usage
+# weight until enough code is released.
+#
+
+USAGE_SHIFT = 2           # the weight grows by 1 when the usage is x4
+BRIDGE_USAGE = 4          # a bridge counts like entries in 4 generations
+MAX_USAGE_WEIGHT = 8
+MAX_EVICTED_KEYS = 4096   # how many freed loops we remember
+CODE_SIZE_CHECK_DELAY = 16   # generations to wait after freeing for size
+
+def usage_weight(looptoken):
+    usage = looptoken.entry_count
+    clt = looptoken.compiled_loop_token
+    if clt is not None:
+        usage += clt.bridges_count * BRIDGE_USAGE
+    weight = 1 + looptoken.times_evicted
+    while usage >= (1 << USAGE_SHIFT) and weight < MAX_USAGE_WEIGHT:
+        usage >>= USAGE_SHIFT
+        weight += 1
+    return min(weight, MAX_USAGE_WEIGHT)
+
+CandidateSort = make_timsort_class(lt=lambda a, b: a[0] > b[0])
+
 
 class MemoryManager(object):
+    cpu = None      # set by warmspot.py
 
     def __init__(self):
         self.check_frequency = -1
@@ -38,6 +70,13 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.max_code_size = 0
+        self.next_code_size_check = r_int64(0)
+        self.evicted_keys = {}     # {greenkey_hash: times_evicted}
+        # statistics
+        self.evicted_loops = 0
+        self.evicted_for_code_size = 0
+        self.recompiled_loops = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,17 +88,48 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_code_size(self, max_code_size):
+        self.max_code_size = max_code_size
+        self.next_code_size_check = r_int64(0)
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if (self.max_code_size > 0 and
+                self.current_generation >= self.next_code_size_check and
+                self.cpu is not None):
+            if self.cpu.get_code_memory_in_use() > self.max_code_size:
+                self._kill_loops_for_code_size()
+                # the code is only freed by the next GC: wait a bit
+                self.next_code_size_check = (self.current_generation +
+                                             CODE_SIZE_CHECK_DELAY)
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
+            looptoken.entry_count += 1
             self.alive_loops[looptoken] = None
 
+    def record_procedure(self, looptoken, greenkey_hash):
+        """Called when 'looptoken' is attached to the greenkey with the
+        given hash.  Detects the loops compiled again after being freed."""
+        looptoken.greenkey_hash = greenkey_hash
+        times_evicted = self.evicted_keys.get(greenkey_hash, 0)
+        if times_evicted > 0:
+            del self.evicted_keys[greenkey_hash]
+            looptoken.times_evicted = times_evicted
+            self.recompiled_loops += 1
+
+    def _evict(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.evicted_loops += 1
+        if len(self.evicted_keys) >= MAX_EVICTED_KEYS:
+            self.evicted_keys.clear()
+        self.evicted_keys[looptoken.greenkey_hash] = (
+            looptoken.times_evicted + 1)
+
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
         oldtotal = len(self.alive_loops)
@@ -68,19 +138,59 @@ class MemoryManager(object):
         debug_print("Loop tokens before:", oldtotal)
         max_generation = self.current_generation - (self.max_age-1)
         for looptoken in self.alive_loops.keys():
-            if (0 <= looptoken.generation < max_generation or
-                looptoken.invalidated):
+            if looptoken.invalidated:
                 del self.alive_loops[looptoken]
+            elif 0 <= looptoken.generation < max_generation:
+                max_age = (self.max_age-1) * usage_weight(looptoken)
+                if looptoken.generation < self.current_generation - max_age:
+                    self._evict(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
         #print self.alive_loops.keys()
-        if not we_are_translated() and oldtotal != newtotal:
+        if oldtotal != newtotal:
+            looptoken = None
+            self._collect_for_tests()
+        debug_stop("jit-mem-collect")
+
+    def _kill_loops_for_code_size(self):
+        debug_start("jit-mem-collect-size")
+        in_use = self.cpu.get_code_memory_in_use()
+        # free a bit more than needed, to not do it again immediately
+        to_free = in_use - self.max_code_size + self.max_code_size // 8
+        debug_print("Code size in use:", in_use)
+        candidates = []
+        for looptoken in self.alive_loops.keys():
+            if looptoken.invalidated:
+                del self.alive_loops[looptoken]
+            elif 0 <= looptoken.generation < self.current_generation:
+                age = self.current_generation - looptoken.generation
+                staleness = age // usage_weight(looptoken)
+                candidates.append((staleness, looptoken))
+        CandidateSort(candidates).sort()
+        count = 0
+        for staleness, looptoken in candidates:
+            if to_free <= 0:
+                break
+            clt = looptoken.compiled_loop_token
+            if clt is not None:
+                to_free -= clt.get_code_size()
+            self._evict(looptoken)
+            count += 1
+        self.evicted_for_code_size += count
+        debug_print("Loop tokens freed: ", count)
+        debug_print("Loop tokens left:  ", len(self.alive_loops))
+        if count > 0:
             looptoken = None
+            candidates = None
+            self._collect_for_tests()
+        debug_stop("jit-mem-collect-size")
+
+    def _collect_for_tests(self):
+        if not we_are_translated():
             from rpython.rlib import rgc
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
-        debug_stop("jit-mem-collect")
 
     def release_all_loops(self):
         debug_start("jit-mem-releaseall")
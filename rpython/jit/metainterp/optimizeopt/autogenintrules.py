@@ -1,11 +1,12 @@
 # Generated by ruleopt/generate.py, don't edit!
 
 import sys
-from rpython.jit.metainterp.history import ConstInt
+from rpython.jit.metainterp.history import ConstInt, ConstFloat
 from rpython.jit.metainterp.optimizeopt.util import (
     get_box_replacement)
 from rpython.jit.metainterp.resoperation import rop
 
+from rpython.rlib.longlong2float import float2longlong
 from rpython.rlib.rarithmetic import LONG_BIT, r_uint, intmask, ovfcheck, uint_mul_high, highest_bit
 MAXINT = sys.maxint
 MININT = -sys.maxint - 1
@@ -16,6 +17,9 @@ class OptIntAutoGenerated(object):
         if box1 is box2: return True
         if bound1.is_constant() and bound2.is_constant() and bound1.lower == bound2.lower: return True
         return False
+    def _same_box(self, box1, box2):
+        if box1 is box2: return True
+        return box1.is_constant() and box2.is_constant() and box1.same_constant(box2)
     _all_rules_fired = []
     _rule_names_int_add = ['add_reassoc_consts', 'add_zero', 'add_sub_c_x_c', 'sub_add_cancel_right', 'add_neg_to_sub']
     _rule_fired_int_add = [0] * 5
@@ -1744,8 +1748,8 @@ class OptIntAutoGenerated(object):
                     self._rule_fired_int_is_true[2] += 1
                     return
         return self.emit(op)
-    _rule_names_int_is_zero = ['is_zero_true', 'is_zero_add']
-    _rule_fired_int_is_zero = [0] * 2
+    _rule_names_int_is_zero = ['is_zero_true', 'is_zero_add', 'is_zero_ptr_eq', 'is_zero_ptr_ne', 'is_zero_instance_ptr_eq', 'is_zero_instance_ptr_ne']
+    _rule_fired_int_is_zero = [0] * 6
     _all_rules_fired.append(('int_is_zero', _rule_names_int_is_zero, _rule_fired_int_is_zero))
     def optimize_INT_IS_ZERO(self, op):
         arg_0 = get_box_replacement(op.getarg(0))
@@ -1775,6 +1779,65 @@ class OptIntAutoGenerated(object):
             self.make_constant_int(op, 0)
             self._rule_fired_int_is_zero[0] += 1
             return
+        arg_0_instance_ptr_eq = self.optimizer.as_operation(arg_0, rop.INSTANCE_PTR_EQ)
+        if arg_0_instance_ptr_eq is not None:
+            arg_0_0 = get_box_replacement(arg_0_instance_ptr_eq.getarg(0))
+            arg_0_1 = get_box_replacement(arg_0_instance_ptr_eq.getarg(1))
+            # is_zero_instance_ptr_eq: int_is_zero(instance_ptr_eq(x, y)) => instance_ptr_ne(x, y)
+            newop = self.replace_op_with(op, rop.INSTANCE_PTR_NE, args=[arg_0_0, arg_0_1])
+            self.optimizer.send_extra_operation(newop)
+            self._rule_fired_int_is_zero[4] += 1
+            return
+            # is_zero_instance_ptr_eq: int_is_zero(instance_ptr_eq(y, x)) => instance_ptr_ne(x, y)
+            newop = self.replace_op_with(op, rop.INSTANCE_PTR_NE, args=[arg_0_1, arg_0_0])
+            self.optimizer.send_extra_operation(newop)
+            self._rule_fired_int_is_zero[4] += 1
+            return
+        else:
+            arg_0_instance_ptr_ne = self.optimizer.as_operation(arg_0, rop.INSTANCE_PTR_NE)
+            if arg_0_instance_ptr_ne is not None:
+                arg_0_0 = get_box_replacement(arg_0_instance_ptr_ne.getarg(0))
+                arg_0_1 = get_box_replacement(arg_0_instance_ptr_ne.getarg(1))
+                # is_zero_instance_ptr_ne: int_is_zero(instance_ptr_ne(x, y)) => instance_ptr_eq(x, y)
+                newop = self.replace_op_with(op, rop.INSTANCE_PTR_EQ, args=[arg_0_0, arg_0_1])
+                self.optimizer.send_extra_operation(newop)
+                self._rule_fired_int_is_zero[5] += 1
+                return
+                # is_zero_instance_ptr_ne: int_is_zero(instance_ptr_ne(y, x)) => instance_ptr_eq(x, y)
+                newop = self.replace_op_with(op, rop.INSTANCE_PTR_EQ, args=[arg_0_1, arg_0_0])
+                self.optimizer.send_extra_operation(newop)
+                self._rule_fired_int_is_zero[5] += 1
+                return
+            else:
+                arg_0_ptr_eq = self.optimizer.as_operation(arg_0, rop.PTR_EQ)
+                if arg_0_ptr_eq is not None:
+                    arg_0_0 = get_box_replacement(arg_0_ptr_eq.getarg(0))
+                    arg_0_1 = get_box_replacement(arg_0_ptr_eq.getarg(1))
+                    # is_zero_ptr_eq: int_is_zero(ptr_eq(x, y)) => ptr_ne(x, y)
+                    newop = self.replace_op_with(op, rop.PTR_NE, args=[arg_0_0, arg_0_1])
+                    self.optimizer.send_extra_operation(newop)
+                    self._rule_fired_int_is_zero[2] += 1
+                    return
+                    # is_zero_ptr_eq: int_is_zero(ptr_eq(y, x)) => ptr_ne(x, y)
+                    newop = self.replace_op_with(op, rop.PTR_NE, args=[arg_0_1, arg_0_0])
+                    self.optimizer.send_extra_operation(newop)
+                    self._rule_fired_int_is_zero[2] += 1
+                    return
+                else:
+                    arg_0_ptr_ne = self.optimizer.as_operation(arg_0, rop.PTR_NE)
+                    if arg_0_ptr_ne is not None:
+                        arg_0_0 = get_box_replacement(arg_0_ptr_ne.getarg(0))
+                        arg_0_1 = get_box_replacement(arg_0_ptr_ne.getarg(1))
+                        # is_zero_ptr_ne: int_is_zero(ptr_ne(x, y)) => ptr_eq(x, y)
+                        newop = self.replace_op_with(op, rop.PTR_EQ, args=[arg_0_0, arg_0_1])
+                        self.optimizer.send_extra_operation(newop)
+                        self._rule_fired_int_is_zero[3] += 1
+                        return
+                        # is_zero_ptr_ne: int_is_zero(ptr_ne(y, x)) => ptr_eq(x, y)
+                        newop = self.replace_op_with(op, rop.PTR_EQ, args=[arg_0_1, arg_0_0])
+                        self.optimizer.send_extra_operation(newop)
+                        self._rule_fired_int_is_zero[3] += 1
+                        return
         return self.emit(op)
     _rule_names_int_force_ge_zero = ['force_ge_zero_pos', 'force_ge_zero_neg']
     _rule_fired_int_force_ge_zero = [0] * 2
@@ -1834,3 +1897,196 @@ class OptIntAutoGenerated(object):
             self._rule_fired_int_neg[1] += 1
             return
         return self.emit(op)
+    _rule_names_float_mul = ['float_mul_one']
+    _rule_fired_float_mul = [0] * 1
+    _all_rules_fired.append(('float_mul', _rule_names_float_mul, _rule_fired_float_mul))
+    def optimize_FLOAT_MUL(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        if arg_0.is_constant():
+            C_arg_0 = arg_0.getfloat()
+            # float_mul_one: float_mul(1.0, x) => x
+            if float2longlong(C_arg_0) == float2longlong(1.0):
+                self.make_equal_to(op, arg_1)
+                self._rule_fired_float_mul[0] += 1
+                return
+        if arg_1.is_constant():
+            C_arg_1 = arg_1.getfloat()
+            # float_mul_one: float_mul(x, 1.0) => x
+            if float2longlong(C_arg_1) == float2longlong(1.0):
+                self.make_equal_to(op, arg_0)
+                self._rule_fired_float_mul[0] += 1
+                return
+        return self.emit(op)
+    _rule_names_float_truediv = ['float_truediv_one']
+    _rule_fired_float_truediv = [0] * 1
+    _all_rules_fired.append(('float_truediv', _rule_names_float_truediv, _rule_fired_float_truediv))
+    def optimize_FLOAT_TRUEDIV(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        if arg_1.is_constant():
+            C_arg_1 = arg_1.getfloat()
+            # float_truediv_one: float_truediv(x, 1.0) => x
+            if float2longlong(C_arg_1) == float2longlong(1.0):
+                self.make_equal_to(op, arg_0)
+                self._rule_fired_float_truediv[0] += 1
+                return
+        return self.emit(op)
+    _rule_names_float_add = ['float_add_minus_zero']
+    _rule_fired_float_add = [0] * 1
+    _all_rules_fired.append(('float_add', _rule_names_float_add, _rule_fired_float_add))
+    def optimize_FLOAT_ADD(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        if arg_0.is_constant():
+            C_arg_0 = arg_0.getfloat()
+            # float_add_minus_zero: float_add(-0.0, x) => x
+            if float2longlong(C_arg_0) == float2longlong(-0.0):
+                self.make_equal_to(op, arg_1)
+                self._rule_fired_float_add[0] += 1
+                return
+        if arg_1.is_constant():
+            C_arg_1 = arg_1.getfloat()
+            # float_add_minus_zero: float_add(x, -0.0) => x
+            if float2longlong(C_arg_1) == float2longlong(-0.0):
+                self.make_equal_to(op, arg_0)
+                self._rule_fired_float_add[0] += 1
+                return
+        return self.emit(op)
+    _rule_names_float_sub = ['float_sub_zero']
+    _rule_fired_float_sub = [0] * 1
+    _all_rules_fired.append(('float_sub', _rule_names_float_sub, _rule_fired_float_sub))
+    def optimize_FLOAT_SUB(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        if arg_1.is_constant():
+            C_arg_1 = arg_1.getfloat()
+            # float_sub_zero: float_sub(x, 0.0) => x
+            if float2longlong(C_arg_1) == float2longlong(0.0):
+                self.make_equal_to(op, arg_0)
+                self._rule_fired_float_sub[0] += 1
+                return
+        return self.emit(op)
+    _rule_names_float_neg = ['float_neg_neg']
+    _rule_fired_float_neg = [0] * 1
+    _all_rules_fired.append(('float_neg', _rule_names_float_neg, _rule_fired_float_neg))
+    def optimize_FLOAT_NEG(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_0_float_neg = self.optimizer.as_operation(arg_0, rop.FLOAT_NEG)
+        if arg_0_float_neg is not None:
+            arg_0_0 = get_box_replacement(arg_0_float_neg.getarg(0))
+            # float_neg_neg: float_neg(float_neg(x)) => x
+            self.make_equal_to(op, arg_0_0)
+            self._rule_fired_float_neg[0] += 1
+            return
+        return self.emit(op)
+    _rule_names_float_abs = ['float_abs_neg', 'float_abs_abs']
+    _rule_fired_float_abs = [0] * 2
+    _all_rules_fired.append(('float_abs', _rule_names_float_abs, _rule_fired_float_abs))
+    def optimize_FLOAT_ABS(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_0_float_abs = self.optimizer.as_operation(arg_0, rop.FLOAT_ABS)
+        if arg_0_float_abs is not None:
+            arg_0_0 = get_box_replacement(arg_0_float_abs.getarg(0))
+            # float_abs_abs: float_abs(float_abs(x)) => float_abs(x)
+            newop = self.replace_op_with(op, rop.FLOAT_ABS, args=[arg_0_0])
+            self.optimizer.send_extra_operation(newop)
+            self._rule_fired_float_abs[1] += 1
+            return
+        else:
+            arg_0_float_neg = self.optimizer.as_operation(arg_0, rop.FLOAT_NEG)
+            if arg_0_float_neg is not None:
+                arg_0_0 = get_box_replacement(arg_0_float_neg.getarg(0))
+                # float_abs_neg: float_abs(float_neg(x)) => float_abs(x)
+                newop = self.replace_op_with(op, rop.FLOAT_ABS, args=[arg_0_0])
+                self.optimizer.send_extra_operation(newop)
+                self._rule_fired_float_abs[0] += 1
+                return
+        return self.emit(op)
+    _rule_names_float_lt = ['float_lt_self']
+    _rule_fired_float_lt = [0] * 1
+    _all_rules_fired.append(('float_lt', _rule_names_float_lt, _rule_fired_float_lt))
+    def optimize_FLOAT_LT(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        # float_lt_self: float_lt(x, x) => 0
+        if self._same_box(arg_1, arg_0):
+            self.make_constant_int(op, 0)
+            self._rule_fired_float_lt[0] += 1
+            return
+        return self.emit(op)
+    _rule_names_float_gt = ['float_gt_self']
+    _rule_fired_float_gt = [0] * 1
+    _all_rules_fired.append(('float_gt', _rule_names_float_gt, _rule_fired_float_gt))
+    def optimize_FLOAT_GT(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        # float_gt_self: float_gt(x, x) => 0
+        if self._same_box(arg_1, arg_0):
+            self.make_constant_int(op, 0)
+            self._rule_fired_float_gt[0] += 1
+            return
+        return self.emit(op)
+    _rule_names_cast_float_to_int = ['cast_int_to_float_to_int']
+    _rule_fired_cast_float_to_int = [0] * 1
+    _all_rules_fired.append(('cast_float_to_int', _rule_names_cast_float_to_int, _rule_fired_cast_float_to_int))
+    def optimize_CAST_FLOAT_TO_INT(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_0_cast_int_to_float = self.optimizer.as_operation(arg_0, rop.CAST_INT_TO_FLOAT)
+        if arg_0_cast_int_to_float is not None:
+            arg_0_0 = get_box_replacement(arg_0_cast_int_to_float.getarg(0))
+            b_arg_0_0 = self.getintbound(arg_0_0)
+            # cast_int_to_float_to_int: cast_float_to_int(cast_int_to_float(x)) => x
+            if b_arg_0_0.known_ge_const(-9007199254740992) and b_arg_0_0.known_le_const(9007199254740992):
+                self.make_equal_to(op, arg_0_0)
+                self._rule_fired_cast_float_to_int[0] += 1
+                return
+        return self.emit(op)
+    _rule_names_ptr_eq = ['ptr_eq_self']
+    _rule_fired_ptr_eq = [0] * 1
+    _all_rules_fired.append(('ptr_eq', _rule_names_ptr_eq, _rule_fired_ptr_eq))
+    def optimize_PTR_EQ(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        # ptr_eq_self: ptr_eq(x, x) => 1
+        if self._same_box(arg_1, arg_0):
+            self.make_constant_int(op, 1)
+            self._rule_fired_ptr_eq[0] += 1
+            return
+        return self.emit(op)
+    _rule_names_ptr_ne = ['ptr_ne_self']
+    _rule_fired_ptr_ne = [0] * 1
+    _all_rules_fired.append(('ptr_ne', _rule_names_ptr_ne, _rule_fired_ptr_ne))
+    def optimize_PTR_NE(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        # ptr_ne_self: ptr_ne(x, x) => 0
+        if self._same_box(arg_1, arg_0):
+            self.make_constant_int(op, 0)
+            self._rule_fired_ptr_ne[0] += 1
+            return
+        return self.emit(op)
+    _rule_names_instance_ptr_eq = ['instance_ptr_eq_self']
+    _rule_fired_instance_ptr_eq = [0] * 1
+    _all_rules_fired.append(('instance_ptr_eq', _rule_names_instance_ptr_eq, _rule_fired_instance_ptr_eq))
+    def optimize_INSTANCE_PTR_EQ(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        # instance_ptr_eq_self: instance_ptr_eq(x, x) => 1
+        if self._same_box(arg_1, arg_0):
+            self.make_constant_int(op, 1)
+            self._rule_fired_instance_ptr_eq[0] += 1
+            return
+        return self.emit(op)
+    _rule_names_instance_ptr_ne = ['instance_ptr_ne_self']
+    _rule_fired_instance_ptr_ne = [0] * 1
+    _all_rules_fired.append(('instance_ptr_ne', _rule_names_instance_ptr_ne, _rule_fired_instance_ptr_ne))
+    def optimize_INSTANCE_PTR_NE(self, op):
+        arg_0 = get_box_replacement(op.getarg(0))
+        arg_1 = get_box_replacement(op.getarg(1))
+        # instance_ptr_ne_self: instance_ptr_ne(x, x) => 0
+        if self._same_box(arg_1, arg_0):
+            self.make_constant_int(op, 0)
+            self._rule_fired_instance_ptr_ne[0] += 1
+            return
+        return self.emit(op)
@@ -1,7 +1,7 @@
 from rpython.jit.metainterp import jitprof, resume, compile
 from rpython.jit.metainterp.executor import execute_nonspec_const
 from rpython.jit.metainterp.history import (
-    Const, ConstInt, CONST_NULL, new_ref_dict)
+    Const, ConstInt, CONST_NULL, new_ref_dict, GuardClassDispatch)
 from rpython.jit.metainterp.optimizeopt.intutils import IntBound
 from rpython.jit.metainterp.optimizeopt.util import (
     make_dispatcher_method, get_box_replacement)
@@ -374,6 +374,11 @@ class Optimizer(Optimization):
                 return None # fast return if the opnum is wrong
             if op in self._emittedoperations:
                 return op
+            optheap = self.optheap
+            if optheap is not None and op is optheap.postponed_op:
+                # heap.py holds back comparisons until the next operation,
+                # but they are as good as emitted
+                return op
         return None
 
     def get_constant_box(self, box):
@@ -721,6 +726,7 @@ class Optimizer(Optimization):
         guard_op.setdescr(descr)
         guard_op.setfailargs(last_guard_op.getfailargs())
         descr.store_hash(self.metainterp_sd)
+        self._record_class_dispatch(guard_op, descr)
         assert isinstance(guard_op, GuardResOp)
         if guard_op.getopnum() == rop.GUARD_VALUE:
             guard_op = self._maybe_replace_guard_value(guard_op, descr)
@@ -745,6 +751,7 @@ class Optimizer(Optimization):
         new_descr.copy_all_attributes_from(old_descr)
         self._newoperations[old_op_pos] = new_op
         self._emittedoperations[new_op] = None
+        self._record_class_dispatch(new_op, new_descr)
 
     def store_final_boxes_in_guard(self, op, pendingfields):
         assert pendingfields is not None
@@ -773,11 +780,31 @@ class Optimizer(Optimization):
                 assert box not in seen
                 seen[box] = None
         descr.store_final_boxes(op, newboxes, self.metainterp_sd)
+        self._record_class_dispatch(op, descr)
         #
         if op.getopnum() == rop.GUARD_VALUE:
             op = self._maybe_replace_guard_value(op, descr)
         return op
 
+    def _record_class_dispatch(self, op, descr):
+        # see history.GuardClassDispatch
+        opnum = op.getopnum()
+        if ((opnum != rop.GUARD_CLASS and opnum != rop.GUARD_NONNULL_CLASS) or
+                not self.cpu.supports_guard_class_dispatch):
+            return
+        assert isinstance(descr, compile.AbstractResumeGuardDescr)
+        box = get_box_replacement(op.getarg(0))
+        failargs = op.getfailargs()
+        input_index = 0
+        for i in range(len(failargs)):
+            if failargs[i] is None:
+                continue
+            if get_box_replacement(failargs[i]) is box:
+                descr.class_dispatch = GuardClassDispatch(i, input_index,
+                                            opnum == rop.GUARD_NONNULL_CLASS)
+                return
+            input_index += 1
+
     def _maybe_replace_guard_value(self, op, descr):
         if op.getarg(0).type == 'i':
             b = self.getintbound(op.getarg(0))
@@ -768,6 +768,261 @@ class TestOptimizeIntBounds(BaseTestBasic):
         """
         self.optimize_loop(ops, expected)
 
+    def test_rule_float_mul_one(self):
+        ops = """
+        [f0]
+        f1 = float_mul(f0, 1.0)
+        jump(f1)
+        """
+        expected = """
+        [f0]
+        jump(f0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_truediv_one(self):
+        ops = """
+        [f0]
+        f1 = float_truediv(f0, 1.0)
+        jump(f1)
+        """
+        expected = """
+        [f0]
+        jump(f0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_add_minus_zero(self):
+        ops = """
+        [f0]
+        f1 = float_add(f0, -0.0)
+        jump(f1)
+        """
+        expected = """
+        [f0]
+        jump(f0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_sub_zero(self):
+        ops = """
+        [f0]
+        f1 = float_sub(f0, 0.0)
+        jump(f1)
+        """
+        expected = """
+        [f0]
+        jump(f0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_float_rewrites_that_change_nan_sign(self):
+        # all of these would give a NaN of the other sign if f0 or f1 is a
+        # NaN, so the rules must not rewrite them
+        ops = """
+        [f0, f1]
+        f2 = float_sub(-0.0, f0)
+        f3 = float_neg(f1)
+        f4 = float_add(f0, f3)
+        f5 = float_sub(f0, f3)
+        f6 = float_neg(f0)
+        f7 = float_mul(f6, f3)
+        f8 = float_truediv(f6, f3)
+        jump(f2, f4, f5, f7, f8)
+        """
+        self.optimize_loop(ops, ops)
+
+    def test_rule_float_neg_neg(self):
+        ops = """
+        [f0]
+        f1 = float_neg(f0)
+        f2 = float_neg(f1)
+        jump(f2)
+        """
+        expected = """
+        [f0]
+        f1 = float_neg(f0)
+        jump(f0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_abs_neg(self):
+        ops = """
+        [f0]
+        f1 = float_neg(f0)
+        f2 = float_abs(f1)
+        jump(f2)
+        """
+        expected = """
+        [f0]
+        f1 = float_neg(f0)
+        f2 = float_abs(f0)
+        jump(f2)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_abs_abs(self):
+        ops = """
+        [f0]
+        f1 = float_abs(f0)
+        f2 = float_abs(f1)
+        jump(f2)
+        """
+        expected = """
+        [f0]
+        f1 = float_abs(f0)
+        jump(f1)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_lt_self(self):
+        ops = """
+        [f0]
+        i1 = float_lt(f0, f0)
+        jump(i1)
+        """
+        expected = """
+        [f0]
+        jump(0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_float_gt_self(self):
+        ops = """
+        [f0]
+        i1 = float_gt(f0, f0)
+        jump(i1)
+        """
+        expected = """
+        [f0]
+        jump(0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_cast_int_to_float_to_int(self):
+        ops = """
+        [i0]
+        i1 = int_and(i0, 255)
+        f2 = cast_int_to_float(i1)
+        i3 = cast_float_to_int(f2)
+        jump(i3)
+        """
+        expected = """
+        [i0]
+        i1 = int_and(i0, 255)
+        f2 = cast_int_to_float(i1)
+        jump(i1)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_ptr_eq_self(self):
+        ops = """
+        [p0]
+        i1 = ptr_eq(p0, p0)
+        jump(i1)
+        """
+        expected = """
+        [p0]
+        jump(1)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_ptr_ne_self(self):
+        ops = """
+        [p0]
+        i1 = ptr_ne(p0, p0)
+        jump(i1)
+        """
+        expected = """
+        [p0]
+        jump(0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_instance_ptr_eq_self(self):
+        ops = """
+        [p0]
+        i1 = instance_ptr_eq(p0, p0)
+        jump(i1)
+        """
+        expected = """
+        [p0]
+        jump(1)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_instance_ptr_ne_self(self):
+        ops = """
+        [p0]
+        i1 = instance_ptr_ne(p0, p0)
+        jump(i1)
+        """
+        expected = """
+        [p0]
+        jump(0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_is_zero_ptr_eq(self):
+        ops = """
+        [p0, p1]
+        i2 = ptr_eq(p0, p1)
+        i3 = int_is_zero(i2)
+        jump(i3)
+        """
+        expected = """
+        [p0, p1]
+        i2 = ptr_eq(p0, p1)
+        i3 = ptr_ne(p0, p1)
+        jump(i3)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_is_zero_ptr_ne(self):
+        ops = """
+        [p0, p1]
+        i2 = ptr_ne(p0, p1)
+        i3 = int_eq(i2, 0)
+        jump(i3)
+        """
+        expected = """
+        [p0, p1]
+        i2 = ptr_ne(p0, p1)
+        i3 = ptr_eq(p0, p1)
+        jump(i3)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_is_zero_instance_ptr_eq(self):
+        ops = """
+        [p0, p1]
+        i2 = instance_ptr_eq(p0, p1)
+        i3 = int_xor(i2, 1)
+        jump(i3)
+        """
+        expected = """
+        [p0, p1]
+        i2 = instance_ptr_eq(p0, p1)
+        i3 = instance_ptr_ne(p0, p1)
+        jump(i3)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_rule_is_zero_instance_ptr_ne(self):
+        ops = """
+        [p0, p1]
+        i2 = instance_ptr_ne(p0, p1)
+        i3 = int_is_zero(i2)
+        jump(i3)
+        """
+        expected = """
+        [p0, p1]
+        i2 = instance_ptr_ne(p0, p1)
+        i3 = instance_ptr_eq(p0, p1)
+        jump(i3)
+        """
+        self.optimize_loop(ops, expected)
+
     def test_bound_lt(self):
         ops = """
         [i0]
@@ -2218,6 +2218,7 @@ class MetaInterpStaticData(object):
 
         self._addr2name_keys = []
         self._addr2name_values = []
+        self.deferred_loops = DeferredLoops()
 
         compile.make_and_attach_done_descrs([self, cpu])
 
@@ -2396,6 +2397,35 @@ class MetaInterpGlobalData(object):
         self.addr2name = None
         self.vtable2typeid = None
 
+class DeferredLoops(object):
+    """The loops that were traced but are not optimized and assembled yet,
+    if the 'defer_compile' parameter is set.  Instead of compiling the loop
+    right away, the tracing MetaInterp is stored here and the interpreter
+    continues running normally from the loop header.  The loops are
+    compiled by compile_all(), which the interpreter calls at a point where
+    latency doesn't matter (see jit_hooks.stats_compile_deferred_loops()).
+    """
+    def __init__(self):
+        self.limit = 0      # the 'defer_compile' parameter
+        self.metainterps = []
+        self.tracing = 0    # number of MetaInterps currently tracing
+
+    def can_defer(self):
+        return len(self.metainterps) < self.limit
+
+    def compile_all(self):
+        if self.tracing > 0:
+            # called from a residual call while tracing: the metainterp
+            # staticdata is in use, so wait for the next call
+            return 0
+        metainterps = self.metainterps
+        self.metainterps = []
+        count = 0
+        for metainterp in metainterps:
+            if metainterp.compile_deferred_loop():
+                count += 1
+        return count
+
 # ____________________________________________________________
 
 class MetaInterp(object):
@@ -2404,6 +2434,8 @@ class MetaInterp(object):
     exported_state = None
     last_exc_box = None
     _last_op = None
+    deferred_original_boxes = None
+    deferred_live_arg_boxes = None
 
     def __init__(self, staticdata, jitdriver_sd, force_finish_trace=False):
         self.staticdata = staticdata
@@ -2890,10 +2922,12 @@ class MetaInterp(object):
         self.staticdata.profiler.start_tracing()
         assert jitdriver_sd is self.jitdriver_sd
         self.staticdata.try_to_free_some_loops()
+        self.staticdata.deferred_loops.tracing += 1
         try:
             original_boxes = self.initialize_original_boxes(jitdriver_sd, *args)
             return self._compile_and_run_once(original_boxes)
         finally:
+            self.staticdata.deferred_loops.tracing -= 1
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -2923,6 +2957,7 @@ class MetaInterp(object):
             raise compile.giveup() # should be rare
         self.staticdata.try_to_free_some_loops()
         self.create_history(resume.get_max_num_inputargs(key))
+        self.staticdata.deferred_loops.tracing += 1
         try:
             excdata = self._prepare_exception_resumption(deadframe, resumedescr)
             inputargs = self.initialize_state_from_guard_failure(key, deadframe)
@@ -2930,6 +2965,7 @@ class MetaInterp(object):
         except SwitchToBlackhole as stb:
             self.run_blackhole_interp_to_cancel_tracing(stb)
         finally:
+            self.staticdata.deferred_loops.tracing -= 1
             self.resumekey_original_loop_token = None
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
@@ -3036,6 +3072,9 @@ class MetaInterp(object):
                     self.staticdata.log('cancelled too many times!')
                     raise SwitchToBlackhole(Counters.ABORT_BAD_LOOP)
             else:
+                if self.staticdata.deferred_loops.can_defer():
+                    self.defer_loop(original_boxes, live_arg_boxes, start,
+                                    use_unroll=can_use_unroll)
                 target_token = self.compile_loop(
                     original_boxes, live_arg_boxes, start,
                     use_unroll=can_use_unroll)
@@ -3077,12 +3116,7 @@ class MetaInterp(object):
         # interpreted mode, but it should come back very quickly to the
         # JIT, find probably the same 'loop_token', and execute it.
         if we_are_translated():
-            num_green_args = self.jitdriver_sd.num_green_args
-            gi, gr, gf = self._unpack_boxes(live_arg_boxes, 0, num_green_args)
-            ri, rr, rf = self._unpack_boxes(live_arg_boxes, num_green_args,
-                                            len(live_arg_boxes))
-            CRN = jitexc.ContinueRunningNormally
-            raise CRN(gi, gr, gf, ri, rr, rf)
+            self._raise_continue_running_normally(live_arg_boxes)
         else:
             # However, in order to keep the existing tests working
             # (which are based on the assumption that 'loop_token' is
@@ -3090,6 +3124,14 @@ class MetaInterp(object):
             self._nontranslated_run_directly(live_arg_boxes, loop_token)
             assert 0, "unreachable"
 
+    def _raise_continue_running_normally(self, live_arg_boxes):
+        num_green_args = self.jitdriver_sd.num_green_args
+        gi, gr, gf = self._unpack_boxes(live_arg_boxes, 0, num_green_args)
+        ri, rr, rf = self._unpack_boxes(live_arg_boxes, num_green_args,
+                                        len(live_arg_boxes))
+        CRN = jitexc.ContinueRunningNormally
+        raise CRN(gi, gr, gf, ri, rr, rf)
+
     def _nontranslated_run_directly(self, live_arg_boxes, loop_token):
         "NOT_RPYTHON"
         args = []
@@ -3198,6 +3240,54 @@ class MetaInterp(object):
                 target_token.targeting_jitcell_token)
         return target_token
 
+    def defer_loop(self, original_boxes, live_arg_boxes, start, use_unroll):
+        # the trace is complete: keep it, and this MetaInterp, in the
+        # DeferredLoops, and continue running the interpreter from the
+        # loop header.  The loop is compiled by compile_deferred_loop().
+        num_green_args = self.jitdriver_sd.num_green_args
+        greenkey = original_boxes[:num_green_args]
+        warmstate = self.jitdriver_sd.warmstate
+        if (has_compiled_targets(self.get_procedure_token(greenkey)) or
+                warmstate.is_compile_pending(greenkey)):
+            self.staticdata.log('cancelled: the loop is already traced')
+            raise SwitchToBlackhole(Counters.ABORT_BAD_LOOP)
+        self.deferred_original_boxes = original_boxes
+        self.deferred_live_arg_boxes = live_arg_boxes
+        self.deferred_start = start
+        self.deferred_use_unroll = use_unroll
+        warmstate.set_compile_pending(greenkey, True)
+        self.staticdata.deferred_loops.metainterps.append(self)
+        self.staticdata.log('deferred the compilation of the loop')
+        self._raise_continue_running_normally(live_arg_boxes)
+
+    def compile_deferred_loop(self):
+        original_boxes = self.deferred_original_boxes
+        live_arg_boxes = self.deferred_live_arg_boxes
+        assert original_boxes is not None and live_arg_boxes is not None
+        self.deferred_original_boxes = None
+        self.deferred_live_arg_boxes = None
+        num_green_args = self.jitdriver_sd.num_green_args
+        greenkey = original_boxes[:num_green_args]
+        self.jitdriver_sd.warmstate.set_compile_pending(greenkey, False)
+        if has_compiled_targets(self.get_procedure_token(greenkey)):
+            return False
+        debug_start('jit-tracing')
+        try:
+            start = self.deferred_start
+            target_token = self.compile_loop(original_boxes, live_arg_boxes,
+                                             start, self.deferred_use_unroll)
+            if target_token is None and self.deferred_use_unroll:
+                # try one last time without unrolling
+                target_token = self.compile_loop(original_boxes,
+                                                 live_arg_boxes, start,
+                                                 use_unroll=False)
+        finally:
+            debug_stop('jit-tracing')
+        if target_token is None:
+            self.staticdata.log('cancelled, the deferred loop is dropped')
+            return False
+        return True
+
     def compile_retrace(self, original_boxes, live_arg_boxes, start):
         num_green_args = self.jitdriver_sd.num_green_args
         greenkey = original_boxes[:num_green_args]
@@ -5,7 +5,9 @@ from rpython.jit.metainterp.ruleopt import parse
 from rpython.jit.metainterp.optimizeopt.intutils import IntBound
 
 commutative_ops = {"int_add", "int_mul", "int_and", "int_mul", "int_or",
-                   "int_xor", "int_eq", "int_ne"}
+                   "int_xor", "int_eq", "int_ne", "float_add", "float_mul",
+                   "float_eq", "float_ne", "ptr_eq", "ptr_ne",
+                   "instance_ptr_eq", "instance_ptr_ne"}
 
 
 def generate_commutative_patterns_args(args):
@@ -69,12 +71,13 @@ class Matcher(BaseMatcher):
 
 
 class IsConstMatcher(Matcher):
-    def __init__(self, name, ifyes, ifno, nextmatcher, constname):
+    def __init__(self, name, ifyes, ifno, nextmatcher, constname, typ=int):
         self.name = name
         self.ifyes = ifyes
         self.ifno = ifno
         self.nextmatcher = nextmatcher
         self.constname = constname
+        self.typ = typ  # int or float
 
 class OpMatcher(Matcher):
     def __init__(self, name, opname, ifyes, ifno, nextmatcher, argnames):
@@ -127,8 +130,10 @@ def _create_matcher(rules, patterns, names, name_paths, bindings):
         newnames = []
         if any(pattern[0].matches_constant() for pattern in patterns):
             name = names[0]
+            typ = int
             for rule, pattern in zip(rules, patterns):
                 if pattern[0].matches_constant():
+                    typ = pattern[0].typ
                     matchrules.append(rule)
                     matchpatterns.append(pattern[1:])
                 elif isinstance(pattern[0], parse.PatternOp):
@@ -137,7 +142,8 @@ def _create_matcher(rules, patterns, names, name_paths, bindings):
                 else:
                     restrules.append(rule)
                     restpatterns.append(pattern[:])
-            res = IsConstMatcher(names[0], None, None, None, "C_" + names[0])
+            res = IsConstMatcher(names[0], None, None, None, "C_" + names[0],
+                                 typ)
             yes_name_paths = name_paths[1:]
             yes_bindings = bindings.copy()
             yes_bindings[name_paths[0] + ('C', )] = "C_" + names[0]
@@ -228,6 +234,10 @@ class Codegen(parse.Visitor):
                 return
             if varname == self.bindings[p.name]:
                 return
+            if p.typ is float:
+                return self.emit_stacking_condition(
+                    "float2longlong(%s) == float2longlong(%s)" % (
+                        varname, self.bindings[p.name]))
             return self.emit_stacking_condition(
                 "%s == %s" % (varname, self.bindings[p.name])
             )
@@ -235,16 +245,26 @@ class Codegen(parse.Visitor):
             intbound_name = "b_" + varname
             if p.name not in self.bindings:
                 self.bindings[p.name] = varname
-                self.intbound_bindings[p.name] = intbound_name
+                if p.typ is IntBound:
+                    self.intbound_bindings[p.name] = intbound_name
                 return
             if varname == self.bindings[p.name]:
                 return
             varname2 = self.bindings[p.name]
+            if p.typ is not IntBound:
+                # a float or a pointer
+                return self.emit_stacking_condition(
+                    "self._same_box(%s, %s)" % (varname, varname2))
             return self.emit_stacking_condition(
                 "self._eq(%s, b_%s, %s, b_%s)" % (varname, varname, varname2, varname2)
             )
 
     def visit_PatternConst(self, p):
+        if p.typ is float:
+            # compare the bits, to distinguish 0.0 and -0.0
+            return self.emit_stacking_condition(
+                "float2longlong(%s) == float2longlong(%r)" % (
+                    self.bindings[p], p.const))
         return self.emit_stacking_condition(
             "%s == %s" % (self.bindings[p], p.const)
         )
@@ -258,23 +278,34 @@ class Codegen(parse.Visitor):
         if isinstance(target, parse.PatternVar):
             if target.typ is int:
                 value = "ConstInt(%s)" % self.bindings[target.name]
+            elif target.typ is float:
+                value = "ConstFloat.fromfloat(%s)" % self.bindings[target.name]
             else:
                 value = self.bindings[target.name]
             self.emit("self.make_equal_to(op, %s)" % value)
             return
         if isinstance(target, parse.PatternConst):
+            if target.typ is float:
+                self.emit("self.make_constant(op, ConstFloat.fromfloat(%r))"
+                          % target.const)
+                return
             self.emit("self.make_constant_int(op, %s)" % target.const)
             return
         if isinstance(target, parse.PatternOp):
             args = []
             for arg in target.args:
                 if isinstance(arg, parse.PatternVar):
-                    if arg.name.startswith('C') or arg.typ is int:
+                    if arg.typ is float:
+                        args.append("ConstFloat.fromfloat(%s)" % self.bindings[arg.name])
+                    elif arg.name.startswith('C') or arg.typ is int:
                         args.append("ConstInt(%s)" % self.bindings[arg.name])
                     else:
                         args.append(self.bindings[arg.name])
                 elif isinstance(arg, parse.PatternConst):
-                    args.append("ConstInt(%s)" % arg.const)
+                    if arg.typ is float:
+                        args.append("ConstFloat.fromfloat(%r)" % arg.const)
+                    else:
+                        args.append("ConstInt(%s)" % arg.const)
                 else:
                     assert 0
             self.emit(
@@ -289,16 +320,17 @@ class Codegen(parse.Visitor):
         for i, p in enumerate(args):
             self.visit(p)
 
-    def _emit_arg_reads(self, prefix, opname, numargs):
+    def _emit_arg_reads(self, prefix, opname, argkinds):
         boxnames = []
         boundnames = []
-        for i in range(numargs):
+        for i in range(len(argkinds)):
             boxname = "%s_%s" % (prefix, i)
             boundname = "b_" + boxname
             boxnames.append(boxname)
             boundnames.append(boundname)
             self.emit("%s = get_box_replacement(%s.getarg(%s))" % (boxname, opname, i))
-            self.emit("%s = self.getintbound(%s)" % (boundname, boxname))
+            if argkinds[i] == "i":
+                self.emit("%s = self.getintbound(%s)" % (boundname, boxname))
         return boxnames, boundnames
 
     def visit_Terminal(self, ast):
@@ -319,7 +351,10 @@ class Codegen(parse.Visitor):
         for rule in ast.rules:
             bindings = {}
             intbound_bindings = {}
-            for path, name in ast.bindings.iteritems():
+            # longer paths last: the binding of a constant (path ending
+            # with 'C') must win over the binding of the same box
+            for path, name in sorted(ast.bindings.iteritems(),
+                                     key=lambda item: len(item[0])):
                 _add_binding(rule.pattern, path, name)
             self.bindings = bindings
             self.intbound_bindings = intbound_bindings
@@ -327,8 +362,12 @@ class Codegen(parse.Visitor):
 
     def visit_IsConstMatcher(self, ast):
         currlevel = self.level
-        self.emit_stacking_condition("b_%s.is_constant()" % ast.name)
-        self.emit("%s = b_%s.get_constant_int()" % (ast.constname, ast.name))
+        if ast.typ is float:
+            self.emit_stacking_condition("%s.is_constant()" % ast.name)
+            self.emit("%s = %s.getfloat()" % (ast.constname, ast.name))
+        else:
+            self.emit_stacking_condition("b_%s.is_constant()" % ast.name)
+            self.emit("%s = b_%s.get_constant_int()" % (ast.constname, ast.name))
         self.visit(ast.ifyes)
         self.level = currlevel
         if ast.ifno:
@@ -345,7 +384,8 @@ class Codegen(parse.Visitor):
             % (boxname, ast.name, ast.opname.upper())
         )
         self.emit_stacking_condition("%s is not None" % boxname)
-        boxnames, boundnames = self._emit_arg_reads(ast.name, boxname, len(ast.argnames))
+        argkinds, _ = parse.optypes(ast.opname, len(ast.argnames))
+        boxnames, boundnames = self._emit_arg_reads(ast.name, boxname, argkinds)
         assert boxnames == ast.argnames
         self.visit(ast.ifyes)
         self.level = currlevel
@@ -373,7 +413,8 @@ class Codegen(parse.Visitor):
         self.emit("_all_rules_fired.append((%r, _rule_names_%s, _rule_fired_%s))" % (opname, opname, opname))
         with self.emit_indent("def optimize_%s(self, op):" % opname.upper()):
             numargs = len(rules[0].pattern.args)
-            boxnames, boundnames = self._emit_arg_reads("arg", "op", numargs)
+            argkinds, _ = parse.optypes(opname, numargs)
+            boxnames, boundnames = self._emit_arg_reads("arg", "op", argkinds)
             self.method_boxnames = boxnames
             self.method_boundnames = boundnames
             for subset_rules in split_by_result_type(all_rules):
@@ -469,10 +510,13 @@ class Codegen(parse.Visitor):
 
     def generate_code(self, ast):
         per_op = defaultdict(list)
+        opnames = []
         for rule in ast.rules:
+            if rule.pattern.opname not in per_op:
+                opnames.append(rule.pattern.opname)
             per_op[rule.pattern.opname].append(rule)
-        for opname, rules in per_op.items():
-            self.generate_method(opname, rules)
+        for opname in opnames:
+            self.generate_method(opname, per_op[opname])
         self.emit()
         return "\n".join(self.code)
 
@@ -482,5 +526,8 @@ class Codegen(parse.Visitor):
                 self.emit("if box1 is box2: return True")
                 self.emit("if bound1.is_constant() and bound2.is_constant() and bound1.lower == bound2.lower: return True")
                 self.emit("return False")
+            with self.emit_indent("def _same_box(self, box1, box2):"):
+                self.emit("if box1 is box2: return True")
+                self.emit("return box1.is_constant() and box2.is_constant() and box1.same_constant(box2)")
             self.emit("_all_rules_fired = []")
             return self.generate_code(ast)
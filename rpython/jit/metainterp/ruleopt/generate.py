@@ -32,11 +32,12 @@ def main(argv):
         f.write("""# Generated by ruleopt/generate.py, don't edit!
 
 import sys
-from rpython.jit.metainterp.history import ConstInt
+from rpython.jit.metainterp.history import ConstInt, ConstFloat
 from rpython.jit.metainterp.optimizeopt.util import (
     get_box_replacement)
 from rpython.jit.metainterp.resoperation import rop
 
+from rpython.rlib.longlong2float import float2longlong
 from rpython.rlib.rarithmetic import LONG_BIT, r_uint, intmask, ovfcheck, uint_mul_high, highest_bit
 MAXINT = sys.maxint
 MININT = -sys.maxint - 1
@@ -26,6 +26,7 @@ addkeyword("and")
 addkeyword("or")
 addkeyword("SORRY_Z3")
 
+addtok("FLOAT", r"[+-]?\d+[.]\d+")
 addtok("NUMBER", r"[+-]?([1-9]\d*)|0")
 addtok("NAME", r"[a-zA-Z_][a-zA-Z_0-9]*")
 addtok("LSHIFT", r"[<][<]")
@@ -179,8 +180,9 @@ class PatternVar(Pattern):
 
 class PatternConst(BaseAst):
     typ = int
-    def __init__(self, const):
+    def __init__(self, const, typ=int):
         self.const = const
+        self.typ = typ
 
     def sort_key(self):
         return (0, self.const)
@@ -492,6 +494,11 @@ def pattern_const(p):
     return PatternConst(p[0].value)
 
 
+@production("pattern : FLOAT")
+def pattern_float_const(p):
+    return PatternConst(float(p[0].value), float)
+
+
 @production("pattern : NAME LPAREN patternargs RPAREN")
 def pattern_op(p):
     return PatternOp(p[0].value, p[2])
@@ -664,6 +671,53 @@ def parse(s):
 # ___________________________________________________________________________
 # attach types
 
+class FloatBox(object):
+    """ The type of the float variables of the patterns (the constants
+    have the type float). """
+
+class PtrBox(object):
+    """ The type of the pointer variables of the patterns. There are no
+    pointer constants. """
+
+# argument and result types of the operations that don't take and return
+# only integers
+OPTYPES = {
+    "float_add": ("ff", "f"),
+    "float_sub": ("ff", "f"),
+    "float_mul": ("ff", "f"),
+    "float_truediv": ("ff", "f"),
+    "float_neg": ("f", "f"),
+    "float_abs": ("f", "f"),
+    "float_lt": ("ff", "i"),
+    "float_le": ("ff", "i"),
+    "float_eq": ("ff", "i"),
+    "float_ne": ("ff", "i"),
+    "float_gt": ("ff", "i"),
+    "float_ge": ("ff", "i"),
+    "cast_float_to_int": ("f", "i"),
+    "cast_int_to_float": ("i", "f"),
+    "ptr_eq": ("rr", "i"),
+    "ptr_ne": ("rr", "i"),
+    "instance_ptr_eq": ("rr", "i"),
+    "instance_ptr_ne": ("rr", "i"),
+}
+
+def optypes(opname, numargs):
+    """ Returns the types of the arguments of 'opname' and of its result,
+    as strings of 'i', 'f' and 'r', like the type of ResOperations. """
+    if opname in OPTYPES:
+        return OPTYPES[opname]
+    return "i" * numargs, "i"
+
+def kind_of_type(typ):
+    if typ is int or typ is IntBound:
+        return "i"
+    if typ is float or typ is FloatBox:
+        return "f"
+    if typ is PtrBox:
+        return "r"
+    return None
+
 INTBOUND_METHODTYPES = {
     "known_eq_const": (IntBound, [int], bool),
     "known_le_const": (IntBound, [int], bool),
@@ -720,38 +774,55 @@ class TypingVisitor(Visitor):
     def _error(self, msg, ast):
         raise TypeCheckError(msg, ast)
 
+    def _must_be_kind(self, ast, typ, kind):
+        if kind_of_type(typ) != kind:
+            self._error("%s must be of kind %r, got %s" % (
+                ast, kind, typ.__name__), ast)
+
     def visit_Rule(self, rule):
         self.bindings = {}
-        self.visit(rule.pattern, patterndefine=True)
+        _, kind = optypes(rule.pattern.opname, len(rule.pattern.args))
+        self.visit(rule.pattern, patterndefine=True, kind=kind)
         for el in rule.elements:
             self.visit(el)
-        self.visit(rule.target, patterndefine=False)
+        self.visit(rule.target, patterndefine=False, kind=kind)
 
-    def visit_PatternVar(self, ast, patterndefine):
+    def visit_PatternVar(self, ast, patterndefine, kind="i"):
         if patterndefine:
             if ast.name.startswith('C'):
-                typ = int
+                if kind == "r":
+                    self._error("pointer constants are not supported", ast)
+                typ = float if kind == "f" else int
             else:
-                typ = IntBound
+                typ = {"i": IntBound, "f": FloatBox, "r": PtrBox}[kind]
             if ast.name in self.bindings:
                 self._must_be_same_typ(ast, self.bindings[ast.name], typ)
             else:
                 self.bindings[ast.name] = typ
-                ast.typ = typ
+            ast.typ = typ
         else:
             if ast.name not in self.bindings:
                 self._error("variable %s is not defined" % (repr(ast.name), ), ast)
             typ = self.bindings[ast.name]
             ast.typ = typ
+            self._must_be_kind(ast, typ, kind)
         return typ
 
-    def visit_PatternConst(self, ast, patterndefine):
+    def visit_PatternConst(self, ast, patterndefine, kind="i"):
+        self._must_be_kind(ast, ast.typ, kind)
         return ast.typ
 
-    def visit_PatternOp(self, ast, patterndefine):
+    def visit_PatternOp(self, ast, patterndefine, kind="i"):
         # XXX check that name exists
-        for arg in ast.args:
-            self.visit(arg, patterndefine=patterndefine)
+        argkinds, resultkind = optypes(ast.opname, len(ast.args))
+        if len(argkinds) != len(ast.args):
+            self._error("%s takes %d arguments" % (ast.opname, len(argkinds)),
+                        ast)
+        if resultkind != kind:
+            self._error("%s must be of kind %r, got %r" % (
+                ast, kind, resultkind), ast)
+        for arg, argkind in zip(ast.args, argkinds):
+            self.visit(arg, patterndefine=patterndefine, kind=argkind)
 
     def visit_Compute(self, ast):
         if ast.name in self.bindings:
@@ -802,9 +873,16 @@ class TypingVisitor(Visitor):
         self._must_be_same_typ(ast.right, bool, self.visit(ast.right))
         return bool
 
+    def visit_Attribute(self, ast):
+        if self.bindings.get(ast.varname, None) is not IntBound:
+            self._error("%s is not an integer variable" % (ast.varname, ), ast)
+        return ast.typ
+
     def visit_MethodCall(self, ast):
         if ast.methname in INTBOUND_METHODTYPES:
-            _, argtyps, restyp = INTBOUND_METHODTYPES[ast.methname]
+            receivertyp, argtyps, restyp = INTBOUND_METHODTYPES[ast.methname]
+            self._must_be_same_typ(ast.value, self.visit(ast.value),
+                                   receivertyp)
             for arg, typ in zip(ast.args, argtyps):
                 hastyp = self.visit(arg)
                 self._must_be_same_typ(arg, hastyp, typ)
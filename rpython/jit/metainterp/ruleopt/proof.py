@@ -1,5 +1,7 @@
 import sys
 import os
+import math
+import struct
 from hashlib import md5
 
 import z3
@@ -47,11 +49,16 @@ class CouldNotProve(ProofProblem):
                                       r_uint(model.evaluate(bound.tvalue).as_signed_long()),)
                 detail.append("bounds for %s: %s" % (name, realbound))
             res.append("%s: %s" % (name, model[prover.name_to_z3[name]].as_signed_long()))
+        for name in sorted(prover.name_to_z3):
+            if name not in prover.name_to_intbound: # floats and pointers
+                res.append("%s: %s" % (name, z3_value(model, prover.name_to_z3[name],
+                                                      name in prover.float_names)))
+        isfloat = prover.result_is_float
         res.append("operation %s with Z3 formula %s" % (rule.pattern, self.lhs))
-        res.append("has counterexample result vale: %s" % (model.evaluate(self.lhs).as_signed_long(), ))
+        res.append("has counterexample result vale: %s" % (z3_value(model, self.lhs, isfloat), ))
         res.append("BUT")
         res.append("target expression: %s with Z3 formula %s" % (rule.target, self.rhs))
-        res.append("has counterexample value: %s" % (model.evaluate(self.rhs).as_signed_long(), ))
+        res.append("has counterexample value: %s" % (z3_value(model, self.rhs, isfloat), ))
         res.extend(detail)
         return "\n".join(res)
 
@@ -74,6 +81,68 @@ class RuleCannotApply(ProofProblem):
 TRUEBV = z3.BitVecVal(1, LONG_BIT)
 FALSEBV = z3.BitVecVal(0, LONG_BIT)
 
+# floats are represented by the 64 bits of their IEEE encoding, so that the
+# sign (and payload) of NaNs is part of the model. the arithmetic is done by
+# converting to z3 floats and back.
+FLOAT64 = z3.Float64()
+# the float operations of the JIT round to nearest, ties to even, like the
+# CPU does by default
+RNE = z3.RNE()
+FLOAT_SIGN = z3.BitVecVal(1 << 63, 64)
+FLOAT_QUIET = z3.BitVecVal(1 << 51, 64)
+# all bits of a quiet NaN, except the sign
+FLOAT_QUIET_NAN = z3.BitVecVal(0x7ff8000000000000, 63)
+
+
+def float_bits(value):
+    return struct.unpack("<Q", struct.pack("<d", value))[0]
+
+
+def z3_value(model, expr, isfloat=False):
+    value = model.evaluate(expr, model_completion=True)
+    if isfloat:
+        bits = value.as_long()
+        value = struct.unpack("<d", struct.pack("<Q", bits))[0]
+        if math.isnan(value) and bits >> 63:
+            return "-nan"
+        return repr(value)
+    return value.as_signed_long()
+
+
+def z3_float(bits):
+    return z3.fpBVToFP(bits, FLOAT64)
+
+
+def z3_float_isnan(bits):
+    return z3.fpIsNaN(z3_float(bits))
+
+
+def z3_float_same(a, b):
+    # two float results are the same if they have the same bits, or if both
+    # are NaNs with the same sign. the payload of a NaN is not compared, e.g.
+    # float_mul(x, 1.0) makes a signalling NaN quiet
+    return z3.If(z3.And(z3_float_isnan(a), z3_float_isnan(b)),
+                 z3.Extract(63, 63, a) == z3.Extract(63, 63, b),
+                 a == b)
+
+
+def z3_float_arith(func, arg0, arg1):
+    # if an argument is a NaN, the result is that NaN, made quiet. if both
+    # are, which one is used depends on the CPU. a NaN that is made by the
+    # operation itself, e.g. by inf - inf, has a sign that depends on the CPU
+    nan0 = arg0 | FLOAT_QUIET
+    nan1 = arg1 | FLOAT_QUIET
+    newnan = z3.Concat(z3.FreshConst(z3.BitVecSort(1), "nansign"),
+                       FLOAT_QUIET_NAN)
+    isnan0 = z3_float_isnan(arg0)
+    isnan1 = z3_float_isnan(arg1)
+    nan = z3.If(isnan0,
+                z3.If(isnan1, z3.If(z3.FreshBool("nanfirst"), nan0, nan1),
+                      nan0),
+                z3.If(isnan1, nan1, newnan))
+    res = func(RNE, z3_float(arg0), z3_float(arg1))
+    return z3.If(z3.fpIsNaN(res), nan, z3.fpToIEEEBV(res))
+
 
 def z3_cond(z3expr):
     return z3.If(z3expr, TRUEBV, FALSEBV)
@@ -106,6 +175,22 @@ def z3_bool_expression(opname, arg0, arg1=None):
         expr = arg0 != FALSEBV
     elif opname == "int_is_zero":
         expr = arg0 == FALSEBV
+    elif opname == "float_lt":
+        expr = z3.fpLT(z3_float(arg0), z3_float(arg1))
+    elif opname == "float_le":
+        expr = z3.fpLEQ(z3_float(arg0), z3_float(arg1))
+    elif opname == "float_gt":
+        expr = z3.fpGT(z3_float(arg0), z3_float(arg1))
+    elif opname == "float_ge":
+        expr = z3.fpGEQ(z3_float(arg0), z3_float(arg1))
+    elif opname == "float_eq":
+        expr = z3.fpEQ(z3_float(arg0), z3_float(arg1))
+    elif opname == "float_ne":
+        expr = z3.fpNEQ(z3_float(arg0), z3_float(arg1))
+    elif opname == "ptr_eq" or opname == "instance_ptr_eq":
+        expr = arg0 == arg1
+    elif opname == "ptr_ne" or opname == "instance_ptr_ne":
+        expr = arg0 != arg1
     else:
         assert 0
     return expr, valid
@@ -147,6 +232,28 @@ def z3_expression(opname, arg0, arg1=None):
         expr = ~arg0
     elif opname == "int_force_ge_zero":
         expr = z3.If(arg0 < 0, 0, arg0)
+    elif opname == "float_add":
+        expr = z3_float_arith(z3.fpAdd, arg0, arg1)
+    elif opname == "float_sub":
+        expr = z3_float_arith(z3.fpSub, arg0, arg1)
+    elif opname == "float_mul":
+        expr = z3_float_arith(z3.fpMul, arg0, arg1)
+    elif opname == "float_truediv":
+        expr = z3_float_arith(z3.fpDiv, arg0, arg1)
+    elif opname == "float_neg":
+        # flips the sign bit, also of NaNs
+        expr = arg0 ^ FLOAT_SIGN
+    elif opname == "float_abs":
+        expr = arg0 & ~FLOAT_SIGN
+    elif opname == "cast_int_to_float":
+        expr = z3.fpToIEEEBV(z3.fpSignedToFP(RNE, arg0, FLOAT64))
+    elif opname == "cast_float_to_int":
+        # the result is only defined if the float is in range
+        farg0 = z3_float(arg0)
+        expr = z3.fpToSBV(z3.RTZ(), farg0, z3.BitVecSort(LONG_BIT))
+        valid = z3.And(z3.Not(z3.fpIsNaN(farg0)),
+                       z3.fpGEQ(farg0, z3.FPVal(-2.0 ** 63, FLOAT64)),
+                       z3.fpLT(farg0, z3.FPVal(2.0 ** 63, FLOAT64)))
     else:
         expr, valid = z3_bool_expression(opname, arg0, arg1)
         return z3_cond(expr), valid
@@ -197,11 +304,21 @@ def z3_highest_bit(x):
 def z3_min(a, b):
     return z3.If(a <= b, a, b)
 
+def uses_floats(pattern):
+    if not isinstance(pattern, parse.PatternOp):
+        return False
+    argkinds, resultkind = parse.optypes(pattern.opname, len(pattern.args))
+    if "f" in argkinds or resultkind == "f":
+        return True
+    return any(uses_floats(arg) for arg in pattern.args)
+
 class Prover(parse.Visitor):
     def __init__(self):
         self.solver = z3.Optimize()
         self.name_to_z3 = {}
         self.name_to_intbound = {}
+        self.float_names = set()
+        self.result_is_float = False
         self.glue_conditions_added = set()
         self.glue_conditions = []
 
@@ -216,7 +333,7 @@ class Prover(parse.Visitor):
             model = self.solver.model()
             return False
 
-    def _convert_var(self, name):
+    def _convert_var(self, name, typ=IntBound):
         def newvar(name, suffix=""):
             if suffix:
                 name += "_" + suffix
@@ -226,8 +343,17 @@ class Prover(parse.Visitor):
 
         if name in self.name_to_z3:
             return self.name_to_z3[name]
+        if typ is float or typ is parse.FloatBox:
+            # the bits of an IEEE double, see z3_float_arith
+            res = self.name_to_z3[name] = z3.BitVec(name, 64)
+            self.float_names.add(name)
+            return res
+        if typ is parse.PtrBox:
+            # pointers can only be compared, and have no bounds
+            return newvar(name)
         res = newvar(name)
-        self.solver.minimize(res)
+        if isinstance(self.solver, z3.Optimize):
+            self.solver.minimize(res)
         b = make_z3_intbounds_instance(name, res)
         self.name_to_intbound[name] = b
         return res
@@ -257,7 +383,7 @@ class Prover(parse.Visitor):
         return res, z3_and(valid, *[arg[1] for arg in args])
 
     def visit_PatternVar(self, pattern):
-        return self._convert_var(pattern.name), True
+        return self._convert_var(pattern.name, pattern.typ), True
 
     def visit_PatternConst(self, pattern):
         if pattern.const == "LONG_BIT":
@@ -266,6 +392,8 @@ class Prover(parse.Visitor):
             return z3.BitVecVal(MININT, LONG_BIT), True
         elif pattern.const == "MAXINT":
             return z3.BitVecVal(MAXINT, LONG_BIT), True
+        if pattern.typ is float:
+            return z3.BitVecVal(float_bits(pattern.const), 64), True
         res = z3.BitVecVal(pattern.const, LONG_BIT)
         return res, True
 
@@ -363,7 +491,7 @@ class Prover(parse.Visitor):
             else:
                 conditions.append(c)
 
-        somevar = z3.BitVec('check_not_empty', LONG_BIT)
+        somevar = z3.Const('check_not_empty', lhs.sort())
         conditions.append(lhs == somevar)
         cond = z3_and(*conditions)
         if self.solver.check(cond) != z3.sat:
@@ -381,11 +509,20 @@ class Prover(parse.Visitor):
         import time
         t1 = time.time()
         print("checking %s" % rule)
+        if uses_floats(rule.pattern):
+            # z3.Optimize gives up on most floating point formulas, and
+            # the specialized solver is a lot faster
+            self.solver = z3.SolverFor("QF_FPBV")
+        _, resultkind = parse.optypes(rule.pattern.opname, len(rule.pattern.args))
+        self.result_is_float = resultkind == "f"
         lhs, lhsvalid = self.visit(rule.pattern)
         self.must_be_sat(rule, lhs, lhsvalid)
         rhs, rhsvalid = self.visit(rule.target)
         implies_left = [lhsvalid]
-        implies_right = [rhsvalid, rhs == lhs]
+        if self.result_is_float:
+            implies_right = [rhsvalid, z3_float_same(rhs, lhs)]
+        else:
+            implies_right = [rhsvalid, rhs == lhs]
         for el in rule.elements:
             if isinstance(el, parse.Compute):
                 expr, exprvalid = self.visit(el.expr, int)
@@ -109,3 +109,28 @@ sub_const_canonicalize: int_sub(x, C1)
     assert "intmask(-r_uint(" in res
     assert "-C_arg_1" not in res
 
+
+
+def test_generate_float_consts():
+    s = """\
+float_add_minus_zero: float_add(x, -0.0)
+    => x
+float_sub_from_minus_zero: float_sub(-0.0, x)
+    => float_neg(x)
+"""
+    codegen = Codegen()
+    res = codegen.generate_code(parse(s))
+    # floats don't have an IntBound, and 0.0 and -0.0 are compared bitwise
+    assert "getintbound" not in res
+    assert "C_arg_1 = arg_1.getfloat()" in res
+    assert "float2longlong(C_arg_1) == float2longlong(-0.0)" in res
+
+def test_generate_same_ptr():
+    s = """\
+ptr_eq_self: ptr_eq(x, x)
+    => 1
+"""
+    codegen = Codegen()
+    res = codegen.generate_code(parse(s))
+    assert "getintbound" not in res
+    assert "self._same_box(arg_1, arg_0)" in res
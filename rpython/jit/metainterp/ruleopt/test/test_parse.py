@@ -133,3 +133,59 @@ Type error: expected check expression to return a bool, got int
 in line 2
         check C
               ^'''
+
+
+def test_parse_float():
+    s = """\
+float_mul_one: float_mul(x, 1.0)
+    => x
+sub_minus_zero: float_sub(-0.0, C)
+    => float_neg(C)
+"""
+    ast = parse(s)
+    rule = ast.rules[0]
+    assert rule.pattern.args[0].typ is FloatBox
+    assert rule.pattern.args[1].const == 1.0
+    assert rule.pattern.args[1].typ is float
+    rule = ast.rules[1]
+    assert str(rule.pattern.args[0].const) == "-0.0"
+    assert rule.pattern.args[1].typ is float
+
+def test_parse_ptr():
+    s = """\
+ptr_eq_self: ptr_eq(x, x)
+    => 1
+"""
+    ast = parse(s)
+    assert ast.rules[0].pattern.args[0].typ is PtrBox
+    assert ast.rules[0].pattern.args[1].typ is PtrBox
+
+def test_wrong_kinds():
+    s = """\
+n: float_add(x, 1)
+    => x
+    """
+    with pytest.raises(TypeCheckError) as info:
+        parse(s)
+    assert str(info.value) == "1 must be of kind 'f', got int"
+    s = """\
+n: int_add(float_neg(x), 1)
+    => x
+    """
+    with pytest.raises(TypeCheckError) as info:
+        parse(s)
+    assert str(info.value) == "float_neg(x) must be of kind 'i', got 'f'"
+    s = """\
+n: ptr_eq(x, C)
+    => 0
+    """
+    with pytest.raises(TypeCheckError) as info:
+        parse(s)
+    assert str(info.value) == "pointer constants are not supported"
+    s = """\
+n: float_neg(x)
+    check x.is_bool()
+    => x
+    """
+    with pytest.raises(TypeCheckError) as info:
+        parse(s)
@@ -74,3 +74,40 @@ And(x <= x_upper,
     x_lower <= x,
     If(x_upper < 0, x_lower > 0, x_upper < 0))\
 '''
+
+def test_float_rule_not_ieee_exact():
+    # x + 0.0 is 0.0 if x is -0.0
+    s = """\
+bug: float_add(x, 0.0)
+    => x
+    """
+    with pytest.raises(CouldNotProve) as info:
+        prove_source(s)
+    assert "x: -0.0" in info.value.format()
+
+def test_float_cast_needs_range():
+    s = """\
+bug: cast_float_to_int(cast_int_to_float(x))
+    => x
+    """
+    with pytest.raises(CouldNotProve):
+        prove_source(s)
+
+def test_float_rule_nan_sign():
+    # float_mul keeps the sign of a NaN, float_neg flips it
+    s = """\
+bug: float_mul(x, -1.0)
+    => float_neg(x)
+    """
+    with pytest.raises(CouldNotProve) as info:
+        prove_source(s)
+    assert "nan" in info.value.format()
+
+def test_float_rule_nan_sign_ok():
+    s = """\
+float_abs_neg: float_abs(float_neg(x))
+    => float_abs(x)
+float_sub_zero: float_sub(x, 0.0)
+    => x
+    """
+    prove_source(s, force=True)
@@ -1,6 +1,7 @@
 
 import py
 from rpython.rlib.jit import JitDriver, JitHookInterface, Counters, dont_look_inside
+from rpython.rlib.jit import set_param
 from rpython.rlib import jit_hooks
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.codewriter.policy import JitPolicy
@@ -349,6 +350,72 @@ class JitHookInterfaceTests(object):
                                no_stats_history=True)
         assert res == 42
 
+    def test_memmgr_stats(self):
+        driver = JitDriver(greens = [], reds = ['i'])
+        def loop(i):
+            while i > 0:
+                driver.jit_merge_point(i=i)
+                i -= 1
+        def main():
+            if jit_hooks.stats_memmgr_alive_loops(None) != 0:
+                return 1000
+            loop(30)
+            if jit_hooks.stats_memmgr_alive_loops(None) != 1:
+                return 2000 + jit_hooks.stats_memmgr_alive_loops(None)
+            if jit_hooks.stats_memmgr_evicted_loops(None) != 0:
+                return 3000
+            if jit_hooks.stats_memmgr_evicted_for_code_size(None) != 0:
+                return 4000
+            if jit_hooks.stats_memmgr_recompiled_loops(None) != 0:
+                return 5000
+            return 42
+
+        res = self.meta_interp(main, [], ProfilerClass=Profiler,
+                               no_stats_history=True)
+        assert res == 42
+
+    def test_defer_compile(self):
+        driver = JitDriver(greens = ['g'], reds = ['i', 's'])
+        def loop(g, i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(g=g, i=i, s=s)
+                s += g
+                i -= 1
+            return s
+        def num_loops():
+            return jit_hooks.stats_get_counter_value(None,
+                                           Counters.TOTAL_COMPILED_LOOPS)
+        def main():
+            set_param(driver, 'defer_compile', 1)
+            # the loop is traced, but not compiled
+            if loop(1, 30) != 30:
+                return 500
+            if loop(1, 30) != 30:
+                return 600
+            if num_loops() != 0:
+                return 1000 + num_loops()
+            # the queue is full: compiled right away
+            if loop(2, 30) != 60:
+                return 1500
+            if num_loops() != 1:
+                return 2000 + num_loops()
+            if jit_hooks.stats_compile_deferred_loops(None) != 1:
+                return 2500
+            if num_loops() != 2:
+                return 3000 + num_loops()
+            if loop(1, 30) != 30:
+                return 3500
+            if num_loops() != 2:
+                return 4000 + num_loops()
+            if jit_hooks.stats_compile_deferred_loops(None) != 0:
+                return 4500
+            return 42
+
+        res = self.meta_interp(main, [], ProfilerClass=Profiler,
+                               no_stats_history=True)
+        assert res == 42
+
 
 class LLJitHookInterfaceTests(JitHookInterfaceTests):
     # use this for any backend, instead of the super class
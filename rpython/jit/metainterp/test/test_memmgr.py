@@ -11,7 +11,8 @@ if len(sys.argv) >= 4 and sys.argv[1] == '--sub':
     rpython.conftest.option.__dict__.update(eval(sys.argv[3]))
 
 import py
-from rpython.jit.metainterp.memmgr import MemoryManager
+from rpython.jit.metainterp.memmgr import MemoryManager, usage_weight
+from rpython.jit.metainterp.memmgr import CODE_SIZE_CHECK_DELAY
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.rlib.jit import JitDriver, dont_look_inside
 from rpython.jit.metainterp.warmspot import get_stats
@@ -21,6 +22,24 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    entry_count = 0
+    times_evicted = 0
+    greenkey_hash = 0
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    bridges_count = 0
+    def __init__(self, size):
+        self.size = size
+    def get_code_size(self):
+        return self.size
+
+class FakeCPU:
+    def __init__(self, tokens):
+        self.tokens = tokens
+    def get_code_memory_in_use(self):
+        return sum([token.compiled_loop_token.size for token in self.tokens
+                    if token in self.memmgr.alive_loops])
 
 
 class _TestMemoryManager:
@@ -78,6 +97,92 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_usage_weight(self):
+        token = FakeLoopToken()
+        assert usage_weight(token) == 1
+        token.entry_count = 4
+        assert usage_weight(token) == 2
+        token.entry_count = 16
+        assert usage_weight(token) == 3
+        token.entry_count = 0
+        token.compiled_loop_token = FakeCompiledLoopToken(100)
+        token.compiled_loop_token.bridges_count = 1
+        assert usage_weight(token) == 2
+        token.times_evicted = 2
+        assert usage_weight(token) == 4
+        token.entry_count = sys.maxint
+        assert usage_weight(token) == 8
+
+    def test_used_loop_lives_longer(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        used = FakeLoopToken()
+        unused = FakeLoopToken()
+        memmgr.keep_loop_alive(unused)
+        for i in range(16):
+            memmgr.keep_loop_alive(used)
+            memmgr.next_generation()
+        assert used.entry_count == 16
+        assert usage_weight(used) == 3
+        assert memmgr.alive_loops == {used: None}
+        # now 'used' is not entered any more, but stays alive 3 times longer
+        # than the 3 generations of an unused loop
+        for i in range(8):
+            memmgr.next_generation()
+            assert memmgr.alive_loops == {used: None}
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {}
+        assert memmgr.evicted_loops == 2
+
+    def test_recompiled_loop(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(4, 1)
+        token = FakeLoopToken()
+        memmgr.record_procedure(token, 1234)
+        memmgr.keep_loop_alive(token)
+        for i in range(4):
+            memmgr.next_generation()
+        assert memmgr.alive_loops == {}
+        assert memmgr.evicted_keys == {1234: 1}
+        token2 = FakeLoopToken()
+        memmgr.record_procedure(token2, 1234)
+        assert token2.times_evicted == 1
+        assert memmgr.recompiled_loops == 1
+        assert memmgr.evicted_keys == {}
+        memmgr.record_procedure(FakeLoopToken(), 5678)
+        assert memmgr.recompiled_loops == 1
+
+    def test_code_size_limit(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_max_code_size(1000)
+        tokens = [FakeLoopToken() for i in range(6)]
+        for token in tokens:
+            token.compiled_loop_token = FakeCompiledLoopToken(300)
+        memmgr.cpu = FakeCPU(tokens)
+        memmgr.cpu.memmgr = memmgr
+        for token in tokens[:3]:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert len(memmgr.alive_loops) == 3
+        # tokens[0] is entered often, tokens[1] and tokens[2] are older
+        for i in range(16):
+            memmgr.keep_loop_alive(tokens[0])
+            memmgr.next_generation()
+        memmgr.keep_loop_alive(tokens[3])
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys([tokens[0], tokens[3]])
+        assert memmgr.evicted_for_code_size == 2
+        # no check again before CODE_SIZE_CHECK_DELAY generations
+        for token in tokens[4:]:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert len(memmgr.alive_loops) == 4
+        for i in range(CODE_SIZE_CHECK_DELAY):
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys([tokens[0], tokens[5]])
+        assert memmgr.evicted_loops == 4
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -203,14 +308,15 @@ class _TestIntegration(LLJitMixin):
                 g(1)   
                 g(3)
                 g(1)
-                g(4)   # g(2), g(3), g(4), g(5) are thrown away every iteration
-                g(1)   # (no entry bridge for them)
-                g(5)
+                g(4)   # g(2), g(3), g(4), g(5) are thrown away in the first
+                g(1)   # iterations (no entry bridge for them), but each time
+                g(5)   # they are compiled again they are kept alive longer
             return 42
 
         res = self.meta_interp(f, [], loop_longevity=3)
         assert res == 42
-        self.check_enter_count(2 + 10*4)
+        # they are compiled 3 times before staying alive
+        self.check_enter_count(2 + 3*4)
 
     def test_call_assembler_keep_alive(self):
         myjitdriver1 = JitDriver(greens=['m'], reds=['n'])
@@ -9,6 +9,7 @@ from rpython.jit.metainterp.resoperation import InputArgInt, InputArgRef,\
 from rpython.jit.metainterp.history import ConstInt, ConstFloat, ConstPtr,\
      IntFrontendOp, FloatFrontendOp, RefFrontendOp
 from rpython.jit.metainterp.counter import DeterministicJitCounter
+from rpython.jit.metainterp.pyjitpl import DeferredLoops
 from rpython.jit.codewriter import longlong
 from rpython.rlib.rarithmetic import r_singlefloat
 
@@ -110,7 +111,7 @@ class FakeWarmRunnerDesc:
     rtyper = None
     jitcounter = DeterministicJitCounter()
     class metainterp_sd:
-        pass
+        deferred_loops = DeferredLoops()
 
 def test_make_jitdriver_callbacks_1():
     class FakeJitDriverSD:
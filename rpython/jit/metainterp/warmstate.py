@@ -133,6 +133,7 @@ JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
 JC_FORCE_FINISH    = 0x10
+JC_COMPILE_PENDING = 0x20
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -183,6 +184,10 @@ class BaseJitCell(object):
         JC_FORCE_FINISH: when from a cell with that flag set, if the trace
         becomes too long, "segment" it, ie finish it with a guard_always_fails.
         this prevents re-tracing and failing this again and again.
+
+        JC_COMPILE_PENDING: a loop was traced from this greenkey, but it
+        waits in the DeferredLoops of pyjitpl.py to be compiled (see the
+        'defer_compile' parameter).  Don't trace it again meanwhile.
     """
     flags = 0     # JC_xxx flags
     wref_procedure_token = None
@@ -212,7 +217,7 @@ class BaseJitCell(object):
     def should_remove_jitcell(self):
         if self.get_procedure_token() is not None:
             return False    # don't remove JitCells with a procedure_token
-        if self.flags & JC_TRACING:
+        if self.flags & (JC_TRACING | JC_COMPILE_PENDING):
             return False    # don't remove JitCells that are being traced
         if self.flags & JC_DONT_TRACE_HERE:
             # if we have this flag, and we *had* a procedure_token but
@@ -259,6 +264,9 @@ class WarmEnterState(object):
     def set_param_trace_eagerness(self, value):
         self.increment_trace_eagerness = self._compute_threshold(value)
 
+    def set_param_class_dispatch(self, value):
+        self.class_dispatch_limit = value
+
     def set_param_trace_limit(self, value):
         if value < 0:
             raise ValueError
@@ -296,6 +304,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_code_memory_limit(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_code_size(value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -328,6 +342,22 @@ class WarmEnterState(object):
     def set_param_vec_cost(self, ivalue):
         self.vec_cost = ivalue
 
+    def set_param_defer_compile(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if self.warmrunnerdesc is not None:       # for tests
+            self.warmrunnerdesc.metainterp_sd.deferred_loops.limit = value
+
+    def set_compile_pending(self, greenkey, pending):
+        cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+        if pending:
+            cell.flags |= JC_COMPILE_PENDING
+        else:
+            cell.flags &= ~JC_COMPILE_PENDING
+
+    def is_compile_pending(self, greenkey):
+        cell = self.JitCell.get_jit_cell_at_key(greenkey)
+        return cell is not None and bool(cell.flags & JC_COMPILE_PENDING)
+
     def disable_noninlinable_function(self, greenkey):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         cell.flags |= JC_DONT_TRACE_HERE
@@ -340,6 +370,10 @@ class WarmEnterState(object):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
         cell.set_procedure_token(procedure_token)
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.record_procedure(
+                procedure_token, self.JitCell.get_uhash_at_key(greenkey))
         if old_token is not None:
             self.cpu.redirect_call_assembler(old_token, procedure_token)
             # procedure_token is also kept alive by any loop that used
@@ -470,10 +504,11 @@ class WarmEnterState(object):
 
             # Here, we have found 'cell'.
             #
-            if cell.flags & (JC_TRACING | JC_TEMPORARY):
-                if cell.flags & JC_TRACING:
+            if cell.flags & (JC_TRACING | JC_TEMPORARY | JC_COMPILE_PENDING):
+                if cell.flags & (JC_TRACING | JC_COMPILE_PENDING):
                     # tracing already happening in some outer invocation of
-                    # this function. don't trace a second time.
+                    # this function, or its loop waits to be compiled.
+                    # don't trace a second time.
                     return
                 # attached by compile_tmp_callback().  count normally
                 if jitcounter.tick(hash, increment_threshold):
@@ -603,6 +638,11 @@ class WarmEnterState(object):
                     cell = cell.next
                 return None
 
+            @staticmethod
+            def get_uhash_at_key(greenkey):
+                greenargs = unwrap_greenkey(greenkey)
+                return JitCell.get_uhash(*greenargs)
+
             @staticmethod
             def get_jit_cell_at_key(greenkey):
                 greenargs = unwrap_greenkey(greenkey)
@@ -132,6 +132,28 @@ def stats_asmmemmgr_used(warmrunnerdesc):
 def stats_memmgr_release_all(warmrunnerdesc):
     warmrunnerdesc.memory_manager.release_all_loops()
 
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_alive_loops(warmrunnerdesc):
+    return len(warmrunnerdesc.memory_manager.alive_loops)
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_loops
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_evicted_for_code_size(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.evicted_for_code_size
+
+@register_helper(annmodel.SomeInteger())
+def stats_memmgr_recompiled_loops(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.recompiled_loops
+
+@register_helper(annmodel.SomeInteger())
+def stats_compile_deferred_loops(warmrunnerdesc):
+    """Optimize and assemble the loops whose compilation was deferred
+    (see the 'defer_compile' parameter).  Returns how many were compiled."""
+    return warmrunnerdesc.metainterp_sd.deferred_loops.compile_all()
+
 # ---------------------- jitcell interface ----------------------
 
 def _new_hook(name, resulttype):
@@ -74,6 +74,27 @@ def crc32(s, crc=r_uint(0)):
         #/* Note:  (crc >> 8) MUST zero fill on left
     return crc ^ r_uint(0xffffffffL)
 
+def _crc32_fast(s):
+    assert s is not None
+    if rzlib is not None:
+        return r_uint(rzlib.crc32(s)) & r_uint(0xffffffffL)
+    return crc32(s)
+
+# The index of an archive records where the data of every member starts,
+# which otherwise requires reading the local header of every member.  It
+# is only valid for an archive with the same central directory: the
+# position and size of the directory and its CRC-32 are checked.
+INDEX_MAGIC = "RZIPIDX1"
+
+def _pack_uint(n):
+    n = r_uint(n)
+    return (chr(intmask(n & 0xff)) + chr(intmask((n >> 8) & 0xff)) +
+            chr(intmask((n >> 16) & 0xff)) + chr(intmask((n >> 24) & 0xff)))
+
+def _unpack_uint(s, pos):
+    return (r_uint(ord(s[pos])) | (r_uint(ord(s[pos + 1])) << 8) |
+            (r_uint(ord(s[pos + 2])) << 16) | (r_uint(ord(s[pos + 3])) << 24))
+
 # parts copied from zipfile library implementation
 
 class BadZipfile(Exception):
@@ -122,6 +143,11 @@ _FH_UNCOMPRESSED_SIZE = 9
 _FH_FILENAME_LENGTH = 10
 _FH_EXTRA_FIELD_LENGTH = 11
 
+def _getfield(s, start, length):
+    assert start >= 0
+    assert length >= 0
+    return s[start:start + length]
+
 class EndRecStruct(object):
     def __init__(self, stuff, comment, filesize):
         self.stuff = stuff
@@ -192,26 +218,30 @@ class RZipInfo(object):
         # file_size             Size of the uncompressed file
 
 class RZipFile(object):
-    def __init__(self, zipname, mode='r', compression=ZIP_STORED):
+    def __init__(self, zipname, mode='r', compression=ZIP_STORED, index=None):
+        """'index' is the result of get_index() on an earlier RZipFile
+        of the same archive, if any; 'index_used' tells if it was still
+        valid."""
         if mode != 'r':
             raise TypeError("Read only support by now")
         self.compression = compression
         self.filename = zipname
         self.filelist = []
         self.NameToInfo = {}
+        self.index_used = False
         if 'b' not in mode:
             mode += 'b'
         self.mode = mode
         fp = self.get_fp()
         try:
-            self._GetContents(fp)
+            self._GetContents(fp, index)
         finally:
             fp.close()
 
     def get_fp(self):
         return open_file_as_stream(self.filename, self.mode, 1024)
 
-    def _GetContents(self, fp):
+    def _GetContents(self, fp, index):
         endrec = _EndRecData(fp)
         if not endrec:
             raise BadZipfile("File is not a zip file")
@@ -222,18 +252,26 @@ class RZipFile(object):
         concat = x - offset_cd
         self.start_dir = offset_cd + concat
         fp.seek(self.start_dir, 0)
+        # read the whole central directory at once
+        cd = fp.read(size_cd)
+        self.end_offset = endrec.filesize
+        self.size_cd = size_cd
+        self.cd_crc = _crc32_fast(cd)
         total = 0
         while total < size_cd:
-            centdir = fp.read(46)
+            centdir = _getfield(cd, total, 46)
             total = total + 46
             if centdir[0:4] != stringCentralDir:
                 raise BadZipfile("Bad magic number for central directory")
             centdir = runpack(structCentralDir, centdir)
-            filename = fp.read(centdir[_CD_FILENAME_LENGTH])
+            start = total
+            filename = _getfield(cd, start, centdir[_CD_FILENAME_LENGTH])
             # Create ZipInfo instance to store file information
             x = RZipInfo(filename)
-            x.extra = fp.read(centdir[_CD_EXTRA_FIELD_LENGTH])
-            x.comment = fp.read(centdir[_CD_COMMENT_LENGTH])
+            start += len(filename)
+            x.extra = _getfield(cd, start, centdir[_CD_EXTRA_FIELD_LENGTH])
+            start += len(x.extra)
+            x.comment = _getfield(cd, start, centdir[_CD_COMMENT_LENGTH])
             total = (total + centdir[_CD_FILENAME_LENGTH]
                      + centdir[_CD_EXTRA_FIELD_LENGTH]
                      + centdir[_CD_COMMENT_LENGTH])
@@ -251,6 +289,9 @@ class RZipFile(object):
                                      t>>11, (t>>5)&0x3F, (t&0x1F) * 2 )
             self.filelist.append(x)
             self.NameToInfo[x.filename] = x
+        if index is not None and self._UseIndex(index):
+            self.index_used = True
+            return
         for data in self.filelist:
             fp.seek(data.header_offset, 0)
             fheader = fp.read(30)
@@ -270,6 +311,38 @@ class RZipFile(object):
                     'header "%s" differ.' % (data.orig_filename, fname))
         fp.seek(self.start_dir, 0)
 
+    def _UseIndex(self, index):
+        count = len(self.filelist)
+        if (len(index) != len(INDEX_MAGIC) + 16 + 4 * count or
+                not index.startswith(INDEX_MAGIC)):
+            return False
+        pos = len(INDEX_MAGIC)
+        if (_unpack_uint(index, pos) != r_uint(self.end_offset) or
+                _unpack_uint(index, pos + 4) != r_uint(self.size_cd) or
+                _unpack_uint(index, pos + 8) != self.cd_crc or
+                _unpack_uint(index, pos + 12) != r_uint(count)):
+            return False
+        pos += 16
+        offsets = [0] * count
+        for i in range(count):
+            offset = intmask(_unpack_uint(index, pos + 4 * i))
+            if offset < self.filelist[i].header_offset + 30:
+                return False
+            offsets[i] = offset
+        for i in range(count):
+            self.filelist[i].file_offset = offsets[i]
+        return True
+
+    def get_index(self):
+        """Return a string that can be passed as 'index' to RZipFile() to
+        open the same archive faster."""
+        parts = [INDEX_MAGIC, _pack_uint(self.end_offset),
+                 _pack_uint(self.size_cd), _pack_uint(intmask(self.cd_crc)),
+                 _pack_uint(len(self.filelist))]
+        for data in self.filelist:
+            parts.append(_pack_uint(data.file_offset))
+        return ''.join(parts)
+
     def getinfo(self, filename):
         """Return the instance of ZipInfo given 'filename'."""
         return self.NameToInfo[filename]
@@ -299,9 +372,11 @@ class RZipFile(object):
             else:
                 raise BadZipfile("Unsupported compression method %d for "
                                  "file %s" % (zinfo.compress_type, filename))
-            crc = crc32(bytes)
-            if crc != zinfo.CRC:
-                raise BadZipfile("Bad CRC-32 for file %s" % filename)
+            self.check_crc(zinfo, bytes)
             return bytes
         finally:
             fp.close()
+
+    def check_crc(self, zinfo, bytes):
+        if _crc32_fast(bytes) != zinfo.CRC:
+            raise BadZipfile("Bad CRC-32 for file %s" % zinfo.filename)
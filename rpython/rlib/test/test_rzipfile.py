@@ -43,6 +43,35 @@ class BaseTestRZipFile(BaseRtypingTest):
         assert one()
         assert self.interpret(one, [])
 
+    def test_index(self):
+        zipname = self.zipname
+        compression = self.compression
+        def one():
+            index = RZipFile(zipname, "r", compression).get_index()
+            rzip = RZipFile(zipname, "r", compression, index)
+            if not rzip.index_used:
+                return False
+            rzip2 = RZipFile(zipname, "r", compression, index[:-1])
+            return (rzip.read('one') == 'stuff\n' and
+                    rzip.read('three') == 'hello, world' and
+                    not rzip2.index_used and
+                    rzip2.read('one') == 'stuff\n')
+
+        assert one()
+        assert self.interpret(one, [])
+
+    def test_index_of_other_archive(self):
+        other = str(udir.join('zipimport_other_%s.zip' % self.__class__.__name__))
+        zipfile = ZipFile(other, "w", compression=self.compression)
+        zipfile.writestr("one", "STUFF\n")
+        zipfile.writestr("dir" + os.path.sep + "two", "otherstuff")
+        zipfile.writestr("three", "hello, world")
+        zipfile.close()
+        index = RZipFile(self.zipname, "r", self.compression).get_index()
+        rzip = RZipFile(other, "r", self.compression, index)
+        assert not rzip.index_used
+        assert rzip.read('one') == 'STUFF\n'
+
 class TestRZipFile(BaseTestRZipFile):
     compression = ZIP_STORED
 
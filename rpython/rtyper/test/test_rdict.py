@@ -1153,6 +1153,20 @@ class TestRDict(BaseTestRDict):
         DICT = lltype.typeOf(res.item2).TO
         assert hasattr(DICT.entries.TO.OF, 'f_valid')    # no dummy available
 
+    def test_opt_none_value_takes_no_space(self):
+        # used by pypy's set strategies, which store sets as dicts whose
+        # values are all None
+        def f(n):
+            d = {n: None}
+            d[-87] = None
+            del d[n]
+            return len(d), -87 in d, d
+        res = self.interpret(f, [5])
+        assert res.item0 == 1
+        assert res.item1 == True
+        ENTRY = lltype.typeOf(res.item2).TO.entries.TO.OF
+        assert ENTRY.value is lltype.Void
+
     def test_opt_multiple_identical_dicts(self):
         def f(n):
             s = "x" * n